@@ -0,0 +1,471 @@
+"""
+EVM 历史区块回扫脚本
+
+将指定区块范围切分为多个分片，分发到多个工作进程并行扫描。
+每个工作进程拥有独立的 RPCManager、TokenParser 和 TransactionProcessor，
+复用实时监控的交易分类逻辑；代币元数据由主进程解析并写入注册表缓存，工作进程扫描前加载，命中的交易按 tx_hash 幂等写入 deposit_records。
+每完成一个分片即写入进度文件，中断后重新执行相同命令会跳过已完成的分片
+
+用法:
+    python backfill.py bsc --from-block 40000000 --to-block 40100000
+    python backfill.py bsc --from-block 40000000 --addresses new_customers.json --workers 8
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Dict, Tuple
+
+from config.monitor_config import MonitorConfig, IngestionMode
+from db.database import get_database_manager, initialize_database
+from managers.rate_limiter import RequestPriority
+from managers.rpc_manager import RPCManager
+from managers.token_registry import TokenRegistry
+from models.transaction_adapter import AsyncTransactionAdapter
+from processors.block_prefilter import BlockBloomPrefilter
+from processors.log_scanner import TransferLogScanner
+from processors.receipt_enricher import ReceiptEnricher
+from processors.transaction_processor import TransactionProcessor
+from utils.file_utils import atomic_write_json, resolve_project_path
+from utils.load_address import load_evm_wallet_addresses
+from utils.token_parser import TokenParser
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ChunkTask:
+    """回扫分片任务（传递给工作进程，需可序列化）"""
+    chain_name: str
+    rpc_urls: List[str]
+    start_block: int
+    end_block: int
+    ingestion_mode: str
+    block_window: int
+    max_rpc_per_second: float
+    max_rpc_per_day: float
+    save_to_db: bool
+    raw_transport: bool = False
+    detect_native_transfers: bool = True
+
+
+@dataclass
+class ChunkResult:
+    """回扫分片结果"""
+    start_block: int
+    end_block: int
+    transactions_found: int
+    rpc_calls: int
+    http_requests: int
+    elapsed: float
+
+
+# ---------------------------------------------------------------------------
+# 工作进程
+# ---------------------------------------------------------------------------
+
+# 监控地址在工作进程启动时由 init_worker 接收一次，所有分片共用，不随每个分片任务序列化
+_watch_addresses: List[str] = []
+
+
+def init_worker(watch_addresses: List[str]) -> None:
+    """工作进程初始化：保存监控地址"""
+    global _watch_addresses
+    _watch_addresses = watch_addresses
+
+
+def scan_chunk(task: ChunkTask) -> ChunkResult:
+    """工作进程入口：扫描一个分片"""
+    return asyncio.run(_scan_chunk_async(task))
+
+
+async def _scan_chunk_async(task: ChunkTask) -> ChunkResult:
+    """扫描分片内的区块，入库命中的交易，并将已达到确认数的记录标记为已确认"""
+    start_time = time.time()
+
+    config = MonitorConfig.from_chain_name(
+        task.chain_name,
+        rpc_url=task.rpc_urls[0],
+        rpc_urls=task.rpc_urls[1:],
+        watch_addresses=_watch_addresses,
+        ingestion_mode=IngestionMode(task.ingestion_mode),
+        max_rpc_per_second=task.max_rpc_per_second,
+        max_rpc_per_day=task.max_rpc_per_day,
+        rpc_raw_transport=task.raw_transport,
+        detect_native_transfers=task.detect_native_transfers
+    )
+    token_parser = TokenParser(task.chain_name)
+    rpc_manager = RPCManager(config)
+    if config.token_registry_enabled:
+        # 主进程已解析配置的代币合约，这里只读缓存，按链上小数位换算金额
+        TokenRegistry(config, rpc_manager, token_parser, task.chain_name, config.get_token_registry_path()).load()
+    tx_processor = TransactionProcessor(config, token_parser, rpc_manager)
+    receipt_enricher = ReceiptEnricher(config, rpc_manager)
+
+    if task.save_to_db and not await initialize_database():
+        raise RuntimeError("数据库初始化失败")
+
+    try:
+        if config.is_logs_ingestion():
+            log_scanner = TransferLogScanner(config, token_parser, rpc_manager, tx_processor)
+            tx_infos = await _scan_by_logs(log_scanner, config, task)
+        else:
+            block_prefilter = BlockBloomPrefilter(config, token_parser)
+            tx_infos = await _scan_by_blocks(rpc_manager, tx_processor, block_prefilter, task)
+
+        # 核对回执，丢弃执行失败的转账
+        tx_infos = await receipt_enricher.enrich(tx_infos, RequestPriority.BACKGROUND)
+        for tx_info in tx_infos:
+            tx_processor.accept_transaction(tx_info, save=task.save_to_db)
+
+        if task.save_to_db:
+            # 入库失败的分片不记为完成，恢复时会重新扫描
+            await tx_processor.wait_for_pending_saves()
+            if tx_processor.save_failures:
+                raise RuntimeError(f"{tx_processor.save_failures} 笔交易入库失败")
+            await _mark_confirmed(rpc_manager, config, tx_infos)
+    finally:
+        await rpc_manager.close()
+
+    return ChunkResult(
+        start_block=task.start_block,
+        end_block=task.end_block,
+        transactions_found=len(tx_infos),
+        rpc_calls=rpc_manager.rpc_calls,
+        http_requests=rpc_manager.get_http_request_count(),
+        elapsed=time.time() - start_time
+    )
+
+
+async def _scan_by_blocks(rpc_manager: RPCManager, tx_processor: TransactionProcessor,
+                          block_prefilter: BlockBloomPrefilter, task: ChunkTask) -> list:
+    """下载完整区块并按区块分类（与实时监控的区块模式一致）"""
+    tx_infos = []
+    for window_start in range(task.start_block, task.end_block + 1, task.block_window):
+        window_end = min(window_start + task.block_window - 1, task.end_block)
+        block_numbers = range(window_start, window_end + 1)
+
+        # 启用 logsBloom 预过滤时先批量获取区块头，只下载可能包含相关转账的区块
+        if block_prefilter.enabled:
+            headers = await asyncio.gather(*(
+                rpc_manager.get_block_header(block_number, RequestPriority.BACKGROUND)
+                for block_number in block_numbers
+            ))
+            block_numbers = [
+                block_number for block_number, header in zip(block_numbers, headers)
+                if block_prefilter.may_contain(header)
+            ]
+
+        # 同一窗口内的区块并发请求，由批量合并器合并为一次HTTP请求
+        blocks = await asyncio.gather(*(
+            rpc_manager.get_block(block_number, RequestPriority.BACKGROUND)
+            for block_number in block_numbers
+        ))
+
+        for block in blocks:
+            tx_infos.extend(tx_processor.process_block(block.transactions))
+    return tx_infos
+
+
+async def _scan_by_logs(log_scanner: TransferLogScanner, config: MonitorConfig, task: ChunkTask) -> list:
+    """通过 eth_getLogs 扫描 Transfer 事件（与实时监控的事件模式一致）"""
+    tx_infos = []
+    for range_start in range(task.start_block, task.end_block + 1, config.logs_block_range):
+        range_end = min(range_start + config.logs_block_range - 1, task.end_block)
+        tx_infos.extend(await log_scanner.scan_range(range_start, range_end))
+    return tx_infos
+
+
+async def _mark_confirmed(rpc_manager: RPCManager, config: MonitorConfig, tx_infos: list) -> None:
+    """历史交易通常已达到确认数，直接更新为已确认状态"""
+    if not tx_infos:
+        return
+
+    current_block = await rpc_manager.get_cached_block_number()
+    async with get_database_manager().get_async_session() as session:
+        for tx_info in tx_infos:
+            confirmations = current_block - tx_info.block_number + 1
+            if confirmations < config.required_confirmations:
+                continue
+            if not await AsyncTransactionAdapter.update_status(session, tx_info.hash, 'confirmed', confirmations,
+                                                               tx_info.transfer_index, tx_info.trace_address):
+                raise RuntimeError(f"更新交易状态失败: {tx_info.hash}")
+
+
+# ---------------------------------------------------------------------------
+# 进度管理
+# ---------------------------------------------------------------------------
+
+@dataclass
+class BackfillProgress:
+    """回扫进度，持久化到进度文件以便中断后恢复"""
+    path: str
+    chain_name: str
+    from_block: int
+    to_block: int
+    chunk_size: int
+    completed: Dict[int, int] = field(default_factory=dict)  # 分片起始区块 -> 结束区块
+    transactions_found: int = 0
+
+    def load(self) -> bool:
+        """读取进度文件，参数不一致时忽略"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ 读取回扫进度失败，重新开始: {e}")
+            return False
+
+        expected = (self.chain_name, self.from_block, self.to_block, self.chunk_size)
+        actual = (data.get('chain_name'), data.get('from_block'), data.get('to_block'), data.get('chunk_size'))
+        if actual != expected:
+            logger.warning(f"⚠️ 进度文件参数不一致 {actual}，重新开始")
+            return False
+
+        self.completed = {start: end for start, end in data.get('completed', [])}
+        self.transactions_found = data.get('transactions_found', 0)
+        return True
+
+    def save(self) -> None:
+        """原子写入进度文件"""
+        atomic_write_json(self.path, {
+            'chain_name': self.chain_name,
+            'from_block': self.from_block,
+            'to_block': self.to_block,
+            'chunk_size': self.chunk_size,
+            'completed': sorted(self.completed.items()),
+            'transactions_found': self.transactions_found,
+            'updated_at': int(time.time()),
+        })
+
+    def mark_done(self, result: ChunkResult) -> None:
+        """记录完成的分片"""
+        self.completed[result.start_block] = result.end_block
+        self.transactions_found += result.transactions_found
+        self.save()
+
+    @property
+    def total_blocks(self) -> int:
+        return self.to_block - self.from_block + 1
+
+    @property
+    def completed_blocks(self) -> int:
+        return sum(end - start + 1 for start, end in self.completed.items())
+
+
+def split_chunks(from_block: int, to_block: int, chunk_size: int) -> List[Tuple[int, int]]:
+    """将区块范围切分为分片"""
+    return [
+        (start, min(start + chunk_size - 1, to_block))
+        for start in range(from_block, to_block + 1, chunk_size)
+    ]
+
+
+def load_addresses_file(path: str) -> List[str]:
+    """
+    读取地址文件
+
+    支持 JSON 列表、watch_addr.json 格式（{"evm_wallet_addresses": [...]}）
+    以及每行一个地址的纯文本
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return [line.strip() for line in content.splitlines() if line.strip() and not line.startswith('#')]
+
+    if isinstance(data, dict):
+        data = data.get('evm_wallet_addresses', [])
+    return [address.strip() for address in data if address.strip()]
+
+
+# ---------------------------------------------------------------------------
+# 主进程
+# ---------------------------------------------------------------------------
+
+async def run_backfill(args: argparse.Namespace) -> bool:
+    """
+    执行回扫
+
+    Returns:
+        bool: 是否全部分片都已完成
+    """
+    # 地址只在主进程加载一次，再分发给各工作进程
+    if args.addresses:
+        watch_addresses = load_addresses_file(args.addresses)
+        logger.info(f"📋 从 {args.addresses} 加载了 {len(watch_addresses)} 个地址")
+    else:
+        watch_addresses = load_evm_wallet_addresses()
+        logger.info(f"📋 加载了 {len(watch_addresses)} 个监控地址")
+
+    config = MonitorConfig.from_chain_name(args.chain, watch_addresses=watch_addresses)
+    if args.rpc_url:
+        # 历史数据通常需要归档节点，允许单独指定
+        config.rpc_url = args.rpc_url
+        config.rpc_urls = []
+    ingestion_mode = args.mode or config.ingestion_mode.value
+
+    to_block = args.to_block
+    rpc_manager = RPCManager(config)
+    try:
+        if to_block is None:
+            to_block = await rpc_manager.get_cached_block_number() - config.required_confirmations
+            logger.info(f"📍 未指定结束区块，使用已确认的最新区块 {to_block}（中断后请加上 --to-block {to_block} 恢复）")
+        if config.token_registry_enabled:
+            await _refresh_token_registry(config, rpc_manager, args.chain)
+    finally:
+        await rpc_manager.close()
+
+    if to_block < args.from_block:
+        logger.error(f"❌ 区块范围无效: {args.from_block} - {to_block}")
+        return False
+
+    resume_path = resolve_project_path(
+        args.resume_file or f"data/backfill_{args.chain}_{args.from_block}_{to_block}.json"
+    )
+    progress = BackfillProgress(resume_path, args.chain, args.from_block, to_block, args.chunk_size)
+    if progress.load():
+        logger.info(f"♻️ 从进度文件恢复: 已完成 {len(progress.completed)} 个分片 ({resume_path})")
+
+    chunks = [chunk for chunk in split_chunks(args.from_block, to_block, args.chunk_size)
+              if chunk[0] not in progress.completed]
+
+    # 服务商限额是全局的，按工作进程数平分
+    workers = max(1, min(args.workers, len(chunks) or 1))
+    total_rps = args.rps if args.rps is not None else config.max_rpc_per_second
+    tasks = [
+        ChunkTask(
+            chain_name=args.chain,
+            rpc_urls=config.get_rpc_urls(),
+            start_block=start,
+            end_block=end,
+            ingestion_mode=ingestion_mode,
+            block_window=args.block_window or config.rpc_batch_max_size,
+            max_rpc_per_second=total_rps / workers,
+            max_rpc_per_day=config.max_rpc_per_day / workers,
+            save_to_db=not args.dry_run,
+            raw_transport=args.raw_transport or config.rpc_raw_transport,
+            detect_native_transfers=not args.tokens_only and config.detect_native_transfers
+        )
+        for start, end in chunks
+    ]
+
+    logger.info("=" * 60)
+    logger.info(f"🔎 回扫 {args.chain.upper()} 区块 {args.from_block} - {to_block} ({progress.total_blocks} 个区块)")
+    logger.info(f"📦 分片: {len(tasks)} 个待处理 (每片 {args.chunk_size} 个区块) | 工作进程: {workers}")
+    logger.info(f"📜 数据获取: {ingestion_mode} | 总速率上限: {total_rps}/s | 入库: {'否' if args.dry_run else '是'}")
+    logger.info("=" * 60)
+
+    if not tasks:
+        logger.info("✅ 所有分片均已完成")
+        return True
+
+    start_time = time.time()
+    blocks_at_start = progress.completed_blocks
+    failed: List[Tuple[ChunkTask, BaseException]] = []
+    loop = asyncio.get_running_loop()
+
+    # 使用 spawn 启动工作进程，避免 fork 继承主进程的事件循环和连接；
+    # 监控地址通过 initializer 每个工作进程只发送一次
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=init_worker, initargs=(watch_addresses,)) as pool:
+
+        async def run_task(task: ChunkTask) -> Tuple[ChunkTask, Optional[ChunkResult], Optional[BaseException]]:
+            try:
+                return task, await loop.run_in_executor(pool, scan_chunk, task), None
+            except Exception as e:
+                return task, None, e
+
+        for future in asyncio.as_completed([run_task(task) for task in tasks]):
+            task, result, error = await future
+            if error:
+                failed.append((task, error))
+                logger.error(f"❌ 分片 {task.start_block}-{task.end_block} 失败: {error}")
+                continue
+
+            progress.mark_done(result)
+            _log_progress(progress, result, start_time, blocks_at_start)
+
+    elapsed = time.time() - start_time
+    logger.info("=" * 60)
+    logger.info(f"🏁 回扫结束，耗时 {elapsed:.1f}s，共发现 {progress.transactions_found} 笔交易")
+    if failed:
+        logger.error(f"❌ {len(failed)} 个分片失败，重新执行相同命令即可从进度文件继续")
+        return False
+    logger.info("✅ 所有分片均已完成")
+    return True
+
+
+async def _refresh_token_registry(config: MonitorConfig, rpc_manager: RPCManager, chain_name: str) -> None:
+    """在主进程解析缓存尚未覆盖的代币合约并写入缓存，工作进程只读缓存，不重复解析"""
+    registry = TokenRegistry(config, rpc_manager, TokenParser(chain_name), chain_name,
+                             config.get_token_registry_path())
+    registry.load()
+    try:
+        await registry.refresh()
+    except Exception as e:
+        logger.warning(f"⚠️ 解析代币元数据失败，沿用配置中的小数位: {e}")
+
+
+def _log_progress(progress: BackfillProgress, result: ChunkResult, start_time: float, blocks_at_start: int) -> None:
+    """输出回扫进度"""
+    done = progress.completed_blocks
+    elapsed = time.time() - start_time
+    speed = (done - blocks_at_start) / elapsed if elapsed > 0 else 0
+    remaining = progress.total_blocks - done
+    eta = remaining / speed if speed > 0 else 0
+
+    logger.info(
+        f"📊 回扫进度: {done}/{progress.total_blocks} ({done / progress.total_blocks * 100:.1f}%) | "
+        f"分片 {result.start_block}-{result.end_block} 发现 {result.transactions_found} 笔 "
+        f"({result.http_requests} 次HTTP请求, {result.elapsed:.1f}s) | "
+        f"速度: {speed:.1f} 区块/s | 预计剩余: {eta / 60:.1f} 分钟"
+    )
+
+
+def parse_arguments() -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='EVM 历史区块回扫')
+    parser.add_argument(
+        'chain',
+        help='链名称 (core, bsc, eth, polygon, arbitrum, optimism)'
+    )
+    parser.add_argument('--from-block', type=int, required=True, help='起始区块号')
+    parser.add_argument('--to-block', type=int, help='结束区块号（默认：已确认的最新区块）')
+    parser.add_argument('--chunk-size', type=int, default=2000, help='每个分片的区块数')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(), help='工作进程数')
+    parser.add_argument('--addresses', help='只回扫该文件中的地址（JSON 列表、watch_addr.json 格式或每行一个地址）')
+    parser.add_argument('--rpc-url', help='使用指定的RPC节点（例如归档节点），默认使用链配置')
+    parser.add_argument('--mode', choices=[mode.value for mode in IngestionMode], help='数据获取方式（默认使用配置）')
+    parser.add_argument('--rps', type=float, help='所有工作进程合计的每秒HTTP请求上限（默认使用配置）')
+    parser.add_argument('--block-window', type=int, help='区块模式下每个工作进程同时请求的区块数（默认等于批量大小）')
+    parser.add_argument('--resume-file', help='进度文件路径（默认：data/backfill_<链>_<起始>_<结束>.json）')
+    parser.add_argument('--dry-run', action='store_true', help='只扫描不入库')
+    parser.add_argument('--raw-transport', action='store_true', help='区块模式下绕过 web3 格式化，直接解析 JSON-RPC 结果')
+    parser.add_argument('--tokens-only', action='store_true', help='不检测原生代币转账，区块模式下启用 logsBloom 预过滤')
+
+    return parser.parse_args()
+
+
+async def main() -> None:
+    """主函数"""
+    args = parse_arguments()
+    if not await run_backfill(args):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("回扫被用户中断，重新执行相同命令即可继续")
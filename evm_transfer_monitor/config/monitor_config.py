@@ -2,20 +2,92 @@
 监控配置管理模块
 
 统一管理所有监控相关的配置参数，便于维护和调整
-支持两种监控策略：大额交易监控 和 指定地址监控
+支持两种监控策略：大额交易监控 和 指定地址监控，以及在一次遍历中同时执行多条检测规则的规则模式
 """
 
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple, Union
 from enum import Enum
 from config.base_config import ActiveConfig, ConfigMap
+from utils.address_index import AddressIndex
 from utils.load_address import load_evm_wallet_addresses
 
+# 监控地址增量日志最多保留的条数
+WATCH_CHANGES_MAX = 4096
+
 
 class MonitorStrategy(Enum):
     """监控策略枚举"""
     LARGE_AMOUNT = "large_amount"      # 大额交易监控
     WATCH_ADDRESS = "watch_address"    # 指定地址监控
+    RULES = "rules"                    # 多规则检测（detection_rules，一次遍历同时执行）
+
+
+class RuleKind(Enum):
+    """检测规则类型"""
+    LARGE_AMOUNT = "large_amount"      # 金额不低于阈值的转账（不限地址）
+    WATCH_INBOUND = "watch_inbound"    # 转入监控地址
+    WATCH_OUTBOUND = "watch_outbound"  # 从监控地址转出
+    ADDRESS_AMOUNT = "address_amount"  # 指定地址转入或转出，且金额不低于阈值
+
+
+@dataclass
+class DetectionRule:
+    """
+    检测规则（规则模式下使用）
+
+    - LARGE_AMOUNT: 未设置 min_amount 时使用 thresholds 中对应代币的阈值，没有阈值的代币不检测
+    - WATCH_INBOUND / WATCH_OUTBOUND: 未设置 addresses 时使用 watch_addresses（随钱包更新增删），
+      可选 min_amount；转出和转入地址相同的转账不算
+    - ADDRESS_AMOUNT: addresses 必填，转出或转入地址在其中且金额不低于 min_amount（未设置时不限金额）
+    """
+    name: str
+    kind: RuleKind
+    tokens: Optional[List[str]] = None  # 适用的代币符号（含原生代币），None 表示全部
+    min_amount: Optional[float] = None  # 金额阈值（代币单位）
+    addresses: Optional[List[str]] = None  # 规则自带的地址列表
+
+    def __post_init__(self):
+        if not isinstance(self.kind, RuleKind):
+            self.kind = RuleKind(self.kind)
+        if self.kind == RuleKind.ADDRESS_AMOUNT and not self.addresses:
+            raise ValueError(f"规则 {self.name}: address_amount 规则必须配置 addresses")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DetectionRule':
+        """由配置字典创建规则，例如 {'name': 'usdt_large', 'kind': 'large_amount', 'tokens': ['USDT']}"""
+        return cls(
+            name=data['name'],
+            kind=RuleKind(data['kind']),
+            tokens=data.get('tokens'),
+            min_amount=data.get('min_amount'),
+            addresses=data.get('addresses'),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式"""
+        return {
+            'name': self.name,
+            'kind': self.kind.value,
+            'tokens': self.tokens,
+            'min_amount': self.min_amount,
+            'addresses_count': len(self.addresses) if self.addresses else 0,
+        }
+
+
+def default_detection_rules() -> List[DetectionRule]:
+    """未配置规则时的默认规则：同时执行大额交易监控和监控地址转入"""
+    return [
+        DetectionRule(name='large_amount', kind=RuleKind.LARGE_AMOUNT),
+        DetectionRule(name='watch_inbound', kind=RuleKind.WATCH_INBOUND),
+    ]
+
+
+class IngestionMode(Enum):
+    """区块数据获取方式枚举"""
+    BLOCKS = "blocks"    # 下载完整区块并逐笔解码交易
+    LOGS = "logs"        # 通过 eth_getLogs 扫描 ERC-20 Transfer 事件（不含原生代币转账）
 
 
 @dataclass
@@ -26,6 +98,8 @@ class MonitorConfig:
     chain_name: str = ActiveConfig.get("chain_name", "core")  # 链名称
     block_time: int = ActiveConfig.get("block_time", 3)  # 出块时间（秒）
     rpc_url: str = ActiveConfig.get("rpc_url", "")
+    rpc_urls: list = field(default_factory=lambda: list(ActiveConfig.get("rpc_urls", None) or []))  # 可选，多节点列表
+    ws_url: str = ActiveConfig.get("ws_url", "")  # 可选，配置后通过 newHeads 订阅推送新区块
     scan_url: str = ActiveConfig.get("scan_url", "")
     token_name: str = ActiveConfig.get("token_name", "")
     usdt_contract: str = ActiveConfig.get("usdt_contract", "")
@@ -33,12 +107,69 @@ class MonitorConfig:
     
     # 监控策略配置 - 默认使用大额交易监控
     monitor_strategy: MonitorStrategy = MonitorStrategy.WATCH_ADDRESS
+    # 检测规则（仅在 RULES 策略下使用，元素可以是 DetectionRule 或配置字典），为空时使用 default_detection_rules
+    detection_rules: List[Union[DetectionRule, Dict[str, Any]]] = field(default_factory=list)
+    # 检测规则变更计数，通过 set_detection_rules 修改规则时递增，分类索引据此重新编译
+    detection_rules_version: int = field(default=0, init=False)
+    
+    # 数据获取方式配置
+    ingestion_mode: IngestionMode = IngestionMode.BLOCKS
+    logs_block_range: int = 500  # 单次 eth_getLogs 查询的区块跨度
+    logs_topic_address_limit: int = 1000  # 监控地址数不超过该值时作为 topic2 过滤条件下推到节点
+    
+    # WebSocket 订阅配置
+    ws_reconnect_max_delay: int = 60  # 重连退避的最大间隔（秒）
     
     # 监控参数配置
     required_confirmations: int = ActiveConfig.get("confirmation_blocks", 10)  # 需要的确认数
     confirmation_check_interval: int = 10  # 秒
     cache_ttl: float = 1.5  # 缓存时间
     transaction_timeout: int = 300  # 交易超时时间（秒）
+    block_fetch_window: int = 4  # 流水线模式下同时在途的 get_block 请求数，<= 1 时逐块处理
+    detect_native_transfers: bool = True  # 是否检测原生代币转账，只监控代币时关闭可启用 logsBloom 预过滤
+    bloom_prefilter_enabled: bool = True  # 先取区块头按 logsBloom 过滤，只下载可能包含相关转账的区块（不检测原生转账时生效）
+    bloom_prefilter_address_limit: int = 1000  # 监控地址数超过该值时预过滤只检查 Transfer 签名和代币合约，不再逐个检查地址
+    receipts_enabled: bool = True  # 为命中的交易获取回执，补充 Gas 消耗并丢弃执行失败的转账
+    reorg_detection_enabled: bool = True  # 按父哈希校验区块链接，重组时作废孤块中的交易并重新处理新链（区块模式）
+    
+    # 内部转账追踪配置（trace_block / debug_traceBlockByNumber，需节点支持）
+    trace_internal_transfers: bool = False  # 是否检测合约内部调用转出的原生代币
+    trace_method: str = "auto"  # auto / trace_block / debug_traceBlockByNumber
+    trace_max_per_second: float = 2  # trace 调用独立的每秒上限
+    trace_max_concurrency: int = 2  # 同时在途的 trace 调用数
+    trace_cache_size: int = 128  # 按区块缓存的 trace 结果数
+    
+    # 区块解码进程池配置（交易分类移出事件循环线程，繁忙链上保持事件循环响应）
+    decode_workers: int = 0  # 解码工作进程数，0 表示在事件循环线程内分类
+    decode_pool_min_transactions: int = 64  # 交易数少于该值的区块仍在事件循环内分类（进程间传输有固定开销）
+    decode_pool_max_changes: int = 1024  # 随任务下发的监控地址增量上限，超过后以新快照重启工作进程
+    
+    # 追块模式配置（落后较多时加大并发和批量，窗口按 AIMD 自适应）
+    catchup_enter_lag: int = 50  # 落后超过该区块数时进入追块模式
+    catchup_exit_lag: int = 5  # 落后不超过该区块数时恢复头部模式
+    catchup_min_window: int = 8  # 追块窗口下限
+    catchup_max_window: int = 64  # 追块窗口上限
+    catchup_window_step: int = 4  # 每轮加性增大的步长
+    catchup_decrease_factor: float = 0.5  # 出错或延迟超标时的乘性减小系数
+    catchup_target_latency: float = 1.5  # 区块获取的目标平均延迟（秒）
+    catchup_max_batch_size: int = 50  # 追块时单个批量请求的最大调用数
+    catchup_max_blocks_per_round: int = 500  # 追块时每轮最多处理的区块数，保证游标和确认检查定期执行
+    
+    # 区块游标配置（持久化处理进度，重启后从上次位置继续）
+    cursor_enabled: bool = True
+    cursor_path: str = ""  # 为空时使用 data/block_cursor_<链名称>.json
+    cursor_flush_interval: float = 5.0  # 落盘间隔（秒）
+    cursor_flush_blocks: int = 100  # 推进超过该区块数时立即落盘
+    failed_saves_limit: int = 10000  # 内存中最多保留的入库失败交易数，超出的交易所在区块之后的游标保持不落盘，重启后重新扫描
+    save_retry_batch: int = 200  # 每次落盘前最多重试的入库失败交易数
+    
+    # 代币注册表配置（链上 decimals()/symbol() 解析结果的本地缓存）
+    token_registry_enabled: bool = True
+    token_registry_path: str = ""  # 为空时使用 data/token_registry_<链名称>.json
+    
+    # 批量调用解码白名单：批量调用是否真的转账取决于被调用的合约，只解码确认实现了这些方法的合约
+    disperse_contracts: List[str] = field(default_factory=list)  # 批量分发合约（Disperse / Multisender）地址
+    batch_transfer_tokens: List[str] = field(default_factory=list)  # 实现了 batchTransfer / multiTransfer 的代币符号
     
     # 大额交易阈值配置（仅在 LARGE_AMOUNT 策略下使用）
     thresholds: Dict[str, float] = field(default_factory=lambda: {
@@ -47,26 +178,60 @@ class MonitorConfig:
         'USDC': 10000.0,
     })
     
-    # 监控地址列表（仅在 WATCH_ADDRESS 策略下使用）
-    watch_addresses: list = field(default_factory=load_evm_wallet_addresses)
+    # 监控地址（仅在 WATCH_ADDRESS 策略下使用），初始化时传入地址列表，之后转换为 AddressIndex
+    watch_addresses: Iterable[str] = field(default_factory=load_evm_wallet_addresses)
+    # 地址数达到该值时索引改用紧凑存储（每个地址 20 字节），较少时使用 bytes 键的哈希集合
+    watch_index_compact_min: int = 200_000
+    # 紧凑存储前置布隆过滤器每个地址占用的位数，0 表示不使用（千万级地址时可把未命中查找降低约 4 倍）
+    watch_index_bloom_bits: int = 16
     
-    # 缓存的小写地址集合，用于快速查找
-    _watch_addresses_set: set = field(default_factory=set, init=False)
+    # 监控地址变更计数，依赖地址列表的缓存（如 logsBloom 预过滤）据此判断是否需要重建
+    watch_addresses_version: int = field(default=0, init=False)
+    # 监控地址增量日志 (版本号, 是否为添加, 地址)，解码进程池据此只向工作进程同步增删
+    _watch_changes: Deque[Tuple[int, bool, str]] = field(
+        default_factory=lambda: deque(maxlen=WATCH_CHANGES_MAX), init=False, repr=False
+    )
     
-    # API限制配置
+    # API限制配置（令牌桶，每个RPC节点独立计算）
     max_rpc_per_second: int = 5
     max_rpc_per_day: int = 100_000
     
+    # JSON-RPC 批量请求配置
+    rpc_batch_enabled: bool = True
+    rpc_batch_max_size: int = 20  # 单个批量请求的最大调用数
+    rpc_batch_linger: float = 0.01  # 合并并发调用的等待窗口（秒）
+    rpc_raw_transport: bool = False  # 区块获取绕过 web3 格式化，直接发送 JSON-RPC 并解析为精简结构
+    
+    # 区块缓存配置（进程内缓存区块、区块头和回执，避免重试、重组校验等重复获取）
+    block_cache_enabled: bool = True
+    block_cache_max_mb: float = 64  # 缓存的估算内存上限（MB）
+    block_cache_head_ttl: float = 3.0  # 未达到确认数的区块的缓存有效期（秒），更早的区块视为不可变
+    
+    # 多节点路由配置
+    rpc_max_attempts: int = 3  # 单次调用最多尝试的节点数（含故障转移）
+    rpc_eject_after_errors: int = 3  # 节点连续出错多少次后被摘除
+    rpc_eject_seconds: int = 30  # 摘除后的冷却时间（秒），冷却到期后探测通过即重新加入
+    rpc_latency_ewma_alpha: float = 0.3  # 延迟和错误率 EWMA 平滑系数
+    
     # 日志配置
     stats_log_interval: int = 300  # 性能统计日志间隔（秒）
+    log_sample_limit: int = 120  # 逐笔交易/确认日志每类每个窗口最多输出的行数，超出的只计数（0 表示不限流）
+    log_sample_window: float = 60.0  # 逐笔日志限流窗口（秒）
 
     def __post_init__(self):
-        """初始化后处理 - 构建地址查找集合"""
+        """初始化后处理 - 构建地址索引，规范化检测规则"""
         self._update_watch_addresses_cache()
+        self.detection_rules = self._normalize_rules(self.detection_rules)
     
     def _update_watch_addresses_cache(self):
-        """更新地址查找缓存"""
-        self._watch_addresses_set = {addr.lower() for addr in self.watch_addresses}
+        """由传入的地址列表构建地址索引（原列表不再保留）"""
+        self.watch_addresses = AddressIndex(
+            self.watch_addresses,
+            compact_min=self.watch_index_compact_min,
+            bloom_bits_per_key=self.watch_index_bloom_bits,
+        )
+        self.watch_addresses_version += 1
+        self._watch_changes.clear()
     
     def set_strategy(self, strategy: MonitorStrategy) -> None:
         """设置监控策略"""
@@ -80,11 +245,53 @@ class MonitorConfig:
         """检查是否为指定地址监控策略"""
         return self.monitor_strategy == MonitorStrategy.WATCH_ADDRESS
 
+    def is_rules_strategy(self) -> bool:
+        """检查是否为多规则检测策略"""
+        return self.monitor_strategy == MonitorStrategy.RULES
+
+    @staticmethod
+    def _normalize_rules(rules: Iterable[Union[DetectionRule, Dict[str, Any]]]) -> List[DetectionRule]:
+        """配置字典转换为 DetectionRule，检查规则名不重复"""
+        normalized = [rule if isinstance(rule, DetectionRule) else DetectionRule.from_dict(rule) for rule in rules]
+        names = [rule.name for rule in normalized]
+        if len(set(names)) != len(names):
+            raise ValueError(f"检测规则名称重复: {names}")
+        return normalized
+
+    def set_detection_rules(self, rules: Iterable[Union[DetectionRule, Dict[str, Any]]]) -> None:
+        """替换检测规则"""
+        self.detection_rules = self._normalize_rules(rules)
+        self.detection_rules_version += 1
+
+    def get_detection_rules(self) -> List[DetectionRule]:
+        """获取生效的检测规则（未配置时为默认规则）"""
+        return self.detection_rules or default_detection_rules()
+
+    def get_rpc_urls(self) -> list:
+        """获取RPC节点列表，未配置 rpc_urls 时使用 rpc_url"""
+        urls = []
+        for url in [self.rpc_url] + list(self.rpc_urls):
+            if url and url not in urls:
+                urls.append(url)
+        return urls
+
+    def get_cursor_path(self) -> str:
+        """获取区块游标文件路径"""
+        return self.cursor_path or f"data/block_cursor_{self.chain_name}.json"
+
+    def get_token_registry_path(self) -> str:
+        """获取代币注册表缓存文件路径"""
+        return self.token_registry_path or f"data/token_registry_{self.chain_name}.json"
+
+    def is_logs_ingestion(self) -> bool:
+        """检查是否通过 eth_getLogs 获取转账"""
+        return self.ingestion_mode == IngestionMode.LOGS
+
     # 大额交易策略相关方法
     def update_thresholds(self, **new_thresholds) -> None:
-        """更新交易阈值配置（仅在大额交易策略下有效）"""
-        if not self.is_large_amount_strategy():
-            raise ValueError("阈值配置仅在大额交易监控策略下有效")
+        """更新交易阈值配置（大额交易策略和规则模式下有效）"""
+        if self.is_watch_address_strategy():
+            raise ValueError("阈值配置仅在大额交易监控策略和规则模式下有效")
         
         for token, threshold in new_thresholds.items():
             if token in self.thresholds:
@@ -94,41 +301,50 @@ class MonitorConfig:
                 self.thresholds[token] = threshold
     
     def get_threshold(self, token_type: str) -> float:
-        """获取指定代币的阈值（仅在大额交易策略下有效）"""
-        if not self.is_large_amount_strategy():
+        """获取指定代币的阈值（大额交易策略和规则模式下有效）"""
+        if self.is_watch_address_strategy():
             return 0  # 地址监控策略下不检查阈值
         return self.thresholds.get(token_type, float('inf'))
 
     # 地址监控策略相关方法
     def add_watch_address(self, address: str) -> None:
-        """添加监控地址"""
-        address_lower = address.lower()
-        if address_lower not in self._watch_addresses_set:
-            self.watch_addresses.append(address)
-            self._watch_addresses_set.add(address_lower)
+        """添加监控地址（增量写入索引）"""
+        if self.watch_addresses.add(address):
+            self.watch_addresses_version += 1
+            self._watch_changes.append((self.watch_addresses_version, True, address))
     
     def remove_watch_address(self, address: str) -> None:
-        """移除监控地址"""
-        address_lower = address.lower()
-        if address_lower in self._watch_addresses_set:
-            # 从列表中移除（保持原始大小写）
-            self.watch_addresses = [addr for addr in self.watch_addresses 
-                                   if addr.lower() != address_lower]
-            # 从集合中移除
-            self._watch_addresses_set.discard(address_lower)
+        """移除监控地址（增量写入索引）"""
+        if self.watch_addresses.discard(address):
+            self.watch_addresses_version += 1
+            self._watch_changes.append((self.watch_addresses_version, False, address))
     
     def is_watched_address(self, address: str) -> bool:
-        """检查地址是否在监控列表中 - O(1) 时间复杂度"""
-        return address.lower() in self._watch_addresses_set
+        """检查地址是否在监控列表中（不区分大小写）"""
+        return address in self.watch_addresses
     
-    def update_watch_addresses(self, new_addresses: list) -> None:
-        """批量更新监控地址列表"""
-        self.watch_addresses = new_addresses.copy()
+    def update_watch_addresses(self, new_addresses: Iterable[str]) -> None:
+        """批量替换监控地址"""
+        self.watch_addresses = new_addresses
         self._update_watch_addresses_cache()
     
+    def watch_changes_since(self, version: int) -> Optional[List[Tuple[int, bool, str]]]:
+        """
+        获取某个版本之后的监控地址增量
+        
+        Returns:
+            Optional[List]: [(版本号, 是否为添加, 地址), ...]；增量日志无法覆盖（地址被整体替换或日志已截断）时返回 None
+        """
+        if version == self.watch_addresses_version:
+            return []
+        changes = self._watch_changes
+        if version > self.watch_addresses_version or not changes or changes[0][0] > version + 1:
+            return None
+        return [change for change in changes if change[0] > version]
+    
     def get_watch_addresses_count(self) -> int:
         """获取监控地址数量"""
-        return len(self._watch_addresses_set)
+        return len(self.watch_addresses)
     
     def is_within_rate_limits(self, current_rps: float, daily_calls: int) -> bool:
         """检查是否在速率限制范围内"""
@@ -139,34 +355,76 @@ class MonitorConfig:
         """转换为字典格式，便于序列化"""
         return {
             'rpc_url': self.rpc_url,
+            'rpc_urls': self.get_rpc_urls(),
+            'ws_url': self.ws_url,
             'scan_url': self.scan_url,
             'token_name': self.token_name,
             'monitor_strategy': self.monitor_strategy.value,
+            'ingestion_mode': self.ingestion_mode.value,
+            'logs_block_range': self.logs_block_range,
             'required_confirmations': self.required_confirmations,
             'confirmation_check_interval': self.confirmation_check_interval,
             'cache_ttl': self.cache_ttl,
             'transaction_timeout': self.transaction_timeout,
+            'block_fetch_window': self.block_fetch_window,
+            'detect_native_transfers': self.detect_native_transfers,
+            'bloom_prefilter_enabled': self.bloom_prefilter_enabled,
+            'bloom_prefilter_address_limit': self.bloom_prefilter_address_limit,
+            'receipts_enabled': self.receipts_enabled,
+            'reorg_detection_enabled': self.reorg_detection_enabled,
+            'trace_internal_transfers': self.trace_internal_transfers,
+            'trace_method': self.trace_method,
+            'catchup_enter_lag': self.catchup_enter_lag,
+            'catchup_exit_lag': self.catchup_exit_lag,
+            'catchup_max_window': self.catchup_max_window,
+            'decode_workers': self.decode_workers,
+            'decode_pool_min_transactions': self.decode_pool_min_transactions,
+            'cursor_enabled': self.cursor_enabled,
+            'cursor_path': self.get_cursor_path(),
+            'failed_saves_limit': self.failed_saves_limit,
+            'save_retry_batch': self.save_retry_batch,
+            'token_registry_enabled': self.token_registry_enabled,
+            'token_registry_path': self.get_token_registry_path(),
+            'disperse_contracts': list(self.disperse_contracts),
+            'batch_transfer_tokens': list(self.batch_transfer_tokens),
             'thresholds': self.thresholds.copy(),
-            'watch_addresses': self.watch_addresses.copy(),
-            'watch_addresses_count': len(self._watch_addresses_set),
+            'detection_rules': [rule.to_dict() for rule in self.get_detection_rules()] if self.is_rules_strategy() else [],
+            'watch_addresses_count': len(self.watch_addresses),
+            'watch_index_compact_min': self.watch_index_compact_min,
+            'watch_index_bloom_bits': self.watch_index_bloom_bits,
             'max_rpc_per_second': self.max_rpc_per_second,
             'max_rpc_per_day': self.max_rpc_per_day,
+            'rpc_batch_enabled': self.rpc_batch_enabled,
+            'rpc_batch_max_size': self.rpc_batch_max_size,
+            'rpc_batch_linger': self.rpc_batch_linger,
+            'rpc_raw_transport': self.rpc_raw_transport,
+            'block_cache_enabled': self.block_cache_enabled,
+            'block_cache_max_mb': self.block_cache_max_mb,
+            'rpc_max_attempts': self.rpc_max_attempts,
+            'rpc_eject_after_errors': self.rpc_eject_after_errors,
+            'rpc_eject_seconds': self.rpc_eject_seconds,
             'stats_log_interval': self.stats_log_interval,
+            'log_sample_limit': self.log_sample_limit,
+            'log_sample_window': self.log_sample_window,
         }
 
     def get_strategy_description(self) -> str:
         """获取当前策略的描述"""
         if self.is_large_amount_strategy():
             return f"大额交易监控 - 阈值: {self.thresholds}"
+        elif self.is_rules_strategy():
+            rules = self.get_detection_rules()
+            return f"多规则检测 - {len(rules)} 条规则: {', '.join(rule.name for rule in rules)}"
         else:
             return f"指定地址监控 - 监控 {len(self.watch_addresses)} 个地址"
     
     @classmethod
-    def from_chain_name(cls, chain_name: str) -> 'MonitorConfig':
+    def from_chain_name(cls, chain_name: str, **overrides) -> 'MonitorConfig':
         """通过链名称创建监控配置实例
         
         Args:
             chain_name: 链名称，如 'core', 'bsc', 'ethereum' 等
+            **overrides: 覆盖的配置项，例如传入 watch_addresses 可跳过远程加载地址
             
         Returns:
             MonitorConfig: 配置实例
@@ -181,15 +439,19 @@ class MonitorConfig:
         chain_config = ConfigMap[chain_name]
         
         # 创建新的配置实例，使用指定链的配置
-        return cls(
+        params = dict(
             chain_name=chain_name,
             block_time=chain_config.get("block_time", 3),
             rpc_url=chain_config.get("rpc_url", ""),
+            rpc_urls=list(chain_config.get("rpc_urls", None) or []),
+            ws_url=chain_config.get("ws_url", ""),
             scan_url=chain_config.get("scan_url", ""),
             token_name=chain_config.get("token_name", ""),
             usdt_contract=chain_config.get("usdt_contract", ""),
             usdc_contract=chain_config.get("usdc_contract", ""),
             required_confirmations=chain_config.get("confirmation_blocks", 10),
+            disperse_contracts=list(chain_config.get("disperse_contracts", None) or []),
+            batch_transfer_tokens=list(chain_config.get("batch_transfer_tokens", None) or []),
             # 使用指定链的代币名称更新阈值
             thresholds={
                 chain_config.get("token_name", "ETH"): 1.0,
@@ -197,6 +459,8 @@ class MonitorConfig:
                 'USDC': 10000.0,
             }
         )
+        params.update(overrides)
+        return cls(**params)
     
     @staticmethod
     def get_available_chains() -> list:
@@ -236,6 +500,8 @@ class MonitorConfig:
         self.chain_name = chain_name
         self.block_time = chain_config.get("block_time", 3)
         self.rpc_url = chain_config.get("rpc_url", "")
+        self.rpc_urls = list(chain_config.get("rpc_urls", None) or [])
+        self.ws_url = chain_config.get("ws_url", "")
         self.scan_url = chain_config.get("scan_url", "")
         self.token_name = chain_config.get("token_name", "")
         self.usdt_contract = chain_config.get("usdt_contract", "")
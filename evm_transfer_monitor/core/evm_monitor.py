@@ -8,14 +8,17 @@
 import asyncio
 import signal
 import time
-from typing import Optional, Dict, Any
+from collections import deque
+from typing import Optional, Dict, Any, Deque, List, Tuple
 
 from web3.exceptions import BlockNotFound
 
 from config.monitor_config import MonitorConfig, MonitorStrategy
+from managers.catchup_controller import CatchupController
+from managers.rate_limiter import RequestPriority
 from models.data_types import MonitorStatus
 from utils.token_parser import TokenParser
-from utils.log_utils import get_logger
+from utils.log_utils import get_logger, get_logging_stats
 
 # 导入新的初始化模块
 from core.monitor_initializer import MonitorInitializer
@@ -50,6 +53,7 @@ class EVMMonitor:
         self.chain_name = chain_name or getattr(config, 'chain_name', 'unknown')
         self.is_running = False
         self.last_block = 0
+        self._rollback_block: Optional[int] = None  # 检测到重组后需要回退到的分叉点
         
         # 创建初始化器
         self.initializer = MonitorInitializer(self.config, self.token_parser, self.chain_name)
@@ -57,9 +61,18 @@ class EVMMonitor:
         # 初始化核心组件
         components = self.initializer.init_core_components()
         self.rpc_manager = components['rpc_manager']
+        self.head_subscriber = components['head_subscriber']
+        self.token_registry = components['token_registry']
         self.tx_processor = components['tx_processor']
+        self.log_scanner = components['log_scanner']
+        self.block_prefilter = components['block_prefilter']
+        self.receipt_enricher = components['receipt_enricher']
+        self.internal_tracer = components['internal_tracer']
         self.confirmation_manager = components['confirmation_manager']
+        self.reorg_detector = components['reorg_detector']
         self.stats_reporter = components['stats_reporter']
+        self.block_cursor = components['block_cursor']
+        self.catchup_controller = CatchupController(self.config)
         
         # 初始化数据库和通知服务
         db_notification_components = self.initializer.init_database_and_notification()
@@ -100,6 +113,12 @@ class EVMMonitor:
             # 检查网络连接
             await self.network_validator.check_network_connection()
             
+            # 解析缓存尚未覆盖的代币合约元数据
+            await self._refresh_token_registry()
+            
+            # 初始化交易入库使用的异步数据库（失败时不入库，也不阻塞区块游标）
+            await self.tx_processor.init_database()
+            
             # 初始化RabbitMQ管理器
             rabbitmq_components = await self.rabbitmq_initializer.init_rabbitmq_manager(self.rabbitmq_config)
             self.rabbitmq_consumer = rabbitmq_components['consumer']
@@ -108,8 +127,12 @@ class EVMMonitor:
             # 显示启动信息
             self.startup_logger.log_startup_info()
             
-            # 获取起始区块
-            self.last_block = await self.rpc_manager.get_cached_block_number()
+            # 获取起始区块（优先从区块游标恢复）
+            self.last_block = await self._resolve_start_block()
+            
+            # 启动 newHeads 订阅（如果配置了 WebSocket）
+            if self.head_subscriber:
+                self.head_subscriber.start()
             
             # 主监控循环
             await self._monitoring_loop()
@@ -119,6 +142,57 @@ class EVMMonitor:
             self.is_running = False
             raise
     
+    async def _refresh_token_registry(self) -> None:
+        """解析配置中缓存尚未覆盖的代币合约，失败时沿用配置中的小数位继续启动"""
+        if not self.token_registry:
+            return
+        try:
+            await self.token_registry.refresh()
+        except Exception as e:
+            logger.warning(f"⚠️ 解析代币元数据失败，沿用配置中的小数位: {e}")
+    
+    async def _resolve_start_block(self) -> int:
+        """确定起始区块：有游标时从游标继续，否则从当前最新区块开始"""
+        current_block = await self.rpc_manager.get_cached_block_number()
+        
+        if not self.block_cursor:
+            return current_block
+        
+        cursor_block = self.block_cursor.load()
+        if cursor_block is None:
+            logger.info(f"📍 未找到区块游标，从当前区块 {current_block} 开始监控")
+            self.block_cursor.advance(current_block)
+            self.block_cursor.flush()
+            return current_block
+        
+        lag = current_block - cursor_block
+        if lag > 0:
+            logger.info(f"📍 从区块游标恢复: 上次处理到 {cursor_block}，落后 {lag} 个区块，开始补齐")
+        else:
+            logger.info(f"📍 从区块游标恢复: 上次处理到 {cursor_block}")
+        return cursor_block
+    
+    async def _commit_cursor(self, force: bool = False) -> None:
+        """
+        推进区块游标，达到批量条件（或 force）时落盘
+        
+        落盘前等待已发现交易的入库任务完成并重试入库失败的交易，保证游标之前的充值都已持久化；
+        仍有失败的交易时只落盘到其所在区块之前，重启后重新扫描这些区块
+        """
+        if not self.block_cursor:
+            return
+        
+        self.block_cursor.advance(self.last_block)
+        if force or self.block_cursor.should_flush():
+            await self.tx_processor.wait_for_pending_saves()
+            await self.tx_processor.retry_failed_saves()
+            self.block_cursor.flush(self._cursor_limit())
+    
+    def _cursor_limit(self) -> Optional[int]:
+        """游标落盘上限：入库失败的交易所在区块之前"""
+        failed_block = self.tx_processor.lowest_failed_block()
+        return None if failed_block is None else failed_block - 1
+    
     async def _monitoring_loop(self) -> None:
         """主监控循环"""
         logger.info("🔄 开始监控循环")
@@ -128,7 +202,9 @@ class EVMMonitor:
             
             try:
                 # 处理新区块
+                previous_block = self.last_block
                 self.last_block = await self._process_new_blocks(self.last_block)
+                await self._commit_cursor()
                 
                 # 检查确认状态
                 await self.confirmation_manager.check_confirmations()
@@ -137,7 +213,7 @@ class EVMMonitor:
                 await self._periodic_maintenance()
                 
                 # 控制循环频率
-                await self._control_loop_timing(loop_start)
+                await self._control_loop_timing(loop_start, self.last_block != previous_block)
                 
             except KeyboardInterrupt:
                 logger.info("接收到中断信号，准备退出...")
@@ -152,67 +228,254 @@ class EVMMonitor:
         """处理新区块"""
         try:
             current_block = await self.rpc_manager.get_cached_block_number()
-            await self.rpc_manager.check_rate_limit()
         except Exception as e:
             logger.error(f"获取当前区块号失败: {e}")
             return last_block
         
+        if self.catchup_controller.update_lag(current_block, last_block):
+            self._apply_sync_mode()
+        
+        if current_block <= last_block:
+            return last_block
+        
+        # 追块模式下分段处理，保证游标落盘和确认检查定期执行
+        end_block = current_block
+        if self.catchup_controller.is_catching_up:
+            end_block = min(current_block, last_block + self.config.catchup_max_blocks_per_round)
+        
+        # 事件模式：通过 eth_getLogs 按范围扫描 Transfer 事件
+        if self.config.is_logs_ingestion():
+            processed_to, new_blocks_processed = await self._process_blocks_by_logs(
+                last_block + 1, end_block
+            )
+        # 流水线模式：多个区块并发获取，按顺序交给分类逻辑（追块模式总是使用流水线）
+        elif self.catchup_controller.get_window() > 1:
+            processed_to, new_blocks_processed = await self._process_blocks_pipelined(
+                last_block + 1, end_block
+            )
+        else:
+            processed_to, new_blocks_processed = await self._process_blocks_sequential(
+                last_block + 1, end_block
+            )
+        
+        # 检测到区块重组时回退到分叉点，下一轮重新处理新链
+        if self._rollback_block is not None:
+            processed_to = min(processed_to, self._rollback_block)
+            self._rollback_block = None
+            if self.block_cursor:
+                self.block_cursor.rewind(processed_to)
+                self.block_cursor.flush(self._cursor_limit())
+        
+        # 记录处理进度
+        if new_blocks_processed > 0:
+            self.stats_reporter.log_processing_progress(
+                new_blocks_processed, processed_to,
+                self.rpc_manager, self.tx_processor, self.confirmation_manager,
+                lag=current_block - processed_to
+            )
+        
+        return processed_to
+    
+    def _apply_sync_mode(self) -> None:
+        """按当前同步模式调整批量大小和逐笔日志"""
+        catching_up = self.catchup_controller.is_catching_up
+        self.tx_processor.quiet = catching_up
+        self.rpc_manager.set_batch_size(self.catchup_controller.get_batch_size())
+    
+    async def _process_blocks_sequential(self, start_block: int, end_block: int) -> Tuple[int, int]:
+        """
+        逐块获取并处理区块
+        
+        遇到失败的区块即停止，下一轮从该区块重新开始，不会跳过区块
+        
+        Returns:
+            (连续处理成功的最后一个区块号, 成功处理的区块数)
+        """
+        processed_to = start_block - 1
         new_blocks_processed = 0
         
-        # 处理新区块
-        for block_number in range(last_block + 1, current_block + 1):
+        for block_number in range(start_block, end_block + 1):
             if not self.is_running:
                 break
             
             try:
-                processed = await self._process_single_block(block_number)
-                if processed:
-                    new_blocks_processed += 1
-                    self.stats_reporter.increment_blocks_processed()
-                    
+                header, block = await self._fetch_block(block_number)
             except BlockNotFound:
                 logger.debug(f"区块 {block_number} 未找到，可能还未生成")
-                continue
+                break
             except Exception as e:
-                logger.error(f"处理区块 {block_number} 失败: {e}")
-                continue
+                logger.error(f"获取区块 {block_number} 失败: {e}")
+                break
+            
+            if not await self._process_block(block_number, header, block):
+                break
+            
+            processed_to = block_number
+            new_blocks_processed += 1
+            self.stats_reporter.increment_blocks_processed()
         
-        # 记录处理进度
-        if new_blocks_processed > 0:
-            self.stats_reporter.log_processing_progress(
-                new_blocks_processed, current_block,
-                self.rpc_manager, self.tx_processor, self.confirmation_manager
-            )
+        return processed_to, new_blocks_processed
+    
+    async def _process_blocks_pipelined(self, start_block: int, end_block: int) -> Tuple[int, int]:
+        """
+        流水线处理区块
+        
+        保持最多 block_fetch_window 个 get_block 请求同时在途（追块模式下由追块控制器动态调整），
+        区块严格按高度顺序交给交易分类，只有连续处理成功的前缀才会推进进度，
+        遇到失败的区块即停止，下一轮从该区块重新开始。
+        
+        Args:
+            start_block: 起始区块号
+            end_block: 结束区块号（包含）
+            
+        Returns:
+            (连续处理成功的最后一个区块号, 成功处理的区块数)
+        """
+        controller = self.catchup_controller
+        in_flight: Deque[Tuple[int, asyncio.Task]] = deque()
+        next_block = start_block
+        processed_to = start_block - 1
+        new_blocks_processed = 0
         
-        return current_block
+        try:
+            while self.is_running and (in_flight or next_block <= end_block):
+                # 填满请求窗口
+                window = controller.get_window()
+                if controller.is_catching_up:
+                    self.rpc_manager.set_batch_size(controller.get_batch_size())
+                while next_block <= end_block and len(in_flight) < window:
+                    task = asyncio.create_task(self._fetch_block_timed(next_block))
+                    in_flight.append((next_block, task))
+                    next_block += 1
+                
+                block_number, task = in_flight.popleft()
+                try:
+                    header, block = await task
+                except BlockNotFound:
+                    logger.debug(f"区块 {block_number} 未找到，可能还未生成")
+                    break
+                except Exception as e:
+                    controller.observe_error()
+                    logger.error(f"获取区块 {block_number} 失败: {e}")
+                    break
+                
+                if not await self._process_block(block_number, header, block):
+                    break
+                
+                processed_to = block_number
+                new_blocks_processed += 1
+                self.stats_reporter.increment_blocks_processed()
+        finally:
+            # 取消连续前缀之后仍在途的请求，下一轮会重新获取
+            for _, task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*(task for _, task in in_flight), return_exceptions=True)
+        
+        return processed_to, new_blocks_processed
     
-    async def _process_single_block(self, block_number: int) -> bool:
-        """处理单个区块"""
+    async def _fetch_block(self, block_number: int) -> Tuple[Any, Any]:
+        """
+        获取区块
+        
+        启用 logsBloom 预过滤时先只获取区块头，确定不含相关转账的区块不下载交易；
+        启用内部转账追踪时同时获取区块 trace（缓存后由 _process_block 使用）
+        
+        Returns:
+            (区块头, 完整区块)，区块被预过滤跳过时完整区块为 None；未预过滤时区块头即完整区块
+        """
+        if self.block_prefilter.enabled:
+            header = await self.rpc_manager.get_block_header(block_number)
+            if not self.block_prefilter.may_contain(header):
+                return header, None
+        block = await self.rpc_manager.get_block(block_number)
+        if self.internal_tracer.enabled:
+            await self.internal_tracer.get_internal_transfers(block)
+        return block, block
+    
+    async def _fetch_block_timed(self, block_number: int) -> Tuple[Any, Any]:
+        """获取区块并把延迟反馈给追块控制器"""
+        start = time.time()
+        fetched = await self._fetch_block(block_number)
+        self.catchup_controller.observe_latency(time.time() - start)
+        return fetched
+    
+    async def _process_blocks_by_logs(self, start_block: int, end_block: int) -> Tuple[int, int]:
+        """
+        通过 eth_getLogs 扫描区块范围内的 Transfer 事件
+        
+        按 logs_block_range 切分范围依次查询，某个范围失败时停止，下一轮从该范围重新开始
+        
+        Returns:
+            (扫描完成的最后一个区块号, 扫描的区块数)
+        """
+        processed_to = start_block - 1
+        
+        for range_start in range(start_block, end_block + 1, self.config.logs_block_range):
+            if not self.is_running:
+                break
+            
+            range_end = min(range_start + self.config.logs_block_range - 1, end_block)
+            try:
+                tx_infos = await self.log_scanner.scan_range(range_start, range_end)
+                tx_infos = await self.receipt_enricher.enrich(tx_infos, RequestPriority.NORMAL)
+            except Exception as e:
+                logger.error(f"扫描区块 {range_start}-{range_end} 的转账事件失败: {e}")
+                break
+            
+            for tx_info in tx_infos:
+                self.tx_processor.accept_transaction(tx_info)
+                self._add_pending_transaction(tx_info)
+            
+            if tx_infos:
+                logger.debug(f"区块 {range_start}-{range_end} 发现 {len(tx_infos)} 笔代币转账")
+            
+            for _ in range(range_end - range_start + 1):
+                self.stats_reporter.increment_blocks_processed()
+            processed_to = range_end
+        
+        return processed_to, processed_to - start_block + 1
+    
+    async def _process_block(self, block_number: int, header, block) -> bool:
+        """
+        对已获取的区块进行交易分类，block 为 None 表示已被预过滤跳过
+        
+        分类前先用区块头校验链接关系，检测到重组时作废孤块中的交易并返回 False，
+        由 _process_new_blocks 回退到分叉点
+        """
+        if self.reorg_detector.enabled:
+            try:
+                fork_point = await self.reorg_detector.check(header)
+            except Exception as e:
+                logger.error(f"校验区块 {block_number} 链接关系失败: {e}")
+                return False
+            if fork_point is not None:
+                await self._rollback_to(fork_point, [ref.hash for ref in self.reorg_detector.orphaned])
+                return False
+        
+        if block is None:
+            return True
+        
         try:
-            block = await self.rpc_manager.get_block(block_number)
-            await self.rpc_manager.check_rate_limit()
+            # 一次遍历分类区块中的所有交易（启用解码进程池时在工作进程中分类）
+            candidates = await self.tx_processor.process_block_async(block.transactions)
+            
+            # 合约内部调用转出的原生代币
+            if self.internal_tracer.enabled:
+                candidates.extend(await self.internal_tracer.scan_block(block))
             
-            # 处理区块中的所有交易
+            # 核对回执后再记录，执行失败的转账被丢弃
             transactions_found = 0
-            for tx in block.transactions:
-                if not self.is_running:
-                    break
-                
-                tx_info = await self.tx_processor.process_transaction(tx)
-                if tx_info:
-                    tx = tx_info.tx
-                    if tx['from'].lower() == tx['to'].lower():
-                        logger.warning(
-                            f"⚠️ 代币转账检测到发送地址和接收地址相同: {tx['from']} => {tx['to']} | "
-                            f"忽略本次交易"
-                        )
-                        continue
-                    self.confirmation_manager.add_pending_transaction(tx_info)
+            for tx_info in await self.receipt_enricher.enrich(candidates):
+                self.tx_processor.accept_transaction(tx_info)
+                if self._add_pending_transaction(tx_info):
                     transactions_found += 1
             
             if transactions_found > 0:
                 if self.config.is_large_amount_strategy():
                     logger.debug(f"区块 {block_number} 发现 {transactions_found} 笔大额交易")
+                elif self.config.is_rules_strategy():
+                    logger.debug(f"区块 {block_number} 发现 {transactions_found} 笔命中规则的交易")
                 else:
                     logger.debug(f"区块 {block_number} 发现 {transactions_found} 笔监控地址交易")
             
@@ -222,6 +485,27 @@ class EVMMonitor:
             logger.error(f"处理区块 {block_number} 时出错: {e}", exc_info=True)
             return False
     
+    async def _rollback_to(self, fork_point: int, orphaned_hashes: List[str]) -> None:
+        """区块重组：等待在途的入库任务完成后，批量作废分叉点之后的待确认交易和孤块中的入库记录，清除孤块缓存"""
+        await self.tx_processor.wait_for_pending_saves()
+        self.tx_processor.discard_failed_saves_after(fork_point)
+        orphaned = await self.confirmation_manager.invalidate_blocks_after(fork_point, orphaned_hashes)
+        if self.rpc_manager.block_cache is not None:
+            self.rpc_manager.block_cache.invalidate_from(fork_point + 1)
+        self._rollback_block = fork_point
+        logger.warning(f"🔀 回退到分叉点 {fork_point}，作废 {orphaned} 笔待确认交易，重新处理新链")
+    
+    def _add_pending_transaction(self, tx_info) -> bool:
+        """将命中的交易加入待确认列表，发送地址和接收地址相同时忽略"""
+        if tx_info.from_address.lower() == tx_info.to_address.lower():
+            logger.warning(
+                f"⚠️ 代币转账检测到发送地址和接收地址相同: {tx_info.from_address} => {tx_info.to_address} | "
+                f"忽略本次交易"
+            )
+            return False
+        self.confirmation_manager.add_pending_transaction(tx_info)
+        return True
+    
     async def _periodic_maintenance(self) -> None:
         """定期维护任务"""
         current_time = time.time()
@@ -232,22 +516,37 @@ class EVMMonitor:
             if timeout_count > 0:
                 logger.info(f"🧹 清理了 {timeout_count} 个超时交易")
         
+        # 解析 Transfer 事件中出现的未知代币合约
+        if self.token_registry:
+            try:
+                await self.token_registry.resolve_pending()
+            except Exception as e:
+                logger.debug(f"解析代币元数据失败: {e}")
+        
         # 定期输出统计信息
         if self.stats_reporter.should_log_stats():
             self.stats_reporter.log_performance_stats(
                 self.rpc_manager, self.tx_processor, self.confirmation_manager
             )
     
-    async def _control_loop_timing(self, loop_start: float) -> None:
+    async def _control_loop_timing(self, loop_start: float, progressed: bool = True) -> None:
         """控制循环时间"""
         loop_time = time.time() - loop_start
         
-        if loop_time > self.config.block_time:
+        if self.catchup_controller.is_catching_up:
+            # 追块模式：不休眠，立即处理下一段
+            await asyncio.sleep(0)
+        elif loop_time > self.config.block_time:
             logger.warning(f"⚠️ 处理耗时 {loop_time:.2f}s，可能跟不上出块速度 {self.config.block_time}")
             await asyncio.sleep(0.1)
-        else:
-            # 保持合理的轮询间隔
+        elif not progressed and (self.rpc_manager.cached_block_number or 0) > self.last_block:
+            # 有新区块但本轮未能推进（节点尚未同步或获取失败），保持原有的重试间隔
             await asyncio.sleep(max(0.1, 1 - loop_time))
+        else:
+            # 等待共享链头出现新区块（推送或同链监控器共享的一次轮询），而不是各自定时轮询
+            await self.rpc_manager.wait_for_new_head(
+                self.last_block, timeout=self.config.block_time * 2
+            )
     
     def stop(self) -> None:
         """停止监控"""
@@ -260,7 +559,11 @@ class EVMMonitor:
     
     def get_status(self) -> MonitorStatus:
         """获取当前监控状态"""
-        return self.stats_reporter.get_monitor_status(self.last_block, self.is_running)
+        return self.stats_reporter.get_monitor_status(
+            self.last_block, self.is_running,
+            lag_blocks=self.catchup_controller.lag,
+            sync_mode=self.catchup_controller.mode.value
+        )
     
     def get_comprehensive_stats(self) -> Dict[str, Any]:
         """获取全面的统计信息"""
@@ -283,12 +586,12 @@ class EVMMonitor:
             logger.info(f"📋 当前策略: {self.config.get_strategy_description()}")
         except ValueError:
             logger.error(f"无效的监控策略: {strategy_name}")
-            logger.info("可用策略: large_amount, watch_address")
+            logger.info(f"可用策略: {', '.join(item.value for item in MonitorStrategy)}")
     
     # 大额交易策略相关方法
     def update_thresholds(self, **thresholds) -> None:
-        """动态更新交易阈值（仅在大额交易策略下有效）"""
-        if not self.config.is_large_amount_strategy():
+        """动态更新交易阈值（大额交易策略和规则模式下有效）"""
+        if self.config.is_watch_address_strategy():
             logger.warning("当前策略为地址监控，阈值设置无效")
             return
         
@@ -325,9 +628,9 @@ class EVMMonitor:
     
     def update_watch_addresses(self, addresses: list) -> None:
         """更新监控地址列表"""
-        self.config.watch_addresses = addresses
+        self.config.update_watch_addresses(addresses)
         self.tx_processor.config = self.config
-        logger.info(f"🔧 监控地址列表已更新: {len(addresses)} 个地址")
+        logger.info(f"🔧 监控地址列表已更新: {len(self.config.watch_addresses)} 个地址")
     
     def update_config(self, **config_updates) -> None:
         """更新配置参数"""
@@ -378,6 +681,15 @@ class EVMMonitor:
         # 停止接收新的区块
         self.stop()
         
+        # 关闭 newHeads 订阅
+        if self.head_subscriber:
+            await self.head_subscriber.stop()
+        
+        # 保存区块处理进度
+        if self.block_cursor:
+            await self._commit_cursor(force=True)
+            logger.info(f"📍 区块游标已保存: {self.block_cursor.committed_block}")
+        
         # 关闭通知调度器
         if self.notification_initializer:
             try:
@@ -405,6 +717,12 @@ class EVMMonitor:
             logger.info("等待最后的确认检查...")
             await self.confirmation_manager.check_confirmations()
         
+        # 释放RPC连接
+        await self.rpc_manager.close()
+        
+        # 关闭解码进程池
+        self.tx_processor.close()
+        
         # 输出最终报告
         self.log_final_report()
         
@@ -468,6 +786,19 @@ class EVMMonitor:
             'oldest_pending_age': oldest_pending,
             'blocks_processed': self.stats_reporter.blocks_processed,
             'current_block': self.last_block,
+            'chain_head': self.rpc_manager.cached_block_number,
+            'head_tracker': self.rpc_manager.head_tracker.get_stats(),
+            'head_subscription': self.head_subscriber.get_stats() if self.head_subscriber else None,
+            'block_cursor': self.block_cursor.get_stats() if self.block_cursor else None,
+            'lag_blocks': self.catchup_controller.lag,
+            'sync': self.catchup_controller.get_stats(),
+            'block_prefilter': self.block_prefilter.get_stats(),
+            'receipts': self.receipt_enricher.get_stats(),
+            'internal_tracer': self.internal_tracer.get_stats(),
+            'reorg': self.reorg_detector.get_stats(),
+            'decode_pool': self.tx_processor.decode_pool.get_stats() if self.tx_processor.decode_pool else None,
+            'token_registry': self.token_registry.get_stats() if self.token_registry else None,
+            'logging': get_logging_stats(),
             'uptime_hours': (time.time() - self.stats_reporter.start_time) / 3600,
             'rabbitmq_enabled': self.rabbitmq_enabled,
             'rabbitmq_healthy': rabbitmq_healthy,
@@ -9,8 +9,16 @@ from typing import Optional, Dict, Any
 from config.monitor_config import MonitorConfig
 from config.base_config import get_rabbitmq_config, DatabaseConfig, NotifyConfig
 from managers.rpc_manager import RPCManager
+from managers.block_cursor import BlockCursor
+from managers.head_subscriber import NewHeadsSubscriber
+from managers.token_registry import TokenRegistry
 from processors.transaction_processor import TransactionProcessor
+from processors.log_scanner import TransferLogScanner
+from processors.block_prefilter import BlockBloomPrefilter
+from processors.receipt_enricher import ReceiptEnricher
+from processors.internal_transfer_tracer import InternalTransferTracer
 from managers.confirmation_manager import ConfirmationManager
+from managers.reorg_detector import ReorgDetector
 from reports.statistics_reporter import StatisticsReporter
 from utils.token_parser import TokenParser
 from utils.log_utils import get_logger
@@ -55,23 +63,78 @@ class MonitorInitializer:
         rpc_manager = RPCManager(self.config)
         logger.debug("✅ RPC管理器已创建")
         
+        # 创建新区块头订阅器（仅在配置了 ws_url 时）
+        head_subscriber = None
+        if self.config.ws_url:
+            head_subscriber = NewHeadsSubscriber(self.config, rpc_manager)
+            logger.debug("✅ newHeads 订阅器已创建")
+        
+        # 创建代币注册表并加载本地缓存（不发 RPC），缓存中的链上小数位立即生效
+        token_registry = None
+        if self.config.token_registry_enabled:
+            token_registry = TokenRegistry(
+                self.config, rpc_manager, self.token_parser, self.chain_name,
+                self.config.get_token_registry_path()
+            )
+            token_registry.load()
+            logger.debug("✅ 代币注册表已创建")
+        
         # 创建交易处理器
         tx_processor = TransactionProcessor(self.config, self.token_parser, rpc_manager)
         logger.debug("✅ 交易处理器已创建")
         
+        # 创建事件扫描器（eth_getLogs 模式使用）
+        log_scanner = TransferLogScanner(self.config, self.token_parser, rpc_manager, tx_processor)
+        logger.debug("✅ 事件扫描器已创建")
+        
+        # 创建 logsBloom 预过滤器（区块模式且不检测原生转账时生效）
+        block_prefilter = BlockBloomPrefilter(self.config, self.token_parser)
+        logger.debug("✅ logsBloom 预过滤器已创建")
+        
+        # 创建内部转账追踪器（启用 trace_internal_transfers 且节点支持时生效）
+        internal_tracer = InternalTransferTracer(self.config, rpc_manager, tx_processor)
+        logger.debug("✅ 内部转账追踪器已创建")
+        
+        # 创建回执处理器（回执中出现的未知代币合约交给代币注册表解析）
+        receipt_enricher = ReceiptEnricher(self.config, rpc_manager, token_registry)
+        logger.debug("✅ 回执处理器已创建")
+        
         # 创建确认管理器
         confirmation_manager = ConfirmationManager(self.config, rpc_manager, self.token_parser)
         logger.debug("✅ 确认管理器已创建")
         
+        # 创建区块重组检测器
+        reorg_detector = ReorgDetector(self.config, rpc_manager)
+        logger.debug("✅ 区块重组检测器已创建")
+        
         # 创建统计报告器
         stats_reporter = StatisticsReporter(self.config)
         logger.debug("✅ 统计报告器已创建")
         
+        # 创建区块游标（持久化处理进度）
+        block_cursor = None
+        if self.config.cursor_enabled:
+            block_cursor = BlockCursor(
+                self.config.get_cursor_path(),
+                self.chain_name,
+                flush_interval=self.config.cursor_flush_interval,
+                flush_blocks=self.config.cursor_flush_blocks
+            )
+            logger.debug("✅ 区块游标已创建")
+        
         return {
             'rpc_manager': rpc_manager,
+            'head_subscriber': head_subscriber,
+            'token_registry': token_registry,
             'tx_processor': tx_processor,
+            'log_scanner': log_scanner,
+            'block_prefilter': block_prefilter,
+            'receipt_enricher': receipt_enricher,
+            'internal_tracer': internal_tracer,
             'confirmation_manager': confirmation_manager,
-            'stats_reporter': stats_reporter
+            'reorg_detector': reorg_detector,
+            'stats_reporter': stats_reporter,
+            'block_cursor': block_cursor
         }
     
     def init_rabbitmq_config(self, custom_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
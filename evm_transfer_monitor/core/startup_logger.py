@@ -4,7 +4,9 @@
 负责记录监控器启动时的详细信息和配置状态
 """
 
-from config.monitor_config import MonitorConfig
+from itertools import islice
+
+from config.monitor_config import MonitorConfig, RuleKind
 from utils.log_utils import get_logger
 
 logger = get_logger(__name__)
@@ -38,7 +40,28 @@ class StartupLogger:
     def _log_basic_config(self) -> None:
         """记录基本配置信息"""
         logger.info(f"🔗 RPC URL: {self.config.rpc_url}")
+        backup_urls = self.config.get_rpc_urls()[1:]
+        if backup_urls:
+            logger.info(f"🌐 备用节点: {', '.join(backup_urls)}")
+        if self.config.ws_url:
+            logger.info(f"🔌 newHeads 订阅: {self.config.ws_url}")
         logger.info(f"⏱️ 区块时间: {self.config.block_time} 秒")
+        if self.config.cursor_enabled:
+            logger.info(f"📍 区块游标: {self.config.get_cursor_path()}")
+        if self.config.is_logs_ingestion():
+            logger.info(f"📜 数据获取: eth_getLogs 事件扫描 (每次 {self.config.logs_block_range} 个区块)")
+            logger.warning("⚠️ 事件扫描模式不检测原生代币转账")
+        else:
+            transport = "原生 JSON-RPC" if self.config.rpc_raw_transport else "web3"
+            logger.info(f"📦 数据获取: 完整区块解码 (并发窗口 {self.config.block_fetch_window}, {transport})")
+            if self.config.detect_native_transfers and self.config.trace_internal_transfers:
+                logger.info(f"🔍 内部转账追踪: {self.config.trace_method} (每秒 {self.config.trace_max_per_second} 次)")
+            if not self.config.detect_native_transfers:
+                logger.info("🪙 不检测原生代币转账")
+                if self.config.bloom_prefilter_enabled:
+                    logger.info("🌸 logsBloom 预过滤: 先取区块头，只下载可能包含相关转账的区块")
+            if self.config.reorg_detection_enabled:
+                logger.info("🔀 区块重组检测: 校验父哈希，重组时作废孤块交易并重新处理新链")
     
     def _log_strategy_details(self) -> None:
         """记录策略详细信息"""
@@ -49,6 +72,8 @@ class StartupLogger:
             self._log_large_amount_strategy()
         elif self.config.is_watch_address_strategy():
             self._log_watch_address_strategy()
+        elif self.config.is_rules_strategy():
+            self._log_rules_strategy()
     
     def _log_large_amount_strategy(self) -> None:
         """记录大额交易策略信息"""
@@ -58,13 +83,29 @@ class StartupLogger:
         ])
         logger.info(f"📈 监控阈值: {threshold_info}")
     
+    def _log_rules_strategy(self) -> None:
+        """记录规则模式信息"""
+        for rule in self.config.get_detection_rules():
+            tokens = ','.join(rule.tokens) if rule.tokens else '全部代币'
+            if rule.min_amount is not None:
+                amount = f"≥{rule.min_amount:,.0f}"
+            elif rule.kind == RuleKind.LARGE_AMOUNT:
+                amount = "按阈值"
+            else:
+                amount = "不限金额"
+            addresses = f"{len(rule.addresses)} 个指定地址" if rule.addresses else ''
+            logger.info(f"📐 规则 {rule.name}: {rule.kind.value} | {tokens} | {amount} {addresses}".rstrip())
+        watch_kinds = (RuleKind.WATCH_INBOUND, RuleKind.WATCH_OUTBOUND)
+        if any(rule.kind in watch_kinds and not rule.addresses for rule in self.config.get_detection_rules()):
+            logger.info(f"👁️ 监控地址数量: {len(self.config.watch_addresses)}")
+    
     def _log_watch_address_strategy(self) -> None:
         """记录地址监控策略信息"""
         addresses_count = len(self.config.watch_addresses)
         logger.info(f"👁️ 监控地址数量: {addresses_count}")
         
         # 显示前5个地址作为示例
-        for i, addr in enumerate(self.config.watch_addresses[:5], 1):
+        for i, addr in enumerate(islice(self.config.watch_addresses, 5), 1):
             logger.info(f"   {i}. {addr}")
         
         # 如果地址数量超过5个，显示省略信息
@@ -6,7 +6,7 @@
 
 import asyncio
 import yaml
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
@@ -20,6 +20,14 @@ from utils.log_utils import get_logger
 
 logger = get_logger(__name__)
 
+# 旧版本建表之后新增的充值记录列：(列名, 列定义)
+DEPOSIT_ADDED_COLUMNS = [
+    ('transfer_index', 'INTEGER NOT NULL DEFAULT 0'),
+    ('trace_address', "VARCHAR(128) NOT NULL DEFAULT ''"),
+]
+# 充值记录唯一键（旧版本为 tx_hash 单列唯一索引）
+DEPOSIT_UNIQUE_INDEX = ('uq_deposit_records_transfer', ['tx_hash', 'transfer_index', 'trace_address'])
+
 
 class DatabaseManager:
     """数据库管理器 - 负责数据库初始化和连接管理"""
@@ -70,6 +78,7 @@ class DatabaseManager:
             # 创建所有表
             DepositBase.metadata.create_all(self.sync_engine)
             NotificationBase.metadata.create_all(self.sync_engine)
+            self._upgrade_schema()
             
             logger.info("数据库表结构创建完成")
             
@@ -99,6 +108,32 @@ class DatabaseManager:
             logger.error(f"数据库初始化失败: {e}")
             return False
     
+    def _upgrade_schema(self) -> None:
+        """升级旧版本创建的充值记录表：补充新增的列，唯一键由 tx_hash 改为 DEPOSIT_UNIQUE_INDEX（create_all 不修改已有的表）"""
+        inspector = inspect(self.sync_engine)
+        columns = {column['name'] for column in inspector.get_columns('deposit_records')}
+        indexes = {index['name']: index for index in inspector.get_indexes('deposit_records')}
+        
+        with self.sync_engine.begin() as conn:
+            for name, definition in DEPOSIT_ADDED_COLUMNS:
+                if name not in columns:
+                    conn.execute(text(f"ALTER TABLE deposit_records ADD COLUMN {name} {definition}"))
+                    logger.info(f"🗄️ deposit_records 已添加列 {name}")
+            
+            tx_hash_index = indexes.get('ix_deposit_records_tx_hash')
+            if tx_hash_index and tx_hash_index['unique']:
+                conn.execute(text("DROP INDEX ix_deposit_records_tx_hash"))
+                conn.execute(text("CREATE INDEX ix_deposit_records_tx_hash ON deposit_records (tx_hash)"))
+            
+            name, key_columns = DEPOSIT_UNIQUE_INDEX
+            unique_index = indexes.get(name)
+            if unique_index and unique_index['column_names'] != key_columns:
+                conn.execute(text(f"DROP INDEX {name}"))
+                unique_index = None
+            if unique_index is None:
+                conn.execute(text(f"CREATE UNIQUE INDEX {name} ON deposit_records ({', '.join(key_columns)})"))
+                logger.info(f"🗄️ deposit_records 唯一键已更新为 ({', '.join(key_columns)})")
+    
     def get_sync_session(self) -> Session:
         """获取同步数据库会话"""
         if not self.sync_session_factory:
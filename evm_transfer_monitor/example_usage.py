@@ -45,17 +45,15 @@ def example_save_transaction():
     # 模拟一个 TransactionInfo 对象
     transaction_info = TransactionInfo(
         hash="0x1234567890abcdef1234567890abcdef1234567890abcdef1234567890abcdef",
-        tx={
-            "blockHash": "0xabcdef1234567890abcdef1234567890abcdef1234567890abcdef1234567890",
-            "from": "0xfrom1234567890123456789012345678901234567890",
-            "to": "0xto1234567890123456789012345678901234567890",
-            "gasUsed": "21000",
-            "gasPrice": "20000000000"  # 20 Gwei
-        },
-        value=1.5,  # 1.5 ETH
-        tx_type="transfer",
+        block_number=18000000,
+        block_hash="0xabcdef1234567890abcdef1234567890abcdef1234567890abcdef1234567890",
+        from_address="0xfrom1234567890123456789012345678901234567890",
+        to_address="0xto1234567890123456789012345678901234567890",
+        amount_wei=1_500_000_000_000_000_000,  # 1.5 ETH
+        tx_type="ETH",
         found_at=datetime.now().timestamp(),
-        block_number=18000000
+        gas_used=21000,
+        gas_price=20_000_000_000  # 20 Gwei
     )
     
     # 保存交易
@@ -159,24 +157,17 @@ def example_token_transaction():
     # 模拟一个代币交易
     token_transaction = TransactionInfo(
         hash="0xtoken123456789abcdef123456789abcdef123456789abcdef123456789abcdef",
-        tx={
-            "blockHash": "0xblock123456789abcdef123456789abcdef123456789abcdef123456789abc",
-            "from": "0xfrom1234567890123456789012345678901234567890",
-            "to": "0xcontract1234567890123456789012345678901234567890",  # 合约地址
-            "gasUsed": "65000",
-            "gasPrice": "25000000000"  # 25 Gwei
-        },
-        value=1000.0,  # 1000 代币
-        tx_type="token_transfer",
-        found_at=datetime.now().timestamp(),
         block_number=18000001,
-        token_info={
-            "contract_address": "0xcontract1234567890123456789012345678901234567890",
-            "symbol": "USDT",
-            "decimals": 6,
-            "from": "0xfrom1234567890123456789012345678901234567890",
-            "to": "0xto1234567890123456789012345678901234567890"
-        }
+        block_hash="0xblock123456789abcdef123456789abcdef123456789abcdef123456789abc",
+        from_address="0xfrom1234567890123456789012345678901234567890",
+        to_address="0xto1234567890123456789012345678901234567890",
+        amount_wei=1_000_000_000,  # 1000 代币（6 位小数）
+        tx_type="USDT",
+        found_at=datetime.now().timestamp(),
+        contract="0xcontract1234567890123456789012345678901234567890",
+        decimals=6,
+        gas_used=65000,
+        gas_price=25_000_000_000  # 25 Gwei
     )
     
     # 保存代币交易
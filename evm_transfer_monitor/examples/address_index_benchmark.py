@@ -0,0 +1,118 @@
+"""
+监控地址索引基准测试
+
+对比原先的「校验和地址列表 + 小写地址集合」与 AddressIndex 各模式的内存占用、构建耗时、
+命中和未命中查找耗时，以及紧凑模式下逐个增删的耗时
+
+运行: python -m examples.address_index_benchmark [地址数 ...]（默认 1000000 10000000）
+"""
+
+import gc
+import os
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from utils.address_index import AddressIndex
+
+LOOKUPS = 20000
+CHANGES = 2000
+
+
+def make_addresses(count: int) -> List[str]:
+    """生成随机地址（大写十六进制，与校验和地址长度相同，小写化时会生成新字符串）"""
+    raw = os.urandom(20 * count).hex().upper()
+    return ['0x' + raw[i:i + 40] for i in range(0, len(raw), 40)]
+
+
+def measure_build(build: Callable[[], Any]) -> Tuple[Any, float]:
+    """构建数据结构，返回 (结构, 耗时秒)"""
+    gc.collect()
+    start = time.perf_counter()
+    structure = build()
+    return structure, time.perf_counter() - start
+
+
+def container_mb(container: Any) -> float:
+    """容器本身加其中全部元素的内存占用（MB）"""
+    return (sys.getsizeof(container) + sum(sys.getsizeof(item) for item in container)) / (1024 * 1024)
+
+
+def index_mb(index: AddressIndex) -> float:
+    """AddressIndex 的内存占用（MB），哈希集合部分按实际对象大小计算"""
+    size = len(index._base) + sys.getsizeof(index._added) + sum(sys.getsizeof(key) for key in index._added)
+    if index._directory is not None:
+        size += index._directory.itemsize * len(index._directory)
+    if index._bloom is not None:
+        size += len(index._bloom)
+    return size / (1024 * 1024)
+
+
+def measure_lookup(contains: Callable[[str], bool], addresses: List[str]) -> float:
+    """每次查找的平均耗时（纳秒）"""
+    start = time.perf_counter()
+    for address in addresses:
+        contains(address)
+    return (time.perf_counter() - start) / len(addresses) * 1e9
+
+
+def bench_size(count: int) -> None:
+    print(f"\n=== {count:,} 个地址 ===")
+    addresses = make_addresses(count)
+    hits = [random.choice(addresses).lower() for _ in range(LOOKUPS)]
+    misses = ['0x' + os.urandom(20).hex() for _ in range(LOOKUPS)]
+
+    print(f"{'结构':<28}{'内存 (MB)':>11}{'B/地址':>9}{'构建 (s)':>10}{'命中 (ns)':>11}{'未命中 (ns)':>13}")
+
+    def report(name: str, elapsed: float, memory_mb: float, contains: Callable[[str], bool]) -> None:
+        hit = measure_lookup(contains, hits)
+        miss = measure_lookup(contains, misses)
+        per_address = memory_mb * 1024 * 1024 / count
+        print(f"{name:<28}{memory_mb:>11.1f}{per_address:>9.1f}{elapsed:>10.2f}{hit:>11.0f}{miss:>13.0f}")
+
+    # 原实现：地址列表（列表本身及其中的字符串都要计入）+ 小写字符串集合
+    def build_baseline() -> Tuple[List[str], set]:
+        watch_addresses = [address[:2] + address[2:] for address in addresses]
+        return watch_addresses, {address.lower() for address in watch_addresses}
+
+    (watch_addresses, lowered), elapsed = measure_build(build_baseline)
+    memory_mb = container_mb(watch_addresses) + container_mb(lowered)
+    report('list + set (原实现)', elapsed, memory_mb, lambda address: address.lower() in lowered)
+    del watch_addresses, lowered
+
+    variants: Dict[str, Dict[str, int]] = {
+        'AddressIndex 哈希集合': {'compact_min': count + 1},
+        'AddressIndex 紧凑': {'compact_min': 0, 'bloom_bits_per_key': 0},
+        'AddressIndex 紧凑 + 布隆': {'compact_min': 0, 'bloom_bits_per_key': 16},
+    }
+    for name, options in variants.items():
+        index, elapsed = measure_build(lambda: AddressIndex(addresses, **options))
+        report(name, elapsed, index_mb(index), index.__contains__)
+        if index.is_compact:
+            bench_changes(index)
+        del index
+        gc.collect()
+
+
+def bench_changes(index: AddressIndex) -> None:
+    """紧凑模式下逐个增删的平均耗时（含触发的合并）"""
+    new_addresses = ['0x' + os.urandom(20).hex() for _ in range(CHANGES)]
+    start = time.perf_counter()
+    for address in new_addresses:
+        index.add(address)
+    for address in new_addresses:
+        index.discard(address)
+    elapsed = time.perf_counter() - start
+    print(f"{'':<28}增删 {2 * CHANGES} 次: 平均 {elapsed / (2 * CHANGES) * 1e6:.1f} µs")
+
+
+def main() -> None:
+    random.seed(20)
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000_000, 10_000_000]
+    for count in sizes:
+        bench_size(count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+区块解码进程池基准测试
+
+构造类似 BSC 繁忙区块的交易（代币 transfer、批量转账、DEX 调用和原生转账），分别在事件循环内
+和解码进程池中分类，同时运行一个每毫秒唤醒一次的心跳任务，测量事件循环被阻塞的时间
+（心跳实际间隔与预期间隔之差）以及区块处理吞吐
+
+运行: python -m examples.decode_pool_benchmark [区块数] [每块交易数]（默认 200 400）
+"""
+
+import asyncio
+import random
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from config.monitor_config import MonitorConfig, MonitorStrategy
+from managers.rpc_manager import RPCManager
+from processors.transaction_processor import TransactionProcessor
+from utils.token_parser import TokenParser
+
+HEARTBEAT_INTERVAL = 0.001
+
+
+def _word(value: int) -> str:
+    return '%064x' % value
+
+
+def _address() -> str:
+    return '0x' + random.randbytes(20).hex()
+
+
+def build_block(parser: TokenParser, number: int, size: int, watched: List[str]) -> List[Dict[str, Any]]:
+    """构造一个区块的交易（原生 JSON-RPC 格式：input 为十六进制字符串）"""
+    contracts = [contract for contract in parser.contracts.values() if contract]
+    transactions = []
+    for i in range(size):
+        kind = random.random()
+        to_address, value, input_data = _address(), 0, '0x'
+        if kind < 0.45:
+            to_address = random.choice(contracts)
+            recipient = random.choice(watched) if random.random() < 0.01 else _address()
+            input_data = '0xa9059cbb' + _word(int(recipient, 16)) + _word(random.getrandbits(70))
+        elif kind < 0.5:
+            to_address = random.choice(contracts)
+            count = 20
+            input_data = ('0x88d695b2' + _word(64) + _word(64 + 32 * (count + 1))
+                          + _word(count) + ''.join(_word(int(_address(), 16)) for _ in range(count))
+                          + _word(count) + ''.join(_word(random.getrandbits(70)) for _ in range(count)))
+        elif kind < 0.85:
+            input_data = '0x38ed1739' + ''.join(_word(random.getrandbits(64)) for _ in range(9))
+        else:
+            value = random.getrandbits(60)
+        transactions.append({
+            'hash': '0x%064x' % (number * 100000 + i), 'from': _address(), 'to': to_address,
+            'value': value, 'gas': 21000, 'gasPrice': 1, 'input': input_data,
+            'blockNumber': number, 'blockHash': '',
+        })
+    return transactions
+
+
+async def heartbeat(lags: List[float], stop: asyncio.Event) -> None:
+    """每 HEARTBEAT_INTERVAL 唤醒一次，记录超出预期的延迟"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        lags.append(time.perf_counter() - start - HEARTBEAT_INTERVAL)
+
+
+async def run(parser: TokenParser, blocks: List[List[Dict[str, Any]]], watched: List[str],
+              workers: int) -> Optional[Dict[str, float]]:
+    config = MonitorConfig(
+        rpc_url='http://127.0.0.1:1',
+        monitor_strategy=MonitorStrategy.WATCH_ADDRESS,
+        watch_addresses=watched,
+        decode_workers=workers,
+        decode_pool_min_transactions=1,
+    )
+    processor = TransactionProcessor(config, parser, RPCManager(config))
+    # 预热：启动工作进程并传输索引快照
+    await processor.process_block_async(blocks[0])
+
+    lags: List[float] = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    await asyncio.sleep(0.01)
+    lags.clear()
+
+    start = time.perf_counter()
+    found = 0
+    for transactions in blocks:
+        found += len(await processor.process_block_async(transactions))
+        # 实际运行时区块之间有获取区块等 await，这里让出一次事件循环
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await beat
+    processor.close()
+
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    return {
+        'blocks_per_s': len(blocks) / elapsed,
+        'found': found,
+        'lag_p50_ms': statistics.median(lags_ms),
+        'lag_p99_ms': lags_ms[int(len(lags_ms) * 0.99) - 1] if len(lags_ms) > 1 else lags_ms[0],
+        'lag_max_ms': lags_ms[-1],
+    }
+
+
+async def main() -> None:
+    random.seed(21)
+    block_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    block_size = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    parser = TokenParser()
+    watched = [_address() for _ in range(10000)]
+    blocks = [build_block(parser, number, block_size, watched) for number in range(block_count)]
+
+    print(f"{block_count} 个区块, 每块 {block_size} 笔交易")
+    print(f"{'模式':<18}{'区块/秒':>10}{'命中':>8}{'循环延迟 p50 (ms)':>20}{'p99 (ms)':>11}{'max (ms)':>11}")
+    for workers in (0, 2, 4):
+        name = '事件循环内' if workers == 0 else f'进程池 x{workers}'
+        result = await run(parser, blocks, watched, workers)
+        print(f"{name:<18}{result['blocks_per_s']:>10.1f}{result['found']:>8}{result['lag_p50_ms']:>20.2f}"
+              f"{result['lag_p99_ms']:>11.2f}{result['lag_max_ms']:>11.2f}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+"""
+日志管线基准测试
+
+模拟繁忙链上大额策略的逐笔交易日志：每个区块输出一批日志行，写文件的处理器每隔若干行
+停顿一次（模拟磁盘刷写/日志轮转停顿）。对比处理器直接挂在日志器上（调用线程同步写文件）
+与经 DeferredQueueHandler 交给写日志线程两种方式下，事件循环心跳的延迟和每次日志调用的耗时
+
+运行: python -m examples.log_pipeline_benchmark [区块数] [每块日志行数]（默认 200 50）
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import statistics
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from logging.handlers import QueueListener
+from typing import Dict, List
+
+from utils.log_utils import FMT, DeferredQueueHandler
+
+HEARTBEAT_INTERVAL = 0.001
+STALL_EVERY = 500  # 每写多少行停顿一次
+STALL_SECONDS = 0.05
+
+
+class StallingFileHandler(logging.FileHandler):
+    """每写 STALL_EVERY 行停顿 STALL_SECONDS 的文件处理器"""
+
+    def __init__(self, filename: str):
+        super().__init__(filename, encoding='utf-8')
+        self.setFormatter(FMT)
+        self.written = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        super().emit(record)
+        self.written += 1
+        if self.written % STALL_EVERY == 0:
+            time.sleep(STALL_SECONDS)
+
+
+async def heartbeat(lags: List[float], stop: asyncio.Event) -> None:
+    """每 HEARTBEAT_INTERVAL 唤醒一次，记录超出预期的延迟"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        lags.append(time.perf_counter() - start - HEARTBEAT_INTERVAL)
+
+
+async def run(name: str, blocks: int, lines: int, queued: bool, directory: str) -> Dict[str, float]:
+    file_handler = StallingFileHandler(os.path.join(directory, f'{name}.log'))
+    logger = logging.getLogger(f'log_pipeline_benchmark.{name}')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    listener = None
+    if queued:
+        log_queue: queue.Queue = queue.Queue(100_000)
+        logger.addHandler(DeferredQueueHandler(log_queue))
+        listener = QueueListener(log_queue, file_handler)
+        listener.start()
+    else:
+        logger.addHandler(file_handler)
+
+    lags: List[float] = []
+    calls: List[float] = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    await asyncio.sleep(0.01)
+    lags.clear()
+
+    start = time.perf_counter()
+    for block in range(blocks):
+        for i in range(lines):
+            call_start = time.perf_counter()
+            logger.info("%s %s%s: %s => %s | %s | 区块: %s | %s/tx/%s",
+                        '💵', '大额', 'USDT', '0x' + '11' * 20, '0x' + '22' * 20,
+                        f"{Decimal(12_345_678) / 1_000_000:,.2f}M USDT", block,
+                        'https://bscscan.com', '0x%064x' % (block * lines + i))
+            calls.append(time.perf_counter() - call_start)
+        # 区块之间让出事件循环（实际运行时是获取下一个区块的 await）
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await beat
+    if listener is not None:
+        listener.stop()
+    logger.handlers.clear()
+    file_handler.close()
+
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    calls_us = sorted(call * 1e6 for call in calls)
+    return {
+        'elapsed_s': elapsed,
+        'call_p50_us': statistics.median(calls_us),
+        'call_max_us': calls_us[-1],
+        'lag_p99_ms': lags_ms[int(len(lags_ms) * 0.99) - 1] if len(lags_ms) > 1 else lags_ms[0],
+        'lag_max_ms': lags_ms[-1],
+    }
+
+
+async def main() -> None:
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print(f"{blocks} 个区块, 每块 {lines} 行日志, 每 {STALL_EVERY} 行停顿 {STALL_SECONDS * 1000:.0f} ms")
+    print(f"{'方式':<14}{'耗时 (s)':>10}{'调用 p50 (µs)':>15}{'调用 max (µs)':>15}"
+          f"{'循环延迟 p99 (ms)':>20}{'max (ms)':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, queued in (('同步写文件', False), ('队列 + 写日志线程', True)):
+            result = await run('queued' if queued else 'direct', blocks, lines, queued, directory)
+            print(f"{name:<14}{result['elapsed_s']:>10.2f}{result['call_p50_us']:>15.1f}{result['call_max_us']:>15.0f}"
+                  f"{result['lag_p99_ms']:>20.2f}{result['lag_max_ms']:>11.2f}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,148 @@
+"""
+待确认交易内存基准测试
+
+模拟大额策略下确认窗口内驻留的待确认代币转账，对比旧版 TransactionInfo（dataclass，持有完整的
+web3 交易 AttributeDict 和转账信息 dict）与精简的 __slots__ 记录的内存占用。旧版定义在本文件中
+保留一份副本作为基线
+
+运行: python -m examples.pending_memory_benchmark [待确认交易数]（默认 100000）
+"""
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+from hexbytes import HexBytes
+from web3.datastructures import AttributeDict
+
+from models.data_types import TransactionInfo
+
+CONTRACT = '0xdac17f958d2ee523a2206206994597c13d831ec7'
+
+
+@dataclass
+class LegacyTransactionInfo:
+    """旧版交易信息：持有完整交易和转账信息 dict"""
+    hash: str
+    tx: Dict[str, Any]
+    amount_wei: int
+    tx_type: str
+    found_at: float
+    block_number: int
+    token_info: Optional[Dict[str, Any]] = None
+    decimals: int = 18
+    status: Optional[int] = None
+    gas_used: Optional[int] = None
+    effective_gas_price: Optional[int] = None
+
+
+# 每个区块的命中交易数（同一区块的交易共享区块哈希）
+MATCHES_PER_BLOCK = 20
+
+
+def make_web3_transaction(index: int) -> AttributeDict:
+    """构造一笔 web3 格式化后的 EIP-1559 代币 transfer 交易（web3 为每笔交易单独构造 blockHash）"""
+    recipient = os.urandom(20)
+    block_number = 20_000_000 + index // MATCHES_PER_BLOCK
+    return AttributeDict({
+        'blockHash': HexBytes(block_number.to_bytes(32, 'big')),
+        'blockNumber': block_number,
+        'from': '0x' + os.urandom(20).hex(),
+        'gas': 65000,
+        'gasPrice': 25_000_000_000,
+        'maxFeePerGas': 30_000_000_000,
+        'maxPriorityFeePerGas': 1_000_000_000,
+        'hash': HexBytes(os.urandom(32)),
+        'input': HexBytes(bytes.fromhex('a9059cbb') + bytes(12) + recipient + (10 ** 12).to_bytes(32, 'big')),
+        'nonce': index,
+        'to': CONTRACT,
+        'transactionIndex': index % 200,
+        'value': 0,
+        'type': 2,
+        'accessList': [],
+        'chainId': 1,
+        'v': 1,
+        'yParity': 1,
+        'r': HexBytes(os.urandom(32)),
+        's': HexBytes(os.urandom(32)),
+    })
+
+
+def build_legacy(tx: AttributeDict) -> LegacyTransactionInfo:
+    recipient = '0x' + tx['input'][16:36].hex()
+    amount_wei = int.from_bytes(tx['input'][36:68], 'big')
+    return LegacyTransactionInfo(
+        hash=tx['hash'].hex(),
+        tx=tx,
+        amount_wei=amount_wei,
+        tx_type='USDT',
+        found_at=time.time(),
+        block_number=tx['blockNumber'],
+        token_info={
+            'from': tx['from'].lower(), 'to': recipient, 'amount': Decimal(amount_wei).scaleb(-6),
+            'token': 'USDT', 'contract': CONTRACT, 'raw_amount_wei': amount_wei, 'decimals': 6, 'chain': 'ethereum',
+        },
+        decimals=6,
+    )
+
+
+_last_block_hash = (None, '')
+
+
+def build_slim(tx: AttributeDict) -> TransactionInfo:
+    # 与 TransactionProcessor._block_hash 相同：同一区块的记录共用区块哈希字符串
+    global _last_block_hash
+    if tx['blockHash'] != _last_block_hash[0]:
+        _last_block_hash = (tx['blockHash'], tx['blockHash'].hex())
+    return TransactionInfo(
+        hash=tx['hash'].hex(),
+        block_number=tx['blockNumber'],
+        block_hash=_last_block_hash[1],
+        from_address=tx['from'].lower(),
+        to_address='0x' + tx['input'][16:36].hex(),
+        amount_wei=int.from_bytes(tx['input'][36:68], 'big'),
+        tx_type='USDT',
+        found_at=time.time(),
+        contract=CONTRACT,
+        decimals=6,
+        gas=tx['gas'],
+        gas_price=tx['gasPrice'],
+    )
+
+
+def measure(count: int, build: Callable[[AttributeDict], Any]) -> float:
+    """
+    构造 count 条待确认记录并返回驻留内存（MB）
+
+    交易在测量开始后构造，构造完后只保留记录列表：旧版记录引用的交易计入驻留内存，精简记录不引用
+    """
+    gc.collect()
+    tracemalloc.start()
+    records: List[Any] = [build(make_web3_transaction(i)) for i in range(count)]
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return current / (1024 * 1024)
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"{count:,} 笔待确认代币转账")
+    print(f"{'记录':<34}{'内存 (MB)':>12}{'B/笔':>10}")
+    baseline = None
+    for name, build in (('旧版 dataclass + 完整交易', build_legacy), ('__slots__ 精简记录', build_slim)):
+        memory_mb = measure(count, build)
+        per_record = memory_mb * 1024 * 1024 / count
+        ratio = f"  ({baseline / memory_mb:.1f}x)" if baseline else ''
+        print(f"{name:<34}{memory_mb:>12.1f}{per_record:>10.0f}{ratio}")
+        baseline = baseline or memory_mb
+
+
+if __name__ == '__main__':
+    main()
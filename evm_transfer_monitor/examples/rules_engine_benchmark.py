@@ -0,0 +1,68 @@
+"""
+规则模式基准测试
+
+对比两种同时执行大额交易监控和地址监控的方式：分别运行大额策略和地址策略两个处理器（两个监控器
+各自下载并分类同一批区块），与规则模式下一个处理器一次遍历执行 large_amount + watch_inbound 两条规则。
+输出分类耗时、命中数以及需要下载的区块数（即 eth_getBlockByNumber 调用数）
+
+运行: python -m examples.rules_engine_benchmark [区块数] [每块交易数]（默认 200 400）
+"""
+
+import random
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from config.monitor_config import MonitorConfig, MonitorStrategy
+from examples.decode_pool_benchmark import _address, build_block
+from managers.rpc_manager import RPCManager
+from processors.transaction_processor import TransactionProcessor
+from utils.token_parser import TokenParser
+
+
+def make_processor(parser: TokenParser, strategy: MonitorStrategy, watched: List[str]) -> TransactionProcessor:
+    config = MonitorConfig(
+        rpc_url='http://127.0.0.1:1',
+        monitor_strategy=strategy,
+        watch_addresses=watched,
+    )
+    # 随机金额最高约 1180 个代币，阈值取 1000 使约六分之一的代币转账为大额
+    config.thresholds.update({symbol: 1000.0 for symbol in parser.contracts})
+    return TransactionProcessor(config, parser, RPCManager(config))
+
+
+def run(processors: List[TransactionProcessor], blocks: List[List[Dict]]) -> Tuple[float, int, int, Counter]:
+    """依次用每个处理器分类全部区块，返回 (耗时, 命中数, 下载区块数, 规则命中统计)"""
+    found = 0
+    rules: Counter = Counter()
+    start = time.perf_counter()
+    for processor in processors:
+        for transactions in blocks:
+            for info in processor.process_block(transactions):
+                found += 1
+                rules.update(info.matched_rules)
+    return time.perf_counter() - start, found, len(processors) * len(blocks), rules
+
+
+def main() -> None:
+    random.seed(25)
+    block_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    block_size = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    parser = TokenParser()
+    watched = [_address() for _ in range(10000)]
+    blocks = [build_block(parser, number, block_size, watched) for number in range(block_count)]
+
+    print(f"{block_count} 个区块, 每块 {block_size} 笔交易")
+    print(f"{'方式':<24}{'耗时 (s)':>10}{'命中':>8}{'下载区块':>10}")
+    separate = [make_processor(parser, MonitorStrategy.LARGE_AMOUNT, watched),
+                make_processor(parser, MonitorStrategy.WATCH_ADDRESS, watched)]
+    elapsed, found, downloads, _ = run(separate, blocks)
+    print(f"{'大额 + 地址 两个监控器':<24}{elapsed:>10.3f}{found:>8}{downloads:>10}")
+    elapsed, found, downloads, rules = run([make_processor(parser, MonitorStrategy.RULES, watched)], blocks)
+    print(f"{'规则模式 一次遍历':<24}{elapsed:>10.3f}{found:>8}{downloads:>10}")
+    print(f"规则命中: {dict(rules)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""
+区块缓存
+
+同一个区块会被多次获取：实时循环、出错后的重试、重组校验、回执核对、回填范围重叠等。
+本模块在进程内按区块号缓存完整区块、区块头和区块回执，按估算的内存占用做 LRU 淘汰。
+
+- 每个区块号对应一个条目，条目记录区块哈希；写入哈希不同的区块时整个条目被替换（链已重组）
+- 距链头不足确认数的区块可能被重组，只在 head_ttl 秒内有效；更早的区块视为不可变
+- 检测到重组时由监控器调用 invalidate_from 清除分叉点之后的条目
+- 通过 get_block_cache 获取，同一进程内相同链的所有 RPCManager 共享一个缓存
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from web3 import Web3
+
+from models.data_types import RawBlock
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# 缓存的数据类型
+BLOCK = 'block'
+HEADER = 'header'
+RECEIPTS = 'receipts'
+
+# 内存占用的粗略估算（字节），只用于淘汰决策
+HEADER_SIZE = 2048
+TX_SIZE = 1024
+RECEIPT_SIZE = 1024
+
+
+def block_hash_of(block: Any) -> str:
+    """区块哈希转小写十六进制字符串，兼容 web3 区块和 RawBlock"""
+    value = block.hash if isinstance(block, RawBlock) else block['hash']
+    if not isinstance(value, str):
+        value = Web3.to_hex(value)
+    return value.lower()
+
+
+def estimate_size(kind: str, value: Any) -> int:
+    """估算缓存数据的内存占用"""
+    if kind == RECEIPTS:
+        return RECEIPT_SIZE * len(value)
+    transactions = value.transactions if isinstance(value, RawBlock) else value.get('transactions', [])
+    if kind == HEADER:
+        # web3 区块头的 transactions 为交易哈希列表
+        return HEADER_SIZE + 32 * len(transactions)
+    return HEADER_SIZE + TX_SIZE * len(transactions)
+
+
+@dataclass
+class _CacheEntry:
+    """单个区块号的缓存条目"""
+    block_hash: Optional[str]
+    cached_at: float
+    values: Dict[str, Any] = field(default_factory=dict)
+    size: int = 0
+
+
+class BlockCache:
+    """区块缓存 - 按区块号索引、按内存占用淘汰的 LRU"""
+    
+    def __init__(self, max_bytes: int, head_ttl: float, finality_depth: int,
+                 head_getter: Callable[[], Optional[int]]):
+        """
+        初始化缓存
+        
+        Args:
+            max_bytes: 缓存的估算内存上限
+            head_ttl: 未达到确认深度的区块的缓存有效期（秒）
+            finality_depth: 确认深度，距链头超过该区块数的区块视为不可变
+            head_getter: 返回当前已知链头区块号的函数
+        """
+        self.max_bytes = max_bytes
+        self.head_ttl = head_ttl
+        self.finality_depth = finality_depth
+        self._head_getter = head_getter
+        
+        self._entries: 'OrderedDict[int, _CacheEntry]' = OrderedDict()
+        self.total_bytes: int = 0
+        
+        # 统计信息
+        self.hits: Dict[str, int] = {BLOCK: 0, HEADER: 0, RECEIPTS: 0}
+        self.misses: Dict[str, int] = {BLOCK: 0, HEADER: 0, RECEIPTS: 0}
+        self.evictions: int = 0
+        self.invalidations: int = 0
+    
+    def _is_final(self, block_number: int) -> bool:
+        """区块是否已超过确认深度"""
+        head = self._head_getter()
+        return head is not None and block_number <= head - self.finality_depth
+    
+    def _lookup(self, block_number: int) -> Optional[_CacheEntry]:
+        """取出有效的条目，过期的近链头条目直接移除"""
+        entry = self._entries.get(block_number)
+        if entry is None:
+            return None
+        if not self._is_final(block_number) and time.time() - entry.cached_at > self.head_ttl:
+            self._remove(block_number)
+            return None
+        self._entries.move_to_end(block_number)
+        return entry
+    
+    def get(self, block_number: int, kind: str) -> Optional[Any]:
+        """
+        读取缓存
+        
+        Args:
+            block_number: 区块号
+            kind: BLOCK / HEADER / RECEIPTS，读取区块头时完整区块也可以代替
+        
+        Returns:
+            Optional[Any]: 缓存的数据，未命中时返回 None
+        """
+        entry = self._lookup(block_number)
+        value = None
+        if entry is not None:
+            value = entry.values.get(kind)
+            if value is None and kind == HEADER:
+                value = entry.values.get(BLOCK)
+        
+        if value is None:
+            self.misses[kind] += 1
+        else:
+            self.hits[kind] += 1
+        return value
+    
+    def put(self, block_number: int, kind: str, value: Any) -> None:
+        """
+        写入缓存
+        
+        区块和区块头携带哈希，与已有条目的哈希不同时替换整个条目；
+        回执不携带哈希，附加到已有条目上
+        """
+        if value is None:
+            return
+        
+        block_hash = block_hash_of(value) if kind in (BLOCK, HEADER) else None
+        entry = self._entries.get(block_number)
+        if entry is not None and block_hash and entry.block_hash and entry.block_hash != block_hash:
+            logger.debug(f"区块 {block_number} 哈希已变化，替换缓存条目")
+            self._remove(block_number)
+            self.invalidations += 1
+            entry = None
+        
+        if entry is None:
+            entry = _CacheEntry(block_hash=block_hash, cached_at=time.time())
+            self._entries[block_number] = entry
+        elif block_hash and not entry.block_hash:
+            entry.block_hash = block_hash
+        
+        size = estimate_size(kind, value)
+        old = entry.values.get(kind)
+        if old is not None:
+            size -= estimate_size(kind, old)
+        entry.values[kind] = value
+        entry.size += size
+        self.total_bytes += size
+        self._entries.move_to_end(block_number)
+        self._evict()
+    
+    def _remove(self, block_number: int) -> None:
+        """移除一个条目"""
+        entry = self._entries.pop(block_number, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+    
+    def _evict(self) -> None:
+        """按 LRU 顺序淘汰直到不超过内存上限（至少保留最新写入的条目）"""
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            block_number = next(iter(self._entries))
+            self._remove(block_number)
+            self.evictions += 1
+    
+    def invalidate_from(self, block_number: int) -> int:
+        """
+        清除指定区块号及之后的全部条目（区块重组）
+        
+        Returns:
+            int: 清除的条目数
+        """
+        stale = [number for number in self._entries if number >= block_number]
+        for number in stale:
+            self._remove(number)
+        self.invalidations += len(stale)
+        return len(stale)
+    
+    def clear(self) -> None:
+        """清空缓存"""
+        self._entries.clear()
+        self.total_bytes = 0
+    
+    def reset_stats(self) -> None:
+        """重置统计数据"""
+        self.hits = {BLOCK: 0, HEADER: 0, RECEIPTS: 0}
+        self.misses = {BLOCK: 0, HEADER: 0, RECEIPTS: 0}
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        return {
+            'entries': len(self._entries),
+            'size_mb': self.total_bytes / (1024 * 1024),
+            'max_mb': self.max_bytes / (1024 * 1024),
+            'hits': dict(self.hits),
+            'misses': dict(self.misses),
+            'hit_rate': (hits / (hits + misses) * 100) if hits + misses > 0 else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+
+# 进程内共享的区块缓存，按链名索引
+_caches: Dict[str, BlockCache] = {}
+
+
+def get_block_cache(chain_name: str, max_bytes: int, head_ttl: float, finality_depth: int,
+                    head_getter: Callable[[], Optional[int]]) -> BlockCache:
+    """
+    获取链对应的共享区块缓存（进程内单例）
+    
+    同一条链的区块与节点无关，同一进程内各节点的 RPCManager 共用一个缓存；
+    参数只在首次创建时生效
+    """
+    cache = _caches.get(chain_name)
+    if cache is None:
+        cache = BlockCache(max_bytes, head_ttl, finality_depth, head_getter)
+        _caches[chain_name] = cache
+    return cache
@@ -0,0 +1,151 @@
+"""
+区块处理进度游标
+
+持久化记录已连续处理完成的最后一个区块号，重启或发布后从该区块继续处理，
+避免停机期间产生的区块被跳过。写入采用原子替换（utils.file_utils），
+并按区块数和时间间隔批量落盘，避免每个区块都触发一次磁盘同步
+"""
+
+import json
+import time
+from typing import Optional, Dict, Any
+
+from utils.file_utils import atomic_write_json, resolve_project_path
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class BlockCursor:
+    """区块处理进度游标 - 基于本地文件的检查点"""
+
+    def __init__(self, path: str, chain_name: str, flush_interval: float = 5.0, flush_blocks: int = 100):
+        """
+        初始化游标
+
+        Args:
+            path: 游标文件路径，相对路径以项目根目录为基准
+            chain_name: 链名称，写入文件用于校验
+            flush_interval: 距上次落盘超过该时间（秒）时落盘
+            flush_blocks: 距上次落盘推进超过该区块数时落盘
+        """
+        self.path = resolve_project_path(path)
+        self.chain_name = chain_name
+        self.flush_interval = flush_interval
+        self.flush_blocks = flush_blocks
+
+        self.committed_block: Optional[int] = None   # 已落盘的区块号
+        self.current_block: Optional[int] = None     # 内存中已处理完成的区块号
+        self.last_flush_time: float = time.time()
+        self.limited: bool = False  # 上次落盘是否受上限约束（落后于内存进度）
+
+        # 统计信息
+        self.flush_count: int = 0
+
+    def load(self) -> Optional[int]:
+        """
+        读取已落盘的区块号
+
+        Returns:
+            Optional[int]: 已处理完成的最后一个区块号，文件不存在或无效时返回 None
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ 读取区块游标失败 {self.path}: {e}")
+            return None
+
+        if data.get('chain_name') != self.chain_name:
+            logger.warning(
+                f"⚠️ 区块游标属于链 {data.get('chain_name')}，与当前链 {self.chain_name} 不符，忽略"
+            )
+            return None
+
+        block_number = data.get('last_block')
+        if not isinstance(block_number, int):
+            return None
+
+        self.committed_block = block_number
+        self.current_block = block_number
+        return block_number
+
+    def should_flush(self) -> bool:
+        """是否达到批量落盘条件"""
+        if self.current_block is None or self.current_block == self.committed_block:
+            return False
+        if self.committed_block is None:
+            return True
+        if self.limited:
+            # 受上限约束时落后的区块数不断增长，只按时间间隔重试
+            return time.time() - self.last_flush_time >= self.flush_interval
+        return (self.current_block - self.committed_block >= self.flush_blocks or
+                time.time() - self.last_flush_time >= self.flush_interval)
+
+    def advance(self, block_number: int) -> None:
+        """
+        推进内存中的进度（不落盘）
+
+        Args:
+            block_number: 已连续处理完成的最后一个区块号
+        """
+        if self.current_block is None or block_number > self.current_block:
+            self.current_block = block_number
+
+    def rewind(self, block_number: int) -> None:
+        """
+        回退内存中的进度（不落盘），用于区块重组后重新处理新链
+
+        Args:
+            block_number: 分叉点区块号
+        """
+        if self.current_block is not None and block_number < self.current_block:
+            self.current_block = block_number
+
+    def flush(self, limit: Optional[int] = None) -> bool:
+        """
+        将当前进度原子写入磁盘
+
+        Args:
+            limit: 落盘区块号的上限（例如入库失败的交易所在区块之前），内存中的进度不变
+
+        Returns:
+            bool: 是否写入成功
+        """
+        if self.current_block is None or self.current_block == self.committed_block:
+            return True
+
+        block_number = self.current_block if limit is None else min(self.current_block, limit)
+        self.limited = block_number < self.current_block
+        if block_number == self.committed_block:
+            # 已落盘的进度已达到上限，本次不写入，按落盘间隔再检查
+            self.last_flush_time = time.time()
+            return True
+
+        data = {
+            'chain_name': self.chain_name,
+            'last_block': block_number,
+            'updated_at': int(time.time()),
+        }
+        try:
+            atomic_write_json(self.path, data)
+        except OSError as e:
+            logger.error(f"❌ 写入区块游标失败 {self.path}: {e}")
+            return False
+
+        self.committed_block = block_number
+        self.last_flush_time = time.time()
+        self.flush_count += 1
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取游标状态"""
+        return {
+            'path': self.path,
+            'committed_block': self.committed_block,
+            'limited': self.limited,
+            'current_block': self.current_block,
+            'flush_count': self.flush_count,
+        }
@@ -0,0 +1,152 @@
+"""
+追块控制器
+
+根据当前区块与已处理区块的差距（落后区块数）在两种模式间切换：
+- 头部模式：小窗口、低延迟，逐笔输出交易日志
+- 追块模式：大窗口高并发，关闭逐笔 INFO 日志，窗口大小按 AIMD 自适应
+  （本轮无错误且延迟低于目标时加性增大，出错或延迟超标时乘性减小）
+进入和退出使用不同阈值，避免在临界点来回切换
+"""
+
+import time
+from enum import Enum
+from typing import Any, Dict, List
+
+from config.monitor_config import MonitorConfig
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class SyncMode(Enum):
+    """同步模式枚举"""
+    HEAD = "head"          # 头部模式：紧跟最新区块
+    CATCHUP = "catchup"    # 追块模式：大幅落后时批量追赶
+
+
+class CatchupController:
+    """追块控制器 - 模式切换和 AIMD 窗口调整"""
+
+    def __init__(self, config: MonitorConfig):
+        self.config = config
+        self.mode = SyncMode.HEAD
+        self.window: int = config.catchup_min_window
+
+        # 当前一轮的观测数据
+        self._latencies: List[float] = []
+        self._errors: int = 0
+
+        # 统计信息
+        self.lag: int = 0
+        self.max_lag: int = 0
+        self.mode_switches: int = 0
+        self.window_increases: int = 0
+        self.window_decreases: int = 0
+        self.catchup_started_at: float = 0
+
+    @property
+    def is_catching_up(self) -> bool:
+        """是否处于追块模式"""
+        return self.mode == SyncMode.CATCHUP
+
+    def update_lag(self, current_block: int, last_block: int) -> bool:
+        """
+        更新落后区块数并按阈值切换模式
+
+        Args:
+            current_block: 链上最新区块号
+            last_block: 已处理到的区块号
+
+        Returns:
+            bool: 模式是否发生了切换
+        """
+        self.lag = max(0, current_block - last_block)
+        self.max_lag = max(self.max_lag, self.lag)
+
+        if self.mode == SyncMode.HEAD and self.lag > self.config.catchup_enter_lag:
+            self.mode = SyncMode.CATCHUP
+            self.window = max(self.config.catchup_min_window, self.config.block_fetch_window)
+            self.catchup_started_at = time.time()
+            self.mode_switches += 1
+            logger.info(f"🏃 落后 {self.lag} 个区块，进入追块模式 (初始窗口 {self.window})")
+            return True
+
+        if self.mode == SyncMode.CATCHUP and self.lag <= self.config.catchup_exit_lag:
+            self.mode = SyncMode.HEAD
+            self.mode_switches += 1
+            elapsed = time.time() - self.catchup_started_at
+            logger.info(f"🎯 已追上最新区块 (落后 {self.lag})，追块耗时 {elapsed:.1f}s，恢复头部模式")
+            return True
+
+        return False
+
+    def get_window(self) -> int:
+        """当前模式下的并发请求窗口"""
+        if self.is_catching_up:
+            return self.window
+        return self.config.block_fetch_window
+
+    def get_batch_size(self) -> int:
+        """当前模式下单个 JSON-RPC 批量请求的最大调用数，追块时随窗口增大"""
+        if self.is_catching_up:
+            return max(self.config.rpc_batch_max_size, min(self.window, self.config.catchup_max_batch_size))
+        return self.config.rpc_batch_max_size
+
+    def observe_latency(self, latency: float) -> None:
+        """记录一次区块获取的延迟，每收集满一个窗口的样本调整一次"""
+        if not self.is_catching_up:
+            return
+        self._latencies.append(latency)
+        if len(self._latencies) >= self.window:
+            self.end_round()
+
+    def observe_error(self) -> None:
+        """记录一次区块获取失败，立即减小窗口"""
+        if not self.is_catching_up:
+            return
+        self._errors += 1
+        self.end_round()
+
+    def end_round(self) -> None:
+        """一轮观测结束，按 AIMD 调整窗口"""
+        if not self.is_catching_up or (not self._latencies and not self._errors):
+            self._reset_round()
+            return
+
+        avg_latency = sum(self._latencies) / len(self._latencies) if self._latencies else 0.0
+        old_window = self.window
+
+        if self._errors or avg_latency > self.config.catchup_target_latency:
+            # 乘性减小
+            self.window = max(self.config.catchup_min_window, int(self.window * self.config.catchup_decrease_factor))
+            if self.window < old_window:
+                self.window_decreases += 1
+                logger.debug(
+                    f"追块窗口 {old_window} -> {self.window} "
+                    f"(错误 {self._errors}, 平均延迟 {avg_latency * 1000:.0f}ms)"
+                )
+        else:
+            # 加性增大
+            self.window = min(self.config.catchup_max_window, self.window + self.config.catchup_window_step)
+            if self.window > old_window:
+                self.window_increases += 1
+
+        self._reset_round()
+
+    def _reset_round(self) -> None:
+        """清空本轮观测数据"""
+        self._latencies.clear()
+        self._errors = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取追块统计信息"""
+        return {
+            'mode': self.mode.value,
+            'lag': self.lag,
+            'max_lag': self.max_lag,
+            'window': self.get_window(),
+            'batch_size': self.get_batch_size(),
+            'mode_switches': self.mode_switches,
+            'window_increases': self.window_increases,
+            'window_decreases': self.window_decreases,
+        }
@@ -7,9 +7,10 @@
 
 import time
 import asyncio
+import logging
 import yaml
 from collections import defaultdict
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence
 from pathlib import Path
 
 from config.monitor_config import MonitorConfig
@@ -19,8 +20,9 @@ from models.transaction_adapter import AsyncTransactionAdapter
 from models.notification_models import NotificationRecord
 from db.database import get_database_manager
 from services.notification_service import NotificationService
+from utils.amount_utils import NATIVE_DECIMALS, to_base_units
 from utils.token_parser import TokenParser
-from utils.log_utils import get_logger
+from utils.log_utils import LogSampler, get_logger
 
 logger = get_logger(__name__)
 
@@ -42,8 +44,12 @@ class ConfirmationManager:
         # 统计信息
         self.confirmed_transactions: int = 0
         self.timeout_transactions: int = 0
+        self.orphaned_transactions: int = 0
         self.notifications_sent: int = 0
         self.notification_failures: int = 0
+        
+        # 确认日志按代币限流
+        self.log_sampler = LogSampler(logger, config.log_sample_limit, config.log_sample_window)
     
     def add_pending_transaction(self, tx_info: TransactionInfo) -> None:
         """添加待确认交易"""
@@ -91,7 +97,6 @@ class ConfirmationManager:
         
         try:
             current_block = await self.rpc_manager.get_cached_block_number()
-            await self.rpc_manager.check_rate_limit()
         except Exception as e:
             logger.error(f"获取当前区块失败: {e}")
             return
@@ -126,20 +131,49 @@ class ConfirmationManager:
         
         self.last_check_time = current_time
     
+    async def invalidate_blocks_after(self, fork_point: int, orphaned_hashes: Sequence[str]) -> int:
+        """
+        区块重组后批量作废分叉点之后区块中的交易：移出待确认列表并将孤块中的入库记录标记为 orphaned
+        
+        所有链写入同一张充值记录表，入库记录按孤块哈希而不是区块号作废，不影响其他链的记录
+        
+        Args:
+            fork_point: 新旧链共同的最后一个区块号
+            orphaned_hashes: 被替换的区块哈希（重组检测器缓冲区中分叉点之后的区块）
+            
+        Returns:
+            int: 移出待确认列表的交易数
+        """
+        orphaned_blocks = [block_number for block_number in self.pending_by_block if block_number > fork_point]
+        removed = 0
+        for block_number in orphaned_blocks:
+            for tx_info in self.pending_by_block.pop(block_number):
+                removed += 1
+                logger.warning(f"🔀 区块重组，作废交易: {tx_info.tx_type} | 区块: {block_number} | {tx_info.hash}")
+        self.orphaned_transactions += removed
+        
+        if not orphaned_hashes:
+            return removed
+        try:
+            async with self.db_manager.get_async_session() as session:
+                invalidated = await AsyncTransactionAdapter.invalidate_blocks(session, orphaned_hashes)
+            if invalidated:
+                logger.info(f"已作废区块 {fork_point} 之后 {len(orphaned_hashes)} 个孤块中的 {invalidated} 条充值记录")
+        except Exception as e:
+            logger.error(f"作废重组区块的充值记录时出错: {e}")
+        
+        return removed
+    
     def _log_confirmed_transaction(self, tx_info: TransactionInfo, confirmations: int) -> None:
-        """记录已确认的交易"""
-        if tx_info.tx_type == self.config.token_name:
-            logger.info(
-                f"✅ {self.config.token_name}交易确认: {tx_info.get_from_address()} => {tx_info.get_to_address()} | "
-                f"{self.token_parser.format_amount(tx_info.value, self.config.token_name)} | "
-                f"确认数: {confirmations} | {self.config.scan_url}/tx/{tx_info.hash}"
-            )
-        else:
-            logger.info(
-                f"✅ {tx_info.tx_type}交易确认: {tx_info.get_from_address()} => {tx_info.get_to_address()} | "
-                f"{self.token_parser.format_amount(tx_info.value, tx_info.tx_type)} | "
-                f"确认数: {confirmations} | {self.config.scan_url}/tx/{tx_info.hash}"
-            )
+        """记录已确认的交易（级别未启用或被限流时不做格式化）"""
+        if not logger.isEnabledFor(logging.INFO) or not self.log_sampler.allow(f"{tx_info.tx_type}确认"):
+            return
+        logger.info(
+            "✅ %s交易确认: %s => %s | %s | 确认数: %s | %s/tx/%s",
+            tx_info.tx_type, tx_info.get_from_address(), tx_info.get_to_address(),
+            self.token_parser.format_amount(tx_info.value, tx_info.tx_type),
+            confirmations, self.config.scan_url, tx_info.hash
+        )
 
     def cleanup_timeout_transactions(self) -> int:
         """清理超时的交易"""
@@ -208,8 +242,10 @@ class ConfirmationManager:
             'pending_by_block': self.get_pending_by_block(),
             'confirmed_transactions': self.confirmed_transactions,
             'timeout_transactions': self.timeout_transactions,
+            'orphaned_transactions': self.orphaned_transactions,
             'oldest_pending_age': self.get_oldest_pending_age(),
-            'blocks_with_pending': len(self.pending_by_block)
+            'blocks_with_pending': len(self.pending_by_block),
+            'log_sampling': self.log_sampler.get_stats()
         }
     
     def clear_all_pending(self) -> int:
@@ -227,6 +263,7 @@ class ConfirmationManager:
         """重置统计数据"""
         self.confirmed_transactions = 0
         self.timeout_transactions = 0
+        self.orphaned_transactions = 0
         self.notifications_sent = 0
         self.notification_failures = 0
         logger.info("确认管理器统计数据已重置")
@@ -247,7 +284,8 @@ class ConfirmationManager:
                 for tx_info, confirmations in confirmed_transactions:
                     # 更新交易状态为已确认
                     success = await AsyncTransactionAdapter.update_status(
-                        session, tx_info.hash, "confirmed", confirmations
+                        session, tx_info.hash, "confirmed", confirmations, tx_info.transfer_index,
+                        tx_info.trace_address
                     )
                     
                     if success:
@@ -283,7 +321,8 @@ class ConfirmationManager:
                 # 找到对应的记录
                 target_record = None
                 for record in deposit_records:
-                    if record.tx_hash == tx_info.hash:
+                    if (record.tx_hash == tx_info.hash and record.transfer_index == tx_info.transfer_index
+                            and (record.trace_address or '') == tx_info.trace_address):
                         target_record = record
                         break
                 
@@ -390,13 +429,20 @@ class ConfirmationManager:
                 processed_count = 0
                 for record in pending_records:
                     # 为每个记录异步发送通知
+                    decimals = record.token_decimals if record.token_decimals is not None else NATIVE_DECIMALS
                     tx_info = TransactionInfo(
                         hash=record.tx_hash,
-                        tx={"blockNumber": record.block_number},
-                        value=float(record.amount),
+                        block_number=record.block_number,
+                        block_hash=record.block_hash or '',
+                        from_address=record.from_address,
+                        to_address=record.to_address,
+                        amount_wei=to_base_units(record.amount or 0, decimals),
                         tx_type=record.token_symbol,
                         found_at=record.created_at.timestamp() if record.created_at else 0,
-                        block_number=record.block_number
+                        contract=record.token_address or None,
+                        decimals=decimals,
+                        transfer_index=record.transfer_index or 0,
+                        trace_address=record.trace_address or ''
                     )
                     
                     asyncio.create_task(self._send_notification_async(tx_info, record.confirmations))
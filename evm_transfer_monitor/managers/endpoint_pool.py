@@ -0,0 +1,291 @@
+"""
+RPC节点池
+
+管理同一条链的多个RPC节点，按延迟和错误率的指数加权移动平均（EWMA）评分，
+把每次调用路由到最健康的节点；连续出错的节点被摘除，冷却后通过探测请求重新加入
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from web3 import AsyncWeb3
+from web3.middleware import ExtraDataToPOAMiddleware
+
+from managers.rate_limiter import RateLimiter, RequestPriority
+from managers.raw_rpc_client import RawRPCClient
+from managers.rpc_batcher import RPCBatcher
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class RPCEndpoint:
+    """单个RPC节点及其健康状态"""
+
+    def __init__(self, url: str, batcher: Optional[RPCBatcher] = None, w3: Optional[AsyncWeb3] = None,
+                 rate_limiter: Optional[RateLimiter] = None, raw_client: Optional[RawRPCClient] = None):
+        self.url = url
+        self.w3 = w3 or batcher.w3
+        self.batcher = batcher
+        self.rate_limiter = rate_limiter
+        self.raw_client = raw_client
+
+        # 健康评分
+        self.ewma_latency: Optional[float] = None
+        self.ewma_error_rate: float = 0.0
+        self.consecutive_errors: int = 0
+
+        # 摘除状态
+        self.ejected_until: float = 0
+        self.eject_seconds: float = 0
+        self.probing: bool = False
+
+        # 统计信息
+        self.requests: int = 0
+        self.errors: int = 0
+        self.ejections: int = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def is_ejected(self) -> bool:
+        """是否处于摘除状态"""
+        return self.ejected_until > 0
+
+    def score(self, error_penalty: float) -> float:
+        """节点评分（秒），越小越好；错误率按 error_penalty 折算为额外延迟，未测量过延迟的节点优先获得流量"""
+        return (self.ewma_latency or 0.0) + self.ewma_error_rate * error_penalty
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取节点统计信息"""
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'ewma_latency_ms': (self.ewma_latency or 0) * 1000,
+            'ewma_error_rate': self.ewma_error_rate,
+            'ejected': self.is_ejected,
+            'ejections': self.ejections,
+            'last_error': self.last_error,
+            'http_requests': self.batcher.http_requests if self.batcher else self.requests,
+            'rate_limit': self.rate_limiter.get_stats() if self.rate_limiter else {},
+        }
+
+
+class EndpointPool:
+    """RPC节点池 - 延迟感知路由和故障转移"""
+
+    def __init__(self, urls: List[str], batch_enabled: bool = True, batch_max_size: int = 20,
+                 batch_linger: float = 0.01, ewma_alpha: float = 0.3,
+                 eject_after_errors: int = 3, eject_seconds: float = 30,
+                 explore_ratio: float = 0.05, error_penalty: float = 2.0,
+                 max_rpc_per_second: float = 0, max_rpc_per_day: float = 0,
+                 raw_transport: bool = False):
+        """
+        初始化节点池
+
+        Args:
+            urls: 节点地址列表
+            batch_enabled: 是否为每个节点启用批量请求
+            batch_max_size: 单个批量请求的最大调用数
+            batch_linger: 批量合并等待窗口（秒）
+            ewma_alpha: EWMA 平滑系数
+            eject_after_errors: 连续出错多少次后摘除节点
+            eject_seconds: 首次摘除的冷却时间（秒），再次失败时翻倍
+            explore_ratio: 随机选择非最优节点的比例，用于持续更新各节点的延迟
+            error_penalty: 错误率折算的延迟惩罚（秒）
+            max_rpc_per_second: 每个节点每秒最大HTTP请求数，0 表示不限制
+            max_rpc_per_day: 每个节点每日最大HTTP请求数，0 表示不限制
+            raw_transport: 是否为每个节点创建原生 JSON-RPC 客户端
+        """
+        if not urls:
+            raise ValueError("RPC节点列表不能为空")
+
+        self.ewma_alpha = ewma_alpha
+        self.eject_after_errors = eject_after_errors
+        self.base_eject_seconds = eject_seconds
+        self.explore_ratio = explore_ratio
+        self.error_penalty = error_penalty
+
+        self.endpoints: List[RPCEndpoint] = []
+        for url in urls:
+            w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(url))
+            w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+            # 服务商按节点各自限流，每个节点使用独立的令牌桶
+            rate_limiter = RateLimiter(max_rpc_per_second, max_rpc_per_day)
+            raw_client = RawRPCClient(url) if raw_transport else None
+            batcher = RPCBatcher(
+                w3, max_batch_size=batch_max_size, linger=batch_linger,
+                rate_limiter=rate_limiter, raw_client=raw_client
+            ) if batch_enabled else None
+            self.endpoints.append(RPCEndpoint(
+                url, batcher=batcher, w3=w3, rate_limiter=rate_limiter, raw_client=raw_client
+            ))
+
+        self._probe_tasks: set = set()
+
+    @property
+    def primary(self) -> RPCEndpoint:
+        """主节点（配置中的第一个）"""
+        return self.endpoints[0]
+
+    def candidates(self) -> Iterator[RPCEndpoint]:
+        """
+        按评分从优到劣依次给出可用节点，用于首选和故障转移
+
+        所有节点都被摘除时，给出最早到期的节点，避免完全停摆
+        """
+        self._schedule_probes()
+
+        available = [ep for ep in self.endpoints if not ep.is_ejected]
+        if not available:
+            yield min(self.endpoints, key=lambda ep: ep.ejected_until)
+            return
+
+        available.sort(key=lambda ep: ep.score(self.error_penalty))
+        if len(available) > 1 and random.random() < self.explore_ratio:
+            explore = random.choice(available[1:])
+            available.remove(explore)
+            available.insert(0, explore)
+
+        yield from available
+
+    def record_success(self, endpoint: RPCEndpoint, latency: float) -> None:
+        """记录一次成功调用"""
+        alpha = self.ewma_alpha
+        endpoint.requests += 1
+        endpoint.consecutive_errors = 0
+        if endpoint.ewma_latency is None:
+            endpoint.ewma_latency = latency
+        else:
+            endpoint.ewma_latency = alpha * latency + (1 - alpha) * endpoint.ewma_latency
+        endpoint.ewma_error_rate = (1 - alpha) * endpoint.ewma_error_rate
+
+    def record_failure(self, endpoint: RPCEndpoint, error: Exception) -> None:
+        """记录一次失败调用，连续失败达到阈值时摘除节点"""
+        alpha = self.ewma_alpha
+        endpoint.requests += 1
+        endpoint.errors += 1
+        endpoint.consecutive_errors += 1
+        endpoint.last_error = str(error)[:200]
+        endpoint.ewma_error_rate = alpha + (1 - alpha) * endpoint.ewma_error_rate
+
+        if not endpoint.is_ejected and endpoint.consecutive_errors >= self.eject_after_errors:
+            self._eject(endpoint)
+
+    def _eject(self, endpoint: RPCEndpoint) -> None:
+        """摘除节点"""
+        if endpoint.eject_seconds:
+            endpoint.eject_seconds = min(endpoint.eject_seconds * 2, self.base_eject_seconds * 20)
+        else:
+            endpoint.eject_seconds = self.base_eject_seconds
+        endpoint.ejected_until = time.time() + endpoint.eject_seconds
+        endpoint.ejections += 1
+        logger.warning(
+            f"⛔ RPC节点已摘除 {endpoint.eject_seconds:.0f}s: {endpoint.url} "
+            f"(连续错误 {endpoint.consecutive_errors} 次: {endpoint.last_error})"
+        )
+
+    def _schedule_probes(self) -> None:
+        """为冷却到期的摘除节点安排探测"""
+        now = time.time()
+        for endpoint in self.endpoints:
+            if endpoint.is_ejected and not endpoint.probing and now >= endpoint.ejected_until:
+                endpoint.probing = True
+                try:
+                    task = asyncio.get_running_loop().create_task(self._probe(endpoint))
+                except RuntimeError:
+                    endpoint.probing = False
+                    continue
+                self._probe_tasks.add(task)
+                task.add_done_callback(self._probe_tasks.discard)
+
+    async def _probe(self, endpoint: RPCEndpoint) -> None:
+        """探测摘除节点，成功后重新加入"""
+        await endpoint.rate_limiter.acquire(RequestPriority.BACKGROUND)
+        start = time.time()
+        try:
+            await endpoint.w3.eth.get_block_number()
+        except Exception as e:
+            endpoint.last_error = str(e)[:200]
+            self._eject(endpoint)
+        else:
+            endpoint.ejected_until = 0
+            endpoint.eject_seconds = 0
+            endpoint.consecutive_errors = 0
+            endpoint.ewma_latency = time.time() - start
+            endpoint.ewma_error_rate = 0.0
+            logger.info(f"✅ RPC节点探测成功，重新加入: {endpoint.url}")
+        finally:
+            endpoint.probing = False
+
+    def set_batch_size(self, max_batch_size: int) -> None:
+        """调整各节点批量请求的最大调用数"""
+        for endpoint in self.endpoints:
+            if endpoint.batcher:
+                endpoint.batcher.max_batch_size = max(1, max_batch_size)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取各节点统计信息"""
+        return {endpoint.url: endpoint.get_stats() for endpoint in self.endpoints}
+
+    def get_batch_stats(self) -> Dict[str, Any]:
+        """汇总各节点的批量请求统计"""
+        batchers = [endpoint.batcher for endpoint in self.endpoints if endpoint.batcher]
+        if not batchers:
+            return {}
+
+        totals: Dict[str, Any] = {}
+        for batcher in batchers:
+            for key, value in batcher.get_stats().items():
+                if key == 'largest_batch':
+                    totals[key] = max(totals.get(key, 0), value)
+                elif key not in ('avg_batch_size', 'calls_per_request'):
+                    totals[key] = totals.get(key, 0) + value
+
+        total_calls = totals['batched_calls'] + totals['single_calls']
+        totals['avg_batch_size'] = (totals['batched_calls'] / totals['batches_sent']) if totals['batches_sent'] > 0 else 0.0
+        totals['calls_per_request'] = (total_calls / totals['http_requests']) if totals['http_requests'] > 0 else 0.0
+        return totals
+
+    def get_rate_limit_stats(self) -> Dict[str, Any]:
+        """汇总各节点的限流统计"""
+        totals: Dict[str, Any] = {'acquired': 0, 'delayed': 0, 'total_wait': 0.0, 'max_wait': 0.0,
+                                  'queue_length': 0, 'by_priority': {}}
+        for endpoint in self.endpoints:
+            stats = endpoint.rate_limiter.get_stats()
+            for key in ('acquired', 'delayed', 'total_wait', 'queue_length'):
+                totals[key] += stats[key]
+            totals['max_wait'] = max(totals['max_wait'], stats['max_wait'])
+            for name, item in stats['by_priority'].items():
+                merged = totals['by_priority'].setdefault(
+                    name, {'acquired': 0, 'delayed': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+                )
+                merged['acquired'] += item['acquired']
+                merged['delayed'] += item['delayed']
+                merged['total_wait'] += item['total_wait']
+                merged['max_wait'] = max(merged['max_wait'], item['max_wait'])
+
+        for merged in totals['by_priority'].values():
+            merged['avg_wait'] = (merged['total_wait'] / merged['acquired']) if merged['acquired'] > 0 else 0.0
+        return totals
+
+    def get_requests_saved(self) -> int:
+        """批量合并节省的HTTP请求总数"""
+        return sum(endpoint.batcher.requests_saved for endpoint in self.endpoints if endpoint.batcher)
+
+    async def close(self) -> None:
+        """关闭各节点的原生 JSON-RPC 会话"""
+        for endpoint in self.endpoints:
+            if endpoint.raw_client:
+                await endpoint.raw_client.close()
+
+    def reset_stats(self) -> None:
+        """重置统计数据（不影响健康评分）"""
+        for endpoint in self.endpoints:
+            endpoint.requests = 0
+            endpoint.errors = 0
+            endpoint.ejections = 0
+            endpoint.rate_limiter.reset_stats()
+            if endpoint.batcher:
+                endpoint.batcher.reset_stats()
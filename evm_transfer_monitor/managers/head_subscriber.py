@@ -0,0 +1,123 @@
+"""
+新区块头订阅器
+
+通过 WebSocket eth_subscribe('newHeads') 推送获取最新区块号，发布到共享链头跟踪器，
+替代固定间隔轮询 get_block_number，断线后自动重连，
+连接不可用时由监控循环退回到原有的轮询方式
+"""
+
+import asyncio
+import time
+from typing import Optional, Dict, Any
+
+from web3 import AsyncWeb3, WebSocketProvider
+
+from config.monitor_config import MonitorConfig
+from managers.rpc_manager import RPCManager
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class NewHeadsSubscriber:
+    """新区块头订阅器 - 推送式区块头来源"""
+
+    def __init__(self, config: MonitorConfig, rpc_manager: RPCManager):
+        """
+        初始化订阅器
+
+        Args:
+            config: 监控配置（使用 ws_url）
+            rpc_manager: RPC管理器，收到的新区块号会发布到其共享链头
+        """
+        self.config = config
+        self.rpc_manager = rpc_manager
+        self.ws_url = config.ws_url
+
+        self.latest_head: Optional[int] = None
+        self.last_head_time: float = 0
+        self.is_connected: bool = False
+        self._running: bool = False
+        self._task: Optional[asyncio.Task] = None
+
+        # 统计信息
+        self.heads_received: int = 0
+        self.reconnects: int = 0
+
+    def start(self) -> None:
+        """启动订阅任务"""
+        if self._running:
+            return
+        self._running = True
+        self._task = asyncio.create_task(self._run(), name=f"new_heads_{self.config.chain_name}")
+        self.rpc_manager.head_subscriber = self
+
+    async def stop(self) -> None:
+        """停止订阅任务"""
+        self._running = False
+        if self.rpc_manager.head_subscriber is self:
+            self.rpc_manager.head_subscriber = None
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.is_connected = False
+
+    async def _run(self) -> None:
+        """订阅主循环，断线后指数退避重连"""
+        delay = 1.0
+        while self._running:
+            try:
+                async with AsyncWeb3(WebSocketProvider(self.ws_url)) as w3:
+                    await w3.eth.subscribe('newHeads')
+                    self.is_connected = True
+                    delay = 1.0
+                    logger.info(f"🔌 newHeads 订阅已建立: {self.ws_url}")
+
+                    # 连接（或重连）后先同步一次当前高度，断线期间的区块由监控循环补齐
+                    self._on_new_head(await w3.eth.get_block_number())
+
+                    async for payload in w3.socket.process_subscriptions():
+                        if not self._running:
+                            break
+                        head = payload.get('result') or {}
+                        number = head.get('number')
+                        if number is not None:
+                            self._on_new_head(number)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ newHeads 订阅中断: {e}")
+            finally:
+                self.is_connected = False
+
+            if self._running:
+                self.reconnects += 1
+                logger.info(f"🔄 {delay:.0f}s 后重连 newHeads 订阅，期间退回轮询模式")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.config.ws_reconnect_max_delay)
+
+    def _on_new_head(self, number: int) -> None:
+        """处理新的区块头"""
+        if self.latest_head is not None and number <= self.latest_head:
+            return
+        self.latest_head = number
+        self.last_head_time = time.time()
+        self.heads_received += 1
+        self.rpc_manager.update_block_number(number)
+
+    def is_fresh(self) -> bool:
+        """订阅是否可用：已连接且最近收到过新区块头"""
+        if not self.is_connected or self.latest_head is None:
+            return False
+        return time.time() - self.last_head_time < self.config.block_time * 3
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取订阅统计信息"""
+        return {
+            'connected': self.is_connected,
+            'latest_head': self.latest_head,
+            'heads_received': self.heads_received,
+            'reconnects': self.reconnects,
+            'seconds_since_last_head': (time.time() - self.last_head_time) if self.last_head_time else None,
+        }
@@ -0,0 +1,150 @@
+"""
+共享链头跟踪器
+
+同一进程内多个监控器（例如 MultiChainMonitor 中同一条链的多个实例）以及确认管理器、健康检查
+原本各自通过 RPCManager 轮询 eth_blockNumber。本模块按 (链, 节点) 维护一个进程内共享的链头：
+
+- 刷新是单飞的：缓存过期时只有一个请求在途，其他调用方等待同一个结果
+- 新链头通过 asyncio.Event 广播，等待方被唤醒而不是各自定时轮询
+- newHeads 订阅收到的区块头同样发布到这里，所有组件看到一致的链头
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+BlockNumberFetcher = Callable[[], Awaitable[int]]
+
+
+class HeadTracker:
+    """共享链头跟踪器 - 单飞刷新并广播新区块头"""
+
+    def __init__(self, chain_name: str, endpoint: str):
+        self.chain_name = chain_name
+        self.endpoint = endpoint
+
+        self.latest_head: Optional[int] = None
+        self.updated_at: float = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event: Optional[asyncio.Event] = None
+        self._refresh_task: Optional[asyncio.Future] = None
+
+        # 统计信息
+        self.polls: int = 0
+        self.shared_waits: int = 0
+        self.heads_published: int = 0
+
+    def _bind_loop(self) -> None:
+        """绑定当前事件循环，跨事件循环复用时重建等待原语"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._event = asyncio.Event()
+            self._refresh_task = None
+
+    def age(self) -> float:
+        """距上次更新的秒数"""
+        return time.time() - self.updated_at if self.updated_at else float('inf')
+
+    def publish(self, number: int) -> bool:
+        """
+        发布链头（轮询结果或推送的区块头）
+
+        Returns:
+            bool: 是否为更高的新链头
+        """
+        self.updated_at = time.time()
+        if self.latest_head is not None and number <= self.latest_head:
+            return False
+
+        self.latest_head = number
+        self.heads_published += 1
+        if self._event is not None:
+            # 唤醒当前全部等待方，之后的等待使用新的事件
+            self._event.set()
+            self._event = asyncio.Event()
+        return True
+
+    async def get_head(self, fetcher: BlockNumberFetcher, max_age: float) -> int:
+        """
+        获取链头，超过 max_age 未更新时刷新
+
+        Args:
+            fetcher: 查询最新区块号的协程函数（只在需要刷新时调用）
+            max_age: 可接受的最大缓存时间（秒）
+        """
+        self._bind_loop()
+        if self.latest_head is not None and self.age() <= max_age:
+            return self.latest_head
+
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh(fetcher))
+        else:
+            self.shared_waits += 1
+        return await asyncio.shield(self._refresh_task)
+
+    async def _refresh(self, fetcher: BlockNumberFetcher) -> int:
+        """查询一次最新区块号并发布"""
+        number = await fetcher()
+        self.polls += 1
+        self.publish(number)
+        return self.latest_head
+
+    async def wait_for_head(self, after_block: int, timeout: float,
+                            fetcher: BlockNumberFetcher, poll_interval: float) -> bool:
+        """
+        等待高于 after_block 的链头
+
+        等待期间每 poll_interval 秒刷新一次（多个等待方共享同一次刷新）；
+        其他组件或推送发布新链头时立即返回
+
+        Returns:
+            bool: 超时前是否出现了新链头
+        """
+        self._bind_loop()
+        deadline = time.time() + timeout
+        while True:
+            if self.latest_head is not None and self.latest_head > after_block:
+                return True
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+
+            event = self._event
+            try:
+                await asyncio.wait_for(event.wait(), min(poll_interval, remaining))
+            except asyncio.TimeoutError:
+                try:
+                    await self.get_head(fetcher, poll_interval)
+                except Exception as e:
+                    logger.debug(f"刷新链头失败: {e}")
+
+    def get_stats(self) -> Dict[str, object]:
+        """获取跟踪器统计"""
+        return {
+            'chain_name': self.chain_name,
+            'endpoint': self.endpoint,
+            'latest_head': self.latest_head,
+            'seconds_since_update': self.age() if self.updated_at else None,
+            'polls': self.polls,
+            'shared_waits': self.shared_waits,
+            'heads_published': self.heads_published,
+        }
+
+
+_trackers: Dict[Tuple[str, str], HeadTracker] = {}
+
+
+def get_head_tracker(chain_name: str, endpoint: str) -> HeadTracker:
+    """获取 (链, 节点) 对应的共享链头跟踪器（进程内单例）"""
+    key = (chain_name, endpoint)
+    tracker = _trackers.get(key)
+    if tracker is None:
+        tracker = HeadTracker(chain_name, endpoint)
+        _trackers[key] = tracker
+    return tracker
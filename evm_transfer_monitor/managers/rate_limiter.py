@@ -0,0 +1,199 @@
+"""
+RPC请求速率限制器
+
+基于令牌桶实现，调用方在发出HTTP请求前获取令牌：
+每秒桶限制瞬时速率，每日桶按日配额平滑补充，保证不超过服务商的日调用上限。
+令牌不足时按优先级排队，最新区块相关请求优先于后台任务
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+from typing import Any, Dict, List, Tuple
+
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# 每日配额桶最多积攒的时长（秒），允许追块时短时突发，长期速率不超过日配额
+DAY_BUCKET_BURST_SECONDS = 3600
+
+
+class RequestPriority(IntEnum):
+    """请求优先级，数值越小越优先"""
+    HEAD = 0          # 最新区块号、最新区块
+    NORMAL = 1        # 常规请求（事件扫描等）
+    BACKGROUND = 2    # 后台任务（Gas价格、节点探测等）
+
+
+class TokenBucket:
+    """令牌桶"""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量（允许的最大突发量）
+        """
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+
+    def _refill(self) -> None:
+        """按流逝时间补充令牌"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def available(self, tokens: float = 1) -> bool:
+        """当前是否有足够令牌"""
+        self._refill()
+        return self.tokens >= tokens
+
+    def take(self, tokens: float = 1) -> None:
+        """扣除令牌（调用前应确认 available）"""
+        self.tokens -= tokens
+
+    def time_until(self, tokens: float = 1) -> float:
+        """距离有足够令牌还需等待的时间（秒）"""
+        self._refill()
+        if self.tokens >= tokens:
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """RPC速率限制器 - 每秒桶 + 每日桶，按优先级排队"""
+
+    def __init__(self, max_per_second: float, max_per_day: float):
+        """
+        初始化速率限制器
+
+        Args:
+            max_per_second: 每秒最大请求数
+            max_per_day: 每日最大请求数
+        """
+        self.buckets: List[TokenBucket] = []
+        if max_per_second and max_per_second > 0:
+            self.buckets.append(TokenBucket(max_per_second, max_per_second))
+        if max_per_day and max_per_day > 0:
+            day_rate = max_per_day / 86400
+            self.buckets.append(TokenBucket(day_rate, min(max_per_day, day_rate * DAY_BUCKET_BURST_SECONDS)))
+
+        self._waiters: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._wakeup_handle = None
+
+        # 统计信息（按优先级）
+        self._acquired: Dict[RequestPriority, int] = {p: 0 for p in RequestPriority}
+        self._delayed: Dict[RequestPriority, int] = {p: 0 for p in RequestPriority}
+        self._wait_total: Dict[RequestPriority, float] = {p: 0.0 for p in RequestPriority}
+        self._wait_max: Dict[RequestPriority, float] = {p: 0.0 for p in RequestPriority}
+
+    def _try_take(self, tokens: float) -> bool:
+        """所有桶都有足够令牌时一起扣除"""
+        if all(bucket.available(tokens) for bucket in self.buckets):
+            for bucket in self.buckets:
+                bucket.take(tokens)
+            return True
+        return False
+
+    def _time_until(self, tokens: float) -> float:
+        """距离所有桶都有足够令牌的等待时间"""
+        return max((bucket.time_until(tokens) for bucket in self.buckets), default=0.0)
+
+    async def acquire(self, priority: RequestPriority = RequestPriority.NORMAL, tokens: float = 1) -> float:
+        """
+        获取令牌，令牌不足时按优先级排队等待
+
+        Args:
+            priority: 请求优先级
+            tokens: 需要的令牌数（一次HTTP请求为1）
+
+        Returns:
+            float: 等待时间（秒）
+        """
+        if not self._waiters and self._try_take(tokens):
+            self._record(priority, 0.0)
+            return 0.0
+
+        start = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), tokens, future))
+        self._schedule_wakeup()
+
+        await future
+
+        waited = time.monotonic() - start
+        self._record(priority, waited)
+        return waited
+
+    def _schedule_wakeup(self) -> None:
+        """按队首请求所需令牌安排下一次分发"""
+        if self._wakeup_handle is not None or not self._waiters:
+            return
+        delay = self._time_until(self._waiters[0][2])
+        self._wakeup_handle = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _dispatch(self) -> None:
+        """按优先级把令牌分发给等待者"""
+        self._wakeup_handle = None
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():
+                # 等待者已取消
+                heapq.heappop(self._waiters)
+                continue
+            if not self._try_take(tokens):
+                break
+            heapq.heappop(self._waiters)
+            future.set_result(None)
+        self._schedule_wakeup()
+
+    def _record(self, priority: RequestPriority, waited: float) -> None:
+        """记录获取令牌的统计"""
+        priority = RequestPriority(priority)
+        self._acquired[priority] += 1
+        if waited > 0:
+            self._delayed[priority] += 1
+            self._wait_total[priority] += waited
+            self._wait_max[priority] = max(self._wait_max[priority], waited)
+
+    @property
+    def queue_length(self) -> int:
+        """当前排队等待的请求数"""
+        return sum(1 for _, _, _, future in self._waiters if not future.done())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取限流统计信息"""
+        by_priority = {}
+        for priority in RequestPriority:
+            acquired = self._acquired[priority]
+            by_priority[priority.name.lower()] = {
+                'acquired': acquired,
+                'delayed': self._delayed[priority],
+                'total_wait': self._wait_total[priority],
+                'avg_wait': (self._wait_total[priority] / acquired) if acquired > 0 else 0.0,
+                'max_wait': self._wait_max[priority],
+            }
+        return {
+            'acquired': sum(self._acquired.values()),
+            'delayed': sum(self._delayed.values()),
+            'total_wait': sum(self._wait_total.values()),
+            'max_wait': max(self._wait_max.values()),
+            'queue_length': self.queue_length,
+            'by_priority': by_priority,
+        }
+
+    def reset_stats(self) -> None:
+        """重置统计数据（不影响令牌）"""
+        for priority in RequestPriority:
+            self._acquired[priority] = 0
+            self._delayed[priority] = 0
+            self._wait_total[priority] = 0.0
+            self._wait_max[priority] = 0.0
@@ -0,0 +1,238 @@
+"""
+原生 JSON-RPC 客户端
+
+绕过 web3 的中间件和结果格式化器，通过连接池化的 aiohttp 会话直接发送 JSON-RPC 请求，
+使用 orjson 解码（未安装时退回标准库 json），只把交易处理需要的字段转换为轻量的 dict。
+繁忙区块包含数百笔交易时，web3 为每笔交易构造 AttributeDict/HexBytes 的开销是主要的 CPU 消耗
+"""
+
+import itertools
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import aiohttp
+from web3.exceptions import BlockNotFound, TransactionNotFound, Web3RPCError
+
+from models.data_types import RawBlock
+from utils.log_utils import get_logger
+from utils.token_parser import TRANSFER_EVENT_TOPIC
+
+try:
+    import orjson
+
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:  # orjson 为可选依赖
+    import json
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode()
+
+    _loads = json.loads
+
+logger = get_logger(__name__)
+
+
+class RawCall:
+    """原生 JSON-RPC 调用 - 方法名、参数和结果转换函数"""
+
+    __slots__ = ('method', 'params', 'formatter')
+
+    def __init__(self, method: str, params: Sequence[Any],
+                 formatter: Optional[Callable[[Any], Any]] = None):
+        self.method = method
+        self.params = list(params)
+        self.formatter = formatter
+
+    def format(self, result: Any) -> Any:
+        """转换节点返回的原始结果"""
+        return self.formatter(result) if self.formatter else result
+
+
+class RawRPCClient:
+    """原生 JSON-RPC 客户端 - 单个节点的连接池化 HTTP 会话"""
+
+    def __init__(self, url: str, timeout: float = 30.0, pool_size: int = 20):
+        """
+        初始化客户端
+
+        Args:
+            url: 节点地址
+            timeout: 单个HTTP请求超时时间（秒）
+            pool_size: 连接池最大连接数
+        """
+        self.url = url
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.pool_size = pool_size
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._ids = itertools.count(1)
+
+        # 统计信息
+        self.http_requests: int = 0
+        self.bytes_received: int = 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取（必要时创建）HTTP 会话，会话在首次请求时于事件循环内创建"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=self.timeout,
+                headers={'Content-Type': 'application/json'}
+            )
+        return self._session
+
+    async def _post(self, payload: Any) -> Any:
+        """发送一个HTTP请求并解码响应"""
+        session = self._get_session()
+        async with session.post(self.url, data=_dumps(payload)) as response:
+            response.raise_for_status()
+            body = await response.read()
+        self.http_requests += 1
+        self.bytes_received += len(body)
+        return _loads(body)
+
+    def _payload(self, call: RawCall) -> Dict[str, Any]:
+        """构造 JSON-RPC 请求体"""
+        return {'jsonrpc': '2.0', 'id': next(self._ids), 'method': call.method, 'params': call.params}
+
+    @staticmethod
+    def _unwrap(call: RawCall, response: Dict[str, Any]) -> Any:
+        """取出单个响应的结果，节点返回错误时抛出 Web3RPCError"""
+        if response.get('error') is not None:
+            raise Web3RPCError(f"{call.method} 调用失败: {response['error']}", rpc_response=response)
+        return call.format(response.get('result'))
+
+    async def request(self, call: RawCall) -> Any:
+        """发送单个调用"""
+        response = await self._post(self._payload(call))
+        return self._unwrap(call, response)
+
+    async def request_batch(self, calls: List[RawCall]) -> List[Any]:
+        """
+        以一个 JSON-RPC batch 数组发送多个调用
+
+        单个调用出错不影响同一批次的其他调用
+
+        Returns:
+            List[Any]: 与 calls 一一对应的结果，出错的调用对应位置为异常对象
+        """
+        payloads = [self._payload(call) for call in calls]
+        responses = await self._post(payloads)
+        if not isinstance(responses, list):
+            # 节点拒绝了整个批量（例如超过批量大小限制）
+            error = responses.get('error') if isinstance(responses, dict) else responses
+            raise Web3RPCError(f"批量请求被拒绝: {error}")
+
+        by_id = {response.get('id'): response for response in responses}
+        results: List[Any] = []
+        for call, payload in zip(calls, payloads):
+            response = by_id.get(payload['id'])
+            if response is None:
+                results.append(Web3RPCError(f"批量响应中缺少 {call.method} 的结果"))
+                continue
+            try:
+                results.append(self._unwrap(call, response))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def close(self) -> None:
+        """关闭HTTP会话"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+def _to_int(value: Optional[str]) -> int:
+    """十六进制数量转整数"""
+    return int(value, 16) if value else 0
+
+
+def parse_transaction(tx: Dict[str, Any]) -> Dict[str, Any]:
+    """只保留交易处理需要的字段，数量字段转为整数，地址和哈希保持十六进制字符串"""
+    return {
+        'hash': tx['hash'],
+        'from': tx['from'],
+        'to': tx.get('to'),
+        'value': _to_int(tx.get('value')),
+        'gas': _to_int(tx.get('gas')),
+        'gasPrice': _to_int(tx.get('gasPrice')),
+        'input': tx.get('input') or '0x',
+        'blockNumber': _to_int(tx.get('blockNumber')),
+        'blockHash': tx.get('blockHash') or '',
+    }
+
+
+def parse_receipt(receipt: Dict[str, Any]) -> Dict[str, Any]:
+    """只保留回执中的执行状态、Gas 字段和 ERC-20 Transfer 事件（用于核对解码出的代币转账）"""
+    return {
+        'transactionHash': receipt['transactionHash'],
+        'status': _to_int(receipt.get('status')) if receipt.get('status') is not None else None,
+        'gasUsed': _to_int(receipt.get('gasUsed')),
+        'effectiveGasPrice': _to_int(receipt['effectiveGasPrice']) if receipt.get('effectiveGasPrice') else None,
+        'logs': [
+            {
+                'address': log['address'],
+                'topics': log['topics'],
+                'data': log.get('data') or '0x',
+                'logIndex': _to_int(log.get('logIndex')),
+            }
+            for log in receipt.get('logs') or ()
+            if len(log.get('topics') or ()) == 3 and log['topics'][0].lower() == TRANSFER_EVENT_TOPIC
+        ],
+    }
+
+
+def parse_block_receipts(result: Optional[List[Dict[str, Any]]], block_number: int) -> List[Dict[str, Any]]:
+    """
+    转换 eth_getBlockReceipts 的原始结果
+
+    Raises:
+        BlockNotFound: 区块尚未生成
+    """
+    if result is None:
+        raise BlockNotFound(f"Block with id: '{block_number}' not found.")
+    return [parse_receipt(receipt) for receipt in result]
+
+
+def parse_transaction_receipt(result: Optional[Dict[str, Any]], tx_hash: str) -> Dict[str, Any]:
+    """
+    转换 eth_getTransactionReceipt 的原始结果
+
+    Raises:
+        TransactionNotFound: 回执不存在
+    """
+    if result is None:
+        raise TransactionNotFound(f"Transaction with hash: '{tx_hash}' not found.")
+    return parse_receipt(result)
+
+
+def parse_block_header(result: Optional[Dict[str, Any]], block_number: int) -> RawBlock:
+    """
+    把 eth_getBlockByNumber(full=False) 的原始结果转换为只含区块头字段的精简区块（transactions 为空）
+
+    Raises:
+        BlockNotFound: 区块尚未生成
+    """
+    if result is None:
+        raise BlockNotFound(f"Block with id: '{block_number}' not found.")
+    return RawBlock(
+        number=_to_int(result.get('number')),
+        hash=result.get('hash') or '',
+        parent_hash=result.get('parentHash') or '',
+        timestamp=_to_int(result.get('timestamp')),
+        logs_bloom=result.get('logsBloom') or '',
+        transactions=[]
+    )
+
+
+def parse_block(result: Optional[Dict[str, Any]], block_number: int) -> RawBlock:
+    """
+    把 eth_getBlockByNumber(full=True) 的原始结果转换为精简区块
+
+    Raises:
+        BlockNotFound: 区块尚未生成
+    """
+    block = parse_block_header(result, block_number)
+    block.transactions = [parse_transaction(tx) for tx in result.get('transactions', [])]
+    return block
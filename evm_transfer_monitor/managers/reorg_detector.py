@@ -0,0 +1,130 @@
+"""
+区块重组检测器
+
+用环形缓冲区记录最近 required_confirmations 个已处理区块的 (区块号, 哈希, 父哈希)，
+处理每个新区块前校验它的父哈希是否等于缓冲区中上一个区块的哈希。
+不一致说明链发生了重组：从新到旧逐块获取当前链上的区块头与缓冲区比对，找到分叉点，
+由监控器作废分叉点之后的待确认交易和入库记录，并从分叉点之后重新处理新链
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional
+
+from config.monitor_config import MonitorConfig
+from managers.rate_limiter import RequestPriority
+from managers.rpc_manager import RPCManager
+from models.data_types import RawBlock
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class BlockRef:
+    """已处理区块的链接信息"""
+    number: int
+    hash: str
+    parent_hash: str
+
+
+class ReorgDetector:
+    """区块重组检测器 - 基于父哈希链接校验的环形缓冲区"""
+
+    def __init__(self, config: MonitorConfig, rpc_manager: RPCManager):
+        self.config = config
+        self.rpc_manager = rpc_manager
+
+        # 超出确认数的重组已无法通过作废待确认交易补救，缓冲区只需覆盖确认窗口
+        self._blocks: Deque[BlockRef] = deque(maxlen=max(config.required_confirmations, 2))
+        # 最近一次重组被替换的区块（按区块哈希作废入库记录）
+        self.orphaned: List[BlockRef] = []
+
+        # 统计信息
+        self.reorgs_detected: int = 0
+        self.orphaned_blocks: int = 0
+        self.max_depth: int = 0
+        self.deep_reorgs: int = 0
+
+    @property
+    def enabled(self) -> bool:
+        """检测是否生效（事件模式不逐块获取区块头，不检测）"""
+        return self.config.reorg_detection_enabled and not self.config.is_logs_ingestion()
+
+    def _hex(self, value: Any) -> str:
+        """哈希转小写十六进制字符串"""
+        if not isinstance(value, str):
+            value = self.rpc_manager.w3.to_hex(value)
+        return value.lower()
+
+    def _ref(self, block: Any) -> BlockRef:
+        """提取区块链接信息，兼容 web3 区块和 RawBlock"""
+        if isinstance(block, RawBlock):
+            return BlockRef(block.number, block.hash.lower(), block.parent_hash.lower())
+        return BlockRef(block['number'], self._hex(block['hash']), self._hex(block['parentHash']))
+
+    async def check(self, block: Any) -> Optional[int]:
+        """
+        校验新区块与已处理区块的链接关系
+
+        Args:
+            block: 即将处理的区块或区块头（web3 区块或 RawBlock）
+
+        Returns:
+            Optional[int]: 检测到重组时返回分叉点（新旧链共同的最后一个区块号），
+                           缓冲区中分叉点之后的记录已移入 orphaned；未重组时记录该区块并返回 None
+        """
+        ref = self._ref(block)
+        last = self._blocks[-1] if self._blocks else None
+
+        if last is None or ref.number != last.number + 1:
+            # 首个区块或进度不连续（例如重启、手动调整），从该区块重新开始记录
+            self._blocks.clear()
+            self._blocks.append(ref)
+            return None
+
+        if ref.parent_hash == last.hash:
+            self._blocks.append(ref)
+            return None
+
+        fork_point = await self._find_fork_point()
+        depth = last.number - fork_point
+        self.reorgs_detected += 1
+        self.orphaned_blocks += depth
+        self.max_depth = max(self.max_depth, depth)
+        orphaned = []
+        while self._blocks and self._blocks[-1].number > fork_point:
+            orphaned.append(self._blocks.pop())
+        self.orphaned = orphaned
+
+        logger.warning(
+            f"🔀 检测到区块重组: 区块 {ref.number} 的父哈希 {ref.parent_hash[:10]}... 与已处理的区块 "
+            f"{last.number} ({last.hash[:10]}...) 不符 | 分叉点: {fork_point} | 深度: {depth}"
+        )
+        return fork_point
+
+    async def _find_fork_point(self) -> int:
+        """从新到旧比对缓冲区与当前链上的区块哈希，返回最后一个一致的区块号（绕过区块缓存）"""
+        for ref in reversed(self._blocks):
+            header = await self.rpc_manager.get_block_header(ref.number, RequestPriority.HEAD, use_cache=False)
+            if self._ref(header).hash == ref.hash:
+                return ref.number
+
+        # 缓冲区内的区块全部被替换，重组深度超过确认数
+        self.deep_reorgs += 1
+        oldest = self._blocks[0].number
+        logger.error(
+            f"❌ 区块重组深度超过 {len(self._blocks)} 个区块，区块 {oldest} 之前已确认的交易可能已失效，请人工核对"
+        )
+        return oldest - 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取重组检测统计"""
+        return {
+            'enabled': self.enabled,
+            'tracked_blocks': len(self._blocks),
+            'reorgs_detected': self.reorgs_detected,
+            'orphaned_blocks': self.orphaned_blocks,
+            'max_depth': self.max_depth,
+            'deep_reorgs': self.deep_reorgs,
+        }
@@ -0,0 +1,235 @@
+"""
+JSON-RPC 批量请求合并器
+
+将并发发起的 RPC 调用在短暂的等待窗口内合并为一个 JSON-RPC batch 数组，
+通过一次 HTTP 往返发送，降低按请求计费/限流的服务商上的调用次数。
+原生调用（RawCall）经 RawRPCClient 发送，与 web3 调用分别成批
+"""
+
+import asyncio
+from typing import Any, Callable, List, Optional, Tuple, Dict, Union
+
+from web3 import AsyncWeb3
+
+from managers.rate_limiter import RateLimiter, RequestPriority
+from managers.raw_rpc_client import RawCall, RawRPCClient
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# 请求工厂：接收 AsyncWeb3 实例，返回 web3 方法调用（在批量上下文中只生成请求信息）
+RequestFactory = Callable[[AsyncWeb3], Any]
+
+# 一个 RPC 调用：web3 请求工厂或原生 JSON-RPC 调用
+RPCRequest = Union[RequestFactory, RawCall]
+
+# 队列条目：调用、结果 Future、优先级
+QueueEntry = Tuple[RPCRequest, asyncio.Future, RequestPriority]
+
+
+async def execute_request(request: RPCRequest, w3: AsyncWeb3, raw_client: Optional[RawRPCClient]) -> Any:
+    """不经批量合并直接发送一个调用"""
+    if isinstance(request, RawCall):
+        return await raw_client.request(request)
+    return await request(w3)
+
+
+class RPCBatcher:
+    """JSON-RPC 批量请求合并器 - 按最大批量和等待窗口合并并发调用"""
+
+    def __init__(self, w3: AsyncWeb3, max_batch_size: int = 20, linger: float = 0.01,
+                 rate_limiter: Optional[RateLimiter] = None, raw_client: Optional[RawRPCClient] = None):
+        """
+        初始化批量合并器
+
+        Args:
+            w3: Web3 实例
+            max_batch_size: 单个批量请求包含的最大调用数
+            linger: 第一个调用入队后等待更多调用的时间（秒）
+            rate_limiter: 速率限制器，每个HTTP请求发出前获取一个令牌
+            raw_client: 原生 JSON-RPC 客户端，用于发送 RawCall
+        """
+        self.w3 = w3
+        self.raw_client = raw_client
+        self.max_batch_size = max(1, max_batch_size)
+        self.linger = max(0.0, linger)
+        self.rate_limiter = rate_limiter
+
+        self._queue: List[QueueEntry] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: set = set()
+
+        # 统计相关
+        self.http_requests: int = 0      # 实际发出的 HTTP 请求数
+        self.batches_sent: int = 0       # 成功发出的批量请求数
+        self.batched_calls: int = 0      # 通过批量请求完成的调用数
+        self.single_calls: int = 0       # 单独发送的调用数
+        self.fallback_batches: int = 0   # 批量失败后退回逐个发送的次数
+        self.largest_batch: int = 0
+
+    async def submit(self, request_factory: RPCRequest,
+                     priority: RequestPriority = RequestPriority.NORMAL) -> Any:
+        """
+        提交一个调用并等待其结果
+
+        Args:
+            request_factory: 请求工厂，例如 lambda w3: w3.eth.get_block(n, True)，或原生调用 RawCall
+            priority: 请求优先级，批次按其中最高的优先级获取令牌
+
+        Returns:
+            经过 web3 格式化（或 RawCall 转换函数转换）后的调用结果
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((request_factory, future, priority))
+
+        if len(self._queue) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.linger, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """把当前队列切分为批次并发送"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        while self._queue:
+            entries = self._queue[:self.max_batch_size]
+            self._queue = self._queue[self.max_batch_size:]
+            task = asyncio.create_task(self._send(entries))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+    async def _acquire(self, priority: RequestPriority) -> None:
+        """发出HTTP请求前获取令牌"""
+        if self.rate_limiter:
+            await self.rate_limiter.acquire(priority)
+
+    async def _send(self, entries: List[QueueEntry]) -> None:
+        """发送一个批次"""
+        # 调用方已取消的请求不再发送
+        entries = [entry for entry in entries if not entry[1].done()]
+        if not entries:
+            return
+
+        raw_entries = [entry for entry in entries if isinstance(entry[0], RawCall)]
+        if raw_entries and len(raw_entries) < len(entries):
+            # 原生调用和 web3 调用走不同的传输，分别成批发送
+            web3_entries = [entry for entry in entries if not isinstance(entry[0], RawCall)]
+            await asyncio.gather(self._send_batch(raw_entries), self._send_batch(web3_entries))
+        else:
+            await self._send_batch(entries)
+
+    async def _send_batch(self, entries: List[QueueEntry]) -> None:
+        """发送一组使用同一传输的调用"""
+        if len(entries) == 1:
+            await self._send_single(*entries[0])
+            return
+
+        await self._acquire(min(priority for _, _, priority in entries))
+        entries = [entry for entry in entries if not entry[1].done()]
+        if not entries:
+            return
+
+        if isinstance(entries[0][0], RawCall):
+            await self._send_raw_batch(entries)
+            return
+
+        try:
+            self.http_requests += 1
+            async with self.w3.batch_requests() as batch:
+                for factory, _, _ in entries:
+                    batch.add(factory(self.w3))
+                results = await batch.async_execute()
+        except Exception as e:
+            # 批量中任一调用出错（例如区块尚未生成）时整批失败，
+            # 退回逐个发送，让错误只落在对应的调用上
+            logger.debug(f"批量请求失败，退回逐个发送 ({len(entries)} 个调用): {e}")
+            self.fallback_batches += 1
+            await asyncio.gather(*(self._send_single(*entry) for entry in entries))
+            return
+
+        self.batches_sent += 1
+        self.batched_calls += len(entries)
+        self.largest_batch = max(self.largest_batch, len(entries))
+
+        for (_, future, _), result in zip(entries, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _send_raw_batch(self, entries: List[QueueEntry]) -> None:
+        """发送原生调用批次，单个调用的错误只落在对应的调用上"""
+        try:
+            self.http_requests += 1
+            results = await self.raw_client.request_batch([call for call, _, _ in entries])
+        except Exception as e:
+            for _, future, _ in entries:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches_sent += 1
+        self.batched_calls += len(entries)
+        self.largest_batch = max(self.largest_batch, len(entries))
+
+        for (_, future, _), result in zip(entries, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _send_single(self, factory: RPCRequest, future: asyncio.Future,
+                           priority: RequestPriority = RequestPriority.NORMAL) -> None:
+        """单独发送一个调用"""
+        if future.done():
+            return
+
+        await self._acquire(priority)
+        if future.done():
+            return
+
+        self.http_requests += 1
+        self.single_calls += 1
+        try:
+            result = await execute_request(factory, self.w3, self.raw_client)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+
+        if not future.done():
+            future.set_result(result)
+
+    @property
+    def requests_saved(self) -> int:
+        """合并批量请求节省的 HTTP 请求数"""
+        return self.batched_calls - self.batches_sent
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取批量请求统计"""
+        total_calls = self.batched_calls + self.single_calls
+        return {
+            'http_requests': self.http_requests,
+            'batches_sent': self.batches_sent,
+            'batched_calls': self.batched_calls,
+            'single_calls': self.single_calls,
+            'fallback_batches': self.fallback_batches,
+            'largest_batch': self.largest_batch,
+            'avg_batch_size': (self.batched_calls / self.batches_sent) if self.batches_sent > 0 else 0.0,
+            'calls_per_request': (total_calls / self.http_requests) if self.http_requests > 0 else 0.0,
+            'requests_saved': self.requests_saved,
+        }
+
+    def reset_stats(self) -> None:
+        """重置统计数据"""
+        self.http_requests = 0
+        self.batches_sent = 0
+        self.batched_calls = 0
+        self.single_calls = 0
+        self.fallback_batches = 0
+        self.largest_batch = 0
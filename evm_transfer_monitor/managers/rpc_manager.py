@@ -4,32 +4,88 @@ RPC调用管理器
 负责Web3连接管理、缓存控制和API调用限制
 """
 
-import asyncio
 import time
 from collections import defaultdict
+from functools import partial
 from typing import Dict, Any, Optional
 
 from web3 import AsyncWeb3
-from web3.middleware import ExtraDataToPOAMiddleware
+from web3.exceptions import BlockNotFound, ContractLogicError, MethodUnavailable, TransactionNotFound
 
 from config.monitor_config import MonitorConfig
+from managers.block_cache import BLOCK, HEADER, RECEIPTS, BlockCache, get_block_cache
+from managers.endpoint_pool import EndpointPool
+from managers.head_tracker import HeadTracker, get_head_tracker
+from managers.rate_limiter import RequestPriority
+from managers.raw_rpc_client import (
+    RawCall, parse_block, parse_block_header, parse_block_receipts, parse_transaction_receipt
+)
+from managers.rpc_batcher import RPCRequest, execute_request
 from models.data_types import PerformanceMetrics
 from utils.log_utils import get_logger
 
 logger = get_logger(__name__)
 
+# 节点正常返回的"不存在"类结果，不计入节点错误，也不触发故障转移
+NOT_FOUND_ERRORS = (BlockNotFound, TransactionNotFound)
+
+# 节点不支持某个方法时错误信息中的特征
+UNSUPPORTED_METHOD_MARKERS = ('-32601', 'method not found', 'not supported', 'does not exist', 'not available')
+
+
+def is_execution_reverted_error(error: Exception) -> bool:
+    """错误是否为合约调用回滚（节点正常执行了调用，不计入节点错误）"""
+    return isinstance(error, ContractLogicError) or 'execution reverted' in str(error).lower()
+
+
+def is_unsupported_method_error(error: Exception) -> bool:
+    """错误是否表示节点不支持该 RPC 方法"""
+    if isinstance(error, MethodUnavailable):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in UNSUPPORTED_METHOD_MARKERS)
+
 
 class RPCManager:
-    """RPC调用管理器 - 负责缓存和限制控制"""
+    """RPC调用管理器 - 负责缓存、节点路由和限流"""
     
     def __init__(self, config: MonitorConfig):
         self.config = config
-        self.w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(config.rpc_url))
-        self.w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
         
-        # 缓存相关
-        self.cached_block_number: Optional[int] = None
-        self.cache_time: float = 0
+        # 多节点池，每个节点各自持有 Web3 实例和批量请求合并器
+        self.endpoint_pool = EndpointPool(
+            config.get_rpc_urls(),
+            batch_enabled=config.rpc_batch_enabled,
+            batch_max_size=config.rpc_batch_max_size,
+            batch_linger=config.rpc_batch_linger,
+            ewma_alpha=config.rpc_latency_ewma_alpha,
+            eject_after_errors=config.rpc_eject_after_errors,
+            eject_seconds=config.rpc_eject_seconds,
+            max_rpc_per_second=config.max_rpc_per_second,
+            max_rpc_per_day=config.max_rpc_per_day,
+            raw_transport=config.rpc_raw_transport
+        )
+        # 主节点的 Web3 实例，供 from_wei/to_hex 等工具方法使用
+        self.w3 = self.endpoint_pool.primary.w3
+        
+        # 链头缓存：同一进程内相同链和节点的 RPCManager 共享
+        self.head_tracker: HeadTracker = get_head_tracker(config.chain_name, config.rpc_url)
+        
+        # 区块缓存（区块、区块头和回执）：同一进程内相同链的 RPCManager 共享
+        # 链头取自共享的 HeadTracker，不引用本实例，关闭后缓存仍可被其他实例使用
+        self.block_cache: Optional[BlockCache] = None
+        if config.block_cache_enabled:
+            head_tracker = self.head_tracker
+            self.block_cache = get_block_cache(
+                config.chain_name,
+                max_bytes=int(config.block_cache_max_mb * 1024 * 1024),
+                head_ttl=config.block_cache_head_ttl,
+                finality_depth=config.required_confirmations,
+                head_getter=lambda: head_tracker.latest_head
+            )
+        
+        # 推送式区块头来源（NewHeadsSubscriber），可用时区块号由推送更新
+        self.head_subscriber = None
         
         # 统计相关
         self.rpc_calls: int = 0
@@ -43,49 +99,251 @@ class RPCManager:
         self.rpc_calls += 1
         self.rpc_calls_by_type[call_type] += 1
     
+    async def _request(self, request_factory: RPCRequest,
+                       priority: RequestPriority = RequestPriority.NORMAL, batch: bool = True) -> Any:
+        """
+        发送RPC请求
+        
+        按评分选择最健康的节点，启用批量且 batch 为 True 时交给该节点的批量合并器；
+        发出HTTP请求前从该节点的令牌桶获取令牌；
+        节点出错时记录错误并依次转移到下一个可用节点
+        """
+        last_error: Optional[Exception] = None
+        for attempt, endpoint in enumerate(self.endpoint_pool.candidates()):
+            if attempt >= self.config.rpc_max_attempts:
+                break
+            
+            start = time.time()
+            try:
+                if endpoint.batcher and batch:
+                    result = await endpoint.batcher.submit(request_factory, priority)
+                else:
+                    await endpoint.rate_limiter.acquire(priority)
+                    start = time.time()
+                    result = await execute_request(request_factory, endpoint.w3, endpoint.raw_client)
+            except NOT_FOUND_ERRORS:
+                self.endpoint_pool.record_success(endpoint, time.time() - start)
+                raise
+            except Exception as e:
+                if is_execution_reverted_error(e):
+                    self.endpoint_pool.record_success(endpoint, time.time() - start)
+                    raise
+                self.endpoint_pool.record_failure(endpoint, e)
+                last_error = e
+                logger.debug(f"RPC节点 {endpoint.url} 调用失败，尝试下一个节点: {e}")
+                continue
+            
+            self.endpoint_pool.record_success(endpoint, time.time() - start)
+            return result
+        
+        if last_error is None:
+            # 没有尝试任何节点（节点池为空或 rpc_max_attempts 不大于 0）
+            raise ConnectionError(f"没有可用的RPC节点 (rpc_max_attempts={self.config.rpc_max_attempts})")
+        raise last_error
+    
+    def set_batch_size(self, max_batch_size: int) -> None:
+        """调整批量请求的最大调用数（追块模式下加大）"""
+        self.endpoint_pool.set_batch_size(max_batch_size)
+    
+    def get_http_request_count(self) -> int:
+        """获取实际发出的HTTP请求数（批量合并后）"""
+        return self.rpc_calls - self.endpoint_pool.get_requests_saved()
+    
+    @property
+    def cached_block_number(self) -> Optional[int]:
+        """已知的最新区块号（共享链头）"""
+        return self.head_tracker.latest_head
+    
+    async def _fetch_block_number(self) -> int:
+        """向节点查询最新区块号"""
+        self.log_rpc_call('get_block_number')
+        self.cache_misses += 1
+        return await self._request(lambda w3: w3.eth.get_block_number(), RequestPriority.HEAD)
+    
+    def _head_max_age(self) -> float:
+        """链头可接受的缓存时间，推送订阅可用时由推送更新，不再轮询"""
+        if self.head_subscriber is not None and self.head_subscriber.is_fresh():
+            return float('inf')
+        return self.config.cache_ttl
+    
     async def get_cached_block_number(self) -> int:
-        """获取缓存的区块号"""
-        current_time = time.time()
-        
-        if (self.cached_block_number is None or 
-            current_time - self.cache_time > self.config.cache_ttl):
-            self.cached_block_number = await self.w3.eth.get_block_number()
-            self.cache_time = current_time
-            self.log_rpc_call('get_block_number')
-            self.cache_misses += 1
-        else:
+        """获取缓存的区块号（共享链头，过期时单飞刷新）"""
+        misses = self.cache_misses
+        head = await self.head_tracker.get_head(self._fetch_block_number, self._head_max_age())
+        if self.cache_misses == misses:
             self.cache_hits += 1
-            
-        return self.cached_block_number
+        return head
+    
+    async def wait_for_new_head(self, after_block: int, timeout: float) -> bool:
+        """
+        等待高于 after_block 的新区块头
+        
+        推送订阅可用时只等待推送；否则每 cache_ttl 秒刷新一次共享链头，
+        同一链和节点上的其他监控器刷新或收到推送时立即返回
+        
+        Returns:
+            bool: 超时前是否出现了新区块头
+        """
+        return await self.head_tracker.wait_for_head(
+            after_block, timeout, self._fetch_block_number,
+            poll_interval=min(self._head_max_age(), timeout)
+        )
+    
+    def update_block_number(self, block_number: int) -> None:
+        """由推送来源更新最新区块号，发布到共享链头"""
+        self.head_tracker.publish(block_number)
     
-    async def get_block(self, block_number: int):
-        """获取区块信息"""
+    def _cache_get(self, kind: str, block_number: int, use_cache: bool) -> Optional[Any]:
+        """读取区块缓存，未启用缓存或 use_cache 为 False 时返回 None"""
+        if self.block_cache is None or not use_cache:
+            return None
+        return self.block_cache.get(block_number, kind)
+    
+    def _cache_put(self, kind: str, block_number: int, value: Any) -> None:
+        """写入区块缓存，哈希变化时替换旧条目"""
+        if self.block_cache is not None:
+            self.block_cache.put(block_number, kind, value)
+    
+    async def get_block(self, block_number: int, priority: RequestPriority = RequestPriority.HEAD,
+                        use_cache: bool = True):
+        """
+        获取区块信息
+        
+        启用原生传输时绕过 web3 格式化，返回只含必要字段的 RawBlock；
+        use_cache 为 False 时总是从节点获取（结果仍写入缓存）
+        """
+        cached = self._cache_get(BLOCK, block_number, use_cache)
+        if cached is not None:
+            return cached
+        
         self.log_rpc_call('get_block')
-        return await self.w3.eth.get_block(block_number, full_transactions=True)
+        if self.config.rpc_raw_transport:
+            block = await self._request(
+                RawCall('eth_getBlockByNumber', [hex(block_number), True],
+                        partial(parse_block, block_number=block_number)),
+                priority
+            )
+        else:
+            block = await self._request(
+                lambda w3: w3.eth.get_block(block_number, full_transactions=True), priority
+            )
+        self._cache_put(BLOCK, block_number, block)
+        return block
+    
+    async def get_block_header(self, block_number: int, priority: RequestPriority = RequestPriority.HEAD,
+                               use_cache: bool = True):
+        """
+        获取区块头（不含完整交易），用于 logsBloom 预过滤和重组校验
+        
+        缓存中有完整区块时直接返回完整区块
+        """
+        cached = self._cache_get(HEADER, block_number, use_cache)
+        if cached is not None:
+            return cached
+        
+        self.log_rpc_call('get_block_header')
+        if self.config.rpc_raw_transport:
+            header = await self._request(
+                RawCall('eth_getBlockByNumber', [hex(block_number), False],
+                        partial(parse_block_header, block_number=block_number)),
+                priority
+            )
+        else:
+            header = await self._request(
+                lambda w3: w3.eth.get_block(block_number, full_transactions=False), priority
+            )
+        self._cache_put(HEADER, block_number, header)
+        return header
+    
+    async def get_block_receipts(self, block_number: int,
+                                 priority: RequestPriority = RequestPriority.NORMAL,
+                                 use_cache: bool = True) -> list:
+        """获取区块内全部交易回执（eth_getBlockReceipts）"""
+        cached = self._cache_get(RECEIPTS, block_number, use_cache)
+        if cached is not None:
+            return cached
+        
+        self.log_rpc_call('get_block_receipts')
+        if self.config.rpc_raw_transport:
+            receipts = await self._request(
+                RawCall('eth_getBlockReceipts', [hex(block_number)],
+                        partial(parse_block_receipts, block_number=block_number)),
+                priority
+            )
+        else:
+            receipts = await self._request(lambda w3: w3.eth.get_block_receipts(block_number), priority)
+        self._cache_put(RECEIPTS, block_number, receipts)
+        return receipts
+    
+    async def get_transaction_receipt(self, tx_hash: str,
+                                      priority: RequestPriority = RequestPriority.NORMAL):
+        """获取单笔交易回执"""
+        self.log_rpc_call('get_transaction_receipt')
+        if self.config.rpc_raw_transport:
+            return await self._request(
+                RawCall('eth_getTransactionReceipt', [tx_hash],
+                        partial(parse_transaction_receipt, tx_hash=tx_hash)),
+                priority
+            )
+        return await self._request(lambda w3: w3.eth.get_transaction_receipt(tx_hash), priority)
+    
+    async def request_method(self, method: str, params: list,
+                             priority: RequestPriority = RequestPriority.BACKGROUND) -> Any:
+        """
+        发送任意 JSON-RPC 方法，返回未经 web3 格式化的结果
+        
+        用于 trace/debug 等开销较大的调用，不参与批量合并
+        """
+        self.log_rpc_call(method)
+        if self.config.rpc_raw_transport:
+            return await self._request(RawCall(method, params), priority, batch=False)
+        return await self._request(lambda w3: w3.manager.coro_request(method, params), priority, batch=False)
+    
+    async def call_contract(self, contract: str, data: str,
+                            priority: RequestPriority = RequestPriority.BACKGROUND) -> bytes:
+        """
+        只读合约调用（eth_call，最新区块），并发的调用由批量合并器合成一个请求
+        
+        Args:
+            contract: 合约地址
+            data: 调用数据（0x 开头的十六进制字符串）
+            
+        Returns:
+            bytes: 返回数据，合约不存在或方法不存在时通常为空
+            
+        Raises:
+            调用回滚时抛出异常（不计入节点错误）
+        """
+        self.log_rpc_call('eth_call')
+        if self.config.rpc_raw_transport:
+            return await self._request(
+                RawCall('eth_call', [{'to': contract, 'data': data}, 'latest'],
+                        lambda result: bytes.fromhex((result or '0x')[2:])),
+                priority
+            )
+        transaction = {'to': AsyncWeb3.to_checksum_address(contract), 'data': data}
+        return bytes(await self._request(lambda w3: w3.eth.call(transaction), priority))
+    
+    async def get_logs(self, filter_params: Dict[str, Any],
+                       priority: RequestPriority = RequestPriority.NORMAL) -> list:
+        """按过滤条件获取事件日志"""
+        self.log_rpc_call('get_logs')
+        return await self._request(lambda w3: w3.eth.get_logs(filter_params), priority)
     
     async def get_gas_price(self):
         """获取当前Gas价格"""
         self.log_rpc_call('get_gas_price')
-        return await self.w3.eth.gas_price
-    
-    async def check_rate_limit(self) -> None:
-        """检查并执行速率限制"""
-        runtime = time.time() - self.start_time
-        if runtime <= 0:
-            return
-            
-        avg_rpc_per_second = self.rpc_calls / runtime
-        
-        if avg_rpc_per_second > self.config.max_rpc_per_second * 0.8:
-            delay = 1.0 / self.config.max_rpc_per_second
-            logger.warning(f"⚠️ RPC调用频率过高 ({avg_rpc_per_second:.2f}/s)，添加 {delay:.2f}s 延迟")
-            await asyncio.sleep(delay)
+        return await self._request(lambda w3: w3.eth.gas_price, RequestPriority.BACKGROUND)
     
     def get_performance_stats(self) -> PerformanceMetrics:
         """获取性能统计信息"""
         runtime = time.time() - self.start_time
         avg_rpc_per_second = self.rpc_calls / runtime if runtime > 0 else 0
         
+        # 服务商按HTTP请求计费/限流，配额相关指标使用批量合并后的请求数
+        http_requests = self.get_http_request_count()
+        avg_http_per_second = http_requests / runtime if runtime > 0 else 0
+        
         total_requests = self.cache_hits + self.cache_misses
         cache_hit_rate = (self.cache_hits / total_requests) if total_requests > 0 else 0
         
@@ -95,15 +353,21 @@ class RPCManager:
             cache_misses=self.cache_misses,
             avg_rpc_per_second=avg_rpc_per_second,
             cache_hit_rate=cache_hit_rate * 100,
-            estimated_daily_calls=avg_rpc_per_second * 86400,
-            within_rate_limit=avg_rpc_per_second <= self.config.max_rpc_per_second,
-            api_usage_percent=(self.rpc_calls / self.config.max_rpc_per_day) * 100,
-            rpc_calls_by_type=dict(self.rpc_calls_by_type)
+            estimated_daily_calls=avg_http_per_second * 86400,
+            within_rate_limit=avg_http_per_second <= self.config.max_rpc_per_second,
+            api_usage_percent=(http_requests / self.config.max_rpc_per_day) * 100,
+            rpc_calls_by_type=dict(self.rpc_calls_by_type),
+            http_requests=http_requests,
+            batch_stats=self.endpoint_pool.get_batch_stats(),
+            endpoint_stats=self.endpoint_pool.get_stats(),
+            rate_limit_stats=self.endpoint_pool.get_rate_limit_stats(),
+            block_cache_stats=self.block_cache.get_stats() if self.block_cache else {}
         )
     
     async def test_connection(self) -> Dict[str, Any]:
         """测试网络连接并返回基本信息"""
-        logger.info(f"正在测试RPC {self.config.rpc_url} 连接...")
+        rpc_urls = self.config.get_rpc_urls()
+        logger.info(f"正在测试RPC {', '.join(rpc_urls)} 连接...")
         try:
             latest_block = await self.get_cached_block_number()
             gas_price = await self.get_gas_price()
@@ -114,13 +378,15 @@ class RPCManager:
                 'latest_block': latest_block,
                 'gas_price_gwei': float(gas_price_gwei),
                 'network': self.config.chain_name,
-                'rpc_url': self.config.rpc_url
+                'rpc_url': self.config.rpc_url,
+                'rpc_urls': rpc_urls
             }
         except Exception as e:
             return {
                 'success': False,
                 'error': str(e),
-                'rpc_url': self.config.rpc_url
+                'rpc_url': self.config.rpc_url,
+                'rpc_urls': rpc_urls
             }
     
     def reset_stats(self) -> None:
@@ -129,9 +395,16 @@ class RPCManager:
         self.cache_hits = 0
         self.cache_misses = 0
         self.rpc_calls_by_type.clear()
+        self.endpoint_pool.reset_stats()
+        if self.block_cache is not None:
+            self.block_cache.reset_stats()
         self.start_time = time.time()
         logger.info("RPC统计数据已重置")
     
+    async def close(self) -> None:
+        """释放网络连接"""
+        await self.endpoint_pool.close()
+    
     def is_healthy(self) -> bool:
         """检查RPC管理器健康状态"""
         stats = self.get_performance_stats()
@@ -0,0 +1,246 @@
+"""
+代币注册表
+
+通过 eth_call 读取代币合约的 decimals() 和 symbol()，结果持久化到本地 JSON 缓存：
+- 启动时只读缓存（不发 RPC），已缓存的元数据立即写入 TokenParser，分类索引按链上小数位换算金额
+- 配置中缓存尚未覆盖的合约（包括 custom_tokens 中只配置了合约地址的代币）在开始监控前解析一次
+- 核对命中交易时，回执中发出 Transfer 事件的其他合约通过 observe 记入待解析队列，由定期维护批量解析，
+  只记录元数据，不加入监控的代币列表（eth_getLogs 只查询配置的合约，看不到其他合约）
+
+同一轮解析的调用并发发出，由 RPC 批量合并器合成 JSON-RPC batch 请求
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from config.monitor_config import MonitorConfig
+from managers.rpc_manager import RPCManager
+from utils.file_utils import atomic_write_json, resolve_project_path
+from utils.token_parser import TokenParser
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+DECIMALS_SELECTOR = '0x313ce567'  # decimals()
+SYMBOL_SELECTOR = '0x95d89b41'  # symbol()
+
+# uint8 decimals 的合理上限，超出视为非标准合约
+MAX_DECIMALS = 77
+# 单轮最多解析的合约数（每个合约 2 个调用）
+RESOLVE_BATCH = 50
+# 解析失败的合约重试前的等待时间（秒）
+RETRY_SECONDS = 3600
+
+
+def decode_decimals(data: bytes) -> Optional[int]:
+    """解码 decimals() 返回值，无效时返回 None"""
+    if len(data) < 32:
+        return None
+    decimals = int.from_bytes(data[:32], 'big')
+    return decimals if decimals <= MAX_DECIMALS else None
+
+
+def decode_symbol(data: bytes) -> Optional[str]:
+    """解码 symbol() 返回值：ABI string，或早期合约使用的 bytes32"""
+    if len(data) >= 96 and int.from_bytes(data[:32], 'big') == 32:
+        length = int.from_bytes(data[32:64], 'big')
+        raw = data[64:64 + length] if length <= len(data) - 64 else b''
+    elif len(data) == 32:
+        raw = data.rstrip(b'\x00')
+    else:
+        return None
+    symbol = raw.decode('utf-8', errors='replace').strip()
+    return symbol or None
+
+
+class TokenRegistry:
+    """代币注册表 - 链上代币元数据解析和本地缓存"""
+
+    def __init__(self, config: MonitorConfig, rpc_manager: RPCManager, token_parser: TokenParser,
+                 chain_name: str, path: str):
+        """
+        初始化注册表
+
+        Args:
+            config: 监控配置
+            rpc_manager: RPC管理器
+            token_parser: 代币解析器（解析结果写入其中）
+            chain_name: 链名称，写入缓存文件用于校验
+            path: 缓存文件路径，相对路径以项目根目录为基准
+        """
+        self.config = config
+        self.rpc_manager = rpc_manager
+        self.token_parser = token_parser
+        self.chain_name = chain_name
+        self.path = resolve_project_path(path)
+
+        # 小写合约地址 -> {'symbol': 链上符号, 'decimals': 小数位}
+        self.tokens: Dict[str, Dict[str, Any]] = {}
+        self._observed: Set[str] = set()
+        self._retry_after: Dict[str, float] = {}  # 解析失败的合约 -> 可重试的时间
+
+        # 统计信息
+        self.cache_loaded: int = 0
+        self.resolved: int = 0
+        self.resolve_failures: int = 0
+        self.decimals_corrected: int = 0
+
+    def load(self) -> int:
+        """
+        读取缓存并写入 TokenParser（不发 RPC）
+
+        Returns:
+            int: 缓存中的代币数
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ 读取代币注册表缓存失败 {self.path}: {e}")
+            return 0
+
+        if data.get('chain_name') != self.chain_name:
+            logger.warning(f"⚠️ 代币注册表缓存属于链 {data.get('chain_name')}，与当前链 {self.chain_name} 不符，忽略")
+            return 0
+
+        for contract, metadata in (data.get('tokens') or {}).items():
+            if isinstance(metadata, dict) and isinstance(metadata.get('decimals'), int):
+                self.tokens[contract.lower()] = {'symbol': metadata.get('symbol'), 'decimals': metadata['decimals']}
+        self.cache_loaded = len(self.tokens)
+        self._apply()
+        logger.info(f"🪙 代币注册表已从缓存加载 {self.cache_loaded} 个代币")
+        return self.cache_loaded
+
+    def save(self) -> None:
+        """写入缓存文件"""
+        try:
+            atomic_write_json(self.path, {
+                'chain_name': self.chain_name,
+                'tokens': self.tokens,
+                'updated_at': int(time.time()),
+            })
+        except OSError as e:
+            logger.error(f"❌ 写入代币注册表缓存失败 {self.path}: {e}")
+
+    def _configured_contracts(self) -> List[str]:
+        """配置中的代币合约（小写），包括只配置了合约地址的代币"""
+        contracts = [contract.lower() for contract in self.token_parser.contracts.values() if contract]
+        contracts.extend(contract.lower() for contract in self.token_parser.unresolved_contracts)
+        return contracts
+
+    def _apply(self) -> None:
+        """把已解析的元数据写入 TokenParser：配置的代币按链上小数位修正，只配置了合约的代币以链上符号加入"""
+        parser = self.token_parser
+        for symbol, contract in list(parser.contracts.items()):
+            metadata = self.tokens.get(contract.lower()) if contract else None
+            if metadata is None or parser.decimals.get(symbol) == metadata['decimals']:
+                continue
+            logger.warning(
+                f"⚠️ {symbol} 链上小数位为 {metadata['decimals']}，配置为 {parser.decimals.get(symbol)}，按链上值换算金额"
+            )
+            parser.update_token(symbol, contract, metadata['decimals'])
+            self.decimals_corrected += 1
+
+        known = {contract.lower() for contract in parser.contracts.values() if contract}
+        for contract in parser.unresolved_contracts:
+            metadata = self.tokens.get(contract.lower())
+            if metadata is None or contract.lower() in known or not metadata.get('symbol'):
+                continue
+            symbol = metadata['symbol']
+            if symbol in parser.contracts:
+                # 符号与已有代币重复时附加合约地址前缀区分
+                symbol = f"{symbol}_{contract[2:8].lower()}"
+            parser.update_token(symbol, contract, metadata['decimals'])
+            known.add(contract.lower())
+            logger.info(f"🪙 已添加代币 {symbol}: {contract} ({metadata['decimals']} 位小数)")
+
+    def observe(self, contract: str) -> None:
+        """记录 Transfer 事件中出现的合约，尚未解析时加入待解析队列"""
+        contract = contract.lower()
+        if contract not in self.tokens and contract not in self._observed:
+            self._observed.add(contract)
+
+    async def refresh(self) -> int:
+        """
+        解析缓存尚未覆盖的配置合约（开始监控前调用，缓存完整时不发 RPC）
+
+        Returns:
+            int: 新解析的代币数
+        """
+        missing = [contract for contract in dict.fromkeys(self._configured_contracts())
+                   if contract not in self.tokens]
+        if not missing:
+            return 0
+        logger.info(f"🔍 解析 {len(missing)} 个代币合约的链上元数据...")
+        resolved = await self._resolve_all(missing)
+        if resolved < len(missing):
+            logger.warning(f"⚠️ {len(missing) - resolved} 个代币合约的元数据解析失败，沿用配置中的小数位")
+        return resolved
+
+    async def resolve_pending(self) -> int:
+        """解析 observe 记录的合约（定期维护时调用），每轮最多 RESOLVE_BATCH 个"""
+        now = time.monotonic()
+        pending = [contract for contract in self._observed
+                   if contract not in self.tokens and self._retry_after.get(contract, 0) <= now]
+        if not pending:
+            return 0
+        batch = pending[:RESOLVE_BATCH]
+        self._observed.difference_update(batch)
+        return await self._resolve_all(batch)
+
+    async def _resolve_all(self, contracts: List[str]) -> int:
+        """分批解析合约，有新结果时写入 TokenParser 并落盘"""
+        resolved = 0
+        for start in range(0, len(contracts), RESOLVE_BATCH):
+            batch = contracts[start:start + RESOLVE_BATCH]
+            results = await asyncio.gather(*(self._resolve(contract) for contract in batch))
+            for contract, metadata in zip(batch, results):
+                if metadata is None:
+                    self.resolve_failures += 1
+                    self._retry_after[contract] = time.monotonic() + RETRY_SECONDS
+                    continue
+                self.tokens[contract] = metadata
+                self._retry_after.pop(contract, None)
+                resolved += 1
+        if resolved:
+            self.resolved += resolved
+            self._apply()
+            self.save()
+        return resolved
+
+    async def _resolve(self, contract: str) -> Optional[Dict[str, Any]]:
+        """读取一个合约的 decimals() 和 symbol()，decimals 无效时返回 None"""
+        decimals_data, symbol_data = await asyncio.gather(
+            self.rpc_manager.call_contract(contract, DECIMALS_SELECTOR),
+            self.rpc_manager.call_contract(contract, SYMBOL_SELECTOR),
+            return_exceptions=True
+        )
+        if isinstance(decimals_data, Exception):
+            logger.debug(f"读取 {contract} 的 decimals() 失败: {decimals_data}")
+            return None
+        decimals = decode_decimals(decimals_data)
+        if decimals is None:
+            logger.debug(f"{contract} 的 decimals() 返回值无效")
+            return None
+        symbol = None if isinstance(symbol_data, Exception) else decode_symbol(symbol_data)
+        return {'symbol': symbol, 'decimals': decimals}
+
+    def get(self, contract: str) -> Optional[Dict[str, Any]]:
+        """获取合约的链上元数据"""
+        return self.tokens.get(contract.lower())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取注册表统计"""
+        return {
+            'tokens': len(self.tokens),
+            'cache_loaded': self.cache_loaded,
+            'resolved': self.resolved,
+            'resolve_failures': self.resolve_failures,
+            'decimals_corrected': self.decimals_corrected,
+            'pending': len(self._observed),
+            'version': self.token_parser.version,
+        }
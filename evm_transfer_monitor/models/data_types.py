@@ -5,40 +5,94 @@
 """
 
 from dataclasses import dataclass
-from typing import Dict, Any, Optional
+from decimal import Decimal
+from typing import Dict, Any, List, Optional, Tuple
+
+from utils.amount_utils import NATIVE_DECIMALS, from_base_units
 
 
 @dataclass
-class TransactionInfo:
-    """交易信息数据类"""
+class RawBlock:
+    """原生 JSON-RPC 路径解析出的精简区块，只保留处理流程使用的字段"""
+    number: int
     hash: str
-    tx: Dict[str, Any]
-    value: float
-    tx_type: str
-    found_at: float
-    block_number: int
-    token_info: Optional[Dict[str, Any]] = None
+    parent_hash: str
+    timestamp: int
+    logs_bloom: str
+    transactions: List[Dict[str, Any]]
+
+
+class TransactionInfo:
+    """
+    命中交易的精简记录
+    
+    待确认交易在整个确认窗口内驻留内存（大额策略下可达数万笔），因此只保留确认、入库和通知
+    使用的字段，不持有完整交易 dict（input、签名、访问列表），并用 __slots__ 去掉实例 __dict__。
+    from_address / to_address 为转账双方（代币转账取自 calldata 或事件，而非交易的 from/to）；
+    金额以整数最小单位携带，value 在使用时按小数位换算
+    """
+    
+    __slots__ = (
+        'hash', 'block_number', 'block_hash', 'from_address', 'to_address',
+        'tx_type', 'contract', 'amount_wei', 'decimals', 'gas', 'gas_price', 'found_at',
+        'status', 'gas_used', 'effective_gas_price', 'matched_rules', 'transfer_index',
+        'trace_address',
+    )
+    
+    def __init__(self, hash: str, block_number: int, from_address: str, to_address: str,
+                 amount_wei: int, tx_type: str, found_at: float, block_hash: str = '',
+                 contract: Optional[str] = None, decimals: int = NATIVE_DECIMALS,
+                 gas: Optional[int] = None, gas_price: Optional[int] = None,
+                 status: Optional[int] = None, gas_used: Optional[int] = None,
+                 effective_gas_price: Optional[int] = None, matched_rules: Tuple[str, ...] = (),
+                 transfer_index: int = 0, trace_address: str = ''):
+        self.hash = hash
+        self.block_number = block_number
+        self.block_hash = block_hash
+        self.from_address = from_address
+        self.to_address = to_address
+        self.tx_type = tx_type  # 代币符号，原生代币为链的原生代币名
+        self.contract = contract  # 小写代币合约地址，原生代币为 None
+        self.amount_wei = amount_wei
+        self.decimals = decimals
+        # 交易中的 Gas 上限和报价（没有回执时用于估算手续费）
+        self.gas = gas
+        self.gas_price = gas_price
+        self.found_at = found_at
+        # 交易回执字段（回执阶段填充）
+        self.status = status
+        self.gas_used = gas_used
+        self.effective_gas_price = effective_gas_price
+        # 规则模式下命中的检测规则名（其他策略为空）
+        self.matched_rules = matched_rules
+        # 交易内转账序号（代币转账为对应 Transfer 事件的 logIndex，区块模式在回执核对时由 calldata 中的序号换为 logIndex），与交易哈希一起唯一标识一笔充值
+        self.transfer_index = transfer_index
+        # 内部转账的调用路径（如 0_1），交易本身的转账为空
+        self.trace_address = trace_address
     
     def __str__(self) -> str:
         return (f"TransactionInfo(hash={self.hash[:10]}..., "
                 f"type={self.tx_type}, value={self.value}, "
                 f"block={self.block_number})")
     
+    __repr__ = __str__
+    
+    @property
+    def value(self) -> Decimal:
+        """代币数量（精确换算，只用于入库、日志和通知）"""
+        return from_base_units(self.amount_wei, self.decimals)
+    
     def is_token_transaction(self) -> bool:
         """判断是否为代币交易"""
-        return self.token_info is not None
+        return self.contract is not None
     
     def get_from_address(self) -> str:
         """获取发送方地址"""
-        if self.is_token_transaction() and self.token_info:
-            return self.token_info.get('from', '')
-        return self.tx.get('from', '')
+        return self.from_address or ''
     
     def get_to_address(self) -> str:
         """获取接收方地址"""
-        if self.is_token_transaction() and self.token_info:
-            return self.token_info.get('to', '')
-        return self.tx.get('to', '')
+        return self.to_address or ''
 
 
 @dataclass
@@ -53,10 +107,23 @@ class PerformanceMetrics:
     within_rate_limit: bool = True
     api_usage_percent: float = 0.0
     rpc_calls_by_type: Dict[str, int] = None
+    http_requests: int = 0
+    batch_stats: Dict[str, Any] = None
+    endpoint_stats: Dict[str, Dict[str, Any]] = None
+    rate_limit_stats: Dict[str, Any] = None
+    block_cache_stats: Dict[str, Any] = None
     
     def __post_init__(self):
         if self.rpc_calls_by_type is None:
             self.rpc_calls_by_type = {}
+        if self.batch_stats is None:
+            self.batch_stats = {}
+        if self.endpoint_stats is None:
+            self.endpoint_stats = {}
+        if self.rate_limit_stats is None:
+            self.rate_limit_stats = {}
+        if self.block_cache_stats is None:
+            self.block_cache_stats = {}
 
 
 @dataclass
@@ -82,6 +149,8 @@ class MonitorStatus:
     runtime_hours: float = 0.0
     current_block: int = 0
     last_activity: float = 0.0
+    lag_blocks: int = 0
+    sync_mode: str = "head"
     
     def update_runtime(self, current_time: float) -> None:
         """更新运行时间"""
@@ -4,7 +4,7 @@
 对应 Go 版本的 DepositRecord 模型
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, DECIMAL
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, DECIMAL, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -18,9 +18,17 @@ class DepositRecord(Base):
     """充值记录模型 - 对应 Go 版本的 DepositRecord"""
     
     __tablename__ = 'deposit_records'
+    __table_args__ = (
+        # 一笔交易可以包含多笔转账（含内部转账），记录按 (交易哈希, 转账序号, 调用路径) 唯一
+        Index('uq_deposit_records_transfer', 'tx_hash', 'transfer_index', 'trace_address', unique=True),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    tx_hash = Column(String(66), unique=True, nullable=False, index=True)
+    tx_hash = Column(String(66), nullable=False, index=True)
+    # 交易内转账序号：代币转账为对应 Transfer 事件的 logIndex（两种扫描方式一致；关闭回执核对时区块模式为批量转账中的第几笔），原生转账为 0
+    transfer_index = Column(Integer, nullable=False, default=0, server_default='0')
+    # 内部转账的调用路径（如 0_1），交易本身的转账为空
+    trace_address = Column(String(128), nullable=False, default='', server_default='')
     block_number = Column(Integer)
     block_hash = Column(String(66))
     from_address = Column(String(42))
@@ -29,7 +37,7 @@ class DepositRecord(Base):
     token_address = Column(String(42))  # 空表示原生代币
     token_symbol = Column(String(20))
     token_decimals = Column(Integer)
-    status = Column(String(20), default='pending')  # pending, confirmed, failed
+    status = Column(String(20), default='pending')  # pending, confirmed, failed, orphaned（区块重组）
     confirmations = Column(Integer, default=0)
     notification_generated = Column(Boolean, default=False, index=True)  # 标记是否已生成通知记录
     gas_used = Column(Integer)
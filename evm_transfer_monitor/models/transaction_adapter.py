@@ -6,19 +6,31 @@
 """
 
 import asyncio
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Sequence
 from decimal import Decimal
 from datetime import datetime
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from .data_types import TransactionInfo
 from .deposit_model import DepositRecord
+from utils.amount_utils import NATIVE_DECIMALS, from_base_units
 from utils.log_utils import get_logger
 
 logger = get_logger(__name__)
 
 
+def _record_key(tx_hash: str, transfer_index: int = 0, trace_address: str = '') -> tuple:
+    """一笔充值记录的唯一键条件：(交易哈希, 交易内转账序号, 内部转账调用路径)"""
+    return (DepositRecord.tx_hash == tx_hash, DepositRecord.transfer_index == transfer_index,
+            DepositRecord.trace_address == trace_address)
+
+
+def _info_key(transaction_info: TransactionInfo) -> tuple:
+    """TransactionInfo 对应充值记录的唯一键条件"""
+    return _record_key(transaction_info.hash, transaction_info.transfer_index, transaction_info.trace_address)
+
+
 class TransactionAdapter:
     """交易信息适配器，用于将 TransactionInfo 保存到数据库（支持同步和异步）"""
     
@@ -42,39 +54,31 @@ class TransactionAdapter:
         try:
             # 检查交易是否已存在
             existing_record = self.db_session.query(DepositRecord).filter(
-                DepositRecord.tx_hash == transaction_info.hash
+                *_info_key(transaction_info)
             ).first()
             
-            if existing_record:
-                logger.info(f"交易 {transaction_info.hash} 已存在，跳过保存")
+            if existing_record and existing_record.status != 'orphaned':
+                logger.info(f"交易 {transaction_info.hash} #{transaction_info.transfer_index} {transaction_info.trace_address} 已存在，跳过保存")
                 return existing_record
             
-            # 创建新的充值记录
-            deposit_record = DepositRecord()
+            # 创建新的充值记录（区块重组后被重新打包的交易复用原记录）
+            deposit_record = existing_record or DepositRecord()
             
             # 基础交易信息
             deposit_record.tx_hash = transaction_info.hash
+            deposit_record.transfer_index = transaction_info.transfer_index
+            deposit_record.trace_address = transaction_info.trace_address
             deposit_record.block_number = transaction_info.block_number
-            deposit_record.block_hash = transaction_info.tx.get('blockHash', '')
+            deposit_record.block_hash = transaction_info.block_hash
             deposit_record.from_address = transaction_info.get_from_address()
             deposit_record.to_address = transaction_info.get_to_address()
             deposit_record.status = 'pending'  # 新交易默认为pending状态
             deposit_record.confirmations = 0   # 初始确认数为0
             
-            # Gas 相关信息
-            if 'gasUsed' in transaction_info.tx:
-                deposit_record.gas_used = int(transaction_info.tx['gasUsed'], 16) if isinstance(transaction_info.tx['gasUsed'], str) else transaction_info.tx['gasUsed']
-            
-            if 'gasPrice' in transaction_info.tx:
-                gas_price_wei = int(transaction_info.tx['gasPrice'], 16) if isinstance(transaction_info.tx['gasPrice'], str) else transaction_info.tx['gasPrice']
-                deposit_record.gas_price = Decimal(gas_price_wei) / Decimal(10**18)  # 转换为 ETH
-            
-            # 计算交易费用
-            if deposit_record.gas_used and deposit_record.gas_price:
-                deposit_record.transaction_fee = deposit_record.gas_price * Decimal(deposit_record.gas_used)
+            self._fill_gas_fields(deposit_record, transaction_info)
             
             # 处理代币交易
-            if transaction_info.is_token_transaction() and transaction_info.token_info:
+            if transaction_info.is_token_transaction():
                 self._handle_token_transaction(deposit_record, transaction_info)
             else:
                 self._handle_native_transaction(deposit_record, transaction_info)
@@ -94,17 +98,30 @@ class TransactionAdapter:
             self.db_session.rollback()
             return None
     
+    def _fill_gas_fields(self, deposit_record: DepositRecord, transaction_info: TransactionInfo) -> None:
+        """Gas 相关信息（优先使用回执中的实际消耗和实际单价，没有回执时使用交易报价）"""
+        if transaction_info.gas_used is not None:
+            deposit_record.gas_used = transaction_info.gas_used
+        
+        gas_price_wei = transaction_info.effective_gas_price
+        if gas_price_wei is None:
+            gas_price_wei = transaction_info.gas_price
+        if gas_price_wei is not None:
+            deposit_record.gas_price = from_base_units(gas_price_wei, NATIVE_DECIMALS)
+        
+        # 计算交易费用
+        if deposit_record.gas_used and deposit_record.gas_price:
+            deposit_record.transaction_fee = deposit_record.gas_price * Decimal(deposit_record.gas_used)
+    
     def _handle_token_transaction(self, deposit_record: DepositRecord, transaction_info: TransactionInfo) -> None:
         """处理代币交易"""
-        token_info = transaction_info.token_info
-        
         # 代币基础信息
-        deposit_record.token_address = token_info.get('contract_address', '')
-        deposit_record.token_symbol = token_info.get('symbol', 'UNKNOWN')
-        deposit_record.token_decimals = token_info.get('decimals', 18)
+        deposit_record.token_address = transaction_info.contract
+        deposit_record.token_symbol = transaction_info.tx_type
+        deposit_record.token_decimals = transaction_info.decimals
         
-        # 代币金额（已经是实际数量，不需要再次转换）
-        deposit_record.amount = Decimal(str(transaction_info.value))
+        # 代币金额（由整数最小单位精确换算）
+        deposit_record.amount = from_base_units(transaction_info.amount_wei, transaction_info.decimals)
         
         logger.debug(f"处理代币交易: {deposit_record.token_symbol}, 数量: {deposit_record.amount}")
     
@@ -112,13 +129,13 @@ class TransactionAdapter:
         """处理原生代币交易"""
         # 原生代币信息
         deposit_record.token_address = ""  # 空表示原生代币
-        deposit_record.token_symbol = "ETH"  # 默认为ETH，可根据实际链调整
-        deposit_record.token_decimals = 18
+        deposit_record.token_symbol = transaction_info.tx_type
+        deposit_record.token_decimals = transaction_info.decimals
         
         # 原生代币金额
-        deposit_record.amount = Decimal(str(transaction_info.value))
+        deposit_record.amount = from_base_units(transaction_info.amount_wei, transaction_info.decimals)
         
-        logger.debug(f"处理原生代币交易: ETH, 数量: {deposit_record.amount}")
+        logger.debug(f"处理原生代币交易: {deposit_record.token_symbol}, 数量: {deposit_record.amount}")
     
     def _extract_user_id(self, transaction_info: TransactionInfo) -> str:
         """
@@ -133,7 +150,8 @@ class TransactionAdapter:
         to_address = transaction_info.get_to_address()
         return to_address.lower() if to_address else ""
     
-    def update_transaction_status(self, tx_hash: str, status: str, confirmations: int = 0) -> bool:
+    def update_transaction_status(self, tx_hash: str, status: str, confirmations: int = 0,
+                                  transfer_index: int = 0, trace_address: str = '') -> bool:
         """
         更新交易状态和确认数
         
@@ -141,6 +159,8 @@ class TransactionAdapter:
             tx_hash: 交易哈希
             status: 新状态
             confirmations: 确认数
+            transfer_index: 交易内转账序号
+            trace_address: 内部转账调用路径
             
         Returns:
             bool: 更新是否成功
@@ -150,7 +170,7 @@ class TransactionAdapter:
             
         try:
             record = self.db_session.query(DepositRecord).filter(
-                DepositRecord.tx_hash == tx_hash
+                *_record_key(tx_hash, transfer_index, trace_address)
             ).first()
             
             if not record:
@@ -236,48 +256,32 @@ class TransactionAdapter:
         try:
             # 检查交易是否已存在
             result = await async_session.execute(
-                select(DepositRecord).where(DepositRecord.tx_hash == transaction_info.hash)
+                select(DepositRecord).where(*_info_key(transaction_info))
             )
             existing_record = result.scalar_one_or_none()
             
-            if existing_record:
-                logger.info(f"交易 {transaction_info.hash} 已存在，跳过保存")
+            if existing_record and existing_record.status != 'orphaned':
+                logger.info(f"交易 {transaction_info.hash} #{transaction_info.transfer_index} {transaction_info.trace_address} 已存在，跳过保存")
                 return existing_record
             
-            # 创建新的充值记录
-            deposit_record = DepositRecord()
+            # 创建新的充值记录（区块重组后被重新打包的交易复用原记录）
+            deposit_record = existing_record or DepositRecord()
             
             # 基础交易信息
             deposit_record.tx_hash = transaction_info.hash
+            deposit_record.transfer_index = transaction_info.transfer_index
+            deposit_record.trace_address = transaction_info.trace_address
             deposit_record.block_number = transaction_info.block_number
-            deposit_record.block_hash = transaction_info.tx.get('blockHash', '')
+            deposit_record.block_hash = transaction_info.block_hash
             deposit_record.from_address = transaction_info.get_from_address()
             deposit_record.to_address = transaction_info.get_to_address()
             deposit_record.status = 'pending'  # 新交易默认为pending状态
             deposit_record.confirmations = 0   # 初始确认数为0
             
-            # Gas 相关信息
-            if 'gasUsed' in transaction_info.tx:
-                gas_used = transaction_info.tx['gasUsed']
-                if isinstance(gas_used, str):
-                    deposit_record.gas_used = int(gas_used, 16)
-                else:
-                    deposit_record.gas_used = gas_used
-            
-            if 'gasPrice' in transaction_info.tx:
-                gas_price = transaction_info.tx['gasPrice']
-                if isinstance(gas_price, str):
-                    gas_price_wei = int(gas_price, 16)
-                else:
-                    gas_price_wei = gas_price
-                deposit_record.gas_price = Decimal(gas_price_wei) / Decimal(10**18)
-            
-            # 计算交易费用
-            if deposit_record.gas_used and deposit_record.gas_price:
-                deposit_record.transaction_fee = deposit_record.gas_price * Decimal(deposit_record.gas_used)
+            self._fill_gas_fields(deposit_record, transaction_info)
             
             # 处理代币交易
-            if transaction_info.is_token_transaction() and transaction_info.token_info:
+            if transaction_info.is_token_transaction():
                 self._handle_token_transaction(deposit_record, transaction_info)
             else:
                 self._handle_native_transaction(deposit_record, transaction_info)
@@ -299,7 +303,8 @@ class TransactionAdapter:
     
     async def update_transaction_status_async(self, async_session: AsyncSession, 
                                             tx_hash: str, status: str, 
-                                            confirmations: int = 0) -> bool:
+                                            confirmations: int = 0, transfer_index: int = 0,
+                                            trace_address: str = '') -> bool:
         """
         异步更新交易状态和确认数
         
@@ -308,13 +313,15 @@ class TransactionAdapter:
             tx_hash: 交易哈希
             status: 新状态
             confirmations: 确认数
+            transfer_index: 交易内转账序号
+            trace_address: 内部转账调用路径
             
         Returns:
             bool: 更新是否成功
         """
         try:
             result = await async_session.execute(
-                select(DepositRecord).where(DepositRecord.tx_hash == tx_hash)
+                select(DepositRecord).where(*_record_key(tx_hash, transfer_index, trace_address))
             )
             record = result.scalar_one_or_none()
             
@@ -333,6 +340,37 @@ class TransactionAdapter:
             logger.error(f"异步更新交易状态时出错: {e}")
             return False
     
+    async def invalidate_blocks_async(self, async_session: AsyncSession, block_hashes: Sequence[str]) -> int:
+        """
+        异步批量作废孤块中的交易记录（区块重组）
+        
+        按区块哈希过滤（所有链共用充值记录表，区块号会与其他链重叠），已确认的记录不修改
+        
+        Args:
+            async_session: 异步数据库会话
+            block_hashes: 被替换的区块哈希
+            
+        Returns:
+            int: 作废的记录数
+        """
+        if not block_hashes:
+            return 0
+        try:
+            result = await async_session.execute(
+                update(DepositRecord)
+                .where(
+                    DepositRecord.block_hash.in_([block_hash.lower() for block_hash in block_hashes]),
+                    DepositRecord.status.notin_(('confirmed', 'orphaned'))
+                )
+                .values(status='orphaned', confirmations=0)
+            )
+            await async_session.flush()
+            return result.rowcount or 0
+            
+        except Exception as e:
+            logger.error(f"异步作废重组区块的交易记录时出错: {e}")
+            return 0
+    
     async def get_pending_notifications_async(self, async_session: AsyncSession, 
                                             required_confirmations: int = 12) -> List[DepositRecord]:
         """
@@ -401,10 +439,18 @@ class AsyncTransactionAdapter:
     @staticmethod
     async def update_status(async_session: AsyncSession, 
                           tx_hash: str, status: str, 
-                          confirmations: int = 0) -> bool:
+                          confirmations: int = 0, transfer_index: int = 0, trace_address: str = '') -> bool:
         """静态方法：异步更新交易状态"""
         adapter = TransactionAdapter()
-        return await adapter.update_transaction_status_async(async_session, tx_hash, status, confirmations)
+        return await adapter.update_transaction_status_async(
+            async_session, tx_hash, status, confirmations, transfer_index, trace_address
+        )
+    
+    @staticmethod
+    async def invalidate_blocks(async_session: AsyncSession, block_hashes: Sequence[str]) -> int:
+        """静态方法：异步作废孤块中的交易记录"""
+        adapter = TransactionAdapter()
+        return await adapter.invalidate_blocks_async(async_session, block_hashes)
     
     @staticmethod
     async def get_pending_notifications(async_session: AsyncSession, 
@@ -0,0 +1,406 @@
+"""
+区块交易分类索引
+
+classify_rows 在一次同步遍历中完成整个区块的交易分类（事件循环内和解码工作进程共用），
+遍历只查预先编译好的不可变索引：代币合约 -> (符号, 小数位)、监控地址集合、
+按代币换算为整数 wei 的阈值。策略、阈值、监控地址或原生转账开关变化时重新编译
+
+规则模式（MonitorStrategy.RULES）下，全部检测规则按代币编译为规则表，每笔转账查一次规则表，
+命中的规则以位掩码记录在命中记录中
+
+批量转账方法和批量分发合约的调用只对配置中的白名单解码（batch_transfer_tokens / disperse_contracts）：
+这类调用是否真的转账取决于被调用的合约，任何合约都能接收形状相同的 calldata
+"""
+
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Sequence, Tuple
+
+from config.monitor_config import MonitorConfig, MonitorStrategy, RuleKind
+from utils.address_index import AddressIndex
+from utils.amount_utils import NATIVE_DECIMALS, threshold_to_base_units
+from utils.token_parser import DISPERSE_MIN_CALLDATA, TokenParser, decode_disperse_call, decode_token_call
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+def classifier_key(config: MonitorConfig, token_parser: TokenParser) -> Tuple:
+    """
+    影响分类结果的配置快照，变化时需要重新编译索引
+
+    代币版本在代币注册表修正小数位或添加代币时变化。监控地址版本固定放在最后：
+    key[:-1] 相同说明只有监控地址发生了增删，解码进程池据此只下发增量
+    """
+    return (
+        config.monitor_strategy,
+        config.detect_native_transfers,
+        config.token_name,
+        tuple(sorted(config.thresholds.items())),
+        config.detection_rules_version,
+        tuple(sorted(address.lower() for address in config.disperse_contracts)),
+        tuple(sorted(config.batch_transfer_tokens)),
+        token_parser.version,
+        config.watch_addresses_version,
+    )
+
+
+# 一个代币的规则表：(大额规则, 监控地址转入规则, 监控地址转出规则, 地址 -> 转入规则, 地址 -> 转出规则)，
+# 每条规则为 (最小金额wei, 规则位)
+RuleTable = Tuple[Tuple[Tuple[int, int], ...], Tuple[Tuple[int, int], ...], Tuple[Tuple[int, int], ...],
+                  Dict[str, Tuple[Tuple[int, int], ...]], Dict[str, Tuple[Tuple[int, int], ...]]]
+
+
+@dataclass(frozen=True)
+class ClassifierIndex:
+    """预编译的分类索引（不可变）"""
+    key: Tuple
+    strategy: MonitorStrategy
+    detect_native: bool
+    native_symbol: str
+    native_threshold_wei: Optional[int]
+    contracts: Mapping[str, Tuple[str, int]]  # 小写合约地址 -> (代币符号, 小数位)
+    watched: AddressIndex  # 监控地址索引（与配置共用同一个实例）
+    thresholds_wei: Mapping[str, Optional[int]]  # 代币符号 -> 整数 wei 阈值
+    rule_names: Tuple[str, ...] = ()  # 规则模式下第 i 位对应的规则名
+    rule_tables: Mapping[str, RuleTable] = field(default_factory=lambda: MappingProxyType({}))  # 代币符号 -> 规则表
+    disperse_contracts: FrozenSet[str] = frozenset()  # 解码分发调用的批量分发合约（小写）
+    batch_contracts: FrozenSet[str] = frozenset()  # 解码批量转账方法的代币合约（小写）
+
+    @property
+    def is_large_amount(self) -> bool:
+        return self.strategy == MonitorStrategy.LARGE_AMOUNT
+
+    @property
+    def is_watch_address(self) -> bool:
+        return self.strategy == MonitorStrategy.WATCH_ADDRESS
+
+    @property
+    def is_rules(self) -> bool:
+        return self.strategy == MonitorStrategy.RULES
+
+    @property
+    def is_active(self) -> bool:
+        """当前策略是否会产生命中"""
+        return self.is_large_amount or self.is_watch_address or (self.is_rules and bool(self.rule_tables))
+
+    def rule_names_for(self, bits: int) -> Tuple[str, ...]:
+        """位掩码转换为命中的规则名"""
+        return tuple(name for i, name in enumerate(self.rule_names) if bits >> i & 1)
+
+    def __reduce__(self):
+        """序列化（发送给解码工作进程）时只读映射转为 dict，MappingProxyType 不能 pickle"""
+        return (_restore_index, (
+            self.key, self.strategy, self.detect_native, self.native_symbol, self.native_threshold_wei,
+            dict(self.contracts), self.watched, dict(self.thresholds_wei), self.rule_names, dict(self.rule_tables),
+            self.disperse_contracts, self.batch_contracts,
+        ))
+
+
+def _restore_index(key, strategy, detect_native, native_symbol, native_threshold_wei,
+                   contracts, watched, thresholds_wei, rule_names=(), rule_tables=None,
+                   disperse_contracts=frozenset(), batch_contracts=frozenset()) -> ClassifierIndex:
+    """反序列化分类索引"""
+    return ClassifierIndex(
+        key=key,
+        strategy=strategy,
+        detect_native=detect_native,
+        native_symbol=native_symbol,
+        native_threshold_wei=native_threshold_wei,
+        contracts=MappingProxyType(contracts),
+        watched=watched,
+        thresholds_wei=MappingProxyType(thresholds_wei),
+        rule_names=rule_names,
+        rule_tables=MappingProxyType(rule_tables or {}),
+        disperse_contracts=disperse_contracts,
+        batch_contracts=batch_contracts,
+    )
+
+
+def compile_rule_tables(config: MonitorConfig, symbols: Dict[str, int]) -> Tuple[Tuple[str, ...], Dict[str, RuleTable]]:
+    """
+    把检测规则编译为按代币查找的规则表
+
+    Args:
+        config: 监控配置（检测规则、阈值）
+        symbols: 参与检测的代币符号 -> 小数位（含原生代币）
+
+    Returns:
+        (规则名元组, 代币符号 -> 规则表)，没有任何规则的代币不出现在规则表中
+    """
+    names: List[str] = []
+    tables = {symbol: ([], [], [], {}, {}) for symbol in symbols}
+    for rule in config.get_detection_rules():
+        bit = 1 << len(names)
+        names.append(rule.name)
+        if rule.tokens is None:
+            targets = symbols
+        else:
+            unknown = [symbol for symbol in rule.tokens if symbol not in symbols]
+            if unknown:
+                logger.warning(f"⚠️ 规则 {rule.name} 中的代币 {unknown} 不在当前链支持的代币中，忽略")
+            targets = {symbol: symbols[symbol] for symbol in rule.tokens if symbol in symbols}
+        addresses = [address.lower() for address in rule.addresses] if rule.addresses else None
+
+        for symbol, decimals in targets.items():
+            large, watch_in, watch_out, address_in, address_out = tables[symbol]
+            if rule.kind == RuleKind.LARGE_AMOUNT:
+                amount = rule.min_amount if rule.min_amount is not None else config.thresholds.get(symbol)
+                min_wei = threshold_to_base_units(amount, decimals) if amount is not None else None
+                if min_wei is not None:
+                    large.append((min_wei, bit))
+                continue
+
+            min_wei = threshold_to_base_units(rule.min_amount, decimals) if rule.min_amount is not None else 0
+            if min_wei is None:
+                continue
+            inbound = rule.kind in (RuleKind.WATCH_INBOUND, RuleKind.ADDRESS_AMOUNT)
+            outbound = rule.kind in (RuleKind.WATCH_OUTBOUND, RuleKind.ADDRESS_AMOUNT)
+            if addresses is None:
+                (watch_in if inbound else watch_out).append((min_wei, bit))
+                continue
+            for address in addresses:
+                if inbound:
+                    address_in.setdefault(address, []).append((min_wei, bit))
+                if outbound:
+                    address_out.setdefault(address, []).append((min_wei, bit))
+
+    compiled = {}
+    for symbol, (large, watch_in, watch_out, address_in, address_out) in tables.items():
+        if large or watch_in or watch_out or address_in or address_out:
+            compiled[symbol] = (
+                tuple(large), tuple(watch_in), tuple(watch_out),
+                {address: tuple(entries) for address, entries in address_in.items()},
+                {address: tuple(entries) for address, entries in address_out.items()},
+            )
+    return tuple(names), compiled
+
+
+def match_rules(table: RuleTable, sender: str, recipient: str, wei: int, watched: AddressIndex) -> int:
+    """
+    按一个代币的规则表检测一笔转账
+
+    Args:
+        table: 规则表
+        sender: 转出地址（小写）
+        recipient: 接收地址（小写）
+        wei: 金额（整数最小单位）
+        watched: 监控地址索引
+
+    Returns:
+        int: 命中规则的位掩码，0 表示未命中
+    """
+    large, watch_in, watch_out, address_in, address_out = table
+    bits = 0
+    for min_wei, bit in large:
+        if wei >= min_wei:
+            bits |= bit
+    # 地址类规则不计转出和转入地址相同的转账
+    if recipient == sender:
+        return bits
+    if watch_in and recipient in watched:
+        for min_wei, bit in watch_in:
+            if wei >= min_wei:
+                bits |= bit
+    if watch_out and sender in watched:
+        for min_wei, bit in watch_out:
+            if wei >= min_wei:
+                bits |= bit
+    if address_in:
+        for min_wei, bit in address_in.get(recipient, ()):
+            if wei >= min_wei:
+                bits |= bit
+    if address_out:
+        for min_wei, bit in address_out.get(sender, ()):
+            if wei >= min_wei:
+                bits |= bit
+    return bits
+
+
+def compile_classifier_index(config: MonitorConfig, token_parser: TokenParser) -> ClassifierIndex:
+    """按当前配置编译分类索引"""
+    contracts = {}
+    for symbol, contract in token_parser.contracts.items():
+        if contract:
+            contracts[contract.lower()] = (symbol, token_parser.decimals.get(symbol, 18))
+
+    thresholds_wei = {}
+    native_threshold_wei = None
+    rule_names: Tuple[str, ...] = ()
+    rule_tables: Dict[str, RuleTable] = {}
+    if config.is_rules_strategy():
+        symbols = {symbol: decimals for symbol, decimals in contracts.values()}
+        if config.detect_native_transfers:
+            symbols[config.token_name] = NATIVE_DECIMALS
+        rule_names, rule_tables = compile_rule_tables(config, symbols)
+    elif config.is_large_amount_strategy():
+        for symbol, decimals in contracts.values():
+            thresholds_wei[symbol] = threshold_to_base_units(config.get_threshold(symbol), decimals)
+        native_threshold_wei = threshold_to_base_units(config.get_threshold(config.token_name), NATIVE_DECIMALS)
+
+    index = ClassifierIndex(
+        key=classifier_key(config, token_parser),
+        strategy=config.monitor_strategy,
+        detect_native=config.detect_native_transfers,
+        native_symbol=config.token_name,
+        native_threshold_wei=native_threshold_wei,
+        contracts=MappingProxyType(contracts),
+        watched=config.watch_addresses,
+        thresholds_wei=MappingProxyType(thresholds_wei),
+        rule_names=rule_names,
+        rule_tables=MappingProxyType(rule_tables),
+        disperse_contracts=frozenset(address.lower() for address in config.disperse_contracts),
+        batch_contracts=frozenset(
+            token_parser.contracts[symbol].lower()
+            for symbol in config.batch_transfer_tokens if token_parser.contracts.get(symbol)
+        ),
+    )
+    logger.debug(
+        f"分类索引已编译: {len(contracts)} 个代币合约, {len(index.watched)} 个监控地址, "
+        f"策略: {config.monitor_strategy.value}"
+    )
+    return index
+
+
+def transaction_rows(transactions: Sequence[Dict[str, Any]]) -> List[Tuple]:
+    """提取分类需要的字段 (to, value, from, input)，发给解码工作进程时只序列化这些字段"""
+    return [(tx.get('to'), tx['value'], tx['from'], tx.get('input')) for tx in transactions]
+
+
+def classify_rows(index: ClassifierIndex, rows: Sequence[Tuple]) -> Tuple[List[Tuple], int, int]:
+    """
+    一次遍历分类整个区块的交易（纯函数，不访问配置和网络）
+
+    合约查找为一次字典访问，阈值比较为整数 wei 比较。批量转账和批量分发合约的调用按每笔转账分别检测，
+    一笔交易可能产生多条命中
+
+    Args:
+        index: 分类索引
+        rows: transaction_rows 提取的交易字段
+
+    Returns:
+        (命中记录, 代币合约调用数, 解码出转账的代币调用数)。命中记录为
+        (交易序号, 代币符号, 小数位, 合约地址, 转出地址, 接收地址, 金额wei, 命中规则位掩码, 交易内转账序号)，
+        原生代币转账的符号和地址为 None、转账序号为 0，非规则模式下位掩码为 0；
+        转账序号是 calldata 中的第几笔，回执核对时替换为对应 Transfer 事件的 logIndex
+    """
+    if index.is_rules:
+        return _classify_rules(index, rows)
+    large_amount = index.is_large_amount
+    if not large_amount and not index.is_watch_address:
+        return [], 0, 0
+
+    detect_native = index.detect_native
+    native_threshold = index.native_threshold_wei
+    contracts = index.contracts
+    thresholds_wei = index.thresholds_wei
+    watched = index.watched
+    disperse_contracts = index.disperse_contracts
+    batch_contracts = index.batch_contracts
+
+    matches = []
+    contracts_detected = 0
+    token_transactions = 0
+    for position, (to_address, wei, sender, input_data) in enumerate(rows):
+        if not to_address:
+            continue
+        to_lower = to_address.lower()
+
+        # 原生代币转账
+        if wei and detect_native:
+            if large_amount:
+                hit = native_threshold is not None and wei >= native_threshold
+            else:
+                hit = to_lower in watched
+            if hit:
+                matches.append((position, None, NATIVE_DECIMALS, None, None, None, wei, 0, 0))
+                continue
+
+        # 代币合约调用；白名单内的分发合约检查是否为批量分发调用（选择器不匹配时只读取前 4 个字节）
+        token = contracts.get(to_lower)
+        if token is not None:
+            contract = to_lower
+            transfers = decode_token_call(input_data, sender, to_lower in batch_contracts)
+        else:
+            if to_lower not in disperse_contracts or not input_data or len(input_data) < DISPERSE_MIN_CALLDATA:
+                continue
+            disperse = decode_disperse_call(input_data, sender)
+            if disperse is None:
+                continue
+            contract, transfers = disperse
+            token = contracts.get(contract)
+            if token is None:
+                continue
+        token_symbol, decimals = token
+        contracts_detected += 1
+        if not transfers:
+            continue
+        token_transactions += 1
+
+        threshold = thresholds_wei.get(token_symbol)
+        for transfer_index, (from_address, recipient, amount_wei) in enumerate(transfers):
+            if large_amount:
+                hit = threshold is not None and amount_wei >= threshold
+            else:
+                hit = recipient in watched and recipient != from_address
+            if hit:
+                matches.append((position, token_symbol, decimals, contract, from_address, recipient, amount_wei, 0, transfer_index))
+
+    return matches, contracts_detected, token_transactions
+
+
+def _classify_rules(index: ClassifierIndex, rows: Sequence[Tuple]) -> Tuple[List[Tuple], int, int]:
+    """规则模式下分类区块交易：每笔转账查一次对应代币的规则表，返回值与 classify_rows 相同"""
+    rule_tables = index.rule_tables
+    if not rule_tables:
+        return [], 0, 0
+    native_table = rule_tables.get(index.native_symbol) if index.detect_native else None
+    contracts = index.contracts
+    watched = index.watched
+    disperse_contracts = index.disperse_contracts
+    batch_contracts = index.batch_contracts
+
+    matches = []
+    contracts_detected = 0
+    token_transactions = 0
+    for position, (to_address, wei, sender, input_data) in enumerate(rows):
+        if not to_address:
+            continue
+        to_lower = to_address.lower()
+
+        # 原生代币转账；命中后仍检查代币调用，各条规则分别评估（附带原生代币的代币调用不被遮蔽）
+        if wei and native_table is not None:
+            bits = match_rules(native_table, sender.lower(), to_lower, wei, watched)
+            if bits:
+                matches.append((position, None, NATIVE_DECIMALS, None, None, None, wei, bits, 0))
+
+        # 代币合约调用；白名单内的分发合约检查是否为批量分发调用
+        token = contracts.get(to_lower)
+        if token is not None:
+            contract = to_lower
+            transfers = decode_token_call(input_data, sender, to_lower in batch_contracts)
+        else:
+            if to_lower not in disperse_contracts or not input_data or len(input_data) < DISPERSE_MIN_CALLDATA:
+                continue
+            disperse = decode_disperse_call(input_data, sender)
+            if disperse is None:
+                continue
+            contract, transfers = disperse
+            token = contracts.get(contract)
+            if token is None:
+                continue
+        token_symbol, decimals = token
+        contracts_detected += 1
+        if not transfers:
+            continue
+        token_transactions += 1
+
+        table = rule_tables.get(token_symbol)
+        if table is None:
+            continue
+        for transfer_index, (from_address, recipient, amount_wei) in enumerate(transfers):
+            bits = match_rules(table, from_address.lower(), recipient, amount_wei, watched)
+            if bits:
+                matches.append((position, token_symbol, decimals, contract, from_address, recipient, amount_wei, bits, transfer_index))
+
+    return matches, contracts_detected, token_transactions
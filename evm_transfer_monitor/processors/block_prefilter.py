@@ -0,0 +1,129 @@
+"""
+区块 logsBloom 预过滤器
+
+先只获取区块头，用 logsBloom 判断区块是否可能包含相关的 Transfer 事件：
+Transfer 事件签名、任一监控的代币合约，以及（地址监控策略下、地址数不超过上限时）任一监控地址作为 topic。
+判断为不可能包含的区块不再下载完整交易列表。
+原生代币转账不产生日志，需要检测原生转账时预过滤不生效
+"""
+
+from typing import Any, Dict, List, Optional
+
+from web3 import AsyncWeb3
+
+from config.monitor_config import MonitorConfig
+from models.data_types import RawBlock
+from utils.bloom import BloomBits, address_bits, address_topic_bits, bloom_contains, to_bloom_bytes, topic_bits
+from utils.token_parser import TRANSFER_EVENT_TOPIC, TokenParser
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class BlockBloomPrefilter:
+    """区块 logsBloom 预过滤器 - 跳过确定不含相关转账的区块"""
+
+    def __init__(self, config: MonitorConfig, token_parser: TokenParser):
+        self.config = config
+        self.token_parser = token_parser
+
+        self._transfer_bits: BloomBits = topic_bits(TRANSFER_EVENT_TOPIC)
+        self._contract_bits: List[BloomBits] = []
+        # 监控地址 -> 作为 topic 时的位；None 表示不检查地址（非地址监控策略或地址数超过上限）
+        self._address_bits: Optional[Dict[str, BloomBits]] = None
+        self._token_version: Optional[int] = None
+        self._address_version: Optional[int] = None
+
+        # 统计信息
+        self.blocks_checked: int = 0
+        self.blocks_skipped: int = 0
+
+    @property
+    def enabled(self) -> bool:
+        """预过滤是否生效"""
+        return (self.config.bloom_prefilter_enabled and
+                not self.config.detect_native_transfers and
+                not self.config.is_logs_ingestion())
+
+    def _rebuild_contracts(self) -> None:
+        """按当前代币合约重新计算需要检查的位"""
+        self._contract_bits = [
+            address_bits(contract.lower())
+            for contract in self.token_parser.contracts.values()
+            if contract and AsyncWeb3.is_address(contract)
+        ]
+        self._token_version = self.token_parser.version
+        logger.debug(f"logsBloom 预过滤已更新: {len(self._contract_bits)} 个代币合约")
+
+    def _sync_addresses(self) -> None:
+        """
+        使地址位与监控地址一致
+
+        地址增删时按 watch_changes_since 增量更新；增量无法覆盖（地址被整体替换）、
+        策略变化或地址数从上限以上回落时全量重建。地址数超过 bloom_prefilter_address_limit
+        时不检查地址：地址越多 logsBloom 越难排除，逐个检查的开销却随地址数增长
+        """
+        version = self.config.watch_addresses_version
+        if (not self.config.is_watch_address_strategy() or
+                self.config.get_watch_addresses_count() > self.config.bloom_prefilter_address_limit):
+            if self._address_bits is not None:
+                logger.debug("logsBloom 预过滤不再检查监控地址")
+            self._address_bits = None
+            self._address_version = version
+            return
+
+        changes = None
+        if self._address_bits is not None and self._address_version is not None:
+            changes = self.config.watch_changes_since(self._address_version)
+        if changes is None:
+            self._address_bits = {
+                address.lower(): address_topic_bits(address.lower()) for address in self.config.watch_addresses
+            }
+            logger.debug(f"logsBloom 预过滤已更新: {len(self._address_bits)} 个地址")
+        else:
+            for _, added, address in changes:
+                address = address.lower()
+                if added:
+                    self._address_bits[address] = address_topic_bits(address)
+                else:
+                    self._address_bits.pop(address, None)
+        self._address_version = version
+
+    def may_contain(self, header: Any) -> bool:
+        """
+        区块是否可能包含相关转账
+
+        Args:
+            header: get_block_header 返回的区块头（web3 区块或 RawBlock）
+
+        Returns:
+            bool: False 表示确定不包含，可以跳过该区块
+        """
+        if self._token_version != self.token_parser.version:
+            self._rebuild_contracts()
+        if self._address_version != self.config.watch_addresses_version:
+            self._sync_addresses()
+
+        self.blocks_checked += 1
+        bloom = header.logs_bloom if isinstance(header, RawBlock) else header.get('logsBloom')
+        if not bloom:
+            # 节点未返回 logsBloom，无法判断
+            return True
+        bloom = to_bloom_bytes(bloom)
+
+        hit = (bloom_contains(bloom, self._transfer_bits) and
+               any(bloom_contains(bloom, bits) for bits in self._contract_bits) and
+               (self._address_bits is None or
+                any(bloom_contains(bloom, bits) for bits in self._address_bits.values())))
+        if not hit:
+            self.blocks_skipped += 1
+        return hit
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取预过滤统计信息"""
+        return {
+            'enabled': self.enabled,
+            'blocks_checked': self.blocks_checked,
+            'blocks_skipped': self.blocks_skipped,
+            'skip_rate': (self.blocks_skipped / self.blocks_checked * 100) if self.blocks_checked > 0 else 0.0,
+        }
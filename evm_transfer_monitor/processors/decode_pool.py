@@ -0,0 +1,159 @@
+"""
+区块解码进程池
+
+BSC 等繁忙链上每个区块有数百笔交易，calldata 解码和分类全部在事件循环线程内执行时，
+RabbitMQ 消费、入库任务和确认检查都要等待。启用 decode_workers 后，区块交易只提取
+(to, value, from, input) 发送给工作进程，工作进程持有分类索引（代币合约、阈值、监控地址索引）的副本，
+只返回精简的命中记录，由事件循环构造 TransactionInfo。
+
+索引同步：
+- 只有监控地址增删时（WalletUpdateHandler 逐个添加地址），增量随每个任务下发，工作进程按版本号
+  应用自己尚未应用的部分，不重新传输整个地址索引
+- 策略、阈值等其他配置变化、地址被整体替换，或累积的增量超过 decode_pool_max_changes 时，
+  以新的索引快照重新启动进程池（旧进程处理完已提交的任务后退出）
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config.monitor_config import MonitorConfig
+from processors.block_classifier import ClassifierIndex, classify_rows
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+# 工作进程内的分类索引副本及已应用的监控地址版本
+_worker_index: Optional[ClassifierIndex] = None
+_worker_version: int = 0
+
+
+def _init_worker(index: ClassifierIndex) -> None:
+    """工作进程初始化：保存索引快照"""
+    global _worker_index, _worker_version
+    _worker_index = index
+    _worker_version = index.key[-1]
+
+
+def _classify_in_worker(changes: Sequence[Tuple[int, bool, str]], rows: Sequence[Tuple]) -> Tuple[List[Tuple], int, int]:
+    """工作进程内分类：先应用尚未应用的监控地址增量，再分类区块交易"""
+    global _worker_version
+    watched = _worker_index.watched
+    for version, added, address in changes:
+        if version <= _worker_version:
+            continue
+        if added:
+            watched.add(address)
+        else:
+            watched.discard(address)
+        _worker_version = version
+    return classify_rows(_worker_index, rows)
+
+
+class BlockDecodePool:
+    """区块解码进程池 - 工作进程持有分类索引副本，只返回命中记录"""
+
+    def __init__(self, config: MonitorConfig, workers: int):
+        """
+        初始化进程池（首次分类时才启动工作进程）
+
+        Args:
+            config: 监控配置（读取监控地址增量日志）
+            workers: 工作进程数
+        """
+        self.config = config
+        self.workers = workers
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._snapshot_key: Optional[Tuple] = None  # 工作进程索引快照的 key
+        self._version: int = 0  # 已纳入增量的监控地址版本
+        self._changes: List[Tuple[int, bool, str]] = []  # 快照之后的监控地址增量
+
+        # 统计信息
+        self.blocks_offloaded: int = 0
+        self.transactions_offloaded: int = 0
+        self.snapshots: int = 0
+        self.changes_synced: int = 0
+        self.failures: int = 0
+
+    def _start(self, index: ClassifierIndex) -> None:
+        """以当前索引为快照（重新）启动工作进程"""
+        self.shutdown()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(index,)
+        )
+        self._snapshot_key = index.key
+        self._version = index.key[-1]
+        self._changes = []
+        self.snapshots += 1
+        logger.info(f"🧵 解码进程池已启动: {self.workers} 个工作进程, {len(index.watched)} 个监控地址")
+
+    def _sync(self, index: ClassifierIndex) -> None:
+        """使工作进程的索引与当前索引一致：只有监控地址增删时记录增量，否则重新启动进程池"""
+        if self._executor is None or self._snapshot_key[:-1] != index.key[:-1]:
+            self._start(index)
+            return
+
+        version = index.key[-1]
+        if version == self._version:
+            return
+        changes = self.config.watch_changes_since(self._version)
+        if changes is None or len(self._changes) + len(changes) > self.config.decode_pool_max_changes:
+            self._start(index)
+            return
+        self._changes.extend(changes)
+        self._version = version
+        self.changes_synced += len(changes)
+
+    async def classify(self, index: ClassifierIndex, rows: List[Tuple]) -> Optional[Tuple[List[Tuple], int, int]]:
+        """
+        在工作进程中分类区块交易
+
+        Returns:
+            classify_rows 的结果；进程池异常时返回 None（由调用方在事件循环内分类），下次使用时重新启动
+        """
+        self._sync(index)
+        executor = self._executor
+        loop = asyncio.get_running_loop()
+        try:
+            # 在线程中提交：按需启动工作进程时索引快照经管道发送给子进程，
+            # 子进程完成导入前写入会阻塞，不能发生在事件循环线程
+            future = await loop.run_in_executor(None, executor.submit, _classify_in_worker, tuple(self._changes), rows)
+            result = await asyncio.wrap_future(future)
+        except BrokenProcessPool as e:
+            self.failures += 1
+            logger.error(f"❌ 解码进程池异常，本区块在事件循环内分类: {e}")
+            if self._executor is executor:
+                self.shutdown()
+            return None
+        except RuntimeError:
+            # 提交期间进程池已按新快照重新启动，旧进程池不再接受任务
+            return None
+        self.blocks_offloaded += 1
+        self.transactions_offloaded += len(rows)
+        return result
+
+    def shutdown(self) -> None:
+        """关闭工作进程（不等待已提交的任务）"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._snapshot_key = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取进程池统计"""
+        return {
+            'workers': self.workers,
+            'running': self._executor is not None,
+            'blocks_offloaded': self.blocks_offloaded,
+            'transactions_offloaded': self.transactions_offloaded,
+            'snapshots': self.snapshots,
+            'pending_changes': len(self._changes),
+            'changes_synced': self.changes_synced,
+            'failures': self.failures,
+        }
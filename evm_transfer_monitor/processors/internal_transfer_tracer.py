@@ -0,0 +1,237 @@
+"""
+内部转账追踪器
+
+交易的 value 只反映顶层调用，经由多签钱包、交易所热钱包合约或路由合约转发的原生代币不可见。
+本模块通过 trace_block（Parity/Erigon 风格）或 debug_traceBlockByNumber + callTracer（Geth 风格）
+获取区块内全部调用，提取转入监控地址的内部原生代币转账，交给 TransactionProcessor 按策略检测。
+
+trace 调用开销远大于 get_block，使用独立的速率限制器和并发上限，结果按区块哈希缓存；
+节点不支持任何 trace 方法时自动关闭
+"""
+
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config.monitor_config import MonitorConfig
+from managers.rate_limiter import RateLimiter, RequestPriority
+from managers.rpc_manager import RPCManager, is_unsupported_method_error
+from models.data_types import TransactionInfo
+from processors.transaction_processor import TransactionProcessor
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+TRACE_BLOCK = 'trace_block'
+DEBUG_TRACE_BLOCK = 'debug_traceBlockByNumber'
+
+# 会把原生代币转给其他地址的调用类型（DELEGATECALL/STATICCALL/CALLCODE 不转给其他地址）。
+# 两种 trace 格式处理同一组类型，trace_block 中对应 call（callType 为 call）、create（含 CREATE2）和 suicide
+VALUE_CALL_TYPES = ('CALL', 'CREATE', 'CREATE2', 'SELFDESTRUCT')
+
+
+def _to_int(value: Any) -> int:
+    """十六进制数量转整数"""
+    if isinstance(value, int):
+        return value
+    return int(value, 16) if value else 0
+
+
+def parse_parity_traces(traces: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    从 trace_block 结果中提取内部原生代币转账
+
+    出错的调用及其全部子调用的状态都被回滚，跳过（顶层调用出错时跳过整笔交易）；
+    顶层调用由交易本身处理，跳过。创建合约的转账接收方为新合约地址
+    """
+    failed: Dict[str, List[Tuple[int, ...]]] = {}
+    transfers = []
+    for trace in traces:
+        tx_hash = trace.get('transactionHash')
+        if not tx_hash:
+            # 区块奖励等非交易 trace
+            continue
+
+        address = tuple(trace.get('traceAddress') or [])
+        if trace.get('error'):
+            failed.setdefault(tx_hash, []).append(address)
+            continue
+        if not address:
+            continue
+        if any(address[:len(prefix)] == prefix for prefix in failed.get(tx_hash, [])):
+            continue
+
+        action = trace.get('action') or {}
+        trace_type = trace.get('type')
+        if trace_type == 'call' and action.get('callType') == 'call':
+            from_address, to_address, value = action.get('from'), action.get('to'), _to_int(action.get('value'))
+        elif trace_type == 'create':
+            from_address, to_address, value = action.get('from'), (trace.get('result') or {}).get('address'), _to_int(action.get('value'))
+        elif trace_type == 'suicide':
+            from_address, to_address, value = action.get('address'), action.get('refundAddress'), _to_int(action.get('balance'))
+        else:
+            continue
+
+        if value and to_address:
+            transfers.append({
+                'hash': tx_hash,
+                'from': from_address,
+                'to': to_address,
+                'value': value,
+                'trace_address': '_'.join(str(i) for i in address),
+            })
+    return transfers
+
+
+def parse_call_traces(results: Sequence[Dict[str, Any]], tx_hashes: Sequence[str]) -> List[Dict[str, Any]]:
+    """
+    从 debug_traceBlockByNumber（callTracer）结果中提取内部原生代币转账
+
+    顶层调用出错时跳过整笔交易，出错的子调用连同其下所有调用一起跳过；
+    按深度优先先序遍历，结果顺序与 trace_block 一致。较早的 Geth 版本不返回 txHash，此时按顺序与区块交易对应
+    """
+    transfers = []
+    for index, item in enumerate(results):
+        tx_hash = item.get('txHash') or (tx_hashes[index] if index < len(tx_hashes) else None)
+        frame = item.get('result') or {}
+        if not tx_hash or frame.get('error'):
+            continue
+
+        stack = [(call, str(i)) for i, call in reversed(list(enumerate(frame.get('calls') or [])))]
+        while stack:
+            call, path = stack.pop()
+            if call.get('error'):
+                # 子调用失败，其下所有转账都被回滚
+                continue
+            value = _to_int(call.get('value'))
+            if value and call.get('to') and str(call.get('type', '')).upper() in VALUE_CALL_TYPES:
+                transfers.append({
+                    'hash': tx_hash,
+                    'from': call.get('from'),
+                    'to': call.get('to'),
+                    'value': value,
+                    'trace_address': path,
+                })
+            stack.extend((child, f"{path}_{i}") for i, child in reversed(list(enumerate(call.get('calls') or []))))
+    return transfers
+
+
+class InternalTransferTracer:
+    """内部转账追踪器 - 按区块 trace 提取内部原生代币转账"""
+
+    def __init__(self, config: MonitorConfig, rpc_manager: RPCManager, tx_processor: TransactionProcessor):
+        self.config = config
+        self.rpc_manager = rpc_manager
+        self.tx_processor = tx_processor
+
+        # trace 调用独立限流和并发控制
+        self.rate_limiter = RateLimiter(config.trace_max_per_second, 0)
+        self._semaphore = asyncio.Semaphore(max(1, config.trace_max_concurrency))
+
+        # 使用的 trace 方法，auto 时首次调用探测
+        self.method: Optional[str] = None if config.trace_method == 'auto' else config.trace_method
+        self.supported: Optional[bool] = None
+
+        # 按区块哈希缓存的 trace 结果
+        self._cache: 'OrderedDict[str, List[Dict[str, Any]]]' = OrderedDict()
+
+        # 统计信息
+        self.blocks_traced: int = 0
+        self.cache_hits: int = 0
+        self.internal_transfers_found: int = 0
+
+    @property
+    def enabled(self) -> bool:
+        """追踪是否生效"""
+        return (self.config.trace_internal_transfers and
+                self.config.detect_native_transfers and
+                not self.config.is_logs_ingestion() and
+                self.supported is not False)
+
+    def _hex(self, value: Any) -> str:
+        """哈希转十六进制字符串"""
+        return value if isinstance(value, str) else self.rpc_manager.w3.to_hex(value)
+
+    async def get_internal_transfers(self, block: Any) -> List[Dict[str, Any]]:
+        """
+        获取区块内的内部原生代币转账（带缓存）
+
+        Args:
+            block: 完整区块（web3 区块或 RawBlock）
+        """
+        block_hash = self._hex(block.hash)
+        cached = self._cache.get(block_hash)
+        if cached is not None:
+            self._cache.move_to_end(block_hash)
+            self.cache_hits += 1
+            return cached
+
+        async with self._semaphore:
+            await self.rate_limiter.acquire(RequestPriority.NORMAL)
+            transfers = await self._trace(block)
+
+        self._cache[block_hash] = transfers
+        while len(self._cache) > self.config.trace_cache_size:
+            self._cache.popitem(last=False)
+        return transfers
+
+    async def _trace(self, block: Any) -> List[Dict[str, Any]]:
+        """调用 trace 方法，auto 模式下依次探测节点支持的方法"""
+        block_param = hex(block.number)
+        methods = [self.method] if self.method else [TRACE_BLOCK, DEBUG_TRACE_BLOCK]
+        for method in methods:
+            try:
+                if method == TRACE_BLOCK:
+                    traces = await self.rpc_manager.request_method(method, [block_param], RequestPriority.NORMAL)
+                    transfers = parse_parity_traces(traces or [])
+                else:
+                    results = await self.rpc_manager.request_method(
+                        method, [block_param, {'tracer': 'callTracer'}], RequestPriority.NORMAL
+                    )
+                    tx_hashes = [self._hex(tx['hash']) for tx in block.transactions]
+                    transfers = parse_call_traces(results or [], tx_hashes)
+            except Exception as e:
+                if is_unsupported_method_error(e):
+                    logger.debug(f"节点不支持 {method}: {e}")
+                    continue
+                raise
+
+            if self.supported is None:
+                self.method = method
+                self.supported = True
+                logger.info(f"🔍 使用 {method} 追踪内部转账")
+            self.blocks_traced += 1
+            return transfers
+
+        self.supported = False
+        logger.warning(f"⚠️ RPC节点不支持 {' / '.join(methods)}，内部转账检测已关闭")
+        return []
+
+    async def scan_block(self, block: Any) -> List[TransactionInfo]:
+        """提取区块内命中策略的内部转账"""
+        transfers = await self.get_internal_transfers(block)
+        if not transfers:
+            return []
+
+        txs = {self._hex(tx['hash']).lower(): tx for tx in block.transactions}
+        tx_infos = []
+        for transfer in transfers:
+            tx = txs.get(transfer['hash'].lower())
+            if tx is None:
+                continue
+            tx_info = self.tx_processor.process_internal_transfer(tx, transfer)
+            if tx_info:
+                tx_infos.append(tx_info)
+        self.internal_transfers_found += len(tx_infos)
+        return tx_infos
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取追踪统计"""
+        return {
+            'enabled': self.enabled,
+            'method': self.method,
+            'blocks_traced': self.blocks_traced,
+            'cache_hits': self.cache_hits,
+            'internal_transfers_found': self.internal_transfers_found,
+            'rate_limit': self.rate_limiter.get_stats(),
+        }
@@ -0,0 +1,137 @@
+"""
+Transfer 事件扫描器
+
+通过 eth_getLogs 按区块范围查询 ERC-20 Transfer 事件，替代下载完整区块逐笔解码交易。
+返回数据量远小于完整区块，并且能覆盖 transferFrom、路由合约和智能钱包发起的转账。
+注意：事件日志不包含原生代币转账
+"""
+
+from typing import Any, Dict, List, Optional
+
+from web3 import AsyncWeb3
+
+from config.monitor_config import MonitorConfig
+from managers.rpc_manager import RPCManager
+from models.data_types import TransactionInfo
+from processors.transaction_processor import TransactionProcessor
+from utils.token_parser import TRANSFER_EVENT_TOPIC, TokenParser
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class TransferLogScanner:
+    """Transfer 事件扫描器 - 通过 eth_getLogs 获取代币转账"""
+
+    def __init__(self, config: MonitorConfig, token_parser: TokenParser,
+                 rpc_manager: RPCManager, tx_processor: TransactionProcessor):
+        self.config = config
+        self.token_parser = token_parser
+        self.rpc_manager = rpc_manager
+        self.tx_processor = tx_processor
+
+        # 统计信息
+        self.logs_fetched: int = 0
+        self.ranges_scanned: int = 0
+        self.range_splits: int = 0
+
+    def _get_token_contracts(self) -> List[str]:
+        """获取需要过滤的代币合约地址（校验和格式）"""
+        contracts = []
+        for token, contract in self.token_parser.contracts.items():
+            if not contract:
+                continue
+            if not AsyncWeb3.is_address(contract):
+                logger.debug(f"忽略格式无效的 {token} 合约地址: {contract}")
+                continue
+            contracts.append(AsyncWeb3.to_checksum_address(contract))
+        return contracts
+
+    def _get_recipient_topics(self) -> Optional[List[str]]:
+        """
+        获取接收地址过滤条件（topic2）
+
+        仅在地址监控策略下且地址数量不超过 logs_topic_address_limit 时下推到节点，
+        地址过多时由 TransactionProcessor 在本地过滤
+        """
+        if not self.config.is_watch_address_strategy():
+            return None
+
+        addresses = self.config.watch_addresses
+        if not addresses or len(addresses) > self.config.logs_topic_address_limit:
+            return None
+
+        return ['0x' + address.lower()[2:].rjust(64, '0') for address in addresses]
+
+    def build_filter(self, from_block: int, to_block: int) -> Dict[str, Any]:
+        """
+        构建 eth_getLogs 过滤条件
+
+        Args:
+            from_block: 起始区块号
+            to_block: 结束区块号（包含）
+
+        Returns:
+            过滤条件字典
+        """
+        topics: List[Any] = [TRANSFER_EVENT_TOPIC]
+        recipient_topics = self._get_recipient_topics()
+        if recipient_topics:
+            topics.extend([None, recipient_topics])
+
+        return {
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'address': self._get_token_contracts(),
+            'topics': topics,
+        }
+
+    async def scan_range(self, from_block: int, to_block: int) -> List[TransactionInfo]:
+        """
+        扫描区块范围内的 Transfer 事件
+
+        节点因结果过多拒绝查询时，将范围对半拆分后重试
+
+        Args:
+            from_block: 起始区块号
+            to_block: 结束区块号（包含）
+
+        Returns:
+            命中策略的交易信息列表，按区块和日志顺序排列
+        """
+        filter_params = self.build_filter(from_block, to_block)
+        if not filter_params['address']:
+            logger.warning("⚠️ 没有可用的代币合约，跳过事件扫描")
+            return []
+
+        try:
+            logs = await self.rpc_manager.get_logs(filter_params)
+        except Exception as e:
+            if from_block >= to_block:
+                raise
+            middle = (from_block + to_block) // 2
+            self.range_splits += 1
+            logger.debug(f"eth_getLogs 查询 {from_block}-{to_block} 失败，拆分后重试: {e}")
+            first_half = await self.scan_range(from_block, middle)
+            second_half = await self.scan_range(middle + 1, to_block)
+            return first_half + second_half
+
+        self.ranges_scanned += 1
+        self.logs_fetched += len(logs)
+
+        results = []
+        for log in sorted(logs, key=lambda item: (item['blockNumber'], item['logIndex'])):
+            if log.get('removed'):
+                continue
+            tx_info = self.tx_processor.process_transfer_log(log)
+            if tx_info:
+                results.append(tx_info)
+        return results
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取扫描统计信息"""
+        return {
+            'logs_fetched': self.logs_fetched,
+            'ranges_scanned': self.ranges_scanned,
+            'range_splits': self.range_splits,
+        }
@@ -0,0 +1,215 @@
+"""
+交易回执处理器
+
+区块中的交易不包含执行结果，命中策略的候选交易在记录和入库前补充回执：
+执行状态、实际消耗的 Gas 和实际 Gas 单价，执行失败（已回滚）的转账直接丢弃。
+代币转账与回执中的 Transfer 事件对应，transfer_index 统一取事件的 logIndex，
+区块解码和 eth_getLogs 两种扫描方式得到的同一笔充值因此具有相同的唯一键；回执中没有对应事件的转账被丢弃。
+回执中发出 Transfer 事件的其他合约记入代币注册表，由定期维护解析元数据。
+只为有命中的区块请求回执，优先使用 eth_getBlockReceipts 一次获取整个区块，
+节点不支持时退回逐笔 eth_getTransactionReceipt（由批量合并器合并为一次HTTP请求）
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from config.monitor_config import MonitorConfig
+from managers.rate_limiter import RequestPriority
+from managers.rpc_manager import RPCManager, is_unsupported_method_error
+from managers.token_registry import TokenRegistry
+from models.data_types import TransactionInfo
+from utils.log_utils import get_logger
+from utils.token_parser import TRANSFER_EVENT_TOPIC
+
+logger = get_logger(__name__)
+
+# (执行状态, 实际消耗的 Gas, 实际 Gas 单价)
+ReceiptFields = Tuple[Optional[int], Optional[int], Optional[int]]
+# 回执中的 Transfer 事件: (小写合约地址, 小写接收地址, 金额, logIndex)
+TransferLog = Tuple[str, str, int, int]
+
+
+def _to_hex(value: Any) -> str:
+    """主题和 data 转小写十六进制字符串，兼容 web3 的 HexBytes 和原生传输的字符串"""
+    if isinstance(value, str):
+        return value.lower()
+    return '0x' + bytes(value).hex()
+
+
+class ReceiptEnricher:
+    """交易回执处理器 - 补充执行状态和 Gas 信息，丢弃执行失败的转账"""
+
+    def __init__(self, config: MonitorConfig, rpc_manager: RPCManager,
+                 token_registry: Optional[TokenRegistry] = None):
+        self.config = config
+        self.rpc_manager = rpc_manager
+        self.token_registry = token_registry
+        self.block_receipts_supported: bool = True
+
+        # 统计信息
+        self.blocks_fetched: int = 0
+        self.block_receipt_calls: int = 0
+        self.tx_receipt_calls: int = 0
+        self.reverted_dropped: int = 0
+        self.unmatched_dropped: int = 0
+
+    async def enrich(self, tx_infos: List[TransactionInfo],
+                     priority: RequestPriority = RequestPriority.HEAD) -> List[TransactionInfo]:
+        """
+        为候选交易补充回执字段
+
+        Args:
+            tx_infos: 候选交易
+            priority: 回执请求的优先级
+
+        Returns:
+            List[TransactionInfo]: 执行成功的交易（保持原顺序），代币转账的 transfer_index 为对应 Transfer 事件的 logIndex
+
+        Raises:
+            获取回执失败时抛出异常，调用方应重试该区块，避免入库未核对的交易
+        """
+        if not self.config.receipts_enabled or not tx_infos:
+            return tx_infos
+
+        hashes_by_block: Dict[int, List[str]] = {}
+        for tx_info in tx_infos:
+            hashes_by_block.setdefault(tx_info.block_number, []).append(tx_info.hash.lower())
+
+        receipts: Dict[str, Tuple[ReceiptFields, List[TransferLog]]] = {}
+        for block_receipts in await asyncio.gather(*(
+            self._fetch_receipts(block_number, hashes, priority)
+            for block_number, hashes in hashes_by_block.items()
+        )):
+            receipts.update(block_receipts)
+        self.blocks_fetched += len(hashes_by_block)
+
+        if self.token_registry is not None:
+            for _, transfer_logs in receipts.values():
+                for log_contract, _, _, _ in transfer_logs:
+                    self.token_registry.observe(log_contract)
+
+        accepted = []
+        used_logs: Set[Tuple[str, int]] = set()
+        for tx_info in tx_infos:
+            tx_hash = tx_info.hash.lower()
+            fields, transfer_logs = receipts[tx_hash]
+            tx_info.status, tx_info.gas_used, tx_info.effective_gas_price = fields
+            if tx_info.status == 0:
+                self.reverted_dropped += 1
+                logger.info(f"↩️ 交易执行失败（已回滚），忽略: {tx_info.tx_type} | 区块: {tx_info.block_number} | "
+                            f"{self.config.scan_url}/tx/{tx_info.hash}")
+                continue
+            if tx_info.contract is not None and not tx_info.trace_address:
+                log_index = self._match_transfer_log(tx_info, transfer_logs, used_logs)
+                if log_index is None:
+                    self.unmatched_dropped += 1
+                    logger.info(f"🚫 回执中没有对应的 Transfer 事件，忽略: {tx_info.tx_type} | 区块: {tx_info.block_number} | "
+                                f"{self.config.scan_url}/tx/{tx_info.hash}")
+                    continue
+                used_logs.add((tx_hash, log_index))
+                tx_info.transfer_index = log_index
+            accepted.append(tx_info)
+        return accepted
+
+    @staticmethod
+    def _match_transfer_log(tx_info: TransactionInfo, transfer_logs: List[TransferLog],
+                            used_logs: Set[Tuple[str, int]]) -> Optional[int]:
+        """
+        在回执的 Transfer 事件中查找与代币转账对应的事件
+
+        按代币合约和接收地址匹配（分发合约可能先把代币转入自身再转出，不比较发送方），
+        优先选择 logIndex 与当前序号相同且金额相同的事件（事件扫描得到的转账），其次是金额相同的事件；
+        只有金额不同的事件时（转账收取手续费的代币）以事件中的实际到账金额为准
+
+        Returns:
+            Optional[int]: 对应事件的 logIndex，没有尚未使用的对应事件时返回 None
+        """
+        contract = tx_info.contract.lower()
+        to_address = tx_info.to_address.lower()
+        tx_hash = tx_info.hash.lower()
+        same_amount = other_amount = None
+        for log_contract, log_to, amount, log_index in transfer_logs:
+            if log_contract != contract or log_to != to_address or (tx_hash, log_index) in used_logs:
+                continue
+            if amount == tx_info.amount_wei:
+                if log_index == tx_info.transfer_index:
+                    return log_index
+                if same_amount is None:
+                    same_amount = log_index
+            elif other_amount is None:
+                other_amount = (log_index, amount)
+        if same_amount is not None:
+            return same_amount
+        if other_amount is not None:
+            tx_info.amount_wei = other_amount[1]
+            return other_amount[0]
+        return None
+
+    async def _fetch_receipts(self, block_number: int, hashes: List[str],
+                              priority: RequestPriority) -> Dict[str, Tuple[ReceiptFields, List[TransferLog]]]:
+        """获取一个区块中指定交易的回执"""
+        receipts: Dict[str, Tuple[ReceiptFields, List[TransferLog]]] = {}
+
+        if self.block_receipts_supported:
+            try:
+                self.block_receipt_calls += 1
+                for receipt in await self.rpc_manager.get_block_receipts(block_number, priority):
+                    tx_hash, parsed = self._parse(receipt)
+                    receipts[tx_hash] = parsed
+            except Exception as e:
+                if is_unsupported_method_error(e):
+                    self.block_receipts_supported = False
+                    logger.warning(f"⚠️ 节点不支持 eth_getBlockReceipts，改为逐笔获取回执: {e}")
+                else:
+                    logger.debug(f"获取区块 {block_number} 回执失败，改为逐笔获取: {e}")
+
+        missing = [tx_hash for tx_hash in hashes if tx_hash not in receipts]
+        if missing:
+            self.tx_receipt_calls += len(missing)
+            for receipt in await asyncio.gather(*(
+                self.rpc_manager.get_transaction_receipt(tx_hash, priority) for tx_hash in missing
+            )):
+                tx_hash, parsed = self._parse(receipt)
+                receipts[tx_hash] = parsed
+
+        return receipts
+
+    def _parse(self, receipt: Any) -> Tuple[str, Tuple[ReceiptFields, List[TransferLog]]]:
+        """提取回执字段和 Transfer 事件，兼容 web3 格式化结果和原生传输的精简结果"""
+        tx_hash = receipt['transactionHash']
+        if not isinstance(tx_hash, str):
+            tx_hash = self.rpc_manager.w3.to_hex(tx_hash)
+        fields = (
+            receipt.get('status'),
+            receipt.get('gasUsed'),
+            receipt.get('effectiveGasPrice'),
+        )
+        return tx_hash.lower(), (fields, self._transfer_logs(receipt))
+
+    @staticmethod
+    def _transfer_logs(receipt: Any) -> List[TransferLog]:
+        """提取回执中的 ERC-20 Transfer 事件"""
+        transfer_logs = []
+        for log in receipt.get('logs') or ():
+            topics = log.get('topics') or ()
+            # Transfer(address indexed from, address indexed to, uint256 value)
+            if len(topics) != 3 or _to_hex(topics[0]) != TRANSFER_EVENT_TOPIC:
+                continue
+            data = _to_hex(log.get('data') or b'')
+            if len(data) < 66:
+                continue
+            transfer_logs.append((log['address'].lower(), '0x' + _to_hex(topics[2])[-40:],
+                                  int(data[2:66], 16), log['logIndex']))
+        return transfer_logs
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取回执处理统计"""
+        return {
+            'enabled': self.config.receipts_enabled,
+            'block_receipts_supported': self.block_receipts_supported,
+            'blocks_fetched': self.blocks_fetched,
+            'block_receipt_calls': self.block_receipt_calls,
+            'tx_receipt_calls': self.tx_receipt_calls,
+            'reverted_dropped': self.reverted_dropped,
+            'unmatched_dropped': self.unmatched_dropped,
+        }
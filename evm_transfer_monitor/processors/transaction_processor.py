@@ -4,21 +4,30 @@
 负责检测和分析区块链交易，支持两种监控策略：
 1. 大额交易监控 - 检测超过阈值的交易
 2. 指定地址监控 - 检测发送到特定地址的交易
+以及规则模式：一次遍历同时执行多条检测规则，命中的规则名记录在 TransactionInfo.matched_rules
 
 支持异步数据库操作
 """
 
 import time
+import heapq
 import asyncio
+import logging
 from collections import defaultdict
-from typing import Dict, Any, Optional
+from decimal import Decimal
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from utils.amount_utils import NATIVE_DECIMALS, from_base_units
 from utils.token_parser import TokenParser
 from config.monitor_config import MonitorConfig
 from managers.rpc_manager import RPCManager
+from processors.block_classifier import (
+    ClassifierIndex, classifier_key, classify_rows, compile_classifier_index, match_rules, transaction_rows
+)
+from processors.decode_pool import BlockDecodePool
 from models.data_types import TransactionInfo, TransactionStats
 from models.transaction_adapter import AsyncTransactionAdapter
 from db.database import get_database_manager
-from utils.log_utils import get_logger
+from utils.log_utils import LogSampler, get_logger
 
 logger = get_logger(__name__)
 
@@ -36,36 +45,135 @@ class TransactionProcessor:
         self.transactions_found: Dict[str, int] = defaultdict(int)
         self.token_contracts_detected: int = 0
         self.token_transactions_processed: int = 0
+        
+        # 尚未完成的异步入库任务
+        self._pending_saves: set = set()
+        self.save_failures: int = 0
+        # 入库失败、等待重试的交易，按记录唯一键去重（其所在区块之后的游标不落盘）
+        self._failed_saves: Dict[Tuple[str, int, str], TransactionInfo] = {}
+        # 超出 failed_saves_limit 未能保留的失败交易中最小的区块号，游标保持在其之前，重启后重新扫描
+        self._overflow_block: Optional[int] = None
+        # 数据库未初始化时跳过的入库次数（无数据库模式不阻塞游标）
+        self.saves_skipped: int = 0
+        
+        # 安静模式（追块时开启）：逐笔交易日志降为 DEBUG
+        self.quiet: bool = False
+        # 逐笔交易日志按代币限流
+        self.log_sampler = LogSampler(logger, config.log_sample_limit, config.log_sample_window)
+        
+        # 区块分类索引，配置变化时重新编译
+        self._index: Optional[ClassifierIndex] = None
+        # 规则模式下命中规则位掩码 -> 规则名，随索引重新编译清空
+        self._rule_names: Dict[int, Tuple[str, ...]] = {}
+        
+        # 最近一个区块哈希的 (原始值, 十六进制字符串)
+        self._last_block_hash: tuple = (None, '')
+        
+        # 解码进程池（decode_workers > 0 时启用，首次使用时启动工作进程）
+        self.decode_pool: Optional[BlockDecodePool] = None
+        if config.decode_workers > 0:
+            self.decode_pool = BlockDecodePool(config, config.decode_workers)
+    
+    def _to_hex(self, value: Any) -> str:
+        """哈希转十六进制字符串，原生传输返回的哈希已是字符串"""
+        if isinstance(value, str):
+            return value
+        return self.rpc_manager.w3.to_hex(value)
     
-    async def process_transaction(self, tx: Dict[str, Any]) -> Optional[TransactionInfo]:
-        """处理单个交易，根据配置的策略进行检测"""
-        block_number = tx.get('blockNumber')
+    def _get_index(self) -> ClassifierIndex:
+        """获取分类索引，策略、阈值或监控地址变化后重新编译"""
+        if self._index is None or self._index.key != classifier_key(self.config, self.token_parser):
+            self._index = compile_classifier_index(self.config, self.token_parser)
+            self._rule_names = {}
+        return self._index
+    
+    def _matched_rule_names(self, bits: int) -> Tuple[str, ...]:
+        """命中规则位掩码转换为规则名（同一组合共用一个元组）"""
+        names = self._rule_names.get(bits)
+        if names is None:
+            names = self._rule_names[bits] = self._index.rule_names_for(bits)
+        return names
+    
+    def process_block(self, transactions: Sequence[Dict[str, Any]]) -> List[TransactionInfo]:
+        """
+        一次同步遍历分类整个区块的交易（见 block_classifier.classify_rows），只为命中的交易构造 TransactionInfo
         
-        # 检测原生代币转账
-        native_info = self._process_native_transaction(tx, block_number)
-        if native_info:
-            return native_info
+        Returns:
+            List[TransactionInfo]: 命中策略的候选交易（保持区块内顺序）
+        """
+        index = self._get_index()
+        if not index.is_active:
+            return []
+        return self._build_candidates(transactions, *classify_rows(index, transaction_rows(transactions)))
+    
+    async def process_block_async(self, transactions: Sequence[Dict[str, Any]]) -> List[TransactionInfo]:
+        """
+        分类整个区块的交易，启用解码进程池时交易数较多的区块交给工作进程分类
         
-        # 检测代币转账
-        token_info = self._process_token_transaction(tx, block_number)
-        if token_info:
-            return token_info
+        等待工作进程期间事件循环继续处理 RabbitMQ 消费、入库和确认检查；
+        进程池不可用时退回事件循环内分类
+        """
+        pool = self.decode_pool
+        if pool is None or len(transactions) < self.config.decode_pool_min_transactions:
+            return self.process_block(transactions)
         
-        return None
+        index = self._get_index()
+        if not index.is_active:
+            return []
+        rows = transaction_rows(transactions)
+        result = await pool.classify(index, rows)
+        if result is None:
+            result = classify_rows(index, rows)
+        return self._build_candidates(transactions, *result)
+    
+    def _build_candidates(self, transactions: Sequence[Dict[str, Any]], matches: List[tuple],
+                          contracts_detected: int, token_transactions: int) -> List[TransactionInfo]:
+        """由分类得到的命中记录构造候选交易"""
+        self.token_contracts_detected += contracts_detected
+        self.token_transactions_processed += token_transactions
+        
+        candidates = []
+        for position, token_symbol, decimals, contract, from_address, recipient, amount_wei, bits, index in matches:
+            tx = transactions[position]
+            rules = self._matched_rule_names(bits) if bits else ()
+            if token_symbol is None:
+                candidates.append(self._make_native_info(tx, amount_wei, tx.get('blockNumber'), rules))
+                continue
+            candidates.append(self._make_token_info(
+                tx, token_symbol, contract, decimals, from_address, recipient, amount_wei, tx.get('blockNumber'),
+                matched_rules=rules, transfer_index=index
+            ))
+        return candidates
+    
+    def close(self) -> None:
+        """关闭解码进程池"""
+        if self.decode_pool is not None:
+            self.decode_pool.shutdown()
     
     def _process_native_transaction(self, tx: Dict[str, Any], block_number: int) -> Optional[TransactionInfo]:
         """处理原生代币交易，根据策略检测"""
         wei = tx['value']
         if wei == 0:
             return None
-            
-        token_amount = self.rpc_manager.w3.from_wei(wei, 'ether')
         
         # 根据策略检测
+        rules: Tuple[str, ...] = ()
         if self.config.is_large_amount_strategy():
-            # 大额交易策略：检查金额阈值
-            if token_amount < self.config.get_threshold(self.config.token_name):
+            # 大额交易策略：检查金额阈值（整数 wei 比较）
+            threshold = self._get_index().native_threshold_wei
+            if threshold is None or wei < threshold:
+                return None
+        elif self.config.is_rules_strategy():
+            # 规则模式：查原生代币的规则表
+            index = self._get_index()
+            table = index.rule_tables.get(self.config.token_name)
+            to_address = tx.get('to')
+            if table is None or not to_address:
                 return None
+            bits = match_rules(table, tx['from'].lower(), to_address.lower(), wei, index.watched)
+            if not bits:
+                return None
+            rules = self._matched_rule_names(bits)
         elif self.config.is_watch_address_strategy():
             # 地址监控策略：检查接收地址
             to_address = tx.get('to')
@@ -74,116 +182,232 @@ class TransactionProcessor:
         else:
             return None
         
-        # 记录交易
-        gas_cost = self.rpc_manager.w3.from_wei(tx['gasPrice'] * tx['gas'], 'ether')
-        tx_hash = self.rpc_manager.w3.to_hex(tx['hash'])
-        
-        self._log_native_transaction(tx, token_amount, gas_cost, block_number, tx_hash)
-        
-        self.transactions_found[self.config.token_name] += 1
-        self.transactions_found['total'] += 1
-        
-        transaction_info = TransactionInfo(
-            hash=tx_hash,
-            tx=tx,
-            value=token_amount,
+        return self._make_native_info(tx, wei, block_number, rules)
+    
+    def _make_native_info(self, tx: Dict[str, Any], wei: int, block_number: int,
+                          matched_rules: Tuple[str, ...] = ()) -> TransactionInfo:
+        """构造原生代币转账的交易信息（只复制后续使用的字段，不保留交易 dict；内部转账带调用路径）"""
+        return TransactionInfo(
+            hash=self._to_hex(tx['hash']),
+            block_number=block_number,
+            block_hash=self._block_hash(tx),
+            from_address=tx['from'],
+            to_address=tx['to'],
+            amount_wei=wei,
             tx_type=self.config.token_name,
             found_at=time.time(),
-            block_number=block_number
+            decimals=NATIVE_DECIMALS,
+            gas=tx.get('gas'),
+            gas_price=tx.get('gasPrice'),
+            matched_rules=matched_rules,
+            trace_address=tx.get('traceAddress') or ''
         )
+    
+    def _block_hash(self, tx: Dict[str, Any]) -> str:
+        """交易所在区块的哈希（小写十六进制字符串，重组时按它作废记录），同一区块的命中交易共用一个字符串对象"""
+        block_hash = tx.get('blockHash')
+        if not block_hash:
+            return ''
+        if block_hash != self._last_block_hash[0]:
+            self._last_block_hash = (block_hash, self._to_hex(block_hash).lower())
+        return self._last_block_hash[1]
+    
+    def process_internal_transfer(self, tx: Dict[str, Any], transfer: Dict[str, Any]) -> Optional[TransactionInfo]:
+        """
+        处理合约内部调用产生的原生代币转账（由 trace 得到），根据策略检测
         
-        # 异步保存到数据库
-        asyncio.create_task(self._save_transaction_to_db_async(transaction_info))
+        Args:
+            tx: 所属的顶层交易
+            transfer: 内部转账（from/to/value/trace_address）
+        """
+        internal_tx = dict(tx)
+        internal_tx.update({
+            'from': transfer['from'],
+            'to': transfer['to'],
+            'value': transfer['value'],
+            'traceAddress': transfer['trace_address'],
+        })
+        return self._process_native_transaction(internal_tx, tx.get('blockNumber'))
+    
+    def accept_transaction(self, transaction_info: TransactionInfo, save: bool = True) -> None:
+        """记录已通过回执核对的命中交易：输出日志、计数，save 为 True 时异步入库"""
+        token_symbol = transaction_info.tx_type
+        if transaction_info.is_token_transaction():
+            self._log_token_transaction(transaction_info)
+        else:
+            self._log_native_transaction(transaction_info)
+        
+        self.transactions_found[token_symbol] += 1
+        self.transactions_found['total'] += 1
         
-        return transaction_info
+        # 异步保存到数据库
+        if save:
+            self._schedule_save(transaction_info)
+    
+    def _get_gas_cost(self, transaction_info: TransactionInfo) -> Decimal:
+        """交易手续费，有回执时按实际消耗计算，否则按 Gas 上限估算"""
+        if transaction_info.gas_used is not None and transaction_info.effective_gas_price is not None:
+            fee_wei = transaction_info.gas_used * transaction_info.effective_gas_price
+        else:
+            fee_wei = (transaction_info.gas_price or 0) * (transaction_info.gas or 0)
+        return from_base_units(fee_wei, NATIVE_DECIMALS)
     
-    def _log_native_transaction(self, tx: Dict[str, Any], amount: float, 
-                              gas_cost: float, block_number: int, tx_hash: str) -> None:
-        """记录原生代币交易日志"""
+    def _log_native_transaction(self, transaction_info: TransactionInfo) -> None:
+        """记录原生代币交易日志（级别未启用或被限流时不做格式化）"""
+        level = logging.DEBUG if self.quiet else logging.INFO
+        if not logger.isEnabledFor(level) or not self.log_sampler.allow(self.config.token_name):
+            return
+        
         if self.config.is_large_amount_strategy():
-            prefix = f"💰 大额 {self.config.token_name}"
+            prefix = "💰 大额"
+        elif transaction_info.matched_rules:
+            prefix = f"🎯 [{','.join(transaction_info.matched_rules)}]"
         else:
-            prefix = f"📨 接收 {self.config.token_name}"
-            
-        logger.info(
-            f"{prefix}: {tx['from']} => {tx['to']} | "
-            f"{self.token_parser.format_amount(amount, self.config.token_name)} | "
-            f"Gas: {gas_cost:,.5f} {self.config.token_name} | "
-            f"区块: {block_number} | {self.config.scan_url}/tx/{tx_hash}"
+            prefix = "📨 接收"
+        
+        token_name = self.config.token_name
+        logger.log(
+            level, "%s %s: %s => %s | %s | Gas: %s %s | 区块: %s | %s/tx/%s",
+            prefix, token_name, transaction_info.from_address, transaction_info.to_address,
+            self.token_parser.format_amount(transaction_info.value, token_name),
+            f"{self._get_gas_cost(transaction_info):,.5f}", token_name,
+            transaction_info.block_number, self.config.scan_url, transaction_info.hash
         )
     
-    def _process_token_transaction(self, tx: Dict[str, Any], block_number: int) -> Optional[TransactionInfo]:
-        """处理代币交易，根据策略检测"""
-        if not tx.get('to'):
+    def process_transfer_log(self, log: Dict[str, Any]) -> Optional[TransactionInfo]:
+        """
+        处理 eth_getLogs 返回的 ERC-20 Transfer 事件，根据策略检测
+        
+        事件日志覆盖 transfer、transferFrom 以及经由路由/智能钱包合约发起的转账，
+        生成的 TransactionInfo 与区块解码路径一致
+        
+        Args:
+            log: web3 格式化后的日志对象
+            
+        Returns:
+            Optional[TransactionInfo]: 命中策略时返回交易信息
+        """
+        topics = log.get('topics') or []
+        # Transfer(address indexed from, address indexed to, uint256 value)
+        if len(topics) != 3:
             return None
         
-        # 检查是否为支持的代币合约
-        token_symbol = self.token_parser.is_token_contract(tx['to'])
+        token_symbol = self.token_parser.is_token_contract(log['address'])
         if not token_symbol:
             return None
         
         self.token_contracts_detected += 1
         
-        # 解析代币转账
-        token_info = self.token_parser.parse_erc20_transfer(tx, token_symbol)
-        if not token_info:
+        data = bytes(log.get('data') or b'')
+        if len(data) < 32:
             return None
         
+        amount_wei = int.from_bytes(data[:32], 'big')
+        decimals = self.token_parser.decimals.get(token_symbol, 18)
+        from_address = '0x' + bytes(topics[1])[-20:].hex()
+        to_address = '0x' + bytes(topics[2])[-20:].hex()
+        
+        token_info = self.token_parser.build_transfer_info(
+            token_symbol, log['address'], decimals, from_address, to_address, amount_wei
+        )
         self.token_transactions_processed += 1
         
+        block_number = log.get('blockNumber')
+        tx_hash = self.rpc_manager.w3.to_hex(log['transactionHash'])
+        # 日志中没有完整交易，只保留后续流程需要的字段
+        tx = {
+            'hash': tx_hash,
+            'from': from_address,
+            'to': log['address'],
+            'blockNumber': block_number,
+            'blockHash': self.rpc_manager.w3.to_hex(log['blockHash']) if log.get('blockHash') else '',
+        }
+        return self._handle_token_transfer(tx, token_info, token_symbol, block_number, tx_hash,
+                                           transfer_index=log.get('logIndex') or 0)
+    
+    def _handle_token_transfer(self, tx: Dict[str, Any], token_info: Dict[str, Any], token_symbol: str,
+                               block_number: int, tx_hash: Optional[str] = None,
+                               transfer_index: int = 0) -> Optional[TransactionInfo]:
+        """对解析出的代币转账应用策略检测，命中时返回交易信息"""
         # 根据策略检测
         should_process = False
+        rules: Tuple[str, ...] = ()
         
         if self.config.is_large_amount_strategy():
             to_address = token_info.get('to').lower()
-            # 大额交易策略：检查金额阈值
-            threshold = self.config.get_threshold(token_symbol)
-            should_process = token_info['amount'] >= threshold and to_address
+            # 大额交易策略：检查金额阈值（整数 wei 比较）
+            threshold = self._get_index().thresholds_wei.get(token_symbol)
+            should_process = threshold is not None and token_info['raw_amount_wei'] >= threshold and to_address
         elif self.config.is_watch_address_strategy():
             # 地址监控策略：检查接收地址
             to_address = token_info.get('to').lower()
             from_address = token_info.get('from').lower()
             should_process = to_address and self.config.is_watched_address(to_address) and to_address != from_address
+        elif self.config.is_rules_strategy():
+            # 规则模式：查该代币的规则表
+            index = self._get_index()
+            table = index.rule_tables.get(token_symbol)
+            if table is not None:
+                bits = match_rules(table, token_info['from'].lower(), token_info['to'].lower(),
+                                   token_info['raw_amount_wei'], index.watched)
+                if bits:
+                    rules = self._matched_rule_names(bits)
+                    should_process = True
 
         if should_process:
-            tx_hash = self.rpc_manager.w3.to_hex(tx['hash'])
-            self._log_token_transaction(token_info, token_symbol, block_number, tx_hash)
-            self.transactions_found[token_symbol] += 1
-            self.transactions_found['total'] += 1
-            
-            transaction_info = TransactionInfo(
-                hash=tx_hash,
-                tx=tx,
-                value=token_info['amount'],
-                tx_type=token_symbol,
-                found_at=time.time(),
-                block_number=block_number,
-                token_info=token_info
+            return self._make_token_info(
+                tx, token_symbol, token_info['contract'], token_info['decimals'],
+                token_info['from'], token_info['to'], token_info['raw_amount_wei'], block_number, tx_hash, rules,
+                transfer_index
             )
-            
-            # 异步保存到数据库
-            asyncio.create_task(self._save_transaction_to_db_async(transaction_info))
-            
-            return transaction_info
         
         return None
     
-    def _log_token_transaction(self, token_info: Dict[str, Any], token_symbol: str, 
-                             block_number: int, tx_hash: str) -> None:
-        """记录代币交易日志"""
+    def _make_token_info(self, tx: Dict[str, Any], token_symbol: str, contract: str, decimals: int,
+                         from_address: str, to_address: str, amount_wei: int,
+                         block_number: int, tx_hash: Optional[str] = None,
+                         matched_rules: Tuple[str, ...] = (), transfer_index: int = 0) -> TransactionInfo:
+        """构造代币转账的交易信息（只复制后续使用的字段，不保留交易 dict）"""
+        return TransactionInfo(
+            hash=tx_hash if tx_hash is not None else self._to_hex(tx['hash']),
+            block_number=block_number,
+            block_hash=self._block_hash(tx),
+            from_address=from_address,
+            to_address=to_address,
+            amount_wei=amount_wei,
+            tx_type=token_symbol,
+            found_at=time.time(),
+            contract=contract,
+            decimals=decimals,
+            gas=tx.get('gas'),
+            gas_price=tx.get('gasPrice'),
+            matched_rules=matched_rules,
+            transfer_index=transfer_index
+        )
+    
+    def _log_token_transaction(self, transaction_info: TransactionInfo) -> None:
+        """记录代币交易日志（级别未启用或被限流时不做格式化）"""
+        level = logging.DEBUG if self.quiet else logging.INFO
+        token_symbol = transaction_info.tx_type
+        if not logger.isEnabledFor(level) or not self.log_sampler.allow(token_symbol):
+            return
+        
         # 根据代币类型选择图标
         icons = {'USDT': '💵', 'USDC': '💸'}
         icon = icons.get(token_symbol, '🪙')
         
         if self.config.is_large_amount_strategy():
-            prefix = f"{icon} 大额{token_symbol}"
+            prefix = "大额"
+        elif transaction_info.matched_rules:
+            prefix = f"[{','.join(transaction_info.matched_rules)}] "
         else:
-            prefix = f"{icon} 接收{token_symbol}"
+            prefix = "接收"
         
-        logger.info(
-            f"{prefix}: {token_info['from']} => {token_info['to']} | "
-            f"{self.token_parser.format_amount(token_info['amount'], token_symbol)} | "
-            f"区块: {block_number} | {self.config.scan_url}/tx/{tx_hash}"
+        logger.log(
+            level, "%s %s%s: %s => %s | %s | 区块: %s | %s/tx/%s",
+            icon, prefix, token_symbol, transaction_info.from_address, transaction_info.to_address,
+            self.token_parser.format_amount(transaction_info.value, token_symbol),
+            transaction_info.block_number, self.config.scan_url, transaction_info.hash
         )
     
     def get_stats(self) -> TransactionStats:
@@ -216,12 +440,13 @@ class TransactionProcessor:
                 'contracts_detected': stats.token_contracts_detected,
                 'transactions_processed': stats.token_transactions_processed,
                 'success_rate': f"{stats.token_success_rate:.1f}%"
-            }
+            },
+            'log_sampling': self.log_sampler.get_stats()
         }
     
     def update_thresholds(self, **new_thresholds) -> None:
-        """更新交易阈值（仅在大额交易策略下有效）"""
-        if not self.config.is_large_amount_strategy():
+        """更新交易阈值（大额交易策略和规则模式下有效）"""
+        if self.config.is_watch_address_strategy():
             logger.warning("当前策略为地址监控，阈值设置无效")
             return
         
@@ -232,12 +457,97 @@ class TransactionProcessor:
     # 异步数据库操作方法
     # =============================================================================
     
-    async def _save_transaction_to_db_async(self, transaction_info: TransactionInfo) -> None:
+    @property
+    def db_ready(self) -> bool:
+        """异步数据库是否已初始化"""
+        return self.db_manager.async_session_factory is not None
+    
+    async def init_database(self) -> bool:
+        """
+        初始化交易入库使用的异步数据库，失败时以无数据库模式运行（只记录日志，不入库）
+        
+        Returns:
+            bool: 是否可以入库
+        """
+        if not self.db_ready and not await self.db_manager.initialize_database():
+            logger.warning("⚠️ 交易入库数据库初始化失败，命中的交易只记录日志不入库")
+            return False
+        return True
+    
+    def _schedule_save(self, transaction_info: TransactionInfo) -> None:
+        """后台异步入库，并跟踪任务以便推进区块游标前等待完成；数据库未初始化时跳过"""
+        if not self.db_ready:
+            self.saves_skipped += 1
+            return
+        task = asyncio.create_task(self._save_transaction_to_db_async(transaction_info))
+        self._pending_saves.add(task)
+        task.add_done_callback(self._pending_saves.discard)
+    
+    async def wait_for_pending_saves(self) -> None:
+        """等待已发起的入库任务全部完成"""
+        if self._pending_saves:
+            await asyncio.gather(*list(self._pending_saves), return_exceptions=True)
+    
+    def lowest_failed_block(self) -> Optional[int]:
+        """入库失败尚未重试成功的交易中最小的区块号（包括超出上限未保留的交易）"""
+        blocks = [info.block_number for info in self._failed_saves.values()]
+        if self._overflow_block is not None:
+            blocks.append(self._overflow_block)
+        return min(blocks) if blocks else None
+    
+    @property
+    def failed_saves_count(self) -> int:
+        """等待重试的入库失败交易数"""
+        return len(self._failed_saves)
+    
+    def _record_failed_save(self, transaction_info: TransactionInfo) -> None:
+        """记录入库失败的交易；超出上限时只记下其区块号，由重启后的重新扫描补入库"""
+        key = (transaction_info.hash, transaction_info.transfer_index, transaction_info.trace_address)
+        if key in self._failed_saves or len(self._failed_saves) < self.config.failed_saves_limit:
+            self._failed_saves[key] = transaction_info
+            return
+        if self._overflow_block is None:
+            logger.warning(f"⚠️ 入库失败的交易超过 {self.config.failed_saves_limit} 笔，"
+                           f"区块 {transaction_info.block_number} 之后的游标保持不落盘，重启后重新扫描")
+        if self._overflow_block is None or transaction_info.block_number < self._overflow_block:
+            self._overflow_block = transaction_info.block_number
+    
+    async def retry_failed_saves(self) -> int:
+        """
+        按区块顺序重试最早的一批（save_retry_batch）入库失败的交易
+        
+        Returns:
+            int: 仍然等待重试的交易数
+        """
+        if not self._failed_saves:
+            return 0
+        batch = heapq.nsmallest(self.config.save_retry_batch, self._failed_saves.items(),
+                                key=lambda item: item[1].block_number)
+        for key, _ in batch:
+            del self._failed_saves[key]
+        for _, transaction_info in batch:
+            await self._save_transaction_to_db_async(transaction_info)
+        if self._failed_saves:
+            logger.warning(f"⚠️ {len(self._failed_saves)} 笔交易等待重新入库，区块 {self.lowest_failed_block()} 之后的游标暂不落盘")
+        else:
+            logger.info(f"✅ {len(batch)} 笔入库失败的交易已重试成功")
+        return len(self._failed_saves)
+    
+    def discard_failed_saves_after(self, fork_point: int) -> None:
+        """区块重组：丢弃分叉点之后区块中入库失败的交易（新链会重新处理）"""
+        self._failed_saves = {key: info for key, info in self._failed_saves.items() if info.block_number <= fork_point}
+        if self._overflow_block is not None and self._overflow_block > fork_point:
+            self._overflow_block = None
+    
+    async def _save_transaction_to_db_async(self, transaction_info: TransactionInfo) -> bool:
         """
-        异步保存交易信息到数据库
+        异步保存交易信息到数据库（已存在的交易视为成功）
         
         Args:
             transaction_info: 交易信息对象
+            
+        Returns:
+            bool: 是否保存成功
         """
         try:
             async with self.db_manager.get_async_session() as session:
@@ -251,11 +561,16 @@ class TransactionProcessor:
                 
                 if deposit_record:
                     logger.debug(f"交易已保存到数据库: {transaction_info.hash}")
-                else:
-                    logger.warning(f"交易保存失败: {transaction_info.hash}")
+                    return True
+                
+                logger.warning(f"交易保存失败: {transaction_info.hash}")
                     
         except Exception as e:
             logger.error(f"异步保存交易时出错: {e}")
+        
+        self.save_failures += 1
+        self._record_failed_save(transaction_info)
+        return False
     
     def _extract_user_id_from_transaction(self, transaction_info: TransactionInfo) -> str:
         """
@@ -115,9 +115,93 @@ class StatisticsReporter:
         
         logger.info(f"📈 RPC分类 | {rpc_breakdown}")
         
+        # 批量请求统计
+        self._log_batch_stats(rpc_stats)
+        
+        # 区块缓存统计
+        self._log_block_cache_stats(rpc_stats)
+        
+        # 节点统计
+        self._log_endpoint_stats(rpc_stats)
+        
+        # 限流统计
+        self._log_rate_limit_stats(rpc_stats)
+        
         # API限制状态
         self._log_api_limit_status(rpc_stats)
     
+    def _log_batch_stats(self, rpc_stats) -> None:
+        """记录批量请求统计信息"""
+        batch_stats = rpc_stats.batch_stats
+        if not batch_stats or batch_stats.get('http_requests', 0) == 0:
+            return
+        
+        logger.info(
+            f"📦 批量统计 | "
+            f"HTTP请求: {batch_stats['http_requests']} | "
+            f"批次: {batch_stats['batches_sent']} | "
+            f"平均批量: {batch_stats['avg_batch_size']:.1f} | "
+            f"调用/请求: {batch_stats['calls_per_request']:.2f} | "
+            f"节省请求: {batch_stats['requests_saved']}"
+        )
+    
+    def _log_block_cache_stats(self, rpc_stats) -> None:
+        """记录区块缓存统计信息"""
+        cache_stats = rpc_stats.block_cache_stats
+        if not cache_stats:
+            return
+        
+        hits, misses = cache_stats['hits'], cache_stats['misses']
+        if sum(hits.values()) + sum(misses.values()) == 0:
+            return
+        
+        breakdown = " | ".join(f"{kind}: {hits[kind]}/{hits[kind] + misses[kind]}" for kind in hits)
+        logger.info(
+            f"🗃️ 区块缓存 | "
+            f"命中率: {cache_stats['hit_rate']:.1f}% | "
+            f"{breakdown} | "
+            f"条目: {cache_stats['entries']} | "
+            f"内存: {cache_stats['size_mb']:.1f}/{cache_stats['max_mb']:.0f}MB | "
+            f"淘汰: {cache_stats['evictions']}"
+        )
+    
+    def _log_endpoint_stats(self, rpc_stats) -> None:
+        """记录各RPC节点的健康统计"""
+        endpoint_stats = rpc_stats.endpoint_stats
+        if not endpoint_stats or len(endpoint_stats) < 2:
+            return
+        
+        for url, stats in endpoint_stats.items():
+            status = "⛔ 已摘除" if stats['ejected'] else "✅ 可用"
+            logger.info(
+                f"🌐 节点 {url} | {status} | "
+                f"调用: {stats['requests']} | "
+                f"错误: {stats['errors']} | "
+                f"延迟: {stats['ewma_latency_ms']:.0f}ms | "
+                f"错误率: {stats['ewma_error_rate'] * 100:.1f}% | "
+                f"摘除次数: {stats['ejections']}"
+            )
+    
+    def _log_rate_limit_stats(self, rpc_stats) -> None:
+        """记录令牌桶限流的等待统计"""
+        rate_stats = rpc_stats.rate_limit_stats
+        if not rate_stats or rate_stats.get('acquired', 0) == 0:
+            return
+        
+        waits = " | ".join(
+            f"{name}: {item['acquired']}次/等待{item['delayed']}次/平均{item['avg_wait'] * 1000:.0f}ms"
+            for name, item in rate_stats['by_priority'].items()
+            if item['acquired'] > 0
+        )
+        logger.info(
+            f"🚦 限流统计 | "
+            f"令牌: {rate_stats['acquired']} | "
+            f"等待: {rate_stats['delayed']} 次 | "
+            f"最长等待: {rate_stats['max_wait']:.2f}s | "
+            f"排队: {rate_stats['queue_length']}"
+        )
+        logger.info(f"🚦 按优先级 | {waits}")
+    
     def _log_api_limit_status(self, rpc_stats) -> None:
         """记录API限制状态"""
         if rpc_stats.estimated_daily_calls > self.config.max_rpc_per_day:
@@ -142,7 +226,7 @@ class StatisticsReporter:
     def log_processing_progress(self, new_blocks: int, current_block: int, 
                              rpc_manager: RPCManager, tx_processor: TransactionProcessor, 
                              confirmation_manager: ConfirmationManager, 
-                             processing_time: float = None) -> None:
+                             processing_time: float = None, lag: int = None) -> None:
         """记录处理进度
         
         Args:
@@ -152,6 +236,7 @@ class StatisticsReporter:
             tx_processor: 交易处理器
             confirmation_manager: 确认管理器
             processing_time: 处理这批区块花费的时间（秒），可选参数
+            lag: 处理后仍落后最新区块的数量，可选参数
         """
         pending_count = confirmation_manager.get_pending_count()
         rpc_stats = rpc_manager.get_performance_stats()
@@ -167,6 +252,9 @@ class StatisticsReporter:
             f"发现: {tx_stats.transactions_found.get('total', 0)} 笔交易"
         ]
         
+        if lag:
+            log_parts.insert(2, f"落后: {lag}")
+        
         # 如果提供了处理时间，添加时间统计
         if processing_time is not None:
             # 更新处理时间统计
@@ -290,6 +378,8 @@ class StatisticsReporter:
     def _log_final_rpc_stats(self, rpc_stats) -> None:
         """记录最终RPC统计"""
         logger.info(f"🔗 RPC调用: {rpc_stats.rpc_calls} 次")
+        if rpc_stats.batch_stats:
+            logger.info(f"📦 HTTP请求: {rpc_stats.http_requests} 次 (批量节省 {rpc_stats.batch_stats.get('requests_saved', 0)} 次)")
         logger.info(f"⚡ 平均速度: {rpc_stats.avg_rpc_per_second:.2f} 次/秒")
         logger.info(f"📊 预估日用量: {rpc_stats.estimated_daily_calls:.0f} 次")
         logger.info(f"📈 配额使用率: {rpc_stats.api_usage_percent:.1f}%")
@@ -326,7 +416,8 @@ class StatisticsReporter:
         else:
             logger.info("⏱️ 无处理时间数据")
     
-    def get_monitor_status(self, current_block: int, is_running: bool) -> MonitorStatus:
+    def get_monitor_status(self, current_block: int, is_running: bool,
+                           lag_blocks: int = 0, sync_mode: str = "head") -> MonitorStatus:
         """获取当前监控状态"""
         current_time = time.time()
         status = MonitorStatus(
@@ -334,7 +425,9 @@ class StatisticsReporter:
             blocks_processed=self.blocks_processed,
             start_time=self.start_time,
             current_block=current_block,
-            last_activity=current_time
+            last_activity=current_time,
+            lag_blocks=lag_blocks,
+            sync_mode=sync_mode
         )
         status.update_runtime(current_time)
         return status
@@ -4,11 +4,13 @@
 演示如何使用两种不同的监控策略：
 1. 大额交易监控 - 监控超过阈值的交易
 2. 指定地址监控 - 监控特定地址的收款
+以及在一次遍历中同时执行两者的规则模式
 """
 
 import asyncio
 from config.monitor_config import MonitorConfig, MonitorStrategy
 from core.evm_monitor import EVMMonitor
+from utils.token_parser import TokenParser
 from utils.log_utils import get_logger
 
 logger = get_logger(__name__)
@@ -25,7 +27,7 @@ async def demo_large_amount_strategy():
     config.set_strategy(MonitorStrategy.LARGE_AMOUNT)
     
     # 创建监控器
-    monitor = EVMMonitor(config)
+    monitor = EVMMonitor(config, TokenParser(config.chain_name), chain_name=config.chain_name)
     
     # 显示当前配置
     logger.info(f"📋 当前策略: {config.get_strategy_description()}")
@@ -52,7 +54,7 @@ async def demo_watch_address_strategy():
     config.set_strategy(MonitorStrategy.WATCH_ADDRESS)
     
     # 创建监控器
-    monitor = EVMMonitor(config)
+    monitor = EVMMonitor(config, TokenParser(config.chain_name), chain_name=config.chain_name)
     
     # 显示当前配置
     logger.info(f"📋 当前策略: {config.get_strategy_description()}")
@@ -69,7 +71,7 @@ async def demo_watch_address_strategy():
     
     # 演示移除地址
     if len(config.watch_addresses) > 2:
-        remove_addr = config.watch_addresses[-1]
+        remove_addr = example_addresses[-1]
         monitor.remove_watch_address(remove_addr)
     
     logger.info("💡 在此策略下，系统只监控发送到指定地址的交易")
@@ -79,6 +81,29 @@ async def demo_watch_address_strategy():
     return monitor
 
 
+async def demo_rules_strategy():
+    """演示规则模式"""
+    logger.info("=" * 60)
+    logger.info("🎯 演示：规则模式（多条规则一次遍历）")
+    logger.info("=" * 60)
+    
+    config = MonitorConfig()
+    config.set_strategy(MonitorStrategy.RULES)
+    config.set_detection_rules([
+        {'name': 'usdt_large', 'kind': 'large_amount', 'tokens': ['USDT'], 'min_amount': 100000},
+        {'name': 'deposit', 'kind': 'watch_inbound'},
+        {'name': 'withdraw', 'kind': 'watch_outbound', 'min_amount': 1000},
+    ])
+    monitor = EVMMonitor(config, TokenParser(config.chain_name), chain_name=config.chain_name)
+    monitor.add_watch_address("0x1234567890123456789012345678901234567890")
+    
+    logger.info(f"📋 当前策略: {config.get_strategy_description()}")
+    logger.info("💡 大额监控和地址监控共用一个数据流，区块只下载一次")
+    logger.info("📊 命中的交易标记满足的规则（TransactionInfo.matched_rules）")
+    
+    return monitor
+
+
 async def demo_strategy_switching():
     """演示策略切换"""
     logger.info("=" * 60)
@@ -87,7 +112,7 @@ async def demo_strategy_switching():
     
     # 创建监控器
     config = MonitorConfig()
-    monitor = EVMMonitor(config)
+    monitor = EVMMonitor(config, TokenParser(config.chain_name), chain_name=config.chain_name)
     
     # 初始策略
     logger.info(f"📋 初始策略: {config.get_strategy_description()}")
@@ -129,6 +154,11 @@ async def main():
         
         await asyncio.sleep(2)  # 暂停一下
         
+        # 演示规则模式
+        rules_monitor = await demo_rules_strategy()
+        
+        await asyncio.sleep(2)  # 暂停一下
+        
         # 演示策略切换
         switching_monitor = await demo_strategy_switching()
         
@@ -137,6 +167,7 @@ async def main():
         logger.info("=" * 60)
         logger.info("✅ 大额交易策略：适合监控网络中的大额资金流动")
         logger.info("✅ 地址监控策略：适合监控特定钱包的收款情况")
+        logger.info("✅ 规则模式：一次遍历同时执行多条规则，替代分别运行的多个监控器")
         logger.info("✅ 支持运行时动态切换策略")
         logger.info("✅ 每种策略都有独立的配置管理方法")
         
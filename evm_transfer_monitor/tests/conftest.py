@@ -0,0 +1,13 @@
+"""
+单元测试公共配置
+
+项目模块按顶层包导入（config、managers、processors、utils ...），
+把项目根目录加入 sys.path，使 tests 目录下的测试可以直接运行: python -m pytest tests
+"""
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
@@ -0,0 +1,136 @@
+"""
+监控地址索引测试
+
+同一组用例分别在哈希集合模式和紧凑模式（compact_min=0，带或不带布隆过滤器）下运行
+"""
+
+import random
+
+import pytest
+
+from utils import address_index as address_index_module
+from utils.address_index import AddressIndex
+
+
+def make_addresses(count: int, seed: int = 20):
+    rng = random.Random(seed)
+    return ['0x' + rng.getrandbits(160).to_bytes(20, 'big').hex() for _ in range(count)]
+
+
+MODES = {
+    'hash_set': dict(compact_min=10 ** 6),
+    'compact': dict(compact_min=0, bloom_bits_per_key=0),
+    'compact_bloom': dict(compact_min=0),
+}
+
+
+@pytest.fixture(params=list(MODES))
+def mode(request):
+    return MODES[request.param]
+
+
+def test_lookup_is_case_insensitive_and_accepts_bytes(mode):
+    addresses = make_addresses(50)
+    index = AddressIndex(addresses, **mode)
+
+    assert len(index) == 50
+    assert index.is_compact == (mode['compact_min'] == 0)
+    for address in addresses:
+        assert address in index
+        assert address.upper().replace('0X', '0x') in index
+        assert bytes.fromhex(address[2:]) in index
+    for address in make_addresses(200, seed=99):
+        assert address not in index
+    assert sorted(index) == sorted(addresses)
+
+
+def test_invalid_addresses_are_ignored(mode):
+    # 长度正确但缺少 0x 前缀的字符串不能把前两个字符当作前缀丢掉
+    index = AddressIndex(['0x1234', 'not an address', '0x' + 'zz' * 20, 'ab' + '22' * 20,
+                          '0X' + '33' * 20, '0x' + '11' * 20], **mode)
+
+    assert len(index) == 2
+    assert index.invalid_addresses == 4
+    assert 12345 not in index
+    assert '0x1234' not in index
+    assert '0x' + '22' * 20 not in index
+    assert '0x' + '33' * 20 in index
+
+
+def test_add_and_discard(mode):
+    addresses = make_addresses(40)
+    index = AddressIndex(addresses[:30], **mode)
+
+    assert index.add(addresses[30])
+    assert not index.add(addresses[30])
+    assert not index.add('0x12')
+    assert index.discard(addresses[0])
+    assert not index.discard(addresses[0])
+    assert not index.discard(addresses[35])
+
+    assert addresses[30] in index
+    assert addresses[0] not in index
+    assert len(index) == 30
+
+    # 删除后重新添加
+    assert index.add(addresses[0])
+    assert addresses[0] in index
+    assert len(index) == 31
+
+
+def test_compact_merges_pending_changes(mode):
+    addresses = make_addresses(100)
+    index = AddressIndex(addresses[:60], **mode)
+    for address in addresses[60:]:
+        index.add(address)
+    for address in addresses[:20]:
+        index.discard(address)
+
+    index.compact()
+
+    expected = set(addresses[20:])
+    assert len(index) == len(expected)
+    assert set(index) == expected
+    for address in addresses:
+        assert (address in index) == (address in expected)
+    if index.is_compact:
+        stats = index.get_stats()
+        assert stats['pending_adds'] == 0 and stats['pending_removes'] == 0
+
+
+def test_automatic_compaction(monkeypatch):
+    monkeypatch.setattr(address_index_module, 'COMPACT_MIN_CHANGES', 8)
+    addresses = make_addresses(64)
+    index = AddressIndex(addresses[:32], compact_min=0)
+
+    for address in addresses[32:]:
+        index.add(address)
+
+    assert index.compactions >= 1
+    assert len(index) == 64
+    assert all(address in index for address in addresses)
+
+
+def test_hash_set_switches_to_compact_mode_when_it_grows():
+    addresses = make_addresses(20)
+    index = AddressIndex(addresses[:5], compact_min=10)
+    assert not index.is_compact
+
+    for address in addresses[5:]:
+        index.add(address)
+
+    assert index.is_compact
+    assert all(address in index for address in addresses)
+
+
+def test_compact_mode_falls_back_to_hash_set_below_threshold():
+    addresses = make_addresses(20)
+    index = AddressIndex(addresses, compact_min=10)
+    assert index.is_compact
+
+    for address in addresses[:15]:
+        index.discard(address)
+    index.compact()
+
+    assert not index.is_compact
+    assert set(index) == set(addresses[15:])
@@ -0,0 +1,89 @@
+"""
+金额换算测试
+
+金额以整数最小单位携带：覆盖精确换算、阈值向上取整后与按数量比较等价，
+以及大额策略在阈值边界上的判断和入库金额不经过 float
+"""
+
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from config.monitor_config import MonitorConfig, MonitorStrategy
+from models.data_types import TransactionInfo
+from models.transaction_adapter import TransactionAdapter
+from processors import transaction_processor
+from processors.transaction_processor import TransactionProcessor
+from utils.amount_utils import from_base_units, threshold_to_base_units, to_base_units
+from utils.token_parser import TokenParser
+
+TOKEN_PARSER = TokenParser('bsc')
+USDT = TOKEN_PARSER.contracts['USDT']
+WATCHED = '0x' + '22' * 20
+
+
+def word(value) -> str:
+    if isinstance(value, str):
+        return value[2:].lower().rjust(64, '0')
+    return format(value, '064x')
+
+
+def test_from_base_units_is_exact():
+    amount_wei = 123456789012345678901
+    assert from_base_units(amount_wei, 18) == Decimal('123.456789012345678901')
+    # float 只有约 16 位有效数字
+    assert float(from_base_units(amount_wei, 18)) * 10 ** 18 != amount_wei
+    assert from_base_units(5, 0) == 5
+
+
+def test_format_amount_accepts_exact_decimal():
+    assert TOKEN_PARSER.format_amount(from_base_units(1500 * 10 ** 18, 18), 'USDT') == '1.50K USDT'
+    assert TOKEN_PARSER.format_amount(from_base_units(12345, 18), 'USDT') == '0.000000000000012345 USDT'
+
+
+def test_to_base_units_uses_written_decimal_value():
+    assert to_base_units(0.1, 18) == 10 ** 17
+    assert to_base_units('1.0000005', 6) == 1000000
+    assert to_base_units(Decimal('1.0000005'), 6, rounding='ROUND_CEILING') == 1000001
+
+
+@pytest.mark.parametrize('threshold, decimals', [(1000, 18), (1000.1, 18), (0.0000001, 6), ('0.3', 6)])
+def test_threshold_in_wei_matches_amount_comparison(threshold, decimals):
+    threshold_wei = threshold_to_base_units(threshold, decimals)
+    for amount_wei in (threshold_wei - 1, threshold_wei, threshold_wei + 1):
+        assert (amount_wei >= threshold_wei) == (from_base_units(amount_wei, decimals) >= Decimal(str(threshold)))
+
+    assert threshold_to_base_units(float('inf'), 18) is None
+
+
+def test_large_amount_strategy_boundary(monkeypatch):
+    monkeypatch.setattr(transaction_processor, 'get_database_manager', lambda: SimpleNamespace(async_session_factory=None))
+    config = MonitorConfig(rpc_url='http://127.0.0.1:1', monitor_strategy=MonitorStrategy.LARGE_AMOUNT,
+                           watch_addresses=[], thresholds={'USDT': 1000.1, 'BNB': 10.0})
+    processor = TransactionProcessor(config, TokenParser('bsc'), None)
+    threshold_wei = 10001 * 10 ** 17
+
+    def transfer(amount_wei: int, tx: int):
+        return {'hash': '0x' + format(tx, '064x'), 'from': '0x' + '11' * 20, 'to': USDT, 'value': 0,
+                'input': '0xa9059cbb' + word(WATCHED) + word(amount_wei), 'gas': 100000, 'gasPrice': 10 ** 9,
+                'blockNumber': 100, 'blockHash': '0x' + 'cd' * 32}
+
+    found = processor.process_block([transfer(threshold_wei - 1, 1), transfer(threshold_wei, 2)])
+
+    assert [info.amount_wei for info in found] == [threshold_wei]
+    assert found[0].value == Decimal('1000.1')
+
+
+def test_stored_amount_scaled_from_wei():
+    info = TransactionInfo('0x' + 'ab' * 32, 100, '0x' + '11' * 20, WATCHED, 123456789012345678901, 'USDT', 0.0,
+                           contract=USDT.lower(), decimals=18, gas_price=3 * 10 ** 9, gas_used=21000)
+    record = SimpleNamespace(gas_used=None, gas_price=None)
+
+    adapter = TransactionAdapter()
+    adapter._handle_token_transaction(record, info)
+    adapter._fill_gas_fields(record, info)
+
+    assert record.amount == Decimal('123.456789012345678901')
+    assert (record.token_symbol, record.token_decimals, record.token_address) == ('USDT', 18, USDT.lower())
+    assert record.transaction_fee == Decimal('0.000063')
@@ -0,0 +1,74 @@
+"""
+历史区块回扫测试
+
+覆盖分片切分、进度文件的落盘与恢复（参数不一致时重新开始）以及地址文件的几种格式
+"""
+
+import json
+
+from backfill import BackfillProgress, ChunkResult, load_addresses_file, split_chunks
+
+WALLET = '0x' + '22' * 20
+
+
+def make_progress(path, to_block: int = 1099, chunk_size: int = 100) -> BackfillProgress:
+    return BackfillProgress(str(path), 'bsc', 1000, to_block, chunk_size)
+
+
+def chunk_result(start: int, end: int, found: int = 0) -> ChunkResult:
+    return ChunkResult(start, end, found, rpc_calls=0, http_requests=0, elapsed=0.0)
+
+
+def test_split_chunks_covers_range_once():
+    assert split_chunks(1000, 1249, 100) == [(1000, 1099), (1100, 1199), (1200, 1249)]
+    assert split_chunks(5, 5, 100) == [(5, 5)]
+
+
+def test_completed_chunks_survive_restart(tmp_path):
+    path = tmp_path / 'progress.json'
+    progress = make_progress(path, to_block=1399)
+    progress.mark_done(chunk_result(1200, 1299, found=2))
+    progress.mark_done(chunk_result(1000, 1099, found=3))
+
+    resumed = make_progress(path, to_block=1399)
+    assert resumed.load()
+    assert resumed.completed == {1000: 1099, 1200: 1299}
+    assert resumed.transactions_found == 5
+    assert resumed.completed_blocks == 200 and resumed.total_blocks == 400
+
+    # 恢复时只剩未完成的分片
+    pending = [chunk for chunk in split_chunks(1000, 1399, 100) if chunk[0] not in resumed.completed]
+    assert pending == [(1100, 1199), (1300, 1399)]
+
+
+def test_progress_with_other_parameters_is_ignored(tmp_path):
+    path = tmp_path / 'progress.json'
+    make_progress(path).mark_done(chunk_result(1000, 1099))
+
+    # 分片大小或范围变化后分片边界不同，不能复用
+    assert not make_progress(path, chunk_size=50).load()
+    assert not make_progress(path, to_block=1199).load()
+    assert make_progress(path).load()
+
+
+def test_missing_or_corrupt_progress_starts_over(tmp_path):
+    path = tmp_path / 'progress.json'
+    assert not make_progress(path).load()
+
+    path.write_text('{"completed": [[1000', encoding='utf-8')
+    progress = make_progress(path)
+    assert not progress.load()
+    assert progress.completed == {}
+
+
+def test_load_addresses_file_formats(tmp_path):
+    listing = tmp_path / 'list.json'
+    listing.write_text(json.dumps([WALLET, ' ']), encoding='utf-8')
+    watch_file = tmp_path / 'watch_addr.json'
+    watch_file.write_text(json.dumps({'evm_wallet_addresses': [WALLET]}), encoding='utf-8')
+    text = tmp_path / 'addresses.txt'
+    text.write_text(f'# 新客户\n{WALLET}\n\n', encoding='utf-8')
+
+    assert load_addresses_file(str(listing)) == [WALLET]
+    assert load_addresses_file(str(watch_file)) == [WALLET]
+    assert load_addresses_file(str(text)) == [WALLET]
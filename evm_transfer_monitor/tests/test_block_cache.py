@@ -0,0 +1,152 @@
+"""
+区块缓存测试
+
+覆盖按内存占用的 LRU 淘汰、近链头条目的有效期、哈希变化时替换条目、重组清除以及进程内共享
+"""
+
+import pytest
+
+from managers import block_cache
+from managers.block_cache import (
+    BLOCK, HEADER, HEADER_SIZE, RECEIPTS, TX_SIZE, BlockCache, get_block_cache,
+)
+from models.data_types import RawBlock
+
+
+def make_block(number: int, fork: int = 0, transactions: int = 0) -> RawBlock:
+    block_hash = '0x' + format(fork, '02x') + format(number, '062x')
+    return RawBlock(number, block_hash, '0x' + format(number - 1, '064x'), 0, '0x',
+                    [{'hash': '0x' + format(i, '064x')} for i in range(transactions)])
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(block_cache.time, 'time', clock)
+    return clock
+
+
+def make_cache(head: int = 1000, max_bytes: int = 10 * 1024 * 1024, head_ttl: float = 3.0) -> BlockCache:
+    return BlockCache(max_bytes=max_bytes, head_ttl=head_ttl, finality_depth=10, head_getter=lambda: head)
+
+
+def test_get_put_and_header_served_from_full_block(clock):
+    cache = make_cache()
+    block = make_block(100)
+
+    assert cache.get(100, BLOCK) is None
+    cache.put(100, BLOCK, block)
+
+    assert cache.get(100, BLOCK) is block
+    assert cache.get(100, HEADER) is block
+    assert cache.get(100, RECEIPTS) is None
+    assert cache.hits == {BLOCK: 1, HEADER: 1, RECEIPTS: 0}
+    assert cache.misses == {BLOCK: 1, HEADER: 0, RECEIPTS: 1}
+
+
+def test_lru_eviction_by_estimated_size(clock):
+    cache = make_cache(max_bytes=3 * HEADER_SIZE)
+    for number in (1, 2, 3):
+        cache.put(number, HEADER, make_block(number))
+
+    # 访问 1 使其成为最近使用，写入 4 时淘汰最久未使用的 2
+    assert cache.get(1, HEADER) is not None
+    cache.put(4, HEADER, make_block(4))
+
+    assert cache.get(2, HEADER) is None
+    assert all(cache.get(number, HEADER) is not None for number in (1, 3, 4))
+    assert cache.evictions == 1
+    assert cache.total_bytes == 3 * HEADER_SIZE
+
+
+def test_oversized_entry_is_kept_alone(clock):
+    cache = make_cache(max_bytes=HEADER_SIZE)
+    cache.put(1, HEADER, make_block(1))
+    cache.put(2, BLOCK, make_block(2, transactions=10))
+
+    assert cache.get(1, HEADER) is None
+    assert cache.get(2, BLOCK) is not None
+    assert cache.total_bytes == HEADER_SIZE + 10 * TX_SIZE
+
+
+def test_head_ttl_applies_only_to_unfinalized_blocks(clock):
+    cache = make_cache(head=1000, head_ttl=3.0)
+    cache.put(990, HEADER, make_block(990))   # 距链头 10 个区块，已不可变
+    cache.put(995, HEADER, make_block(995))   # 可能被重组
+
+    clock.now += 2.9
+    assert cache.get(995, HEADER) is not None
+
+    clock.now += 0.2
+    assert cache.get(995, HEADER) is None
+    assert cache.get(990, HEADER) is not None
+    assert cache.get_stats()['entries'] == 1
+
+
+def test_unknown_head_treats_blocks_as_unfinalized(clock):
+    cache = BlockCache(max_bytes=1 << 20, head_ttl=1.0, finality_depth=10, head_getter=lambda: None)
+    cache.put(5, HEADER, make_block(5))
+
+    clock.now += 2
+    assert cache.get(5, HEADER) is None
+
+
+def test_hash_change_replaces_entry_and_drops_receipts(clock):
+    cache = make_cache()
+    cache.put(100, BLOCK, make_block(100))
+    cache.put(100, RECEIPTS, [{'status': 1}])
+
+    # 同一哈希的区块头不替换条目
+    cache.put(100, HEADER, make_block(100))
+    assert cache.get(100, RECEIPTS) is not None
+    assert cache.invalidations == 0
+
+    replacement = make_block(100, fork=1)
+    cache.put(100, HEADER, replacement)
+
+    assert cache.get(100, HEADER) is replacement
+    assert cache.get(100, BLOCK) is None
+    assert cache.get(100, RECEIPTS) is None
+    assert cache.invalidations == 1
+    assert cache.total_bytes == HEADER_SIZE
+
+
+def test_receipts_attach_to_existing_entry_and_size_is_replaced(clock):
+    cache = make_cache()
+    cache.put(100, RECEIPTS, [{}] * 3)
+    cache.put(100, HEADER, make_block(100))
+    cache.put(100, RECEIPTS, [{}] * 5)
+
+    entry_size = HEADER_SIZE + 5 * block_cache.RECEIPT_SIZE
+    assert cache.total_bytes == entry_size
+    assert len(cache.get(100, RECEIPTS)) == 5
+
+
+def test_invalidate_from(clock):
+    cache = make_cache()
+    for number in range(100, 106):
+        cache.put(number, HEADER, make_block(number))
+
+    assert cache.invalidate_from(103) == 3
+    assert [cache.get(number, HEADER) is not None for number in range(100, 106)] == [True] * 3 + [False] * 3
+    assert cache.total_bytes == 3 * HEADER_SIZE
+
+
+def test_get_block_cache_is_shared_per_chain(monkeypatch):
+    monkeypatch.setattr(block_cache, '_caches', {})
+
+    first = get_block_cache('bsc', 1 << 20, 3.0, 10, lambda: 100)
+    second = get_block_cache('bsc', 1 << 10, 1.0, 5, lambda: 200)
+    other = get_block_cache('eth', 1 << 20, 3.0, 10, lambda: 100)
+
+    assert first is second
+    assert first.max_bytes == 1 << 20
+    assert other is not first
@@ -0,0 +1,259 @@
+"""
+区块交易分类索引测试
+
+classify_rows 是纯函数，直接构造 ClassifierIndex，不依赖链配置和网络；
+规则表由 compile_rule_tables 按测试中的检测规则编译
+"""
+
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from config.monitor_config import DetectionRule, MonitorConfig, MonitorStrategy, RuleKind
+from processors.block_classifier import ClassifierIndex, classify_rows, compile_rule_tables, match_rules
+from utils.address_index import AddressIndex
+
+USDT = '0x' + 'aa' * 20
+DISPERSE = '0x' + 'dd' * 20
+SENDER = '0x' + '11' * 20
+WATCHED = '0x' + '22' * 20
+OTHER = '0x' + '33' * 20
+FORGER = '0x' + 'ee' * 20
+ETHER = 10 ** 18
+
+
+def word(value) -> str:
+    """ABI 编码一个 32 字节参数（地址或整数）"""
+    if isinstance(value, str):
+        return value[2:].lower().rjust(64, '0')
+    return format(value, '064x')
+
+
+def transfer_call(recipient: str, amount: int) -> str:
+    """transfer(address,uint256) 的 calldata"""
+    return '0xa9059cbb' + word(recipient) + word(amount)
+
+
+def disperse_call(token: str, recipients: List[str], amounts: List[int]) -> str:
+    """disperseToken(address,address[],uint256[]) 的 calldata"""
+    recipients_offset = 3 * 32
+    amounts_offset = recipients_offset + 32 * (len(recipients) + 1)
+    return ('0xc73a2d60' + word(token) + word(recipients_offset) + word(amounts_offset) +
+            word(len(recipients)) + ''.join(word(r) for r in recipients) +
+            word(len(amounts)) + ''.join(word(a) for a in amounts))
+
+
+def make_index(strategy: MonitorStrategy, watched: Tuple[str, ...] = (),
+               thresholds_wei: Optional[Dict[str, Optional[int]]] = None,
+               native_threshold_wei: Optional[int] = None, detect_native: bool = True,
+               rules: Optional[List[DetectionRule]] = None,
+               disperse_contracts: FrozenSet[str] = frozenset({DISPERSE}),
+               batch_contracts: FrozenSet[str] = frozenset()) -> ClassifierIndex:
+    rule_names, rule_tables = (), {}
+    if rules is not None:
+        rule_names, rule_tables = compile_rule_tables(make_config(rules), {'USDT': 18, 'BNB': 18})
+    return ClassifierIndex(
+        key=(),
+        strategy=strategy,
+        detect_native=detect_native,
+        native_symbol='BNB',
+        native_threshold_wei=native_threshold_wei,
+        contracts=MappingProxyType({USDT: ('USDT', 18)}),
+        watched=AddressIndex(watched),
+        thresholds_wei=MappingProxyType(thresholds_wei or {}),
+        rule_names=rule_names,
+        rule_tables=MappingProxyType(rule_tables),
+        disperse_contracts=disperse_contracts,
+        batch_contracts=batch_contracts,
+    )
+
+
+def make_config(rules: List[DetectionRule]) -> MonitorConfig:
+    return MonitorConfig(
+        rpc_url='http://127.0.0.1:1',
+        monitor_strategy=MonitorStrategy.RULES,
+        watch_addresses=[],
+        thresholds={'USDT': 1000.0, 'BNB': 10.0},
+        detection_rules=rules,
+    )
+
+
+def test_large_amount_native_and_token_thresholds():
+    index = make_index(MonitorStrategy.LARGE_AMOUNT, thresholds_wei={'USDT': 1000 * ETHER},
+                       native_threshold_wei=10 * ETHER)
+    rows = [
+        (OTHER, 10 * ETHER, SENDER, '0x'),                          # 原生，恰好达到阈值
+        (OTHER, 10 * ETHER - 1, SENDER, '0x'),                      # 原生，低于阈值
+        (USDT, 0, SENDER, transfer_call(OTHER, 1000 * ETHER)),      # 代币，恰好达到阈值
+        (USDT, 0, SENDER, transfer_call(OTHER, 999 * ETHER)),       # 代币，低于阈值
+        (None, 50 * ETHER, SENDER, '0x6080'),                       # 合约创建
+    ]
+
+    matches, contracts_detected, token_transactions = classify_rows(index, rows)
+
+    assert matches == [
+        (0, None, 18, None, None, None, 10 * ETHER, 0, 0),
+        (2, 'USDT', 18, USDT, SENDER, OTHER, 1000 * ETHER, 0, 0),
+    ]
+    assert (contracts_detected, token_transactions) == (2, 2)
+
+
+def test_large_amount_token_without_threshold_never_matches():
+    index = make_index(MonitorStrategy.LARGE_AMOUNT, thresholds_wei={'USDT': None})
+
+    matches, _, _ = classify_rows(index, [(USDT, 0, SENDER, transfer_call(OTHER, 10 ** 30))])
+
+    assert matches == []
+
+
+def test_watch_address_matches_recipients_only():
+    index = make_index(MonitorStrategy.WATCH_ADDRESS, watched=(WATCHED,))
+    rows = [
+        (WATCHED.upper().replace('0X', '0x'), ETHER, SENDER, '0x'),  # 原生转入，大小写不敏感
+        (OTHER, ETHER, WATCHED, '0x'),                               # 原生转出不算
+        (USDT, 0, SENDER, transfer_call(WATCHED, 5)),
+        (USDT, 0, WATCHED, transfer_call(WATCHED, 5)),               # 转给自己不算
+        (USDT, 0, SENDER, transfer_call(OTHER, 5)),
+    ]
+
+    matches, contracts_detected, token_transactions = classify_rows(index, rows)
+
+    assert [(m[0], m[1], m[5]) for m in matches] == [(0, None, None), (2, 'USDT', WATCHED)]
+    assert (contracts_detected, token_transactions) == (3, 3)
+
+
+def test_native_transfers_ignored_when_detection_disabled():
+    index = make_index(MonitorStrategy.WATCH_ADDRESS, watched=(WATCHED,), detect_native=False)
+
+    matches, _, _ = classify_rows(index, [(WATCHED, ETHER, SENDER, '0x')])
+
+    assert matches == []
+
+
+def test_disperse_call_yields_one_match_per_transfer():
+    index = make_index(MonitorStrategy.WATCH_ADDRESS, watched=(WATCHED,))
+    data = disperse_call(USDT, [WATCHED, OTHER, WATCHED], [1, 2, 3])
+
+    matches, contracts_detected, token_transactions = classify_rows(index, [(DISPERSE, 0, SENDER, data)])
+
+    assert matches == [
+        (0, 'USDT', 18, USDT, SENDER, WATCHED, 1, 0, 0),
+        (0, 'USDT', 18, USDT, SENDER, WATCHED, 3, 0, 2),
+    ]
+    assert (contracts_detected, token_transactions) == (1, 1)
+
+
+def test_disperse_call_for_unknown_token_is_ignored():
+    index = make_index(MonitorStrategy.WATCH_ADDRESS, watched=(WATCHED,))
+    data = disperse_call(OTHER, [WATCHED], [1])
+
+    assert classify_rows(index, [(DISPERSE, 0, SENDER, data)]) == ([], 0, 0)
+
+
+def test_disperse_call_to_unlisted_contract_is_ignored():
+    # 任何人都能部署一个不转账的合约，让 calldata 声称分发了 USDT
+    data = disperse_call(USDT, [WATCHED], [1000 * ETHER])
+    watch = make_index(MonitorStrategy.WATCH_ADDRESS, watched=(WATCHED,))
+    rules = make_index(MonitorStrategy.RULES, watched=(WATCHED,), rules=RULES)
+
+    assert classify_rows(watch, [(FORGER, 0, SENDER, data)]) == ([], 0, 0)
+    assert classify_rows(rules, [(FORGER, 0, SENDER, data)]) == ([], 0, 0)
+
+
+def test_batch_call_decoded_only_for_listed_tokens():
+    batch = ('0x88d695b2' + word(2 * 32) + word(4 * 32) + word(1) + word(WATCHED) + word(1) + word(7))
+    unlisted = make_index(MonitorStrategy.WATCH_ADDRESS, watched=(WATCHED,))
+    listed = make_index(MonitorStrategy.WATCH_ADDRESS, watched=(WATCHED,), batch_contracts=frozenset({USDT}))
+
+    assert classify_rows(unlisted, [(USDT, 0, SENDER, batch)]) == ([], 1, 0)
+    assert classify_rows(listed, [(USDT, 0, SENDER, batch)]) == ([(0, 'USDT', 18, USDT, SENDER, WATCHED, 7, 0, 0)], 1, 1)
+
+
+def test_undecodable_token_call_counts_contract_only():
+    index = make_index(MonitorStrategy.WATCH_ADDRESS, watched=(WATCHED,))
+
+    # approve(address,uint256) 不是转账
+    approve = '0x095ea7b3' + word(WATCHED) + word(1)
+    assert classify_rows(index, [(USDT, 0, SENDER, approve)]) == ([], 1, 0)
+
+
+# ---------------------------------------------------------------------------
+# 规则模式
+# ---------------------------------------------------------------------------
+
+RULES = [
+    DetectionRule('large', RuleKind.LARGE_AMOUNT),
+    DetectionRule('inbound', RuleKind.WATCH_INBOUND),
+    DetectionRule('outbound_usdt', RuleKind.WATCH_OUTBOUND, tokens=['USDT'], min_amount=5),
+    DetectionRule('vip', RuleKind.ADDRESS_AMOUNT, addresses=[OTHER.upper().replace('0X', '0x')], min_amount=1),
+]
+
+
+def test_compile_rule_tables_bits_and_thresholds():
+    names, tables = compile_rule_tables(make_config(RULES), {'USDT': 18, 'BNB': 18, 'BUSD': 18})
+
+    assert names == ('large', 'inbound', 'outbound_usdt', 'vip')
+    large, watch_in, watch_out, address_in, address_out = tables['USDT']
+    assert large == ((1000 * ETHER, 0b0001),)
+    assert watch_in == ((0, 0b0010),)
+    assert watch_out == ((5 * ETHER, 0b0100),)
+    assert address_in == {OTHER: ((ETHER, 0b1000),)}
+    assert address_out == {OTHER: ((ETHER, 0b1000),)}
+
+    # 原生代币不适用 outbound_usdt；BUSD 没有阈值，大额规则不生效
+    assert tables['BNB'][0] == ((10 * ETHER, 0b0001),)
+    assert tables['BNB'][2] == ()
+    assert tables['BUSD'][0] == ()
+
+
+def test_compile_rule_tables_ignores_unknown_tokens_and_empty_tables():
+    rules = [DetectionRule('doge_only', RuleKind.WATCH_INBOUND, tokens=['DOGE'])]
+
+    names, tables = compile_rule_tables(make_config(rules), {'USDT': 18})
+
+    assert names == ('doge_only',)
+    assert tables == {}
+
+
+def test_match_rules():
+    _, tables = compile_rule_tables(make_config(RULES), {'USDT': 18, 'BNB': 18})
+    table = tables['USDT']
+    watched = AddressIndex([WATCHED])
+
+    assert match_rules(table, SENDER, WATCHED, 1, watched) == 0b0010
+    assert match_rules(table, SENDER, WATCHED, 1000 * ETHER, watched) == 0b0011
+    assert match_rules(table, WATCHED, SENDER, 5 * ETHER - 1, watched) == 0
+    assert match_rules(table, WATCHED, SENDER, 5 * ETHER, watched) == 0b0100
+    assert match_rules(table, WATCHED, OTHER, 5 * ETHER, watched) == 0b1100
+    assert match_rules(table, OTHER, SENDER, ETHER, watched) == 0b1000
+    # 转给自己只评估大额规则
+    assert match_rules(table, WATCHED, WATCHED, 1000 * ETHER, watched) == 0b0001
+
+
+def test_rules_mode_evaluates_native_and_token_transfers_in_one_pass():
+    index = make_index(MonitorStrategy.RULES, watched=(WATCHED,), rules=RULES)
+    rows = [
+        (WATCHED, 20 * ETHER, SENDER, '0x'),                                        # 原生：大额 + 转入
+        (USDT, ETHER, SENDER, transfer_call(WATCHED, 2)),                           # 附带原生代币的代币调用，只有代币转账命中
+        (USDT, 0, WATCHED, transfer_call(OTHER, 2000 * ETHER)),                     # 大额 + 转出 + vip
+        (DISPERSE, 0, SENDER, disperse_call(USDT, [OTHER, SENDER], [ETHER, ETHER])),
+    ]
+
+    matches, contracts_detected, token_transactions = classify_rows(index, rows)
+
+    assert [(m[0], m[1], m[7], m[8]) for m in matches] == [
+        (0, None, 0b0011, 0),
+        (1, 'USDT', 0b0010, 0),
+        (2, 'USDT', 0b1101, 0),
+        (3, 'USDT', 0b1000, 0),
+    ]
+    assert index.rule_names_for(0b1101) == ('large', 'outbound_usdt', 'vip')
+    assert (contracts_detected, token_transactions) == (3, 3)
+
+
+def test_rules_mode_without_rule_tables_is_inactive():
+    index = make_index(MonitorStrategy.RULES, watched=(WATCHED,), rules=[
+        DetectionRule('doge_only', RuleKind.WATCH_INBOUND, tokens=['DOGE']),
+    ])
+
+    assert not index.is_active
+    assert classify_rows(index, [(WATCHED, ETHER, SENDER, '0x')]) == ([], 0, 0)
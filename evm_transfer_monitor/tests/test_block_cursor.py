@@ -0,0 +1,136 @@
+"""
+区块处理进度游标测试
+
+覆盖落盘与读取、批量落盘条件、重组回退以及入库失败时的落盘上限
+"""
+
+import json
+
+import pytest
+
+from managers import block_cursor
+from managers.block_cursor import BlockCursor
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(block_cursor.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'cursor.json')
+
+
+def read(path: str) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_load_missing_invalid_and_foreign_files(path):
+    cursor = BlockCursor(path, 'bsc')
+    assert cursor.load() is None
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{not json')
+    assert cursor.load() is None
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'chain_name': 'eth', 'last_block': 5}, f)
+    assert cursor.load() is None
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'chain_name': 'bsc', 'last_block': '5'}, f)
+    assert cursor.load() is None
+
+
+def test_flush_and_reload(path, clock):
+    cursor = BlockCursor(path, 'bsc')
+    cursor.advance(100)
+    assert cursor.flush()
+
+    assert read(path)['last_block'] == 100
+    reloaded = BlockCursor(path, 'bsc')
+    assert reloaded.load() == 100
+    assert reloaded.current_block == reloaded.committed_block == 100
+
+
+def test_should_flush_by_blocks_and_interval(path, clock):
+    cursor = BlockCursor(path, 'bsc', flush_interval=5.0, flush_blocks=10)
+    assert not cursor.should_flush()
+
+    cursor.advance(100)
+    assert cursor.should_flush()
+    cursor.flush()
+    assert not cursor.should_flush()
+
+    cursor.advance(109)
+    assert not cursor.should_flush()
+    cursor.advance(110)
+    assert cursor.should_flush()
+
+    cursor.flush()
+    cursor.advance(111)
+    clock.now += 5
+    assert cursor.should_flush()
+
+
+def test_advance_never_moves_backwards(path):
+    cursor = BlockCursor(path, 'bsc')
+    cursor.advance(100)
+    cursor.advance(90)
+
+    assert cursor.current_block == 100
+
+
+def test_rewind_and_flush_after_reorg(path, clock):
+    cursor = BlockCursor(path, 'bsc')
+    cursor.advance(110)
+    cursor.flush()
+
+    cursor.rewind(105)
+    cursor.rewind(108)  # 只回退不前进
+    assert cursor.current_block == 105
+
+    # 回退后由监控器立即落盘，不等批量条件
+    assert cursor.flush()
+    assert read(path)['last_block'] == 105
+    assert cursor.committed_block == 105
+
+
+def test_flush_limit_holds_cursor_below_failed_saves(path, clock):
+    cursor = BlockCursor(path, 'bsc', flush_interval=5.0, flush_blocks=10)
+    cursor.advance(100)
+    cursor.flush()
+
+    # 区块 106 的交易入库失败，游标最多落盘到 105
+    cursor.advance(120)
+    assert cursor.flush(limit=105)
+    assert read(path)['last_block'] == 105
+    assert cursor.limited
+    assert cursor.current_block == 120
+
+    # 受上限约束时只按时间间隔重试，已达到上限时不重复写入
+    assert not cursor.should_flush()
+    clock.now += 5
+    assert cursor.should_flush()
+    flushes = cursor.flush_count
+    assert cursor.flush(limit=105)
+    assert cursor.flush_count == flushes
+    assert not cursor.should_flush()
+
+    # 重试成功后解除上限
+    assert cursor.flush()
+    assert read(path)['last_block'] == 120
+    assert not cursor.limited
+    assert cursor.get_stats()['committed_block'] == 120
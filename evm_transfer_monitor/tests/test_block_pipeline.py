@@ -0,0 +1,105 @@
+"""
+流水线区块获取测试
+
+只构造 _process_blocks_pipelined 用到的监控器属性：获取区块用按区块号设定延迟的替身，
+验证请求窗口、严格按高度处理以及失败时只推进连续成功的前缀
+"""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from web3.exceptions import BlockNotFound
+
+from config.monitor_config import MonitorConfig
+from core.evm_monitor import EVMMonitor
+from managers.catchup_controller import CatchupController
+
+
+class FakeFetcher:
+    """按区块号延迟返回区块，记录同时在途的请求数"""
+
+    def __init__(self, delays: Optional[Dict[int, float]] = None, errors: Optional[Dict[int, Exception]] = None):
+        self.delays = delays or {}
+        self.errors = errors or {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.started: List[int] = []
+        self.cancelled: List[int] = []
+
+    async def __call__(self, block_number: int):
+        self.started.append(block_number)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(block_number, 0.001))
+            if block_number in self.errors:
+                raise self.errors[block_number]
+            return ('header', block_number), ('block', block_number)
+        except asyncio.CancelledError:
+            self.cancelled.append(block_number)
+            raise
+        finally:
+            self.in_flight -= 1
+
+
+def make_monitor(fetcher: FakeFetcher, window: int = 4, reject: Optional[int] = None) -> EVMMonitor:
+    monitor = EVMMonitor.__new__(EVMMonitor)
+    monitor.is_running = True
+    monitor.config = MonitorConfig(rpc_url='http://127.0.0.1:1', watch_addresses=[], block_fetch_window=window)
+    monitor.catchup_controller = CatchupController(monitor.config)
+    monitor.rpc_manager = SimpleNamespace(set_batch_size=lambda size: None)
+    monitor.stats_reporter = SimpleNamespace(increment_blocks_processed=lambda: None)
+    monitor.processed = []
+
+    async def process_block(block_number, header, block):
+        assert header == ('header', block_number) and block == ('block', block_number)
+        if block_number == reject:
+            return False
+        monitor.processed.append(block_number)
+        return True
+
+    monitor._fetch_block = fetcher
+    monitor._process_block = process_block
+    return monitor
+
+
+def test_blocks_processed_in_height_order_with_bounded_window():
+    # 后面的区块先返回
+    fetcher = FakeFetcher({100 + i: 0.02 - 0.002 * i for i in range(10)})
+    monitor = make_monitor(fetcher, window=4)
+
+    assert asyncio.run(monitor._process_blocks_pipelined(100, 109)) == (109, 10)
+    assert monitor.processed == list(range(100, 110))
+    assert fetcher.max_in_flight == 4
+
+
+def test_fetch_error_stops_at_contiguous_prefix_and_cancels_rest():
+    fetcher = FakeFetcher({103: 0.01, 104: 0.05, 105: 0.05}, errors={103: RuntimeError('timeout')})
+    monitor = make_monitor(fetcher, window=4)
+
+    assert asyncio.run(monitor._process_blocks_pipelined(100, 109)) == (102, 3)
+    assert monitor.processed == [100, 101, 102]
+    assert {104, 105} <= set(fetcher.cancelled)
+    assert fetcher.in_flight == 0
+
+
+def test_block_not_found_and_rejected_block_stop_processing():
+    fetcher = FakeFetcher(errors={102: BlockNotFound('not yet')})
+    monitor = make_monitor(fetcher)
+    assert asyncio.run(monitor._process_blocks_pipelined(100, 105)) == (101, 2)
+
+    # 处理失败（例如检测到重组）的区块不推进进度
+    monitor = make_monitor(FakeFetcher(), reject=101)
+    assert asyncio.run(monitor._process_blocks_pipelined(100, 105)) == (100, 1)
+
+
+def test_window_follows_catchup_controller():
+    fetcher = FakeFetcher({100 + i: 0.005 for i in range(40)})
+    monitor = make_monitor(fetcher, window=2)
+    monitor.catchup_controller.update_lag(10000, 0)
+
+    asyncio.run(monitor._process_blocks_pipelined(100, 139))
+
+    assert fetcher.max_in_flight > 2
+    assert fetcher.max_in_flight <= monitor.config.catchup_max_window
@@ -0,0 +1,122 @@
+"""
+logsBloom 预过滤测试
+
+logsBloom 按黄皮书定义独立构造（2048 位整数，每个值取 keccak 前 6 字节的 3 组低 11 位），
+验证包含相关转账的区块一定不会被跳过，以及监控地址和代币合约变化后过滤条件随之更新
+"""
+
+import random
+
+from eth_utils import keccak
+from hexbytes import HexBytes
+
+from config.monitor_config import MonitorConfig, MonitorStrategy
+from models.data_types import RawBlock
+from processors.block_prefilter import BlockBloomPrefilter
+from utils.token_parser import TRANSFER_EVENT_TOPIC, TokenParser
+
+SENDER = '0x' + '11' * 20
+WATCHED = '0x' + '22' * 20
+OTHER = '0x' + '33' * 20
+APPROVAL_TOPIC = '0x8c5be1e5ebec7d5bd14f71427d1e84f3dd0314c0f7b2291e5b200ac8c7c3b925'
+
+
+def topic(address: str) -> str:
+    return '0x' + address[2:].rjust(64, '0')
+
+
+def make_bloom(logs) -> str:
+    """logs: [(合约地址, [topic, ...]), ...]"""
+    bloom = 0
+    for address, topics in logs:
+        for value in [address] + topics:
+            digest = keccak(bytes.fromhex(value[2:]))
+            for i in (0, 2, 4):
+                bloom |= 1 << (int.from_bytes(digest[i:i + 2], 'big') & 0x7FF)
+    return '0x' + format(bloom, '0512x')
+
+
+def transfer(contract: str, sender: str, recipient: str):
+    return contract, [TRANSFER_EVENT_TOPIC, topic(sender), topic(recipient)]
+
+
+def random_hex(rng: random.Random, size: int) -> str:
+    return '0x' + rng.getrandbits(size * 8).to_bytes(size, 'big').hex()
+
+
+def make_prefilter(watch_addresses, **overrides):
+    config = MonitorConfig(rpc_url='http://127.0.0.1:1', monitor_strategy=MonitorStrategy.WATCH_ADDRESS,
+                           watch_addresses=watch_addresses, detect_native_transfers=False, **overrides)
+    token_parser = TokenParser('bsc')
+    return BlockBloomPrefilter(config, token_parser), config, token_parser
+
+
+def test_blocks_with_watched_transfers_are_never_skipped():
+    rng = random.Random(7)
+    addresses = [random_hex(rng, 20) for _ in range(50)]
+    prefilter, _, token_parser = make_prefilter(addresses)
+    contracts = [contract.lower() for contract in token_parser.contracts.values() if contract]
+
+    for _ in range(300):
+        noise = [(random_hex(rng, 20), [random_hex(rng, 32)]) for _ in range(rng.randrange(20))]
+        deposit = transfer(rng.choice(contracts), random_hex(rng, 20), rng.choice(addresses))
+        logs = noise + [deposit]
+        rng.shuffle(logs)
+        bloom = make_bloom(logs)
+
+        # web3 区块头（HexBytes）和原生路径的 RawBlock 都能识别
+        assert prefilter.may_contain({'logsBloom': HexBytes(bloom)})
+        assert prefilter.may_contain(RawBlock(1, '', '', 0, bloom, []))
+
+    assert prefilter.blocks_skipped == 0
+
+
+def test_unrelated_blocks_are_skipped():
+    prefilter, _, token_parser = make_prefilter([WATCHED])
+    usdt = token_parser.contracts['USDT']
+
+    assert not prefilter.may_contain({'logsBloom': make_bloom([])})
+    assert not prefilter.may_contain({'logsBloom': make_bloom([transfer(usdt, SENDER, OTHER)])})
+    assert not prefilter.may_contain({'logsBloom': make_bloom([(usdt, [APPROVAL_TOPIC, topic(SENDER), topic(WATCHED)])])})
+    assert not prefilter.may_contain({'logsBloom': make_bloom([transfer(OTHER, SENDER, WATCHED)])})
+    assert prefilter.get_stats()['skip_rate'] == 100.0
+
+    # 节点未返回 logsBloom 时不能跳过
+    assert prefilter.may_contain({})
+
+
+def test_filter_follows_watch_address_and_token_changes():
+    prefilter, config, token_parser = make_prefilter([WATCHED])
+    usdt = token_parser.contracts['USDT']
+    new_token = '0x' + '44' * 20
+    to_other = {'logsBloom': make_bloom([transfer(usdt, SENDER, OTHER)])}
+    new_token_block = {'logsBloom': make_bloom([transfer(new_token, SENDER, WATCHED)])}
+    assert not prefilter.may_contain(to_other)
+    assert not prefilter.may_contain(new_token_block)
+
+    config.add_watch_address(OTHER)
+    assert prefilter.may_contain(to_other)
+    config.remove_watch_address(OTHER)
+    assert not prefilter.may_contain(to_other)
+
+    token_parser.update_token('NEW', new_token, 18)
+    assert prefilter.may_contain(new_token_block)
+
+
+def test_address_check_dropped_over_limit_or_for_other_strategies():
+    prefilter, _, token_parser = make_prefilter([WATCHED, OTHER], bloom_prefilter_address_limit=1)
+    block = {'logsBloom': make_bloom([transfer(token_parser.contracts['USDT'], SENDER, '0x' + '55' * 20)])}
+
+    assert prefilter.may_contain(block)
+
+    config = MonitorConfig(rpc_url='http://127.0.0.1:1', monitor_strategy=MonitorStrategy.LARGE_AMOUNT,
+                           watch_addresses=[WATCHED], detect_native_transfers=False)
+    assert BlockBloomPrefilter(config, token_parser).may_contain(block)
+
+
+def test_disabled_when_native_transfers_are_detected():
+    prefilter, _, _ = make_prefilter([WATCHED])
+    assert prefilter.enabled
+
+    config = MonitorConfig(rpc_url='http://127.0.0.1:1', watch_addresses=[WATCHED], detect_native_transfers=True)
+    assert not BlockBloomPrefilter(config, TokenParser('bsc')).enabled
@@ -0,0 +1,101 @@
+"""
+追块控制器测试
+
+覆盖带滞回的模式切换、AIMD 窗口调整（加性增大、乘性减小、上下限）以及追块时的批量大小
+"""
+
+from config.monitor_config import MonitorConfig
+from managers.catchup_controller import CatchupController, SyncMode
+
+
+def make_controller(**overrides) -> CatchupController:
+    options = dict(block_fetch_window=4, rpc_batch_max_size=20, catchup_enter_lag=50, catchup_exit_lag=5,
+                   catchup_min_window=8, catchup_max_window=20, catchup_window_step=4,
+                   catchup_decrease_factor=0.5, catchup_target_latency=1.0, catchup_max_batch_size=30)
+    options.update(overrides)
+    return CatchupController(MonitorConfig(rpc_url='http://127.0.0.1:1', watch_addresses=[], **options))
+
+
+def fast_round(controller: CatchupController, latency: float = 0.2) -> None:
+    for _ in range(controller.window):
+        controller.observe_latency(latency)
+
+
+def test_mode_switch_uses_separate_enter_and_exit_thresholds():
+    controller = make_controller()
+
+    assert not controller.update_lag(1050, 1000)
+    assert controller.update_lag(1051, 1000)
+    assert controller.mode == SyncMode.CATCHUP and controller.get_window() == 8
+
+    # 在两个阈值之间保持追块模式
+    assert not controller.update_lag(1100, 1090)
+    assert controller.update_lag(1100, 1095)
+    assert controller.mode == SyncMode.HEAD and controller.get_window() == 4
+    assert controller.mode_switches == 2 and controller.max_lag == 51
+
+
+def test_additive_increase_until_max_window():
+    controller = make_controller()
+    controller.update_lag(2000, 1000)
+
+    windows = []
+    for _ in range(4):
+        fast_round(controller)
+        windows.append(controller.window)
+
+    assert windows == [12, 16, 20, 20]
+    assert controller.window_increases == 3
+
+
+def test_error_or_slow_round_halves_window_down_to_min():
+    controller = make_controller()
+    controller.update_lag(2000, 1000)
+    fast_round(controller)
+    fast_round(controller)
+    assert controller.window == 16
+
+    # 出错立即减小，不等一轮结束
+    controller.observe_latency(0.2)
+    controller.observe_error()
+    assert controller.window == 8
+
+    fast_round(controller, latency=2.0)
+    assert controller.window == 8
+    assert controller.window_decreases == 1
+
+
+def test_head_mode_ignores_observations():
+    controller = make_controller()
+
+    controller.observe_latency(5.0)
+    controller.observe_error()
+    controller.end_round()
+
+    assert controller.window == 8 and controller.window_decreases == 0
+    assert controller.get_window() == 4
+
+
+def test_batch_size_follows_window_within_bounds():
+    controller = make_controller(catchup_max_window=64)
+    assert controller.get_batch_size() == 20
+
+    controller.update_lag(2000, 1000)
+    assert controller.get_batch_size() == 20  # 窗口 8 小于常规批量大小
+    for _ in range(4):
+        fast_round(controller)
+    assert controller.window == 24 and controller.get_batch_size() == 24
+    for _ in range(4):
+        fast_round(controller)
+    assert controller.get_batch_size() == 30
+
+
+def test_reentering_catchup_starts_from_configured_window():
+    controller = make_controller(block_fetch_window=10)
+    controller.update_lag(2000, 1000)
+    assert controller.window == 10
+    fast_round(controller)
+    controller.update_lag(2000, 1999)
+
+    controller.update_lag(3000, 2000)
+    assert controller.window == 10
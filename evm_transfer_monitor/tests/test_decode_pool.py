@@ -0,0 +1,111 @@
+"""
+区块解码进程池测试
+
+启动真实的工作进程（spawn），同一区块分别在进程池和事件循环内分类，
+命中记录及其区块内顺序应一致；监控地址增删以增量同步，地址被整体替换时以新快照重启
+"""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, List
+
+import pytest
+
+from config.monitor_config import MonitorConfig, MonitorStrategy
+from processors import transaction_processor
+from processors.transaction_processor import TransactionProcessor
+from utils.token_parser import TokenParser
+
+TOKEN_PARSER = TokenParser('bsc')
+USDT = TOKEN_PARSER.contracts['USDT']
+SENDER = '0x' + '11' * 20
+WATCHED = '0x' + '22' * 20
+LATE = '0x' + '33' * 20
+OTHER = '0x' + '44' * 20
+
+
+def word(value) -> str:
+    if isinstance(value, str):
+        return value[2:].lower().rjust(64, '0')
+    return format(value, '064x')
+
+
+def block(recipients: List[str]) -> List[Dict]:
+    """依次向各地址转账：偶数位置为 USDT 转账，奇数位置为原生代币转账"""
+    transactions = []
+    for position, recipient in enumerate(recipients):
+        tx = {'hash': '0x' + format(position, '064x'), 'from': SENDER, 'gas': 100000, 'gasPrice': 10 ** 9,
+              'blockNumber': 100, 'blockHash': '0x' + 'cd' * 32}
+        if position % 2 == 0:
+            tx.update(to=USDT, value=0, input='0xa9059cbb' + word(recipient) + word(position + 1))
+        else:
+            tx.update(to=recipient, value=position + 1, input='0x')
+        transactions.append(tx)
+    return transactions
+
+
+def keys(tx_infos) -> List[tuple]:
+    return [(info.hash, info.tx_type, info.to_address.lower(), info.amount_wei, info.transfer_index)
+            for info in tx_infos]
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    monkeypatch.setattr(transaction_processor, 'get_database_manager', lambda: SimpleNamespace(async_session_factory=None))
+    config = MonitorConfig(rpc_url='http://127.0.0.1:1', monitor_strategy=MonitorStrategy.WATCH_ADDRESS,
+                           watch_addresses=[WATCHED], decode_workers=1, decode_pool_min_transactions=1)
+    processor = TransactionProcessor(config, TokenParser('bsc'), None)
+    yield processor
+    processor.close()
+
+
+def test_pool_and_event_loop_classification_agree(processor):
+    transactions = block([WATCHED, OTHER, WATCHED, WATCHED, OTHER, WATCHED, WATCHED, OTHER])
+
+    async def run():
+        return await processor.process_block_async(transactions)
+
+    offloaded = asyncio.run(run())
+
+    assert keys(offloaded) == keys(processor.process_block(transactions))
+    assert [info.hash[-1] for info in offloaded] == ['0', '2', '3', '5', '6']
+    assert processor.decode_pool.get_stats()['blocks_offloaded'] == 1
+
+
+def test_watch_address_changes_reach_workers(processor):
+    config = processor.config
+    pool = processor.decode_pool
+    transactions = block([WATCHED, LATE, LATE, OTHER])
+
+    async def run():
+        before = await processor.process_block_async(transactions)
+        config.add_watch_address(LATE)
+        added = await processor.process_block_async(transactions)
+        config.remove_watch_address(WATCHED)
+        removed = await processor.process_block_async(transactions)
+        return before, added, removed
+
+    before, added, removed = asyncio.run(run())
+
+    assert [info.to_address.lower() for info in before] == [WATCHED]
+    assert [info.to_address.lower() for info in added] == [WATCHED, LATE, LATE]
+    assert [info.to_address.lower() for info in removed] == [LATE, LATE]
+    # 增量随任务下发，没有重启工作进程
+    assert pool.snapshots == 1 and pool.changes_synced == 2
+
+    async def replace():
+        config.update_watch_addresses([OTHER])
+        return await processor.process_block_async(transactions)
+
+    assert [info.to_address.lower() for info in asyncio.run(replace())] == [OTHER]
+    assert pool.snapshots == 2
+
+
+def test_small_blocks_stay_on_event_loop(processor):
+    processor.config.decode_pool_min_transactions = 10
+
+    async def run():
+        return await processor.process_block_async(block([WATCHED]))
+
+    assert len(asyncio.run(run())) == 1
+    assert processor.decode_pool.get_stats()['running'] is False
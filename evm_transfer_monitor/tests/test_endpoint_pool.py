@@ -0,0 +1,148 @@
+"""
+RPC节点池测试
+
+节点的 Web3 实例用替身代替；覆盖按评分路由、连续出错摘除、冷却后探测重新加入，
+以及 RPCManager 在节点出错时转移到下一个节点
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from config.monitor_config import MonitorConfig
+from managers import endpoint_pool
+from managers.endpoint_pool import EndpointPool
+from managers.rpc_manager import RPCManager
+
+URLS = ['http://127.0.0.1:1', 'http://127.0.0.1:2', 'http://127.0.0.1:3']
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(endpoint_pool.time, 'time', clock)
+    return clock
+
+
+class FakeNode:
+    """按 failing 决定 eth_blockNumber 成功与否"""
+
+    def __init__(self, url: str, head: int = 100):
+        self.url = url
+        self.head = head
+        self.failing = False
+        self.calls = 0
+
+    async def get_block_number(self) -> int:
+        self.calls += 1
+        if self.failing:
+            raise ConnectionError(f'{self.url} unavailable')
+        return self.head
+
+
+def make_pool(**overrides) -> EndpointPool:
+    options = dict(batch_enabled=False, explore_ratio=0, eject_after_errors=3, eject_seconds=30)
+    options.update(overrides)
+    pool = EndpointPool(URLS, **options)
+    for endpoint in pool.endpoints:
+        endpoint.w3 = SimpleNamespace(eth=FakeNode(endpoint.url))
+    return pool
+
+
+def test_routes_by_latency_and_error_score(clock):
+    pool = make_pool()
+    fast, slow, flaky = pool.endpoints
+    pool.record_success(fast, 0.05)
+    pool.record_success(slow, 0.5)
+    pool.record_success(flaky, 0.01)
+    pool.record_failure(flaky, ConnectionError('reset'))
+
+    # 错误率折算为延迟惩罚：0.01 + 0.3 * 2.0 > 0.5
+    assert [endpoint.url for endpoint in pool.candidates()] == [fast.url, slow.url, flaky.url]
+
+
+def test_consecutive_errors_eject_endpoint(clock):
+    pool = make_pool()
+    endpoint = pool.endpoints[0]
+
+    pool.record_failure(endpoint, ConnectionError('reset'))
+    pool.record_failure(endpoint, ConnectionError('reset'))
+    pool.record_success(endpoint, 0.1)  # 成功后重新计数
+    pool.record_failure(endpoint, ConnectionError('reset'))
+    pool.record_failure(endpoint, ConnectionError('reset'))
+    assert not endpoint.is_ejected
+
+    pool.record_failure(endpoint, ConnectionError('reset'))
+    assert endpoint.is_ejected
+    assert endpoint.ejected_until == clock.now + 30
+    assert endpoint not in list(pool.candidates())
+
+
+def test_all_ejected_yields_earliest_to_recover(clock):
+    pool = make_pool(eject_after_errors=1)
+    for offset, endpoint in zip((20, 10, 30), pool.endpoints):
+        clock.now = 1000.0 + offset
+        pool.record_failure(endpoint, ConnectionError('reset'))
+    clock.now = 1001.0
+
+    assert list(pool.candidates()) == [pool.endpoints[1]]
+
+
+def test_probe_after_cooldown_rejoins_or_backs_off(clock):
+    pool = make_pool(eject_after_errors=1)
+    endpoint = pool.endpoints[0]
+    node = endpoint.w3.eth
+    pool.record_failure(endpoint, ConnectionError('reset'))
+
+    async def probe_round():
+        list(pool.candidates())
+        await asyncio.gather(*pool._probe_tasks)
+
+    # 冷却未到期时不探测
+    asyncio.run(probe_round())
+    assert node.calls == 0
+
+    # 探测失败：冷却时间翻倍
+    clock.now += 30
+    node.failing = True
+    asyncio.run(probe_round())
+    assert node.calls == 1
+    assert endpoint.eject_seconds == 60 and endpoint.ejected_until == clock.now + 60
+
+    # 探测成功：重新加入，健康评分清零
+    clock.now += 60
+    node.failing = False
+    asyncio.run(probe_round())
+    assert not endpoint.is_ejected
+    assert endpoint.ewma_error_rate == 0.0 and endpoint.consecutive_errors == 0
+    assert endpoint in list(pool.candidates())
+
+
+def test_rpc_manager_fails_over_to_next_endpoint(clock):
+    config = MonitorConfig(rpc_url=URLS[0], rpc_urls=URLS[1:], watch_addresses=[],
+                           rpc_batch_enabled=False)
+    manager = RPCManager(config)
+    manager.endpoint_pool.explore_ratio = 0
+    for endpoint in manager.endpoint_pool.endpoints:
+        endpoint.w3 = SimpleNamespace(eth=FakeNode(endpoint.url, head=int(endpoint.url[-1])))
+    primary = manager.endpoint_pool.primary
+    primary.w3.eth.failing = True
+
+    async def get_head():
+        return await manager._request(lambda w3: w3.eth.get_block_number())
+
+    assert asyncio.run(get_head()) == 2
+    assert primary.w3.eth.calls == 1 and primary.errors == 1
+
+    # 出错的节点评分变差，之后的调用直接路由到健康节点
+    assert asyncio.run(get_head()) == 2
+    assert primary.w3.eth.calls == 1
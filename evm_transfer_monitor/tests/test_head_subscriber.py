@@ -0,0 +1,151 @@
+"""
+newHeads 订阅测试
+
+WebSocket 连接用替身代替；验证推送的区块头发布到共享链头，订阅可用时不再轮询，
+订阅中断或推送停滞时退回按 cache_ttl 轮询 eth_blockNumber
+"""
+
+import asyncio
+import itertools
+from typing import List
+
+import pytest
+
+from config.monitor_config import MonitorConfig
+from managers import head_subscriber
+from managers.head_subscriber import NewHeadsSubscriber
+from managers.rpc_manager import RPCManager
+
+_ports = itertools.count(10000)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(head_subscriber.time, 'time', clock)
+    return clock
+
+
+def make_manager(polled: List[int], head: int = 100) -> RPCManager:
+    # 每个测试使用不同的节点地址，避免共享同一个进程内链头
+    config = MonitorConfig(rpc_url=f'http://127.0.0.1:{next(_ports)}', watch_addresses=[],
+                           ws_url='ws://127.0.0.1:1', block_time=3, cache_ttl=1.5)
+    manager = RPCManager(config)
+
+    async def fetch_block_number():
+        polled.append(head)
+        return head
+
+    manager._fetch_block_number = fetch_block_number
+    return manager
+
+
+def test_pushed_heads_replace_polling(clock):
+    polled = []
+    manager = make_manager(polled)
+    subscriber = NewHeadsSubscriber(manager.config, manager)
+    manager.head_subscriber = subscriber
+    subscriber.is_connected = True
+
+    subscriber._on_new_head(120)
+    subscriber._on_new_head(119)  # 乱序或重复的区块头被忽略
+
+    # 推送仍然新鲜（距上次推送不到 3 个出块时间），链头缓存不过期
+    clock.now += 8
+    assert subscriber.is_fresh()
+    assert asyncio.run(manager.get_cached_block_number()) == 120
+    assert polled == []
+    assert subscriber.heads_received == 1
+
+
+def test_stale_or_disconnected_subscription_falls_back_to_polling(clock):
+    polled = []
+    manager = make_manager(polled, head=130)
+    subscriber = NewHeadsSubscriber(manager.config, manager)
+    manager.head_subscriber = subscriber
+    subscriber.is_connected = True
+    subscriber._on_new_head(120)
+
+    clock.now += 9
+    assert not subscriber.is_fresh()
+    assert manager._head_max_age() == manager.config.cache_ttl
+    assert asyncio.run(manager.get_cached_block_number()) == 130
+    assert polled == [130]
+
+    subscriber._on_new_head(131)
+    subscriber.is_connected = False
+    assert manager._head_max_age() == manager.config.cache_ttl
+
+
+class FakeSocket:
+    def __init__(self, heads: List[int]):
+        self.heads = heads
+
+    async def process_subscriptions(self):
+        for number in self.heads:
+            yield {'result': {'number': number}}
+        raise ConnectionError('connection closed')
+
+
+class FakeEth:
+    def __init__(self, head: int):
+        self.head = head
+        self.subscriptions: List[str] = []
+
+    async def subscribe(self, name: str):
+        self.subscriptions.append(name)
+
+    async def get_block_number(self) -> int:
+        return self.head
+
+
+class FakeWeb3:
+    """连接后先返回当前高度，推送若干区块头后断开"""
+
+    connections = 0
+
+    def __init__(self, provider):
+        self.eth = FakeEth(200)
+        self.socket = FakeSocket([201, 202])
+
+    async def __aenter__(self):
+        FakeWeb3.connections += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+def test_disconnect_falls_back_to_polling_until_reconnected(monkeypatch):
+    monkeypatch.setattr(head_subscriber, 'AsyncWeb3', FakeWeb3)
+    monkeypatch.setattr(head_subscriber, 'WebSocketProvider', lambda url: url)
+    FakeWeb3.connections = 0
+    manager = make_manager([])
+    subscriber = NewHeadsSubscriber(manager.config, manager)
+
+    async def run():
+        subscriber.start()
+        assert manager.head_subscriber is subscriber
+        while subscriber.reconnects == 0:
+            await asyncio.sleep(0.001)
+
+        # 断线后等待重连期间按 cache_ttl 轮询
+        assert not subscriber.is_connected
+        assert manager._head_max_age() == manager.config.cache_ttl
+
+        await subscriber.stop()
+
+    asyncio.run(run())
+
+    assert FakeWeb3.connections == 1
+    assert subscriber.latest_head == 202 and subscriber.heads_received == 3
+    assert manager.cached_block_number == 202
+    assert manager.head_subscriber is None
@@ -0,0 +1,94 @@
+"""
+共享链头跟踪器测试
+
+覆盖单飞刷新、缓存有效期、新链头广播唤醒等待方、等待超时，以及按 (链, 节点) 共享和跨事件循环复用
+"""
+
+import asyncio
+
+from managers.head_tracker import HeadTracker, get_head_tracker
+
+
+class Fetcher:
+    """返回 head 指定的区块号，记录调用次数"""
+
+    def __init__(self, head: int = 100, delay: float = 0.01):
+        self.head = head
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self) -> int:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.head
+
+
+def test_concurrent_refreshes_share_one_request():
+    tracker = HeadTracker('bsc', 'http://127.0.0.1:1')
+    fetcher = Fetcher()
+
+    async def run():
+        return await asyncio.gather(*(tracker.get_head(fetcher, 1.0) for _ in range(10)))
+
+    assert asyncio.run(run()) == [100] * 10
+    assert fetcher.calls == 1
+    assert tracker.polls == 1 and tracker.shared_waits == 9
+
+
+def test_cached_head_reused_within_max_age():
+    tracker = HeadTracker('bsc', 'http://127.0.0.1:1')
+    fetcher = Fetcher()
+
+    async def run():
+        await tracker.get_head(fetcher, 60.0)
+        fetcher.head = 101
+        cached = await tracker.get_head(fetcher, 60.0)
+        refreshed = await tracker.get_head(fetcher, 0.0)
+        return cached, refreshed
+
+    assert asyncio.run(run()) == (100, 101)
+    assert fetcher.calls == 2
+
+
+def test_publish_wakes_waiters_and_ignores_older_heads():
+    tracker = HeadTracker('bsc', 'http://127.0.0.1:1')
+    tracker.publish(100)
+    fetcher = Fetcher()
+
+    async def run():
+        waiters = [asyncio.ensure_future(tracker.wait_for_head(100, 5.0, fetcher, poll_interval=5.0))
+                   for _ in range(3)]
+        await asyncio.sleep(0.01)
+        assert not tracker.publish(99)
+        assert not any(waiter.done() for waiter in waiters)
+        assert tracker.publish(101)
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(run()) == [True, True, True]
+    assert fetcher.calls == 0
+    assert tracker.latest_head == 101 and tracker.heads_published == 2
+
+
+def test_wait_polls_and_times_out_without_new_head():
+    tracker = HeadTracker('bsc', 'http://127.0.0.1:1')
+    tracker.publish(100)
+    fetcher = Fetcher(head=100, delay=0)
+
+    assert not asyncio.run(tracker.wait_for_head(100, 0.05, fetcher, poll_interval=0.01))
+    assert fetcher.calls >= 2
+
+    # 轮询到新区块时返回
+    fetcher.head = 102
+    assert asyncio.run(tracker.wait_for_head(100, 1.0, fetcher, poll_interval=0.01))
+
+
+def test_trackers_shared_per_chain_and_endpoint_across_loops():
+    tracker = get_head_tracker('test_chain', 'http://127.0.0.1:1')
+    assert get_head_tracker('test_chain', 'http://127.0.0.1:1') is tracker
+    assert get_head_tracker('test_chain', 'http://127.0.0.1:2') is not tracker
+
+    # 每次 asyncio.run 都是新的事件循环，等待原语随之重建
+    fetcher = Fetcher()
+    assert asyncio.run(tracker.get_head(fetcher, 0.0)) == 100
+    fetcher.head = 101
+    assert asyncio.run(tracker.get_head(fetcher, 0.0)) == 101
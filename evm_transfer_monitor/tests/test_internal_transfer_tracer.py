@@ -0,0 +1,124 @@
+"""
+内部转账 trace 解析测试
+
+同一棵调用树分别按 trace_block（Parity）和 debug_traceBlockByNumber + callTracer（Geth）格式构造，
+两个解析器应提取出相同的转账
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from processors.internal_transfer_tracer import parse_call_traces, parse_parity_traces
+
+TX = '0x' + 'aa' * 32
+TX2 = '0x' + 'bb' * 32
+WALLET = '0x' + '11' * 20
+ROUTER = '0x' + '12' * 20
+WATCHED = '0x' + '22' * 20
+CREATED = '0x' + '33' * 20
+LIBRARY = '0x' + '44' * 20
+
+# 调用树节点: (类型, from, to, value, 是否出错, 子调用)
+Node = Tuple[str, str, Optional[str], int, bool, list]
+
+
+def call(kind: str, sender: str, to: Optional[str], value: int, calls: Optional[list] = None,
+         error: bool = False) -> Node:
+    return kind, sender, to, value, error, calls or []
+
+
+def to_parity(tx_hash: str, node: Node, address: Tuple[int, ...] = ()) -> List[Dict[str, Any]]:
+    """调用树转 trace_block 结果（深度优先先序）"""
+    kind, sender, to, value, error, calls = node
+    if kind == 'SELFDESTRUCT':
+        trace = {'type': 'suicide', 'action': {'address': sender, 'refundAddress': to, 'balance': hex(value)}}
+    elif kind in ('CREATE', 'CREATE2'):
+        trace = {'type': 'create', 'action': {'from': sender, 'value': hex(value), 'init': '0x'},
+                 'result': None if error else {'address': to, 'code': '0x'}}
+    else:
+        trace = {'type': 'call', 'action': {'callType': kind.lower(), 'from': sender, 'to': to, 'value': hex(value)}}
+    trace.update(transactionHash=tx_hash, traceAddress=list(address), subtraces=len(calls))
+    if error:
+        trace['error'] = 'Reverted'
+    traces = [trace]
+    for i, child in enumerate(calls):
+        traces.extend(to_parity(tx_hash, child, address + (i,)))
+    return traces
+
+
+def to_frame(node: Node) -> Dict[str, Any]:
+    """调用树转 callTracer 调用帧"""
+    kind, sender, to, value, error, calls = node
+    frame = {'type': kind, 'from': sender, 'to': to, 'value': hex(value)}
+    if error:
+        frame['error'] = 'execution reverted'
+    if calls:
+        frame['calls'] = [to_frame(child) for child in calls]
+    return frame
+
+
+def parse_both(trees: List[Tuple[str, Node]]):
+    parity = []
+    for tx_hash, tree in trees:
+        parity.extend(to_parity(tx_hash, tree))
+    geth = [{'txHash': tx_hash, 'result': to_frame(tree)} for tx_hash, tree in trees]
+    return parse_parity_traces(parity), parse_call_traces(geth, [])
+
+
+def transfer(tx_hash: str, sender: str, to: str, value: int, trace_address: str) -> Dict[str, Any]:
+    return {'hash': tx_hash, 'from': sender, 'to': to, 'value': value, 'trace_address': trace_address}
+
+
+def test_value_call_types_and_reverted_subtree():
+    tree = call('CALL', WALLET, ROUTER, 10, [
+        call('CALL', ROUTER, WATCHED, 1),                               # 0
+        call('DELEGATECALL', ROUTER, LIBRARY, 0, [                      # 1
+            call('CALL', ROUTER, WATCHED, 2),                           # 1_0
+        ]),
+        call('STATICCALL', ROUTER, LIBRARY, 0),                         # 2
+        call('CREATE', ROUTER, CREATED, 3),                             # 3
+        call('CREATE2', ROUTER, CREATED, 4),                            # 4
+        call('CALL', ROUTER, WALLET, 0, [                               # 5 回滚，其下转账都不算
+            call('CALL', WALLET, WATCHED, 5),
+        ], error=True),
+        call('SELFDESTRUCT', ROUTER, WATCHED, 6),                       # 6
+    ])
+
+    parity, geth = parse_both([(TX, tree)])
+
+    assert parity == geth == [
+        transfer(TX, ROUTER, WATCHED, 1, '0'),
+        transfer(TX, ROUTER, WATCHED, 2, '1_0'),
+        transfer(TX, ROUTER, CREATED, 3, '3'),
+        transfer(TX, ROUTER, CREATED, 4, '4'),
+        transfer(TX, ROUTER, WATCHED, 6, '6'),
+    ]
+
+
+def test_failed_top_level_call_skips_whole_transaction():
+    failed = call('CALL', WALLET, ROUTER, 10, [call('CALL', ROUTER, WATCHED, 1)], error=True)
+    ok = call('CALL', WALLET, ROUTER, 0, [call('CALL', ROUTER, WATCHED, 7)])
+
+    parity, geth = parse_both([(TX, failed), (TX2, ok)])
+
+    assert parity == geth == [transfer(TX2, ROUTER, WATCHED, 7, '0')]
+
+
+def test_failed_create_is_skipped():
+    tree = call('CALL', WALLET, ROUTER, 0, [call('CREATE2', ROUTER, None, 9, error=True)])
+
+    parity, geth = parse_both([(TX, tree)])
+
+    assert parity == geth == []
+
+
+def test_parity_skips_reward_traces():
+    reward = {'type': 'reward', 'action': {'author': WATCHED, 'value': hex(100)}, 'traceAddress': []}
+
+    assert parse_parity_traces([reward]) == []
+
+
+def test_call_traces_without_tx_hash_follow_block_order():
+    results = [{'result': to_frame(call('CALL', WALLET, ROUTER, 0, [call('CALL', ROUTER, WATCHED, 1)]))}]
+
+    assert parse_call_traces(results, [TX2]) == [transfer(TX2, ROUTER, WATCHED, 1, '0')]
+    assert parse_call_traces(results, []) == []
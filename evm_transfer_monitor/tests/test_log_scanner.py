@@ -0,0 +1,108 @@
+"""
+Transfer 事件扫描器测试
+
+节点替身拒绝超过指定跨度的 eth_getLogs 查询，验证范围拆分重试、结果顺序以及接收地址过滤条件的下推
+"""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, List
+
+import pytest
+from hexbytes import HexBytes
+from web3 import Web3
+
+from config.monitor_config import MonitorConfig, MonitorStrategy
+from processors import transaction_processor
+from processors.log_scanner import TransferLogScanner
+from processors.transaction_processor import TransactionProcessor
+from utils.token_parser import TRANSFER_EVENT_TOPIC, TokenParser
+
+TOKEN_PARSER = TokenParser('bsc')
+USDT = TOKEN_PARSER.contracts['USDT']
+SENDER = '0x' + '11' * 20
+WATCHED = '0x' + '22' * 20
+
+
+def topic(address: str) -> HexBytes:
+    return HexBytes('0x' + address[2:].rjust(64, '0'))
+
+
+def transfer_log(block_number: int, log_index: int, amount: int, removed: bool = False) -> Dict:
+    return {
+        'address': Web3.to_checksum_address(USDT),
+        'topics': [HexBytes(TRANSFER_EVENT_TOPIC), topic(SENDER), topic(WATCHED)],
+        'data': HexBytes(amount.to_bytes(32, 'big')),
+        'logIndex': log_index,
+        'blockNumber': block_number,
+        'blockHash': HexBytes('0x' + format(block_number, '064x')),
+        'transactionHash': HexBytes('0x' + format(block_number * 100 + log_index, '064x')),
+        'removed': removed,
+    }
+
+
+class FakeRPC:
+    """跨度超过 max_range 的查询报错（类似节点的结果数量限制），记录每次查询的范围"""
+
+    def __init__(self, logs: List[Dict], max_range: int):
+        self.w3 = SimpleNamespace(to_hex=Web3.to_hex)
+        self.logs = logs
+        self.max_range = max_range
+        self.queries: List[tuple] = []
+        self.filters: List[Dict] = []
+
+    async def get_logs(self, filter_params: Dict) -> List[Dict]:
+        from_block, to_block = filter_params['fromBlock'], filter_params['toBlock']
+        self.queries.append((from_block, to_block))
+        self.filters.append(filter_params)
+        if to_block - from_block + 1 > self.max_range:
+            raise ValueError('query returned more than 10000 results')
+        # 节点不保证返回顺序
+        return [log for log in reversed(self.logs) if from_block <= log['blockNumber'] <= to_block]
+
+
+def make_scanner(monkeypatch, rpc: FakeRPC, **overrides) -> TransferLogScanner:
+    monkeypatch.setattr(transaction_processor, 'get_database_manager', lambda: SimpleNamespace(async_session_factory=None))
+    config = MonitorConfig(rpc_url='http://127.0.0.1:1', monitor_strategy=MonitorStrategy.WATCH_ADDRESS,
+                           watch_addresses=[WATCHED], **overrides)
+    processor = TransactionProcessor(config, TokenParser('bsc'), rpc)
+    return TransferLogScanner(config, processor.token_parser, rpc, processor)
+
+
+def test_rejected_range_is_split_and_results_stay_ordered(monkeypatch):
+    logs = [transfer_log(block, index, block + index) for block in (100, 103, 106, 107) for index in (0, 5)]
+    rpc = FakeRPC(logs, max_range=2)
+    scanner = make_scanner(monkeypatch, rpc)
+
+    results = asyncio.run(scanner.scan_range(100, 107))
+
+    assert [(info.block_number, info.transfer_index) for info in results] == [
+        (block, index) for block in (100, 103, 106, 107) for index in (0, 5)
+    ]
+    # 100-107 -> 100-103, 104-107 -> 各再拆分一次
+    assert rpc.queries == [(100, 107), (100, 103), (100, 101), (102, 103), (104, 107), (104, 105), (106, 107)]
+    assert scanner.get_stats() == {'logs_fetched': 8, 'ranges_scanned': 4, 'range_splits': 3}
+
+
+def test_single_block_failure_is_raised(monkeypatch):
+    scanner = make_scanner(monkeypatch, FakeRPC([], max_range=0))
+
+    with pytest.raises(ValueError):
+        asyncio.run(scanner.scan_range(100, 103))
+
+
+def test_removed_logs_are_skipped(monkeypatch):
+    rpc = FakeRPC([transfer_log(100, 0, 1, removed=True), transfer_log(100, 1, 2)], max_range=10)
+
+    results = asyncio.run(make_scanner(monkeypatch, rpc).scan_range(100, 100))
+
+    assert [info.transfer_index for info in results] == [1]
+
+
+def test_recipient_topics_pushed_down_only_under_limit(monkeypatch):
+    rpc = FakeRPC([], max_range=10)
+    scanner = make_scanner(monkeypatch, rpc)
+    assert scanner.build_filter(1, 2)['topics'] == [TRANSFER_EVENT_TOPIC, None, [Web3.to_hex(topic(WATCHED))]]
+
+    scanner = make_scanner(monkeypatch, rpc, logs_topic_address_limit=0)
+    assert scanner.build_filter(1, 2)['topics'] == [TRANSFER_EVENT_TOPIC]
@@ -0,0 +1,119 @@
+"""
+日志工具测试
+
+覆盖 LogSampler 按类别和时间窗口限流并输出省略汇总、DeferredQueueHandler 延迟格式化与队列满时丢弃，
+以及 get_logger 经写日志线程写入文件
+"""
+
+import logging
+import queue
+import time
+
+import pytest
+
+from utils import log_utils
+from utils.log_utils import DeferredQueueHandler, LogSampler, get_logger
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(log_utils, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def handler():
+    logger = logging.getLogger('test_log_sampler')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = ListHandler()
+    logger.addHandler(handler)
+    yield handler
+    logger.removeHandler(handler)
+
+
+def test_sampler_limits_each_category_per_window(clock, handler):
+    sampler = LogSampler(logging.getLogger('test_log_sampler'), limit=2, window=60.0)
+
+    assert [sampler.allow('USDT') for _ in range(5)] == [True, True, False, False, False]
+    assert sampler.allow('BNB')
+    assert handler.messages == []
+
+    # 新窗口的第一次调用输出上个窗口的省略汇总
+    clock.now += 60
+    assert sampler.allow('USDT')
+    assert handler.messages == ['🔇 USDT: 过去 60 秒省略了 3 行日志']
+
+    clock.now += 60
+    assert sampler.allow('BNB')
+    assert len(handler.messages) == 1
+    assert sampler.get_stats()['suppressed'] == {'USDT': 3}
+
+
+def test_sampler_without_limit_allows_everything(clock, handler):
+    sampler = LogSampler(logging.getLogger('test_log_sampler'), limit=0)
+
+    assert all(sampler.allow('USDT') for _ in range(1000))
+    assert sampler.get_stats()['total_suppressed'] == 0
+
+
+def make_record(msg: str, args) -> logging.LogRecord:
+    return logging.LogRecord('test', logging.INFO, __file__, 1, msg, args, None)
+
+
+def test_immutable_args_formatted_on_writer_thread():
+    handler = DeferredQueueHandler(queue.Queue())
+
+    deferred = handler.prepare(make_record('区块 %s 金额 %s', (100, '1.5')))
+    assert deferred.args == (100, '1.5') and deferred.msg == '区块 %s 金额 %s'
+
+    # 可变参数在入队前格式化，之后修改不影响日志内容
+    addresses = ['0xaa']
+    prepared = handler.prepare(make_record('地址 %s', (addresses,)))
+    addresses.append('0xbb')
+    assert prepared.getMessage() == "地址 ['0xaa']"
+
+
+def test_full_queue_drops_records_without_blocking():
+    handler = DeferredQueueHandler(queue.Queue(maxsize=2))
+
+    for i in range(5):
+        handler.enqueue(make_record('%s', (i,)))
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_logger_writes_through_background_thread(tmp_path):
+    log_file = str(tmp_path / 'monitor.log')
+    logger = get_logger('test_log_pipeline', log_file)
+    assert get_logger('test_log_pipeline', log_file) is logger
+    assert len(logger.handlers) == 1
+
+    logger.info("✅ 已处理区块 %s", 12345)
+
+    deadline = time.time() + 5
+    content = ''
+    while time.time() < deadline and '12345' not in content:
+        time.sleep(0.01)
+        with open(log_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+    assert '✅ 已处理区块 12345' in content
@@ -0,0 +1,110 @@
+"""
+令牌桶速率限制器测试
+
+TokenBucket 用可控时钟测试补充和容量；RateLimiter 用真实事件循环测试按优先级分发
+"""
+
+import asyncio
+
+import pytest
+
+from managers import rate_limiter
+from managers.rate_limiter import RateLimiter, RequestPriority, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', clock)
+    return clock
+
+
+def test_token_bucket_refill_and_capacity(clock):
+    bucket = TokenBucket(rate=2, capacity=4)
+
+    for _ in range(4):
+        assert bucket.available()
+        bucket.take()
+    assert not bucket.available()
+    assert bucket.time_until() == pytest.approx(0.5)
+
+    clock.now += 1
+    assert bucket.available(2)
+    assert not bucket.available(3)
+
+    # 补充不超过容量
+    clock.now += 100
+    assert bucket.available(4)
+    assert not bucket.available(4.5)
+
+
+def test_token_bucket_minimum_capacity(clock):
+    bucket = TokenBucket(rate=0.5, capacity=0.1)
+
+    assert bucket.capacity == 1.0
+    assert bucket.available()
+
+
+def test_rate_limiter_without_limits_never_waits():
+    limiter = RateLimiter(max_per_second=0, max_per_day=0)
+
+    async def run():
+        return [await limiter.acquire() for _ in range(100)]
+
+    assert asyncio.run(run()) == [0.0] * 100
+
+
+def test_rate_limiter_serves_waiters_by_priority():
+    limiter = RateLimiter(max_per_second=50, max_per_day=0)
+    order = []
+
+    async def request(priority: RequestPriority, name: str):
+        await limiter.acquire(priority)
+        order.append(name)
+
+    async def run():
+        # 耗尽令牌后按低到高优先级依次排队
+        for _ in range(50):
+            await limiter.acquire(RequestPriority.HEAD)
+        await asyncio.gather(
+            request(RequestPriority.BACKGROUND, 'background-1'),
+            request(RequestPriority.NORMAL, 'normal'),
+            request(RequestPriority.BACKGROUND, 'background-2'),
+            request(RequestPriority.HEAD, 'head'),
+        )
+
+    asyncio.run(run())
+
+    assert order == ['head', 'normal', 'background-1', 'background-2']
+    stats = limiter.get_stats()
+    assert stats['acquired'] == 54
+    assert stats['delayed'] == 4
+    assert stats['by_priority']['background']['delayed'] == 2
+    assert stats['queue_length'] == 0
+
+
+def test_cancelled_waiter_is_skipped():
+    limiter = RateLimiter(max_per_second=20, max_per_day=0)
+
+    async def run():
+        for _ in range(20):
+            await limiter.acquire()
+        cancelled = asyncio.ensure_future(limiter.acquire(RequestPriority.HEAD))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        waited = await limiter.acquire(RequestPriority.BACKGROUND)
+        return cancelled.cancelled(), waited
+
+    cancelled, waited = asyncio.run(run())
+
+    assert cancelled
+    assert waited > 0
+    assert limiter.queue_length == 0
@@ -0,0 +1,134 @@
+"""
+原生 JSON-RPC 客户端测试
+
+覆盖原始结果到精简 dict 的转换（数量字段转整数、回执只保留 Transfer 事件），
+以及 batch 响应按 id 乱序返回、单个调用出错和整批被拒绝时的处理；HTTP 发送用替身代替
+"""
+
+import asyncio
+from typing import Any, List
+
+import pytest
+from web3.exceptions import BlockNotFound, TransactionNotFound, Web3RPCError
+
+from managers.raw_rpc_client import (
+    RawCall, RawRPCClient, parse_block, parse_block_header, parse_block_receipts, parse_transaction_receipt
+)
+from utils.token_parser import TRANSFER_EVENT_TOPIC
+
+TX_HASH = '0x' + 'ab' * 32
+TOKEN = '0x' + '55' * 20
+WATCHED_TOPIC = '0x' + '22'.rjust(64, '0')
+APPROVAL_TOPIC = '0x8c5be1e5ebec7d5bd14f71427d1e84f3dd0314c0f7b2291e5b200ac8c7c3b925'
+
+RAW_BLOCK = {
+    'number': '0x64',
+    'hash': '0x' + 'cd' * 32,
+    'parentHash': '0x' + 'ce' * 32,
+    'timestamp': '0x65f00000',
+    'logsBloom': '0x' + '00' * 256,
+    'transactions': [
+        {'hash': TX_HASH, 'from': '0x' + '11' * 20, 'to': None, 'value': '0xde0b6b3a7640000', 'gas': '0x5208',
+         'gasPrice': '0x3b9aca00', 'input': '0x', 'blockNumber': '0x64', 'blockHash': '0x' + 'cd' * 32,
+         'v': '0x1b', 'r': '0x01', 's': '0x02', 'nonce': '0x7'},
+    ],
+}
+
+
+def log(topics: List[str], index: int, data: str = '0x' + '00' * 31 + '07') -> dict:
+    return {'address': TOKEN, 'topics': topics, 'data': data, 'logIndex': hex(index),
+            'blockNumber': '0x64', 'transactionHash': TX_HASH, 'removed': False}
+
+
+def test_parse_block_keeps_processing_fields_as_ints():
+    block = parse_block(RAW_BLOCK, 100)
+
+    assert (block.number, block.timestamp, block.parent_hash) == (100, 0x65f00000, '0x' + 'ce' * 32)
+    assert block.transactions == [{
+        'hash': TX_HASH, 'from': '0x' + '11' * 20, 'to': None, 'value': 10 ** 18, 'gas': 21000,
+        'gasPrice': 10 ** 9, 'input': '0x', 'blockNumber': 100, 'blockHash': '0x' + 'cd' * 32,
+    }]
+    assert parse_block_header(RAW_BLOCK, 100).transactions == []
+
+
+def test_missing_block_or_receipt_raises_not_found():
+    with pytest.raises(BlockNotFound):
+        parse_block(None, 100)
+    with pytest.raises(BlockNotFound):
+        parse_block_receipts(None, 100)
+    with pytest.raises(TransactionNotFound):
+        parse_transaction_receipt(None, TX_HASH)
+
+
+def test_receipt_keeps_only_transfer_logs():
+    receipt = {
+        'transactionHash': TX_HASH, 'status': '0x1', 'gasUsed': '0xc350', 'effectiveGasPrice': '0x3b9aca00',
+        'logs': [
+            log([APPROVAL_TOPIC, WATCHED_TOPIC, WATCHED_TOPIC], 0),
+            log([TRANSFER_EVENT_TOPIC.upper().replace('0X', '0x'), WATCHED_TOPIC, WATCHED_TOPIC], 1),
+            # ERC-721 Transfer 的 tokenId 也是 indexed，有 4 个主题
+            log([TRANSFER_EVENT_TOPIC, WATCHED_TOPIC, WATCHED_TOPIC, WATCHED_TOPIC], 2, data='0x'),
+        ],
+    }
+
+    parsed = parse_transaction_receipt(receipt, TX_HASH)
+
+    assert (parsed['status'], parsed['gasUsed'], parsed['effectiveGasPrice']) == (1, 50000, 10 ** 9)
+    assert [item['logIndex'] for item in parsed['logs']] == [1]
+    assert set(parsed['logs'][0]) == {'address', 'topics', 'data', 'logIndex'}
+
+    # 拜占庭分叉前的回执没有 status，部分链没有 effectiveGasPrice
+    legacy = parse_block_receipts([{'transactionHash': TX_HASH, 'root': '0x' + '00' * 32, 'gasUsed': '0x5208'}], 1)
+    assert (legacy[0]['status'], legacy[0]['effectiveGasPrice'], legacy[0]['logs']) == (None, None, [])
+
+
+class FakeResponses:
+    """替换 RawRPCClient._post，按请求 id 构造响应"""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.payloads: List[Any] = []
+
+    async def __call__(self, payload):
+        self.payloads.append(payload)
+        return self.respond(payload)
+
+
+def test_batch_matches_responses_by_id_and_isolates_errors():
+    client = RawRPCClient('http://127.0.0.1:1')
+
+    def respond(payloads):
+        first, second, third = payloads
+        # 响应顺序与请求不同，第三个调用的结果缺失
+        return [
+            {'jsonrpc': '2.0', 'id': second['id'], 'error': {'code': -32000, 'message': 'header not found'}},
+            {'jsonrpc': '2.0', 'id': first['id'], 'result': '0x64'},
+        ]
+
+    client._post = FakeResponses(respond)
+    calls = [RawCall('eth_blockNumber', [], lambda value: int(value, 16)),
+             RawCall('eth_getBlockByNumber', ['0x65', True]),
+             RawCall('eth_getBlockReceipts', ['0x65'])]
+
+    results = asyncio.run(client.request_batch(calls))
+
+    assert results[0] == 100
+    assert isinstance(results[1], Web3RPCError) and 'header not found' in str(results[1])
+    assert isinstance(results[2], Web3RPCError)
+    assert [payload['method'] for payload in client._post.payloads[0]] == [call.method for call in calls]
+
+
+def test_rejected_batch_and_single_call_errors_raise():
+    client = RawRPCClient('http://127.0.0.1:1')
+    client._post = FakeResponses(lambda payload: {'jsonrpc': '2.0', 'id': None,
+                                                   'error': {'code': -32600, 'message': 'batch too large'}})
+
+    with pytest.raises(Web3RPCError):
+        asyncio.run(client.request_batch([RawCall('eth_blockNumber', []), RawCall('eth_chainId', [])]))
+    with pytest.raises(Web3RPCError):
+        asyncio.run(client.request(RawCall('eth_blockNumber', [])))
+
+    client._post = FakeResponses(lambda payload: {'jsonrpc': '2.0', 'id': payload['id'], 'result': None})
+    with pytest.raises(TransactionNotFound):
+        asyncio.run(client.request(RawCall('eth_getTransactionReceipt', [TX_HASH],
+                                           lambda result: parse_transaction_receipt(result, TX_HASH))))
@@ -0,0 +1,192 @@
+"""
+交易回执处理器测试
+
+用内存中的回执代替 RPCManager：回执按 web3 格式（HexBytes 主题和 data）构造，
+同一笔充值分别经区块解码和 Transfer 事件两条路径生成，核对后唯一键一致；
+节点不支持 eth_getBlockReceipts 或临时出错时改为逐笔获取回执
+"""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import pytest
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.exceptions import MethodUnavailable
+
+from config.monitor_config import MonitorConfig, MonitorStrategy
+from processors import transaction_processor
+from processors.receipt_enricher import ReceiptEnricher
+from processors.transaction_processor import TransactionProcessor
+from utils.token_parser import TRANSFER_EVENT_TOPIC, TokenParser
+
+TOKEN_PARSER = TokenParser('bsc')
+USDT = TOKEN_PARSER.contracts['USDT']
+BUSD = TOKEN_PARSER.contracts['BUSD']
+SENDER = '0x' + '11' * 20
+WATCHED = '0x' + '22' * 20
+TX_HASH = '0x' + 'ab' * 32
+BLOCK_HASH = '0x' + 'cd' * 32
+
+
+def word(value) -> str:
+    if isinstance(value, str):
+        return value[2:].lower().rjust(64, '0')
+    return format(value, '064x')
+
+
+def transfer_log(contract: str, sender: str, recipient: str, amount: int, log_index: int) -> Dict:
+    """web3 格式化后的 Transfer 事件"""
+    return {
+        'address': Web3.to_checksum_address(contract),
+        'topics': [HexBytes(TRANSFER_EVENT_TOPIC), HexBytes('0x' + word(sender)), HexBytes('0x' + word(recipient))],
+        'data': HexBytes('0x' + word(amount)),
+        'logIndex': log_index,
+        'blockNumber': 100,
+        'blockHash': HexBytes(BLOCK_HASH),
+        'transactionHash': HexBytes(TX_HASH),
+    }
+
+
+class FakeRPC:
+    """按区块返回回执，记录请求；block_error 为 eth_getBlockReceipts 抛出的错误"""
+
+    def __init__(self, logs: List[Dict], status: int = 1, block_error: Optional[Exception] = None):
+        self.w3 = SimpleNamespace(to_hex=Web3.to_hex)
+        self.receipt = {'transactionHash': HexBytes(TX_HASH), 'status': status, 'gasUsed': 50000,
+                        'effectiveGasPrice': 10 ** 9, 'logs': logs}
+        self.block_error = block_error
+        self.block_receipt_calls = 0
+        self.tx_receipt_calls = 0
+
+    async def get_block_receipts(self, block_number, priority=None):
+        self.block_receipt_calls += 1
+        if self.block_error:
+            raise self.block_error
+        return [self.receipt]
+
+    async def get_transaction_receipt(self, tx_hash, priority=None):
+        self.tx_receipt_calls += 1
+        return self.receipt
+
+
+def make_config(**overrides) -> MonitorConfig:
+    return MonitorConfig(rpc_url='http://127.0.0.1:1', monitor_strategy=MonitorStrategy.WATCH_ADDRESS,
+                         watch_addresses=[WATCHED], **overrides)
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    monkeypatch.setattr(transaction_processor, 'get_database_manager', lambda: SimpleNamespace(async_session_factory=None))
+    return TransactionProcessor(make_config(), TokenParser('bsc'), FakeRPC([]))
+
+
+def block_transaction(data: str) -> Dict:
+    return {'hash': TX_HASH, 'from': SENDER, 'to': USDT, 'value': 0, 'input': data, 'gas': 100000,
+            'gasPrice': 10 ** 9, 'blockNumber': 100, 'blockHash': BLOCK_HASH}
+
+
+def enrich(logs: List[Dict], tx_infos, **overrides):
+    enricher = ReceiptEnricher(make_config(**overrides), FakeRPC(logs))
+    return enricher, asyncio.run(enricher.enrich(tx_infos))
+
+
+def test_block_and_log_paths_produce_the_same_record_key(processor):
+    # 回执中第一个事件属于另一个代币，充值事件的 logIndex 为 3
+    deposit = transfer_log(USDT, SENDER, WATCHED, 5 * 10 ** 18, 3)
+    logs = [transfer_log(BUSD, SENDER, WATCHED, 1, 0), deposit]
+
+    from_block = processor.process_block([block_transaction('0xa9059cbb' + word(WATCHED) + word(5 * 10 ** 18))])
+    from_logs = [processor.process_transfer_log(deposit)]
+    assert from_block[0].transfer_index == 0
+
+    _, from_block = enrich(logs, from_block)
+    _, from_logs = enrich(logs, from_logs)
+
+    def keys(tx_infos):
+        return [(info.hash, info.transfer_index, info.trace_address, info.amount_wei) for info in tx_infos]
+
+    assert keys(from_block) == keys(from_logs) == [(TX_HASH, 3, '', 5 * 10 ** 18)]
+
+
+def test_transfer_without_matching_event_is_dropped(processor):
+    candidates = processor.process_block([block_transaction('0xa9059cbb' + word(WATCHED) + word(7))])
+
+    enricher, accepted = enrich([transfer_log(USDT, SENDER, '0x' + '33' * 20, 7, 0)], candidates)
+
+    assert accepted == []
+    assert enricher.get_stats()['unmatched_dropped'] == 1
+
+
+def test_receipts_disabled_keeps_calldata_position(processor):
+    candidates = processor.process_block([block_transaction('0xa9059cbb' + word(WATCHED) + word(7))])
+
+    _, accepted = enrich([], candidates, receipts_enabled=False)
+
+    assert [info.transfer_index for info in accepted] == [0]
+
+
+def test_repeated_transfers_in_one_call_get_distinct_log_indexes(monkeypatch):
+    disperse = '0x' + 'dd' * 20
+    monkeypatch.setattr(transaction_processor, 'get_database_manager', lambda: SimpleNamespace(async_session_factory=None))
+    processor = TransactionProcessor(make_config(disperse_contracts=[disperse]), TokenParser('bsc'), FakeRPC([]))
+    # disperseToken(USDT, [WATCHED, WATCHED], [9, 9])：分发合约先收取代币再逐笔转出
+    data = ('0xc73a2d60' + word(USDT) + word(3 * 32) + word(6 * 32) +
+            word(2) + word(WATCHED) + word(WATCHED) + word(2) + word(9) + word(9))
+    transaction = dict(block_transaction(data), to=disperse)
+    candidates = processor.process_block([transaction])
+
+    _, accepted = enrich([transfer_log(USDT, SENDER, disperse, 18, 0),
+                          transfer_log(USDT, disperse, WATCHED, 9, 1),
+                          transfer_log(USDT, disperse, WATCHED, 9, 2)], candidates)
+
+    assert [info.transfer_index for info in accepted] == [1, 2]
+
+
+def test_unknown_transfer_emitters_are_observed(processor):
+    observed = []
+    registry = SimpleNamespace(observe=observed.append)
+    unknown = '0x' + 'ee' * 20
+    candidates = processor.process_block([block_transaction('0xa9059cbb' + word(WATCHED) + word(7))])
+    enricher = ReceiptEnricher(make_config(), FakeRPC([transfer_log(unknown, SENDER, WATCHED, 1, 0),
+                                                       transfer_log(USDT, SENDER, WATCHED, 7, 1)]), registry)
+
+    assert len(asyncio.run(enricher.enrich(candidates))) == 1
+    assert unknown in observed
+
+
+def test_unsupported_block_receipts_fall_back_to_per_transaction(processor):
+    unsupported = MethodUnavailable('the method eth_getBlockReceipts does not exist')
+    rpc = FakeRPC([transfer_log(USDT, SENDER, WATCHED, 7, 0)], block_error=unsupported)
+    enricher = ReceiptEnricher(make_config(), rpc)
+
+    def run():
+        candidates = processor.process_block([block_transaction('0xa9059cbb' + word(WATCHED) + word(7))])
+        return asyncio.run(enricher.enrich(candidates))
+
+    accepted = run()
+    assert [(info.status, info.gas_used, info.effective_gas_price) for info in accepted] == [(1, 50000, 10 ** 9)]
+    assert not enricher.block_receipts_supported
+
+    # 之后不再尝试 eth_getBlockReceipts
+    run()
+    assert (rpc.block_receipt_calls, rpc.tx_receipt_calls) == (1, 2)
+
+
+def test_transient_block_receipts_error_keeps_method_enabled(processor):
+    rpc = FakeRPC([transfer_log(USDT, SENDER, WATCHED, 7, 0)], block_error=TimeoutError('request timed out'))
+    enricher = ReceiptEnricher(make_config(), rpc)
+    candidates = processor.process_block([block_transaction('0xa9059cbb' + word(WATCHED) + word(7))])
+
+    assert len(asyncio.run(enricher.enrich(candidates))) == 1
+    assert enricher.block_receipts_supported
+    assert rpc.tx_receipt_calls == 1
+
+
+def test_reverted_transaction_is_dropped(processor):
+    candidates = processor.process_block([block_transaction('0xa9059cbb' + word(WATCHED) + word(7))])
+    enricher = ReceiptEnricher(make_config(), FakeRPC([], status=0))
+
+    assert asyncio.run(enricher.enrich(candidates)) == []
+    assert enricher.get_stats()['reverted_dropped'] == 1
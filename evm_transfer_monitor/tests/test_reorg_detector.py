@@ -0,0 +1,105 @@
+"""
+区块重组检测测试
+
+用内存中的链代替 RPCManager：chain[区块号] 为当前链上的区块哈希，分叉时替换后缀
+"""
+
+import asyncio
+from typing import Dict
+
+from config.monitor_config import MonitorConfig
+from managers.reorg_detector import ReorgDetector
+from models.data_types import RawBlock
+
+
+def block_hash(number: int, fork: int = 0) -> str:
+    return '0x' + format(fork, '02x') + format(number, '062x')
+
+
+class FakeChain:
+    """按区块号返回区块头，记录查询过的区块号"""
+
+    def __init__(self):
+        self.hashes: Dict[int, str] = {}
+        self.requests = []
+
+    def extend(self, start: int, end: int, fork: int = 0) -> None:
+        for number in range(start, end + 1):
+            self.hashes[number] = block_hash(number, fork)
+
+    def header(self, number: int) -> RawBlock:
+        parent = self.hashes.get(number - 1, block_hash(number - 1))
+        return RawBlock(number, self.hashes[number], parent, 0, '0x', [])
+
+    async def get_block_header(self, number, priority=None, use_cache=True):
+        assert not use_cache
+        self.requests.append(number)
+        return self.header(number)
+
+
+def make_detector(chain: FakeChain, confirmations: int = 5) -> ReorgDetector:
+    config = MonitorConfig(rpc_url='http://127.0.0.1:1', watch_addresses=[], required_confirmations=confirmations)
+    return ReorgDetector(config, chain)
+
+
+def feed(detector: ReorgDetector, chain: FakeChain, start: int, end: int):
+    return [asyncio.run(detector.check(chain.header(number))) for number in range(start, end + 1)]
+
+
+def test_linked_blocks_are_recorded():
+    chain = FakeChain()
+    chain.extend(100, 110)
+    detector = make_detector(chain)
+
+    assert feed(detector, chain, 100, 110) == [None] * 11
+    assert detector.get_stats()['tracked_blocks'] == 5
+    assert detector.reorgs_detected == 0
+    assert chain.requests == []
+
+
+def test_reorg_finds_fork_point_and_orphans_replaced_blocks():
+    chain = FakeChain()
+    chain.extend(100, 110)
+    detector = make_detector(chain)
+    feed(detector, chain, 100, 110)
+
+    # 108 之后的区块被替换
+    chain.extend(109, 111, fork=1)
+    fork_point = asyncio.run(detector.check(chain.header(111)))
+
+    assert fork_point == 108
+    assert [ref.number for ref in detector.orphaned] == [110, 109]
+    assert [ref.hash for ref in detector.orphaned] == [block_hash(110), block_hash(109)]
+    assert chain.requests == [110, 109, 108]
+    assert detector.get_stats()['tracked_blocks'] == 3
+    assert (detector.reorgs_detected, detector.orphaned_blocks, detector.max_depth) == (1, 2, 2)
+
+    # 从分叉点之后重新处理新链
+    assert feed(detector, chain, 109, 111) == [None, None, None]
+
+
+def test_reorg_deeper_than_buffer():
+    chain = FakeChain()
+    chain.extend(100, 110)
+    detector = make_detector(chain)
+    feed(detector, chain, 100, 110)
+
+    chain.extend(100, 111, fork=2)
+    fork_point = asyncio.run(detector.check(chain.header(111)))
+
+    assert fork_point == 105
+    assert detector.deep_reorgs == 1
+    assert [ref.number for ref in detector.orphaned] == [110, 109, 108, 107, 106]
+
+
+def test_gap_restarts_tracking():
+    chain = FakeChain()
+    chain.extend(100, 120, fork=0)
+    detector = make_detector(chain)
+    feed(detector, chain, 100, 105)
+
+    # 跳过区块（例如重启）时不比较父哈希
+    chain.extend(110, 120, fork=3)
+    assert asyncio.run(detector.check(chain.header(115))) is None
+    assert detector.get_stats()['tracked_blocks'] == 1
+    assert chain.requests == []
@@ -0,0 +1,165 @@
+"""
+JSON-RPC 批量请求合并测试
+
+web3 和原生客户端都用替身代替，记录每次 HTTP 请求包含的调用；
+验证并发调用合并、按最大批量切分、批量失败退回逐个发送以及原生批次的错误隔离
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, List
+
+from managers.raw_rpc_client import RawCall
+from managers.rpc_batcher import RPCBatcher
+
+
+class FakeRequest:
+    """web3 方法调用：单独发送时可 await，批量时由 batch.add 收集"""
+
+    def __init__(self, w3: 'FakeW3', value: Any):
+        self.w3 = w3
+        self.value = value
+
+    def __await__(self):
+        return self.w3.send([self]).__await__()
+
+
+class FakeBatch:
+    def __init__(self, w3: 'FakeW3'):
+        self.w3 = w3
+        self.requests: List[FakeRequest] = []
+
+    def add(self, request: FakeRequest) -> None:
+        self.requests.append(request)
+
+    async def async_execute(self) -> List[Any]:
+        return await self.w3.send(self.requests, batch=True)
+
+
+class FakeW3:
+    """value 为异常时该调用出错；批量中任一调用出错则整批失败，与 web3 一致"""
+
+    def __init__(self):
+        self.http_requests: List[List[Any]] = []
+
+    def call(self, value: Any) -> FakeRequest:
+        return FakeRequest(self, value)
+
+    async def send(self, requests: List[FakeRequest], batch: bool = False):
+        self.http_requests.append([request.value for request in requests])
+        await asyncio.sleep(0)
+        for request in requests:
+            if isinstance(request.value, Exception):
+                raise request.value
+        results = [('result', request.value) for request in requests]
+        return results if batch else results[0]
+
+    @asynccontextmanager
+    async def batch_requests(self):
+        yield FakeBatch(self)
+
+
+class FakeRawClient:
+    """原生批次中 params 为异常的调用单独出错"""
+
+    def __init__(self):
+        self.http_requests: List[List[str]] = []
+
+    async def request(self, call: RawCall):
+        self.http_requests.append([call.method])
+        return call.format(call.params)
+
+    async def request_batch(self, calls: List[RawCall]):
+        self.http_requests.append([call.method for call in calls])
+        return [call.params[0] if isinstance(call.params[0], Exception) else call.format(call.params)
+                for call in calls]
+
+
+def submit_all(batcher: RPCBatcher, requests: List[Any]) -> List[Any]:
+    async def run():
+        return await asyncio.gather(*(batcher.submit(request) for request in requests), return_exceptions=True)
+
+    return asyncio.run(run())
+
+
+def test_concurrent_calls_share_one_http_request():
+    w3 = FakeW3()
+    batcher = RPCBatcher(w3, max_batch_size=10, linger=0.01)
+
+    results = submit_all(batcher, [lambda w3, i=i: w3.call(i) for i in range(5)])
+
+    assert results == [('result', i) for i in range(5)]
+    assert w3.http_requests == [[0, 1, 2, 3, 4]]
+    stats = batcher.get_stats()
+    assert stats['http_requests'] == 1 and stats['batched_calls'] == 5
+    assert stats['requests_saved'] == 4
+
+
+def test_queue_split_by_max_batch_size():
+    w3 = FakeW3()
+    batcher = RPCBatcher(w3, max_batch_size=2, linger=10.0)
+
+    # 队列满时立即发送，不等待 linger
+    results = submit_all(batcher, [lambda w3, i=i: w3.call(i) for i in range(4)])
+
+    assert results == [('result', i) for i in range(4)]
+    assert w3.http_requests == [[0, 1], [2, 3]]
+    assert batcher.largest_batch == 2
+
+
+def test_single_call_sent_without_batch():
+    w3 = FakeW3()
+    batcher = RPCBatcher(w3, max_batch_size=10, linger=0.0)
+
+    assert submit_all(batcher, [lambda w3: w3.call(7)]) == [('result', 7)]
+    assert batcher.single_calls == 1 and batcher.batches_sent == 0
+
+
+def test_failed_batch_falls_back_to_individual_calls():
+    w3 = FakeW3()
+    batcher = RPCBatcher(w3, max_batch_size=10, linger=0.01)
+    error = ValueError('block not found')
+
+    results = submit_all(batcher, [lambda w3: w3.call(1), lambda w3: w3.call(error), lambda w3: w3.call(3)])
+
+    # 错误只落在出错的调用上
+    assert results == [('result', 1), error, ('result', 3)]
+    assert w3.http_requests[0] == [1, error, 3]
+    assert len(w3.http_requests) == 4
+    assert batcher.fallback_batches == 1 and batcher.single_calls == 3
+
+
+def test_raw_and_web3_calls_sent_as_separate_batches():
+    w3 = FakeW3()
+    raw_client = FakeRawClient()
+    batcher = RPCBatcher(w3, max_batch_size=10, linger=0.01, raw_client=raw_client)
+    error = ValueError('execution reverted')
+
+    results = submit_all(batcher, [
+        RawCall('eth_getBlockReceipts', [100], lambda params: ('receipts', params[0])),
+        lambda w3: w3.call(1),
+        RawCall('eth_getBlockReceipts', [error]),
+        lambda w3: w3.call(2),
+        RawCall('eth_getTransactionReceipt', ['0xab']),
+    ])
+
+    # 原生批次中单个调用出错不影响同批其他调用，也不退回逐个发送
+    assert results == [('receipts', 100), ('result', 1), error, ('result', 2), ['0xab']]
+    assert raw_client.http_requests == [['eth_getBlockReceipts', 'eth_getBlockReceipts', 'eth_getTransactionReceipt']]
+    assert w3.http_requests == [[1, 2]]
+    assert batcher.batches_sent == 2 and batcher.fallback_batches == 0
+
+
+def test_cancelled_calls_are_not_sent():
+    w3 = FakeW3()
+    batcher = RPCBatcher(w3, max_batch_size=10, linger=0.01)
+
+    async def run():
+        cancelled = asyncio.ensure_future(batcher.submit(lambda w3: w3.call(0)))
+        kept = [asyncio.ensure_future(batcher.submit(lambda w3, i=i: w3.call(i))) for i in (1, 2)]
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await asyncio.gather(*kept)
+
+    assert asyncio.run(run()) == [('result', 1), ('result', 2)]
+    assert w3.http_requests == [[1, 2]]
@@ -0,0 +1,125 @@
+"""
+ERC-20 calldata 解码测试
+
+覆盖选择器分发、十六进制字符串与 bytes 两种输入，以及截断的 calldata 和越界的数组偏移
+"""
+
+from utils.token_parser import decode_disperse_call, decode_token_call
+
+TOKEN = '0x' + 'aa' * 20
+SENDER = '0x' + '11' * 20
+ALICE = '0x' + '22' * 20
+BOB = '0x' + '33' * 20
+
+
+def word(value) -> str:
+    """ABI 编码一个 32 字节参数（地址或整数）"""
+    if isinstance(value, str):
+        return value[2:].lower().rjust(64, '0')
+    return format(value, '064x')
+
+
+def array(values) -> str:
+    """ABI 编码动态数组的内容（长度 + 元素）"""
+    return word(len(values)) + ''.join(word(value) for value in values)
+
+
+def recipients_amounts(selector: str, recipients, amounts) -> str:
+    """(address[], uint256[]) 参数的调用"""
+    amounts_offset = 2 * 32 + 32 * (len(recipients) + 1)
+    return '0x' + selector + word(2 * 32) + word(amounts_offset) + array(recipients) + array(amounts)
+
+
+def disperse(token: str, recipients, amounts) -> str:
+    """disperseToken(address,address[],uint256[]) 调用"""
+    amounts_offset = 3 * 32 + 32 * (len(recipients) + 1)
+    return '0xc73a2d60' + word(token) + word(3 * 32) + word(amounts_offset) + array(recipients) + array(amounts)
+
+
+def test_transfer():
+    data = '0xa9059cbb' + word(ALICE) + word(123)
+
+    assert decode_token_call(data, SENDER.upper().replace('0X', '0x')) == [(SENDER, ALICE, 123)]
+    assert decode_token_call(bytes.fromhex(data[2:]), SENDER) == [(SENDER, ALICE, 123)]
+
+
+def test_transfer_with_short_amount_is_right_padded():
+    # 部分钱包省略金额末尾的 0 字节
+    data = '0xa9059cbb' + word(ALICE) + '01'
+
+    assert decode_token_call(data, SENDER) == [(SENDER, ALICE, 1 << 248)]
+
+
+def test_transfer_truncated_before_amount():
+    assert decode_token_call('0xa9059cbb' + word(ALICE), SENDER) is None
+    assert decode_token_call('0xa9059cbb' + word(ALICE)[:30], SENDER) is None
+
+
+def test_transfer_from_uses_owner_argument():
+    data = '0x23b872dd' + word(ALICE) + word(BOB) + word(7)
+
+    assert decode_token_call(data, SENDER) == [(ALICE, BOB, 7)]
+    assert decode_token_call(data[:-2], SENDER) is None
+
+
+def test_unknown_selector_and_invalid_hex():
+    assert decode_token_call('0x095ea7b3' + word(ALICE) + word(1), SENDER) is None
+    assert decode_token_call('0x', SENDER) is None
+    assert decode_token_call('', SENDER) is None
+    assert decode_token_call('0xa9059cbb' + 'zz' * 64, SENDER) is None
+
+
+def test_batch_transfer_arrays():
+    data = recipients_amounts('88d695b2', [ALICE, BOB], [1, 2])
+
+    assert decode_token_call(data, SENDER, batch=True) == [(SENDER, ALICE, 1), (SENDER, BOB, 2)]
+
+
+def test_batch_transfer_same_amount():
+    data = '0x83f12fec' + word(2 * 32) + word(5) + array([ALICE, BOB])
+
+    assert decode_token_call(data, SENDER, batch=True) == [(SENDER, ALICE, 5), (SENDER, BOB, 5)]
+
+
+def test_batch_selectors_require_batch_flag():
+    # 非标准批量方法只对已知实现它们的代币合约解码
+    data = recipients_amounts('88d695b2', [ALICE, BOB], [1, 2])
+
+    assert decode_token_call(data, SENDER) is None
+
+
+def test_batch_transfer_length_mismatch():
+    data = recipients_amounts('1e89d545', [ALICE, BOB], [1])
+
+    assert decode_token_call(data, SENDER, batch=True) is None
+
+
+def test_batch_transfer_truncated_array():
+    data = recipients_amounts('88d695b2', [ALICE, BOB], [1, 2])
+
+    assert decode_token_call(data[:-64], SENDER, batch=True) is None
+
+
+def test_oversized_array_offset_and_length():
+    huge = 2 ** 255
+    offset_out_of_range = '0x88d695b2' + word(huge) + word(2 * 32) + array([1])
+    length_out_of_range = '0x88d695b2' + word(2 * 32) + word(3 * 32) + word(huge) + array([1])
+
+    assert decode_token_call(offset_out_of_range, SENDER, batch=True) is None
+    assert decode_token_call(length_out_of_range, SENDER, batch=True) is None
+    assert decode_disperse_call('0xc73a2d60' + word(TOKEN) + word(huge) + word(3 * 32) + array([1]),
+                                SENDER) is None
+
+
+def test_disperse():
+    data = disperse(TOKEN, [ALICE, BOB], [10, 20])
+
+    assert decode_disperse_call(data, SENDER) == (TOKEN, [(SENDER, ALICE, 10), (SENDER, BOB, 20)])
+    assert decode_disperse_call(data[:2 + 8 + 64 * 2], SENDER) is None
+
+
+def test_disperse_selector_not_decoded_as_token_call():
+    data = disperse(TOKEN, [ALICE], [10])
+
+    assert decode_token_call(data, SENDER) is None
+    assert decode_disperse_call('0xa9059cbb' + word(ALICE) + word(1), SENDER) is None
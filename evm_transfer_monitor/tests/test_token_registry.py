@@ -0,0 +1,136 @@
+"""
+代币注册表测试
+
+覆盖 decimals()/symbol() 返回值解码（ABI string 和早期合约的 bytes32）、缓存读取与链校验、
+按链上小数位修正配置，以及解析结果落盘后由新实例只读缓存加载；eth_call 用替身代替
+"""
+
+import asyncio
+import json
+from typing import Dict, Optional
+
+from config.monitor_config import MonitorConfig
+from managers.token_registry import DECIMALS_SELECTOR, TokenRegistry, decode_decimals, decode_symbol
+from utils.token_parser import TokenParser
+
+UNLISTED = '0x' + '66' * 20
+OBSERVED = '0x' + '77' * 20
+
+
+def abi_string(value: str) -> bytes:
+    raw = value.encode()
+    return (32).to_bytes(32, 'big') + len(raw).to_bytes(32, 'big') + raw.ljust(32, b'\x00')
+
+
+def uint(value: int) -> bytes:
+    return value.to_bytes(32, 'big')
+
+
+class FakeRPC:
+    """按合约返回 decimals() 和 symbol() 的结果，记录调用"""
+
+    def __init__(self, tokens: Dict[str, tuple]):
+        self.tokens = tokens
+        self.calls = []
+
+    async def call_contract(self, contract: str, data: str) -> bytes:
+        self.calls.append((contract, data))
+        if contract not in self.tokens:
+            raise ValueError('execution reverted')
+        decimals, symbol = self.tokens[contract]
+        return uint(decimals) if data == DECIMALS_SELECTOR else symbol
+
+
+def make_registry(path, rpc: Optional[FakeRPC] = None, chain_name: str = 'bsc') -> TokenRegistry:
+    config = MonitorConfig(rpc_url='http://127.0.0.1:1', watch_addresses=[])
+    return TokenRegistry(config, rpc or FakeRPC({}), TokenParser('bsc'), chain_name, str(path))
+
+
+def write_cache(path, chain_name: str, tokens: Dict) -> None:
+    path.write_text(json.dumps({'chain_name': chain_name, 'tokens': tokens}), encoding='utf-8')
+
+
+def test_decode_symbol_string_and_bytes32():
+    assert decode_symbol(abi_string('USDT')) == 'USDT'
+    # MKR 等早期合约以 bytes32 返回符号
+    assert decode_symbol(b'MKR'.ljust(32, b'\x00')) == 'MKR'
+    assert decode_symbol(b'\x00' * 32) is None
+    assert decode_symbol(b'') is None
+    # 长度字段超出返回数据
+    assert decode_symbol((32).to_bytes(32, 'big') + (100).to_bytes(32, 'big') + b'USDT'.ljust(32, b'\x00')) is None
+
+
+def test_decode_decimals_rejects_invalid_values():
+    assert decode_decimals(uint(6)) == 6
+    assert decode_decimals(uint(255)) is None
+    assert decode_decimals(b'\x06') is None
+
+
+def test_cache_for_other_chain_or_corrupt_file_is_ignored(tmp_path):
+    path = tmp_path / 'tokens.json'
+    write_cache(path, 'eth', {UNLISTED: {'symbol': 'X', 'decimals': 6}})
+    assert make_registry(path).load() == 0
+
+    path.write_text('{"chain_name": "bsc", "tokens": {', encoding='utf-8')
+    assert make_registry(path).load() == 0
+
+
+def test_cached_decimals_correct_configured_tokens(tmp_path):
+    path = tmp_path / 'tokens.json'
+    registry = make_registry(path)
+    usdt = registry.token_parser.contracts['USDT']
+    registry.token_parser.unresolved_contracts.append(UNLISTED)
+    write_cache(path, 'bsc', {
+        usdt.lower(): {'symbol': 'USDT', 'decimals': 6},
+        UNLISTED: {'symbol': 'USDT', 'decimals': 8},
+        OBSERVED: {'symbol': 'OBS', 'decimals': 'x'},  # 格式无效的条目被忽略
+    })
+    version = registry.token_parser.version
+
+    assert registry.load() == 2
+
+    parser = registry.token_parser
+    assert parser.decimals['USDT'] == 6
+    # 只配置了合约地址的代币以链上符号加入，与已有符号重复时附加合约地址前缀
+    assert parser.contracts['USDT_666666'] == UNLISTED and parser.decimals['USDT_666666'] == 8
+    assert parser.version > version
+    assert registry.get_stats()['decimals_corrected'] == 1
+
+
+def test_refresh_resolves_once_and_cache_is_reused(tmp_path):
+    path = tmp_path / 'tokens.json'
+    parser = TokenParser('bsc')
+    onchain = {contract.lower(): (18, abi_string(symbol)) for symbol, contract in parser.contracts.items() if contract}
+    rpc = FakeRPC(onchain)
+    registry = make_registry(path, rpc)
+
+    resolved = asyncio.run(registry.refresh())
+    assert resolved == len(onchain)
+    assert asyncio.run(registry.refresh()) == 0
+    assert len(rpc.calls) == 2 * len(onchain)
+
+    # 新实例（例如回扫工作进程）只读缓存，不发 RPC
+    reloaded = make_registry(path, FakeRPC({}))
+    assert reloaded.load() == len(onchain)
+    assert reloaded.tokens == registry.tokens
+
+
+def test_observed_contracts_resolved_and_failures_retried_later(tmp_path):
+    rpc = FakeRPC({OBSERVED: (9, b'OBS'.ljust(32, b'\x00'))})
+    registry = make_registry(tmp_path / 'tokens.json', rpc)
+
+    registry.observe(OBSERVED.upper().replace('0X', '0x'))
+    registry.observe(UNLISTED)
+    assert registry.get_stats()['pending'] == 2
+
+    assert asyncio.run(registry.resolve_pending()) == 1
+    assert registry.get(OBSERVED) == {'symbol': 'OBS', 'decimals': 9}
+    # 只记录元数据，不加入监控的代币列表
+    assert OBSERVED not in {contract.lower() for contract in registry.token_parser.contracts.values() if contract}
+
+    # 解析失败的合约再次出现时等待重试间隔
+    registry.observe(UNLISTED)
+    calls = len(rpc.calls)
+    assert asyncio.run(registry.resolve_pending()) == 0
+    assert len(rpc.calls) == calls
+    assert registry.resolve_failures == 1
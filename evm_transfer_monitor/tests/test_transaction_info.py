@@ -0,0 +1,114 @@
+"""
+精简交易记录测试
+
+TransactionInfo 使用 __slots__，不持有实例 __dict__；覆盖序列化复制，
+以及从入库记录重建（重试待发送通知）时金额和唯一键字段不丢失
+"""
+
+import asyncio
+import copy
+import pickle
+from contextlib import asynccontextmanager
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from managers import confirmation_manager
+from managers.confirmation_manager import ConfirmationManager
+from models.data_types import TransactionInfo
+from models.transaction_adapter import TransactionAdapter
+
+TOKEN = '0x' + 'aa' * 20
+SENDER = '0x' + '11' * 20
+WATCHED = '0x' + '22' * 20
+
+
+def token_info() -> TransactionInfo:
+    return TransactionInfo('0x' + 'ab' * 32, 100, SENDER, WATCHED, 123456789012345678901, 'USDT', 1700000000.0,
+                           block_hash='0x' + 'cd' * 32, contract=TOKEN, decimals=18, gas=60000, gas_price=10 ** 9,
+                           status=1, gas_used=50000, effective_gas_price=10 ** 9, matched_rules=('large',),
+                           transfer_index=3)
+
+
+def native_info() -> TransactionInfo:
+    return TransactionInfo('0x' + 'ac' * 32, 101, SENDER, WATCHED, 5 * 10 ** 17 + 1, 'BNB', 1700000000.0,
+                           block_hash='0x' + 'ce' * 32, transfer_index=0, trace_address='0_1')
+
+
+def fields(info: TransactionInfo) -> dict:
+    return {name: getattr(info, name) for name in TransactionInfo.__slots__}
+
+
+def test_slots_without_instance_dict():
+    info = token_info()
+
+    assert not hasattr(info, '__dict__')
+    with pytest.raises(AttributeError):
+        info.tx = {'input': '0x'}
+    assert info.value == Decimal('123.456789012345678901')
+    assert info.is_token_transaction() and not native_info().is_token_transaction()
+
+
+@pytest.mark.parametrize('make_info', [token_info, native_info])
+def test_pickle_and_copy_keep_every_field(make_info):
+    info = make_info()
+
+    assert fields(pickle.loads(pickle.dumps(info))) == fields(info)
+    assert fields(copy.copy(info)) == fields(info)
+
+
+def stored_record(info: TransactionInfo) -> SimpleNamespace:
+    """按 deposit_records 的列保存一笔交易（金额等字段由适配器换算）"""
+    record = SimpleNamespace(
+        tx_hash=info.hash, transfer_index=info.transfer_index, trace_address=info.trace_address,
+        block_number=info.block_number, block_hash=info.block_hash,
+        from_address=info.get_from_address(), to_address=info.get_to_address(),
+        gas_used=None, gas_price=None, confirmations=12,
+        created_at=datetime.fromtimestamp(info.found_at),
+    )
+    adapter = TransactionAdapter()
+    adapter._fill_gas_fields(record, info)
+    if info.is_token_transaction():
+        adapter._handle_token_transaction(record, info)
+    else:
+        adapter._handle_native_transaction(record, info)
+    return record
+
+
+def test_rebuild_from_stored_record_keeps_amount_and_key(monkeypatch):
+    originals = [token_info(), native_info()]
+    records = [stored_record(info) for info in originals]
+    rebuilt = []
+
+    async def get_pending_notifications(session, required_confirmations):
+        return records
+
+    async def send_notification(tx_info, confirmations):
+        rebuilt.append(tx_info)
+
+    @asynccontextmanager
+    async def get_async_session():
+        yield None
+
+    monkeypatch.setattr(confirmation_manager.AsyncTransactionAdapter, 'get_pending_notifications',
+                        get_pending_notifications)
+    manager = ConfirmationManager.__new__(ConfirmationManager)
+    manager.config = SimpleNamespace(required_confirmations=12)
+    manager.notification_service = object()
+    manager.db_manager = SimpleNamespace(get_async_session=get_async_session)
+    manager._send_notification_async = send_notification
+
+    async def run():
+        count = await manager.process_pending_notifications_async()
+        await asyncio.sleep(0)
+        return count
+
+    assert asyncio.run(run()) == 2
+
+    key_fields = ('hash', 'block_number', 'block_hash', 'from_address', 'to_address', 'tx_type', 'contract',
+                  'amount_wei', 'decimals', 'found_at', 'transfer_index', 'trace_address')
+    for original, info in zip(originals, rebuilt):
+        assert {name: getattr(info, name) for name in key_fields} == \
+               {name: getattr(original, name) for name in key_fields}
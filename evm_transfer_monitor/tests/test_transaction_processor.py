@@ -0,0 +1,141 @@
+"""
+交易处理器测试
+
+入库失败的重试：无数据库模式不入库也不阻塞游标，失败记录按唯一键去重并有数量上限，按批重试；
+数据库用替身代替，AsyncTransactionAdapter.save_transaction 按测试设定成功或失败
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from config.monitor_config import MonitorConfig
+from models.data_types import TransactionInfo
+from processors import transaction_processor
+from processors.transaction_processor import TransactionProcessor
+from utils.token_parser import TokenParser
+
+WATCHED = '0x' + '22' * 20
+
+
+class FakeDatabase:
+    """只提供 TransactionProcessor 用到的接口，ready 为 False 时相当于未初始化"""
+
+    def __init__(self, ready: bool = True):
+        self.async_session_factory = object() if ready else None
+        self.initialize_calls = 0
+
+    async def initialize_database(self) -> bool:
+        self.initialize_calls += 1
+        return False
+
+    @asynccontextmanager
+    async def get_async_session(self):
+        yield None
+
+
+class FakeAdapter:
+    """按 failing 决定保存成功与否，记录保存过的交易"""
+
+    def __init__(self):
+        self.failing = True
+        self.saved = []
+
+    async def save_transaction(self, session, transaction_info, user_id=''):
+        if self.failing:
+            return None
+        self.saved.append(transaction_info)
+        return transaction_info
+
+
+@pytest.fixture
+def adapter(monkeypatch):
+    adapter = FakeAdapter()
+    monkeypatch.setattr(transaction_processor.AsyncTransactionAdapter, 'save_transaction', adapter.save_transaction)
+    return adapter
+
+
+def make_processor(monkeypatch, ready: bool = True, **overrides) -> TransactionProcessor:
+    monkeypatch.setattr(transaction_processor, 'get_database_manager', lambda: FakeDatabase(ready))
+    config = MonitorConfig(rpc_url='http://127.0.0.1:1', watch_addresses=[WATCHED], **overrides)
+    return TransactionProcessor(config, TokenParser(), None)
+
+
+def make_info(block_number: int, tx: int = 0, transfer_index: int = 0) -> TransactionInfo:
+    return TransactionInfo('0x' + format(tx, '064x'), block_number, '0x' + '11' * 20, WATCHED,
+                           10 ** 18, 'BNB', 0.0, transfer_index=transfer_index)
+
+
+def save_all(processor: TransactionProcessor, infos) -> None:
+    async def run():
+        for info in infos:
+            processor.accept_transaction(info)
+        await processor.wait_for_pending_saves()
+
+    asyncio.run(run())
+
+
+def test_uninitialized_database_skips_saves_without_holding_cursor(monkeypatch, adapter):
+    processor = make_processor(monkeypatch, ready=False)
+
+    save_all(processor, [make_info(100), make_info(101, tx=1)])
+
+    assert processor.saves_skipped == 2
+    assert processor.lowest_failed_block() is None
+    assert asyncio.run(processor.retry_failed_saves()) == 0
+    assert not asyncio.run(processor.init_database())
+    assert processor.db_manager.initialize_calls == 1
+
+
+def test_failed_saves_are_deduplicated_by_record_key(monkeypatch, adapter):
+    processor = make_processor(monkeypatch)
+
+    # 同一笔转账重复失败只保留一条；同一交易的另一笔转账单独记录
+    save_all(processor, [make_info(105), make_info(105), make_info(105, transfer_index=1), make_info(103, tx=1)])
+
+    assert processor.save_failures == 4
+    assert processor.failed_saves_count == 3
+    assert processor.lowest_failed_block() == 103
+
+
+def test_failed_saves_over_limit_keep_cursor_below_dropped_block(monkeypatch, adapter):
+    processor = make_processor(monkeypatch, failed_saves_limit=2)
+
+    save_all(processor, [make_info(110, tx=0), make_info(111, tx=1), make_info(104, tx=2), make_info(108, tx=3)])
+
+    assert processor.failed_saves_count == 2
+    assert processor.lowest_failed_block() == 104
+
+    # 保留的交易重试成功后，游标仍然停在未保留的交易之前
+    adapter.failing = False
+    assert asyncio.run(processor.retry_failed_saves()) == 0
+    assert processor.lowest_failed_block() == 104
+
+    # 分叉点之前的区块会被新链重新处理
+    processor.discard_failed_saves_after(103)
+    assert processor.lowest_failed_block() is None
+
+
+def test_retry_in_bounded_batches_oldest_first(monkeypatch, adapter):
+    processor = make_processor(monkeypatch, save_retry_batch=2)
+    save_all(processor, [make_info(block, tx=block) for block in (120, 115, 130, 112, 125)])
+
+    adapter.failing = False
+    assert asyncio.run(processor.retry_failed_saves()) == 3
+    assert [info.block_number for info in adapter.saved] == [112, 115]
+    assert processor.lowest_failed_block() == 120
+
+    assert asyncio.run(processor.retry_failed_saves()) == 1
+    assert asyncio.run(processor.retry_failed_saves()) == 0
+    assert [info.block_number for info in adapter.saved] == [112, 115, 120, 125, 130]
+
+
+def test_reorg_discards_failed_saves_after_fork_point(monkeypatch, adapter):
+    processor = make_processor(monkeypatch)
+    save_all(processor, [make_info(block, tx=block) for block in (200, 205, 210)])
+
+    processor.discard_failed_saves_after(204)
+
+    assert processor.failed_saves_count == 1
+    assert processor.lowest_failed_block() == 200
@@ -0,0 +1,350 @@
+"""
+紧凑的监控地址索引
+
+几百万个充值地址若以 Python 字符串列表加小写字符串集合保存，每个地址占用两百多字节，
+千万级时需要数 GB 内存。本模块把地址解析为 20 字节的键：
+
+- 地址较少时（不足 compact_min）直接使用 bytes 键的哈希集合，查找最快
+- 地址较多时主体是一个按字典序排列的连续 bytes（每个地址 20 字节），配合按前 2 字节分桶的目录，
+  查找只在一个桶内搜索；增删先记入增量集合和删除集合，累积到一定数量后合并进主体
+- 紧凑模式下可选布隆过滤器放在最前面，绝大多数未监控的地址检查 2 个位即被拒绝。
+  地址本身来自哈希，位置直接取键的字节，不再计算哈希
+
+查找参数既可以是任意大小写的 0x 地址字符串，也可以是 20 字节的 bytes；
+迭代时返回小写的 0x 地址字符串
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from utils.log_utils import get_logger
+
+logger = get_logger(__name__)
+
+KEY_SIZE = 20
+PREFIX_BUCKETS = 1 << 16
+
+# 地址数达到该值时使用紧凑模式
+DEFAULT_COMPACT_MIN = 200_000
+# 增量达到 max(COMPACT_MIN_CHANGES, 主体地址数 / COMPACT_RATIO) 时合并
+COMPACT_MIN_CHANGES = 4096
+COMPACT_RATIO = 64
+
+# 布隆过滤器每个地址至少占用的位数（实际位数向上取 2 的幂），探测 2 个位，误判率约 1.5% 以下
+DEFAULT_BLOOM_BITS_PER_KEY = 16
+
+
+def address_key(address: Any) -> Optional[bytes]:
+    """地址转 20 字节键，格式不正确时返回 None"""
+    if isinstance(address, str):
+        if len(address) != 42 or address[:2].lower() != '0x':
+            return None
+        try:
+            return bytes.fromhex(address[2:])
+        except ValueError:
+            return None
+    if isinstance(address, (bytes, bytearray)) and len(address) == KEY_SIZE:
+        return bytes(address)
+    return None
+
+
+class AddressIndex:
+    """监控地址索引 - 哈希集合或有序 20 字节键数组 + 前缀目录 + 可选布隆过滤器"""
+
+    def __init__(self, addresses: Iterable[Any] = (), compact_min: int = DEFAULT_COMPACT_MIN,
+                 bloom_bits_per_key: int = DEFAULT_BLOOM_BITS_PER_KEY):
+        """
+        构建索引
+
+        Args:
+            addresses: 初始地址（0x 字符串或 20 字节 bytes），格式不正确的地址被忽略
+            compact_min: 地址数达到该值时使用紧凑模式，0 表示始终使用紧凑模式
+            bloom_bits_per_key: 紧凑模式下布隆过滤器每个地址占用的位数，0 表示不使用布隆过滤器
+        """
+        self.compact_min = compact_min
+        self.bloom_bits_per_key = bloom_bits_per_key
+        self.invalid_addresses: int = 0
+        self.compactions: int = 0
+
+        keys = set()
+        for address in addresses:
+            key = address_key(address)
+            if key is None:
+                self.invalid_addresses += 1
+            else:
+                keys.add(key)
+        if self.invalid_addresses:
+            logger.warning(f"⚠️ 忽略了 {self.invalid_addresses} 个格式不正确的地址")
+
+        self._load(keys)
+
+    # ------------------------------------------------------------------
+    # 构建与合并
+    # ------------------------------------------------------------------
+
+    @property
+    def is_compact(self) -> bool:
+        """是否处于紧凑模式"""
+        return self._count > 0
+
+    def _load(self, keys: Iterable[bytes]) -> None:
+        """由全部键重建索引，按数量选择哈希集合或紧凑模式"""
+        if not isinstance(keys, (set, list)):
+            keys = set(keys)
+        self._removed: set = set()
+        self._bloom: Optional[bytearray] = None
+        self._bloom_mask = 0
+        self._bloom_capacity = 0
+
+        if len(keys) < self.compact_min or not keys:
+            self._added: set = set(keys)
+            self._base = b''
+            self._count = 0
+            self._directory: Optional[array] = None
+            return
+
+        sorted_keys = sorted(keys)
+        self._added = set()
+        self._base = b''.join(sorted_keys)
+        self._count = len(sorted_keys)
+        self._directory = self._build_directory()
+        if self.bloom_bits_per_key > 0:
+            self._build_bloom(sorted_keys)
+
+    def _build_directory(self) -> array:
+        """
+        前缀目录：directory[p] 为前 2 字节不小于 p 的第一个键的序号
+
+        主体有序，每个键的第 1 个字节抽出来是有序的 bytes，同一首字节内第 2 个字节也有序，直接在上面二分
+        """
+        directory = array('I', bytes(4 * (PREFIX_BUCKETS + 1)))
+        first_bytes = self._base[0::KEY_SIZE]
+        second_bytes = self._base[1::KEY_SIZE]
+        start = 0
+        for high in range(256):
+            end = bisect_left(first_bytes, high + 1, start)
+            bucket = second_bytes[start:end]
+            for low in range(256):
+                directory[(high << 8) | low] = start + bisect_left(bucket, low)
+            start = end
+        directory[PREFIX_BUCKETS] = self._count
+        return directory
+
+    def _build_bloom(self, keys: Iterable[bytes]) -> None:
+        """按当前容量（含下次合并前可累积的增量）构建布隆过滤器"""
+        self._bloom_capacity = self._count + max(COMPACT_MIN_CHANGES, self._count // COMPACT_RATIO)
+        size = 1 << max(6, (self._bloom_capacity * self.bloom_bits_per_key - 1).bit_length())
+        self._bloom = bytearray(size >> 3)
+        self._bloom_mask = size - 1
+        for key in keys:
+            self._bloom_add(key)
+
+    def _bloom_add(self, key: bytes) -> None:
+        """布隆过滤器置位：两个位置分别取键的第 0-3、4-7 字节"""
+        bloom = self._bloom
+        mask = self._bloom_mask
+        position = int.from_bytes(key[:4], 'big') & mask
+        bloom[position >> 3] |= 1 << (position & 7)
+        position = int.from_bytes(key[4:8], 'big') & mask
+        bloom[position >> 3] |= 1 << (position & 7)
+
+    def _find(self, key: bytes) -> int:
+        """
+        在紧凑主体中查找键（只在前缀对应的桶内搜索，匹配位置必须与键边界对齐）
+
+        Returns:
+            int: 键在主体中的字节偏移，不存在时返回 -1
+        """
+        directory = self._directory
+        if directory is None:
+            return -1
+        prefix = (key[0] << 8) | key[1]
+        start = directory[prefix] * KEY_SIZE
+        end = directory[prefix + 1] * KEY_SIZE
+        base = self._base
+        position = base.find(key, start, end)
+        while position >= 0 and (position - start) % KEY_SIZE:
+            position = base.find(key, position + 1, end)
+        return position
+
+    def _insert_offset(self, key: bytes) -> int:
+        """键按序插入主体时的字节偏移（桶内二分）"""
+        prefix = (key[0] << 8) | key[1]
+        low = self._directory[prefix]
+        high = self._directory[prefix + 1]
+        base = self._base
+        while low < high:
+            middle = (low + high) >> 1
+            offset = middle * KEY_SIZE
+            if base[offset:offset + KEY_SIZE] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low * KEY_SIZE
+
+    def _maybe_compact(self) -> None:
+        """增量累积过多（或哈希集合增长到紧凑阈值）时合并"""
+        if self._count == 0:
+            if len(self._added) >= max(self.compact_min, 1):
+                self.compact()
+        elif len(self._added) + len(self._removed) >= max(COMPACT_MIN_CHANGES, self._count // COMPACT_RATIO):
+            self.compact()
+
+    def compact(self) -> None:
+        """
+        把增量集合和删除集合合并进有序主体
+
+        只对增量排序并定位插入/删除偏移，主体按偏移切段后一次拼接，不逐个展开全部地址；
+        布隆过滤器在增量写入时已置位，超出容量时才重建。地址数低于阈值时退回哈希集合
+        """
+        if self._count == 0:
+            if len(self._added) >= max(self.compact_min, 1):
+                self._load(self._added)
+                self.compactions += 1
+            return
+        if not self._added and not self._removed:
+            return
+
+        total = len(self)
+        if total < self.compact_min:
+            self._load(set(self._keys()))
+            self.compactions += 1
+            return
+
+        # (偏移, 0=插入/1=删除, 键)：同一偏移先插入再跳过被删除的键
+        events = [(self._insert_offset(key), 0, key) for key in self._added]
+        events.extend((self._find(key), 1, key) for key in self._removed)
+        events.sort()
+
+        base = self._base
+        pieces = []
+        cursor = 0
+        for offset, kind, key in events:
+            pieces.append(base[cursor:offset])
+            if kind == 0:
+                pieces.append(key)
+                cursor = offset
+            else:
+                cursor = offset + KEY_SIZE
+        pieces.append(base[cursor:])
+
+        self._base = b''.join(pieces)
+        self._count = total
+        self._added = set()
+        self._removed = set()
+        self._directory = self._build_directory()
+        if self.bloom_bits_per_key > 0 and total > self._bloom_capacity:
+            self._build_bloom(self._keys())
+        self.compactions += 1
+
+    # ------------------------------------------------------------------
+    # 集合接口
+    # ------------------------------------------------------------------
+
+    def __contains__(self, address: Any) -> bool:
+        key = address_key(address)
+        if key is None:
+            return False
+        return self.contains_key(key)
+
+    def contains_key(self, key: bytes) -> bool:
+        """按 20 字节键查找"""
+        if key in self._added:
+            return True
+        if self._count == 0:
+            return False
+        bloom = self._bloom
+        if bloom is not None:
+            mask = self._bloom_mask
+            position = int.from_bytes(key[:4], 'big') & mask
+            if not bloom[position >> 3] & (1 << (position & 7)):
+                return False
+            position = int.from_bytes(key[4:8], 'big') & mask
+            if not bloom[position >> 3] & (1 << (position & 7)):
+                return False
+        if key in self._removed:
+            return False
+        return self._find(key) >= 0
+
+    def add(self, address: Any) -> bool:
+        """
+        添加地址
+
+        Returns:
+            bool: 是否为新地址（格式不正确时返回 False）
+        """
+        key = address_key(address)
+        if key is None or self.contains_key(key):
+            return False
+        if key in self._removed:
+            self._removed.discard(key)
+        else:
+            self._added.add(key)
+            if self._bloom is not None:
+                self._bloom_add(key)
+        self._maybe_compact()
+        return True
+
+    def discard(self, address: Any) -> bool:
+        """
+        移除地址
+
+        Returns:
+            bool: 地址是否存在
+        """
+        key = address_key(address)
+        if key is None:
+            return False
+        if key in self._added:
+            self._added.discard(key)
+            return True
+        if key in self._removed or self._find(key) < 0:
+            return False
+        self._removed.add(key)
+        self._maybe_compact()
+        return True
+
+    def __len__(self) -> int:
+        return self._count - len(self._removed) + len(self._added)
+
+    def _keys(self) -> Iterator[bytes]:
+        """全部 20 字节键（先有序主体，后增量集合）"""
+        base = self._base
+        removed = self._removed
+        for offset in range(0, len(base), KEY_SIZE):
+            key = base[offset:offset + KEY_SIZE]
+            if key not in removed:
+                yield key
+        yield from self._added
+
+    def __iter__(self) -> Iterator[str]:
+        """返回小写 0x 地址"""
+        for key in self._keys():
+            yield '0x' + key.hex()
+
+    # ------------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------------
+
+    @property
+    def nbytes(self) -> int:
+        """索引的内存占用估算（字节），集合中的每个键按约 100 字节估算"""
+        size = len(self._base) + 100 * (len(self._added) + len(self._removed))
+        if self._directory is not None:
+            size += self._directory.itemsize * len(self._directory)
+        if self._bloom is not None:
+            size += len(self._bloom)
+        return size
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取索引统计"""
+        return {
+            'addresses': len(self),
+            'compact': self.is_compact,
+            'pending_adds': len(self._added) if self.is_compact else 0,
+            'pending_removes': len(self._removed),
+            'compactions': self.compactions,
+            'bloom_enabled': self._bloom is not None,
+            'size_mb': self.nbytes / (1024 * 1024),
+        }
@@ -0,0 +1,44 @@
+"""
+金额换算工具
+
+链上金额在处理流程中始终以整数最小单位（wei）携带，只在入库、日志和通知等边界
+按小数位换算为 Decimal，避免 float 的舍入误差（18 位小数的稳定币尤其明显）
+"""
+
+from decimal import Decimal, ROUND_CEILING, ROUND_DOWN
+from typing import Optional, Union
+
+NATIVE_DECIMALS = 18
+
+Number = Union[int, float, str, Decimal]
+
+
+def from_base_units(amount_wei: int, decimals: int) -> Decimal:
+    """整数最小单位换算为代币数量（精确）"""
+    return Decimal(amount_wei).scaleb(-decimals)
+
+
+def to_base_units(amount: Number, decimals: int, rounding: str = ROUND_DOWN) -> int:
+    """
+    代币数量换算为整数最小单位
+
+    Args:
+        amount: 代币数量，float 先经 str 转换以保留书写时的十进制值
+        decimals: 小数位
+        rounding: 超出小数位部分的取整方式，默认截断
+    """
+    if isinstance(amount, float):
+        amount = str(amount)
+    return int(Decimal(amount).scaleb(decimals).to_integral_value(rounding=rounding))
+
+
+def threshold_to_base_units(threshold: Number, decimals: int) -> Optional[int]:
+    """
+    阈值换算为整数最小单位（向上取整，保证 wei >= 阈值 与 金额 >= 阈值 等价）
+
+    Returns:
+        Optional[int]: 未配置阈值（无穷大）时返回 None，表示永不命中
+    """
+    if threshold == float('inf'):
+        return None
+    return to_base_units(threshold, decimals, rounding=ROUND_CEILING)
@@ -0,0 +1,52 @@
+"""
+以太坊 logsBloom 工具
+
+区块头的 logsBloom 是 2048 位的布隆过滤器，区块内每条日志的合约地址和每个 topic 各置 3 位。
+某个值对应的 3 位没有全部置位时，该区块一定不包含带有该值的日志；全部置位时只是可能包含
+"""
+
+from typing import Tuple, Union
+
+from eth_utils import keccak
+
+BLOOM_BYTES = 256
+
+# 一个值在 logsBloom 中对应的 3 个位：(字节下标, 位掩码)
+BloomBits = Tuple[Tuple[int, int], ...]
+
+
+def bloom_bits(value: bytes) -> BloomBits:
+    """计算一个值（合约地址或 topic 的原始字节）在 logsBloom 中对应的 3 个位"""
+    digest = keccak(value)
+    bits = []
+    for i in (0, 2, 4):
+        bit = ((digest[i] << 8) | digest[i + 1]) & 0x7FF
+        bits.append((BLOOM_BYTES - 1 - (bit >> 3), 1 << (bit & 7)))
+    return tuple(bits)
+
+
+def address_bits(address: str) -> BloomBits:
+    """合约地址（作为日志地址）对应的位"""
+    return bloom_bits(bytes.fromhex(address[2:]))
+
+
+def topic_bits(topic: str) -> BloomBits:
+    """32 字节 topic 对应的位"""
+    return bloom_bits(bytes.fromhex(topic[2:]))
+
+
+def address_topic_bits(address: str) -> BloomBits:
+    """地址作为 indexed 参数（左侧补零到 32 字节的 topic）对应的位"""
+    return bloom_bits(bytes.fromhex(address[2:].rjust(64, '0')))
+
+
+def to_bloom_bytes(bloom: Union[bytes, str]) -> bytes:
+    """把 HexBytes 或十六进制字符串形式的 logsBloom 统一为 bytes"""
+    if isinstance(bloom, str):
+        return bytes.fromhex(bloom[2:] if bloom.startswith('0x') else bloom)
+    return bytes(bloom)
+
+
+def bloom_contains(bloom: bytes, bits: BloomBits) -> bool:
+    """logsBloom 是否可能包含该值"""
+    return all(bloom[index] & mask for index, mask in bits)
@@ -0,0 +1,55 @@
+"""
+文件读写辅助方法
+
+提供原子写入 JSON 文件的能力：先写临时文件并 fsync，再重命名覆盖目标文件，
+进程崩溃或断电时目标文件要么是旧内容要么是新内容，不会出现半截文件
+"""
+
+import json
+import os
+from typing import Any
+
+
+def resolve_project_path(path: str) -> str:
+    """将相对路径解析为相对于项目根目录的绝对路径"""
+    if os.path.isabs(path):
+        return path
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(project_root, path)
+
+
+def atomic_write_json(path: str, data: Any) -> None:
+    """
+    原子写入 JSON 文件
+
+    Args:
+        path: 目标文件路径
+        data: 可序列化为 JSON 的数据
+
+    Raises:
+        OSError: 写入失败时抛出
+    """
+    directory = os.path.dirname(path)
+    tmp_path = f"{path}.tmp"
+
+    os.makedirs(directory, exist_ok=True)
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_directory(directory)
+
+
+def _fsync_directory(directory: str) -> None:
+    """同步目录项，保证重命名在断电后仍然有效（不支持的平台忽略）"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
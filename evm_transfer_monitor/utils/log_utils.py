@@ -1,8 +1,25 @@
+"""
+日志工具
+
+所有日志器共用一个后台写日志线程：get_logger 返回的日志器只挂一个 QueueHandler，
+记录放入内存队列后立即返回，由 QueueListener 线程格式化并写入文件和控制台，
+磁盘 I/O 停顿不再阻塞事件循环。
+
+热路径日志应使用 %s 参数（logger.info("... %s", value)）而不是 f-string：
+级别未启用时不做任何格式化，启用时消息在写日志线程中拼接。
+逐笔交易等高频日志再配合 LogSampler 按类别限流，超出的行只计数。
+"""
+
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from decimal import Decimal
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import os
 import sys
-from time import time, strftime, localtime
+from time import time, strftime, localtime, monotonic
+from typing import Any, Dict, Tuple
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 PROJECT_NAME = os.path.basename(PROJECT_ROOT)
@@ -35,6 +52,100 @@ def epoch_to_localhost(epoch_time: float) -> str:
     return strftime('%Y-%m-%d %H:%M:%S', localtime(epoch_time))
 
 
+# 日志队列容量，写日志线程跟不上（如磁盘长时间停顿）时丢弃新记录并计数，不阻塞调用方
+LOG_QUEUE_SIZE = 100_000
+
+# 可以延迟到写日志线程再格式化的参数类型（不可变），其他类型的参数在入队前格式化
+_DEFERRABLE_ARG_TYPES = (str, int, float, bool, Decimal, type(None))
+
+FMT = logging.Formatter("%(asctime)s %(levelname)s %(filename)s:%(lineno)s %(message)s")
+
+
+class DeferredQueueHandler(QueueHandler):
+    """入队时不格式化消息的 QueueHandler（参数均为不可变值时），由写日志线程格式化"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped: int = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 带异常信息或可变参数的记录仍在调用线程格式化（traceback 和参数在入队后可能变化）
+        if record.exc_info or record.stack_info:
+            return super().prepare(record)
+        args = record.args
+        if args and not (isinstance(args, tuple) and all(isinstance(arg, _DEFERRABLE_ARG_TYPES) for arg in args)):
+            return super().prepare(record)
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# 每个日志文件一个 (QueueHandler, QueueListener)，所有日志器共用
+_pipelines: Dict[str, Tuple[DeferredQueueHandler, QueueListener]] = {}
+_pipelines_lock = threading.Lock()
+
+
+def _get_queue_handler(log_file: str) -> DeferredQueueHandler:
+    """获取日志文件对应的 QueueHandler，首次使用时创建文件/控制台处理器并启动写日志线程"""
+    with _pipelines_lock:
+        pipeline = _pipelines.get(log_file)
+        if pipeline is not None:
+            return pipeline[0]
+
+        handlers = []
+        if log_file:
+            # Ensure the directory exists
+            os.makedirs(os.path.dirname(log_file), exist_ok=True)
+
+            # Create a RotatingFileHandler
+            file_handler = RotatingFileHandler(
+                log_file,
+                maxBytes=10 * 1024 * 1024,  # 10 MB
+                backupCount=5,
+                encoding='utf-8'
+            )
+            file_handler.setFormatter(FMT)
+            handlers.append(file_handler)
+
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(FMT)
+        handlers.append(console_handler)
+
+        log_queue: queue.Queue = queue.Queue(LOG_QUEUE_SIZE)
+        queue_handler = DeferredQueueHandler(log_queue)
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _pipelines[log_file] = (queue_handler, listener)
+        return queue_handler
+
+
+def stop_logging() -> None:
+    """写完队列中剩余的日志并停止写日志线程（进程退出时自动调用）"""
+    with _pipelines_lock:
+        pipelines = list(_pipelines.values())
+        _pipelines.clear()
+    for queue_handler, listener in pipelines:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+atexit.register(stop_logging)
+
+
+def get_logging_stats() -> Dict[str, Any]:
+    """日志队列统计：积压的记录数和因队列已满丢弃的记录数"""
+    with _pipelines_lock:
+        pipelines = list(_pipelines.values())
+    return {
+        'queued': sum(queue_handler.queue.qsize() for queue_handler, _ in pipelines),
+        'dropped': sum(queue_handler.dropped for queue_handler, _ in pipelines),
+    }
+
 
 def get_logger(logger_name: str, log_file: str=LOG_PATH) -> logging.Logger:
     logger = logging.getLogger(logger_name)
@@ -43,28 +154,61 @@ def get_logger(logger_name: str, log_file: str=LOG_PATH) -> logging.Logger:
     if logger.handlers:
         return logger
 
-    FMT = logging.Formatter("%(asctime)s %(levelname)s %(filename)s:%(lineno)s %(message)s")
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(FMT)
-    # File handler (if log_file is provided)
-    if log_file:
-        # Ensure the directory exists
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
-
-        # Create a RotatingFileHandler
-        file_handler = RotatingFileHandler(
-            log_file,
-            maxBytes=10 * 1024 * 1024,  # 10 MB
-            backupCount=5,
-            encoding='utf-8'
-        )
-        file_handler.setFormatter(FMT)
-        logger.addHandler(file_handler)
-
-    logger.addHandler(console_handler)
+    logger.addHandler(_get_queue_handler(log_file or ''))
     logger.setLevel(logging.INFO)
 
     # 防止日志传播到根日志器
     logger.propagate = False
 
     return logger
+
+
+class LogSampler:
+    """
+    高频日志按类别限流
+
+    每个类别在每个时间窗口内最多输出 limit 行，超出的行只计数；
+    窗口结束后第一次调用时输出一行汇总，说明上个窗口省略了多少行
+    """
+
+    def __init__(self, logger: logging.Logger, limit: int, window: float = 60.0):
+        """
+        Args:
+            logger: 输出汇总行的日志器
+            limit: 每个类别每个窗口最多输出的行数，0 表示不限流
+            window: 时间窗口（秒）
+        """
+        self.logger = logger
+        self.limit = limit
+        self.window = window
+        # 类别 -> [窗口开始时间, 本窗口已输出行数, 本窗口省略行数]
+        self._windows: Dict[str, list] = {}
+        self.suppressed: Dict[str, int] = {}
+
+    def allow(self, category: str) -> bool:
+        """本行是否应输出（不输出时计入省略计数）"""
+        if self.limit <= 0:
+            return True
+        now = monotonic()
+        state = self._windows.get(category)
+        if state is None:
+            state = self._windows[category] = [now, 0, 0]
+        elif now - state[0] >= self.window:
+            if state[2]:
+                self.logger.info("🔇 %s: 过去 %.0f 秒省略了 %d 行日志", category, now - state[0], state[2], stacklevel=2)
+            state[0], state[1], state[2] = now, 0, 0
+        if state[1] < self.limit:
+            state[1] += 1
+            return True
+        state[2] += 1
+        self.suppressed[category] = self.suppressed.get(category, 0) + 1
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """各类别累计省略的行数"""
+        return {
+            'limit': self.limit,
+            'window': self.window,
+            'suppressed': dict(self.suppressed),
+            'total_suppressed': sum(self.suppressed.values()),
+        }
@@ -4,10 +4,14 @@
 """
 
 from utils.log_utils import get_logger
+from utils.amount_utils import NATIVE_DECIMALS, from_base_units
 from config.base_config import ActiveConfig, ConfigMap
 
 logger = get_logger(__name__)
 
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_EVENT_TOPIC = '0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef'
+
 class TokenParser:
     """代币转账解析器 - 多链支持版本"""
     
@@ -40,30 +44,38 @@ class TokenParser:
         return "unknown"
     
     def _build_token_info(self):
-        """从配置文件构建代币信息"""
+        """
+        从配置文件构建代币信息
+        
+        配置中的小数位只是默认值，代币注册表（managers.token_registry）解析出链上 decimals() 后通过
+        update_token 覆盖；custom_tokens 中只配置了合约地址的代币记入 unresolved_contracts，由注册表补全
+        """
         self.contracts = {}
         self.decimals = {}
+        self.unresolved_contracts = []
+        # 代币合约或小数位每次变化时递增，分类索引据此重新编译
+        self.version = 0
         
         # 添加原生代币
         if 'token_name' in self.config:
             native_token = self.config['token_name']
             self.contracts[native_token] = None  # 原生代币没有合约地址
-            self.decimals[native_token] = 18  # 大多数 EVM 链的原生代币都是18位小数
+            self.decimals[native_token] = NATIVE_DECIMALS  # 大多数 EVM 链的原生代币都是18位小数
         
         # 添加 USDT
         if 'usdt_contract' in self.config:
             self.contracts['USDT'] = self.config['usdt_contract']
-            self.decimals['USDT'] = 18  # 现在大多数链上的USDT都是18位小数
+            self.decimals['USDT'] = self.config.get('usdt_decimals', 18)  # 各链不同（以太坊为 6），以链上值为准
         
         # 添加 USDC
         if 'usdc_contract' in self.config:
             self.contracts['USDC'] = self.config['usdc_contract']
-            self.decimals['USDC'] = 18  # 现在大多数链上的USDC都是18位小数
+            self.decimals['USDC'] = self.config.get('usdc_decimals', 18)  # 各链不同（以太坊为 6），以链上值为准
         
         # 添加 BUSD (如果配置中有)
         if 'busd_contract' in self.config:
             self.contracts['BUSD'] = self.config['busd_contract']
-            self.decimals['BUSD'] = 18
+            self.decimals['BUSD'] = self.config.get('busd_decimals', 18)
         
         # 添加其他自定义代币 (如果配置中有)
         if 'custom_tokens' in self.config:
@@ -75,10 +87,28 @@ class TokenParser:
                 if symbol and contract:
                     self.contracts[symbol] = contract
                     self.decimals[symbol] = decimals
+                elif contract:
+                    self.unresolved_contracts.append(contract)
+    
+    def update_token(self, symbol, contract, decimals):
+        """
+        添加或更新代币（代币注册表解析出链上元数据后调用）
+        
+        Returns:
+            bool: 是否有变化（有变化时递增 version）
+        """
+        if self.contracts.get(symbol) == contract and self.decimals.get(symbol) == decimals:
+            return False
+        self.contracts[symbol] = contract
+        self.decimals[symbol] = decimals
+        self.version += 1
+        return True
     
     def parse_erc20_transfer(self, tx, token_symbol='USDT'):
         """
-        解析 ERC-20 代币转账交易 - 改进版，能处理不规范的input数据
+        解析 ERC-20 代币转账交易（单笔）
+        
+        批量转账只返回第一笔，需要全部转账时使用 parse_token_transfers
         
         Args:
             tx: 交易对象
@@ -87,109 +117,80 @@ class TokenParser:
         Returns:
             dict: 包含转账信息的字典，解析失败返回 None
         """
+        transfers = self.parse_token_transfers(tx, token_symbol)
+        return transfers[0] if transfers else None
+    
+    def parse_token_transfers(self, tx, token_symbol='USDT'):
+        """
+        解析发往代币合约的调用中的全部转账（transfer / transferFrom / 批量转账）
+        
+        Args:
+            tx: 交易对象
+            token_symbol: 代币符号，默认 USDT
+            
+        Returns:
+            list: 转账信息字典列表，不是支持的转账调用时返回空列表
+        """
         if token_symbol not in self.contracts:
             logger.debug(f"当前链 {self.chain_name} 不支持的代币类型: {token_symbol}")
-            return None
+            return []
             
         contract_address = self.contracts[token_symbol]
         if not contract_address:
             logger.debug(f"{token_symbol} 是原生代币，不需要解析合约调用")
-            return None
+            return []
             
         # 基本检查
         if not tx.get('to') or tx['to'].lower() != contract_address.lower():
-            return None
-            
-        if not tx.get('input'):
-            return None
-        
-        # 规范化input数据 - 处理字节和字符串两种情况
-        input_data = tx['input']
-        
-        # 如果是字节对象，转换为十六进制字符串
-        if isinstance(input_data, bytes):
-            input_data = input_data.hex()
-            if not input_data.startswith('0x'):
-                input_data = '0x' + input_data
-        else:
-            # 如果是字符串，进行常规处理
-            input_data = input_data.strip()
-            if not input_data.startswith('0x'):
-                input_data = '0x' + input_data
+            return []
         
-        # 移除'0x'前缀进行处理
-        hex_data = input_data[2:]
+        transfers = self.decode_token_call(tx.get('input'), tx['from'])
+        if not transfers:
+            return []
+        decimals = self.decimals.get(token_symbol, 18)
+        return [
+            self.build_transfer_info(token_symbol, contract_address, decimals, from_address, to_address, amount_wei)
+            for from_address, to_address, amount_wei in transfers
+        ]
+    
+    def decode_token_call(self, input_data, sender, batch=False):
+        """
+        按方法选择器解码发往代币合约的调用
         
-        # 检查最小长度：方法签名(8) + 至少一个参数(64) = 72
-        if len(hex_data) < 72:
-            logger.debug(f"Input数据太短: {len(hex_data)} < 72")
-            return None
+        Args:
+            input_data: 交易 input（bytes/HexBytes 或十六进制字符串）
+            sender: 交易发送方，作为 transfer / 批量转账的转出地址
+            batch: 是否解码 batchTransfer / multiTransfer，只对确认实现了这些方法的代币合约开启
+            
+        Returns:
+            list: [(转出地址, 接收地址, 金额wei), ...]，不是支持的转账调用时返回 None
+        """
+        return decode_token_call(input_data, sender, batch)
+    
+    def decode_disperse_call(self, input_data, sender):
+        """
+        按方法选择器解码批量分发合约（Disperse / Multisender）的代币分发调用
         
-        # 检查方法签名
-        if hex_data[:8].lower() != self.TRANSFER_SIGNATURE[2:].lower():
-            logger.debug(f"方法签名不匹配: {hex_data[:8]} != {self.TRANSFER_SIGNATURE[2:]}")
-            return None
+        代币合约地址是调用的第一个参数，代币从交易发送方转出。
+        调用方只应对白名单内的分发合约解码，否则任何合约都能伪造分发调用
         
-        try:
-            # 解析接收地址（第1个参数）
-            if len(hex_data) < 72:  # 8 + 64
-                logger.debug("数据长度不足以包含完整的地址参数")
-                return None
-                
-            address_param = hex_data[8:72]  # 64字符参数
-            # 地址参数的前24个字符应该是0填充，后40个字符是实际地址
-            to_address = '0x' + address_param[24:64]
-            
-            # 解析转账金额（第2个参数）
-            amount_wei = 0
-            if len(hex_data) >= 136:  # 完整的第二个参数
-                amount_hex = hex_data[72:136]
-            elif len(hex_data) > 72:  # 不完整的第二个参数，尝试解析
-                amount_hex = hex_data[72:].ljust(64, '0')  # 右侧补0
-                logger.debug(f"金额参数不完整，补0后处理: {amount_hex}")
-            else:
-                logger.debug("没有金额参数")
-                return None
-            
-            # 解析金额
-            amount_wei = int(amount_hex, 16)
-            decimals = self.decimals.get(token_symbol, 18)
-            amount = amount_wei / (10 ** decimals)
-            
-            # 验证地址格式
-            if not self._is_valid_address(to_address):
-                logger.debug(f"解析出的地址格式不正确: {to_address}")
-                return None
-            
-            return {
-                'from': tx['from'],
-                'to': to_address.lower(),
-                'amount': amount,
-                'token': token_symbol,
-                'contract': contract_address.lower(),
-                'raw_amount_wei': amount_wei,
-                'chain': self.chain_name
-            }
-            
-        except (ValueError, IndexError) as e:
-            logger.debug(f"解析{token_symbol}转账失败: {e}, input_data类型: {type(tx.get('input'))}, 长度: {len(str(tx.get('input', '')))}")
-            return None
-        except Exception as e:
-            logger.error(f"解析{token_symbol}转账发生未预期错误: {e}, input数据: {tx.get('input', 'N/A')[:100]}...")
-            return None
+        Returns:
+            tuple: (小写代币合约地址, [(转出地址, 接收地址, 金额wei), ...])，不是支持的调用时返回 None
+        """
+        return decode_disperse_call(input_data, sender)
     
-    def _is_valid_address(self, address):
-        """验证以太坊地址格式"""
-        if not address or len(address) != 42:
-            return False
-        if not address.startswith('0x'):
-            return False
-        # 检查是否为有效的十六进制
-        try:
-            int(address[2:], 16)
-            return True
-        except ValueError:
-            return False
+    def build_transfer_info(self, token_symbol, contract_address, decimals, from_address, to_address, amount_wei):
+        """构造转账信息字典（amount 为按小数位精确换算的 Decimal，raw_amount_wei 为整数原值）"""
+        return {
+            'from': from_address,
+            'to': to_address,
+            'amount': from_base_units(amount_wei, decimals),
+            'token': token_symbol,
+            'contract': contract_address.lower(),
+            'raw_amount_wei': amount_wei,
+            'decimals': decimals,
+            'chain': self.chain_name
+        }
     
     def parse_usdt_transfer(self, tx):
         """解析 USDT 转账（快捷方法）"""
@@ -242,6 +243,186 @@ class TokenParser:
             return f"{amount:,.{precision}f} {token_symbol}"
 
 
+# =============================================================================
+# calldata 解码
+#
+# 参数按 32 字节字直接从 bytes 中按偏移读取，不生成中间十六进制字符串；
+# 选择器不在分发表中的调用只比较前 4 个字节即被拒绝
+# =============================================================================
+
+WORD = 32
+ARGS = 4  # 参数区起始偏移（跳过 4 字节选择器）
+# 批量分发调用的最小 calldata 长度（选择器 + 代币地址 + 两个数组偏移），十六进制字符串只会更长
+DISPERSE_MIN_CALLDATA = ARGS + 3 * 32
+
+
+def _split_calldata(input_data, decoders):
+    """
+    取出 calldata 的选择器并转换为 bytes
+    
+    选择器不在 decoders 中时直接返回 None，不转换其余数据。
+    十六进制字符串（原生 JSON-RPC 路径）在选择器命中后才整体转换为字节，
+    不完整的末尾半字节补 0；HexBytes 的切片较慢，先整体复制为 bytes
+    
+    Returns:
+        tuple: (解码函数, 完整 calldata 的 bytes)
+    """
+    if not input_data:
+        return None
+    
+    if isinstance(input_data, str):
+        input_data = input_data.strip()
+        start = 2 if input_data[:2] in ('0x', '0X') else 0
+        decoder = decoders.get(_HEX_SELECTORS.get(input_data[start:start + 8].lower()))
+        if decoder is None:
+            return None
+        hex_data = input_data[start:]
+        if len(hex_data) % 2:
+            hex_data += '0'
+        try:
+            return decoder, bytes.fromhex(hex_data)
+        except ValueError:
+            return None
+    
+    if type(input_data) is not bytes:
+        input_data = bytes(input_data)
+    decoder = decoders.get(input_data[:4])
+    if decoder is None:
+        return None
+    return decoder, input_data
+
+
+def _uint(data, offset):
+    """读取 offset 处的 uint256（调用方保证不越界）"""
+    return int.from_bytes(data[offset:offset + WORD], 'big')
+
+
+def _address(data, offset):
+    """读取 offset 处的 address 参数（取低 20 字节）"""
+    return '0x' + data[offset + 12:offset + WORD].hex()
+
+
+def _array(data, head_offset):
+    """
+    读取动态数组参数（数组偏移相对于参数区起始位置）
+    
+    Returns:
+        tuple: (首元素偏移, 元素个数)，偏移或长度越界时返回 None
+    """
+    offset = ARGS + _uint(data, head_offset)
+    if offset + WORD > len(data):
+        return None
+    length = _uint(data, offset)
+    start = offset + WORD
+    if start + length * WORD > len(data):
+        return None
+    return start, length
+
+
+def _decode_transfer(data, sender):
+    """transfer(address,uint256)，金额参数不完整时右侧补 0（最常见的调用，偏移直接内联）"""
+    size = len(data)
+    if size <= 36:
+        return None
+    if size >= 68:
+        amount_wei = int.from_bytes(data[36:68], 'big')
+    else:
+        amount_wei = int.from_bytes(data[36:], 'big') << (8 * (68 - size))
+    return [(sender.lower(), '0x' + data[16:36].hex(), amount_wei)]
+
+
+def _decode_transfer_from(data, sender):
+    """transferFrom(address,address,uint256)，转出地址取自参数"""
+    if len(data) < ARGS + 3 * WORD:
+        return None
+    return [(_address(data, ARGS), _address(data, ARGS + WORD), _uint(data, ARGS + 2 * WORD))]
+
+
+def _decode_recipients_amounts(data, sender, head_offset=ARGS):
+    """(address[] 接收地址, uint256[] 金额) 两个数组参数"""
+    if len(data) < head_offset + 2 * WORD:
+        return None
+    recipients = _array(data, head_offset)
+    amounts = _array(data, head_offset + WORD)
+    if recipients is None or amounts is None or recipients[1] != amounts[1]:
+        return None
+    sender = sender.lower()
+    to_start, count = recipients
+    amount_start = amounts[0]
+    return [
+        (sender, _address(data, to_start + i * WORD), _uint(data, amount_start + i * WORD))
+        for i in range(count)
+    ]
+
+
+def _decode_recipients_same_amount(data, sender):
+    """batchTransfer(address[],uint256)：每个接收地址转同样的金额"""
+    if len(data) < ARGS + 2 * WORD:
+        return None
+    recipients = _array(data, ARGS)
+    if recipients is None:
+        return None
+    sender = sender.lower()
+    amount_wei = _uint(data, ARGS + WORD)
+    to_start, count = recipients
+    return [(sender, _address(data, to_start + i * WORD), amount_wei) for i in range(count)]
+
+
+def _decode_disperse(data, sender):
+    """disperseToken 类调用：(address 代币, address[] 接收地址, uint256[] 金额)"""
+    if len(data) < ARGS + 3 * WORD:
+        return None
+    transfers = _decode_recipients_amounts(data, sender, head_offset=ARGS + WORD)
+    if transfers is None:
+        return None
+    return _address(data, ARGS), transfers
+
+
+# 发往代币合约的标准 ERC-20 调用：选择器 -> 解码函数
+_TOKEN_DECODERS = {
+    bytes.fromhex('a9059cbb'): _decode_transfer,                # transfer(address,uint256)
+    bytes.fromhex('23b872dd'): _decode_transfer_from,           # transferFrom(address,address,uint256)
+}
+
+# 非标准的批量转账方法：标准 USDT/USDC 等合约没有实现，调用会回退或落入 fallback 而不发生转账，
+# 只对配置中确认实现了这些方法的代币解码
+_BATCH_DECODERS = {
+    **_TOKEN_DECODERS,
+    bytes.fromhex('88d695b2'): _decode_recipients_amounts,      # batchTransfer(address[],uint256[])
+    bytes.fromhex('1e89d545'): _decode_recipients_amounts,      # multiTransfer(address[],uint256[])
+    bytes.fromhex('83f12fec'): _decode_recipients_same_amount,  # batchTransfer(address[],uint256)
+}
+
+# 发往批量分发合约的调用（代币地址为第一个参数）：选择器 -> 解码函数。
+# 代币地址取自 calldata，任何合约都能构造这样的调用，只对白名单内的分发合约解码
+_DISPERSE_DECODERS = {
+    bytes.fromhex('c73a2d60'): _decode_disperse,  # disperseToken(address,address[],uint256[])
+    bytes.fromhex('51ba162c'): _decode_disperse,  # disperseTokenSimple(address,address[],uint256[])
+    bytes.fromhex('0b66f3f5'): _decode_disperse,  # multisendToken(address,address[],uint256[])
+}
+
+# 十六进制选择器 -> 字节选择器，字符串 input 据此快速拒绝
+_HEX_SELECTORS = {selector.hex(): selector for selector in (*_BATCH_DECODERS, *_DISPERSE_DECODERS)}
+
+
+def decode_token_call(input_data, sender, batch=False):
+    """模块级解码函数（不依赖链配置，解码工作进程直接调用），参见 TokenParser.decode_token_call"""
+    call = _split_calldata(input_data, _BATCH_DECODERS if batch else _TOKEN_DECODERS)
+    if call is None:
+        return None
+    decoder, data = call
+    return decoder(data, sender)
+
+
+def decode_disperse_call(input_data, sender):
+    """模块级解码函数（不依赖链配置，解码工作进程直接调用），参见 TokenParser.decode_disperse_call"""
+    call = _split_calldata(input_data, _DISPERSE_DECODERS)
+    if call is None:
+        return None
+    decoder, data = call
+    return decoder(data, sender)
+
+
 # 全局默认解析器实例（使用当前活跃链配置）
 _default_parser = TokenParser()
 